@@ -0,0 +1,165 @@
+"""
+api_load.py
+Carga sobre la API local (scripts/serve_api.py): peticiones por segundo
+y latencias con clientes keep-alive en paralelo, opcionalmente con un
+escritor que confirma commits en la base al mismo tiempo (como el
+loader), para ver que la API no se bloquea ni sirve datos viejos.
+
+    python scripts/serve_api.py &
+    python benchmarks/api_load.py --seconds 20 --clients 16
+    python benchmarks/api_load.py --writer data/db/cgspace_briefs.sqlite
+
+La mezcla de rutas (MIX) sale de la base: keywords, países y handles
+reales, así que varias peticiones se repiten (caché) y otras no. El
+escritor actualiza last_harvested_at de WRITE_ROWS briefs por commit,
+cada WRITE_EVERY s: cada commit invalida la caché de la API.
+"""
+
+import argparse
+import http.client
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from instrumentation import log   # noqa: E402
+
+URL         = "http://127.0.0.1:8000"
+SEED        = 42
+CLIENTS     = 8
+SECONDS     = 10.0
+WRITE_EVERY = 0.2      # s entre commits del escritor
+WRITE_ROWS  = 200      # briefs actualizados por commit
+
+# (peso, plantilla): {keyword}, {country}, {handle}, {q} salen de la base
+MIX = [
+    (20, "/facets/keywords?top=20"),
+    (10, "/facets/countries?top=15&from_quarter=2023Q1"),
+    (10, "/reports/briefs_by_quarter"),
+    (10, "/trends/keywords?table=emerging&limit=20"),
+    (5,  "/series/keywords?item={keyword}"),
+    (5,  "/cooccurrence/countries?item={country}&limit=20"),
+    (20, "/briefs?keyword={keyword}&limit=20"),
+    (10, "/briefs?q={q}&limit=50"),
+    (10, "/briefs/{handle}"),
+]
+
+def sample_paths(db, n, seed=SEED):
+    """n rutas de MIX con valores reales de la base."""
+    conn = sqlite3.connect(f"file:{Path(db).as_posix()}?mode=ro", uri=True)
+    keywords  = [r[0] for r in conn.execute(
+        "SELECT keyword_norm FROM keywords GROUP BY keyword_norm LIMIT 200")]
+    countries = [r[0] for r in conn.execute(
+        "SELECT DISTINCT value_norm FROM geo WHERE geo_type = 'country' LIMIT 100")]
+    handles   = [r[0] for r in conn.execute("SELECT brief_id FROM briefs LIMIT 2000")]
+    words     = [w for r in conn.execute("SELECT title FROM briefs LIMIT 500")
+                 for w in (r[0] or "").split() if len(w) > 4][:300]
+    conn.close()
+
+    rng     = np.random.default_rng(seed)
+    weights = np.array([w for w, _ in MIX], dtype=float)
+    picks   = rng.choice(len(MIX), size=n, p=weights / weights.sum())
+    values  = {"keyword": keywords or ["x"], "country": countries or ["x"],
+               "handle": handles or ["x"], "q": words or ["x"]}
+    return [MIX[i][1].format(**{k: quote(str(v[rng.integers(len(v))]), safe="")
+                                for k, v in values.items()})
+            for i in picks]
+
+def client(url, paths, deadline, out):
+    """Un cliente keep-alive: recorre sus rutas hasta el deadline."""
+    parts = urlsplit(url)
+    conn  = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    lat, status, k = [], Counter(), 0
+    while time.perf_counter() < deadline:
+        path  = paths[k % len(paths)]
+        k    += 1
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            resp = conn.getresponse()
+            resp.read()
+            status[resp.status] += 1
+        except (OSError, http.client.HTTPException) as e:
+            status[type(e).__name__] += 1
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        lat.append(time.perf_counter() - start)
+    conn.close()
+    out.append((lat, status))
+
+def writer(db, deadline, out):
+    """Commits pequeños y frecuentes sobre briefs, como un loader."""
+    conn  = sqlite3.connect(db, timeout=30)
+    ids   = [r[0] for r in conn.execute("SELECT brief_id FROM briefs")]
+    k, commits, waits = 0, 0, []
+    while time.perf_counter() < deadline:
+        batch = [ids[(k + i) % len(ids)] for i in range(WRITE_ROWS)]
+        k    += WRITE_ROWS
+        start = time.perf_counter()
+        with conn:
+            conn.executemany("UPDATE briefs SET last_harvested_at = ? WHERE brief_id = ?",
+                             [(datetime.now().isoformat(), b) for b in batch])
+        waits.append(time.perf_counter() - start)
+        commits += 1
+        time.sleep(WRITE_EVERY)
+    conn.close()
+    out.append((commits, waits))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--url", default=URL)
+    parser.add_argument("--db", type=Path, default=Path("data/db/cgspace_briefs.sqlite"),
+                        help="base de donde salen las rutas")
+    parser.add_argument("--clients", type=int, default=CLIENTS)
+    parser.add_argument("--seconds", type=float, default=SECONDS)
+    parser.add_argument("--writer", type=Path, default=None,
+                        help="base sobre la que escribir mientras dura la carga")
+    args = parser.parse_args()
+
+    paths    = sample_paths(args.db, 5000)
+    deadline = time.perf_counter() + args.seconds
+    results, written = [], []
+    threads  = [threading.Thread(target=client,
+                                 args=(args.url, paths[i::args.clients], deadline, results))
+                for i in range(args.clients)]
+    if args.writer:
+        threads.append(threading.Thread(target=writer, args=(args.writer, deadline, written)))
+    log(f"{args.clients} clientes × {args.seconds:.0f} s contra {args.url}"
+        + (f" (escribiendo en {args.writer})" if args.writer else ""))
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    lat    = np.array([x for l, _ in results for x in l]) * 1000
+    status = sum((s for _, s in results), Counter())
+    log(f"Peticiones: {len(lat):,} en {elapsed:.1f} s → {len(lat) / elapsed:,.0f} req/s")
+    if len(lat):
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+        log(f"Latencia ms: p50 {p50:.1f} | p95 {p95:.1f} | p99 {p99:.1f} | máx {lat.max():.1f}")
+    log("Estados: " + " | ".join(f"{k}: {v:,}" for k, v in sorted(status.items(), key=str)))
+    if written:
+        commits, waits = written[0]
+        log(f"Escritor: {commits} commits | espera máx {1000 * max(waits, default=0):.1f} ms")
+    try:
+        parts = urlsplit(args.url)
+        conn  = http.client.HTTPConnection(parts.hostname, parts.port, timeout=10)
+        conn.request("GET", "/health")
+        health = json.loads(conn.getresponse().read())
+        log(f"Caché: {health['cache']} | generación {health['generation']}")
+    except (OSError, ValueError, KeyError) as e:
+        log(f"  (sin /health: {e})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+bitstream_server.py
+Servidor local que imita los bitstreams de la REST API de DSpace 7,
+para probar 13_fetch_fulltext.py sin tocar CGSpace.
+
+Lee los briefs (uuid, título, abstract) de una base del pipeline y
+arma, en --out, el árbol que sirve http.server:
+
+- server/api/core/items/<uuid>/bundles: bundles ORIGINAL (un PDF con el
+  título y el abstract, con su MD5 en checkSum) y THUMBNAIL (un JPG
+  que 13 debe ignorar), con los bitstreams embebidos (?embed=bitstreams)
+- server/api/core/bitstreams/<uuid>/content: el contenido
+
+Con una fracción de casos difíciles (--missing: ítems sin bundles, 404;
+--shared: briefs que comparten el PDF del anterior, mismo checksum;
+--no-pdf: solo el thumbnail) y, opcionalmente, respuestas 429 al azar
+(--throttle) para probar los reintentos.
+
+    python benchmarks/bitstream_server.py --db data/db/cgspace_briefs.sqlite
+    python scripts/13_fetch_fulltext.py --base-url http://127.0.0.1:8765/server/api --rate 0
+
+Misma base y semilla → mismos archivos.
+"""
+
+import argparse
+import hashlib
+import json
+import shutil
+import sqlite3
+import sys
+import textwrap
+import uuid
+import zlib
+import numpy as np
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT     = Path(__file__).resolve().parent.parent
+WORK_DIR = ROOT / "benchmarks" / ".work" / "bitstreams"
+DB_PATH  = Path("data/db/cgspace_briefs.sqlite")
+
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from instrumentation import log   # noqa: E402
+
+SEED     = 42
+PORT     = 8765
+MISSING  = 0.02     # ítems que no existen en el servidor (404)
+SHARED   = 0.05     # briefs con el mismo PDF que el anterior
+NO_PDF   = 0.05     # ítems solo con thumbnail
+LINES    = 48       # renglones por página
+WRAP     = 90       # caracteres por renglón
+
+# JPG mínimo (1×1) para los thumbnails
+THUMBNAIL = bytes.fromhex(
+    "ffd8ffe000104a46494600010100000100010000ffdb004300080606070605080707070909080a0c140d0c0b0b0c"
+    "1912130f141d1a1f1e1d1a1c1c20242e2720222c231c1c2837292c30313434341f27393d38323c2e333432ffc000"
+    "0b080001000101011100ffc4001f0000010501010101010100000000000000000102030405060708090a0bffda00"
+    "080101000003f00fffd9")
+
+# ── PDF ────────────────────────────────────────────────────────
+def escape(text):
+    return (text.encode("cp1252", "replace")
+            .replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)"))
+
+def pdf(paragraphs):
+    """PDF 1.4 con Helvetica (WinAnsi) y content streams FlateDecode."""
+    lines = []
+    for p in paragraphs:
+        lines += textwrap.wrap(p, WRAP) + [""]
+    pages   = [lines[i:i + LINES] for i in range(0, len(lines), LINES)] or [[]]
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>",
+               3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                  b"/Encoding /WinAnsiEncoding >>"}
+    kids = []
+    for k, page in enumerate(pages):
+        content = b"BT /F1 10 Tf 12 TL 56 790 Td\n" + b"".join(
+            b"(" + escape(line) + b") Tj T*\n" for line in page) + b"ET"
+        stream  = zlib.compress(content)
+        page_id, content_id = 4 + 2 * k, 5 + 2 * k
+        objects[content_id] = (b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream)
+                               + stream + b"\nendstream")
+        objects[page_id] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                            b"/Contents %d 0 R >>" % content_id)
+        kids.append(b"%d 0 R" % page_id)
+    objects[2] = (b"<< /Type /Pages /Kids [" + b" ".join(kids) + b"] /Count %d "
+                  b"/Resources << /Font << /F1 3 0 R >> >> >>" % len(pages))
+
+    out, offsets = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"), {}
+    for num in sorted(objects):
+        offsets[num] = len(out)
+        out += b"%d 0 obj\n" % num + objects[num] + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offsets[n] for n in sorted(objects))
+    out += (b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(objects) + 1, xref))
+    return bytes(out)
+
+# ── Árbol del servidor ─────────────────────────────────────────
+def bitstream(api, base_url, name, content):
+    """Guarda el contenido y devuelve el bitstream como lo describe la API."""
+    bid  = str(uuid.uuid5(uuid.NAMESPACE_URL, name + hashlib.md5(content).hexdigest()))
+    path = api / "core" / "bitstreams" / bid / "content"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    href = f"{base_url}/core/bitstreams/{bid}"
+    return {"id": bid, "uuid": bid, "name": name, "type": "bitstream",
+            "sizeBytes": len(content), "bundleName": None,
+            "checkSum": {"checkSumAlgorithm": "MD5", "value": hashlib.md5(content).hexdigest()},
+            "_links": {"content": {"href": f"{href}/content"}, "self": {"href": href}}}
+
+def bundle(name, bitstreams):
+    return {"name": name, "type": "bundle",
+            "_embedded": {"bitstreams": {"_embedded": {"bitstreams": bitstreams},
+                                         "page": {"number": 0, "size": 100,
+                                                  "totalElements": len(bitstreams),
+                                                  "totalPages": 1}}}}
+
+def build(db, out, base_url, seed=SEED, limit=None,
+          missing=MISSING, shared=SHARED, no_pdf=NO_PDF):
+    """Arma el árbol de --out desde los briefs de la base. Devuelve conteos."""
+    conn  = sqlite3.connect(f"file:{Path(db).as_posix()}?mode=ro", uri=True)
+    query = ("SELECT brief_id, uuid, title, abstract FROM briefs "
+             "WHERE uuid IS NOT NULL AND uuid != '' ORDER BY rowid")
+    rows  = conn.execute(query + (f" LIMIT {int(limit)}" if limit else "")).fetchall()
+    conn.close()
+
+    api = Path(out) / "server" / "api"
+    if api.exists():
+        shutil.rmtree(api)
+    rng    = np.random.default_rng(seed)
+    draws  = rng.random(len(rows))
+    counts = {"items": 0, "missing": 0, "shared": 0, "no_pdf": 0, "pdfs": 0}
+    last   = None
+    for (brief_id, item_uuid, title, abstract), u in zip(rows, draws):
+        if u < missing:
+            counts["missing"] += 1
+            continue
+        bundles = [bundle("THUMBNAIL", [bitstream(api, base_url, f"{brief_id}.jpg", THUMBNAIL)])]
+        if u < missing + no_pdf:
+            counts["no_pdf"] += 1
+        else:
+            if last is not None and u < missing + no_pdf + shared:
+                content = last
+                counts["shared"] += 1
+            else:
+                content = pdf([title or "", abstract or "", f"Handle: {brief_id}"])
+            last = content
+            name = f"{brief_id.replace('/', '_')}.pdf"
+            bundles.insert(0, bundle("ORIGINAL", [bitstream(api, base_url, name, content)]))
+            counts["pdfs"] += 1
+        path = api / "core" / "items" / item_uuid / "bundles"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"_embedded": {"bundles": bundles}}), encoding="utf-8")
+        counts["items"] += 1
+    return counts
+
+# ── Servidor ───────────────────────────────────────────────────
+class Handler(SimpleHTTPRequestHandler):
+    """Archivos estáticos; con `throttle`, un 429 al azar (Retry-After: 1)."""
+    throttle = 0.0
+    rng      = np.random.default_rng(SEED)
+
+    def do_GET(self):
+        if self.throttle and self.rng.random() < self.throttle:
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.end_headers()
+            return
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+def serve(out, port, throttle=0.0):
+    Handler.throttle = throttle
+    server = ThreadingHTTPServer(("127.0.0.1", port), partial(Handler, directory=str(out)))
+    log(f"Sirviendo {out} en http://127.0.0.1:{port}/server/api (Ctrl+C para terminar)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+# ── Main ───────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="base con los briefs")
+    parser.add_argument("--out", type=Path, default=WORK_DIR,
+                        help=f"directorio del árbol (por defecto {WORK_DIR.relative_to(ROOT)})")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--limit", type=int, default=None, help="solo los primeros N briefs")
+    parser.add_argument("--missing", type=float, default=MISSING)
+    parser.add_argument("--shared", type=float, default=SHARED)
+    parser.add_argument("--no-pdf", type=float, default=NO_PDF)
+    parser.add_argument("--throttle", type=float, default=0.0,
+                        help="fracción de peticiones que responden 429")
+    parser.add_argument("--build-only", action="store_true", help="armar el árbol y salir")
+    parser.add_argument("--serve-only", action="store_true", help="servir el árbol existente")
+    args = parser.parse_args()
+
+    if not args.serve_only:
+        counts = build(args.db, args.out, f"http://127.0.0.1:{args.port}/server/api",
+                       args.seed, args.limit, args.missing, args.shared, args.no_pdf)
+        log(f"Árbol en {args.out}: " + " | ".join(f"{k}: {v}" for k, v in counts.items()))
+    if not args.build_only:
+        serve(args.out, args.port, args.throttle)
+
+if __name__ == "__main__":
+    main()
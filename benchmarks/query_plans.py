@@ -0,0 +1,618 @@
+"""
+query_plans.py
+Regresión de planes de consulta y asesor de índices para el esquema
+analítico.
+
+Corre todas las consultas analíticas de 03 (reports.py), 05 y 06 contra
+bases sintéticas de 10k, 100k y 1M briefs con el esquema de
+02_load_sqlite.py (más las tablas de 08, 10 y 11) y, por consulta:
+
+- guarda el EXPLAIN QUERY PLAN y el tiempo (mínimo de TIMING_REPEAT),
+- marca lo que no escala: SCAN de una tabla sin índice, índices
+  automáticos (el planificador tuvo que crear uno) y subconsultas
+  correlacionadas,
+- propone índices (de búsqueda o cubrientes) para las tablas escaneadas:
+  cada candidato se crea dentro de una transacción, se mide y se
+  deshace; solo se recomienda si quita el SCAN o baja el tiempo al
+  menos ADVISE_GAIN.
+
+Las consultas no se copian acá: se capturan con set_trace_callback al
+llamar a las mismas funciones que usan los scripts, así que un cambio de
+SQL en 03/05/06 entra solo en la suite.
+
+    python benchmarks/query_plans.py                     # 10k y 100k
+    python benchmarks/query_plans.py --sizes 10000 100000 1000000
+    python benchmarks/query_plans.py --update-baseline   # fijar referencia
+    python benchmarks/query_plans.py --check             # exit 1 si hay regresión
+
+--check compara contra benchmarks/query_plans_baseline.json: falla si
+una consulta gana una marca que no tenía, si tarda más de
+TIME_TOLERANCE veces lo de la referencia (y al menos MIN_DELTA s más) o
+si es nueva y ya trae marcas (hay que revisarla y fijar la referencia).
+Las bases generadas quedan en benchmarks/.work/ y se reutilizan mientras
+no cambien el tamaño, la semilla, el generador o el esquema.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import numpy as np
+import pandas as pd
+from datetime import date, datetime
+from pathlib import Path
+
+ROOT        = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = ROOT / "scripts"
+WORK_DIR    = ROOT / "benchmarks" / ".work"
+RESULTS     = ROOT / "benchmarks" / "results" / "query_plans.json"
+BASELINE    = ROOT / "benchmarks" / "query_plans_baseline.json"
+DB_NAME     = Path("data/db/cgspace_briefs.sqlite")
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import quality                       # noqa: E402
+from instrumentation import log      # noqa: E402
+from periods import PERIOD_COLUMNS   # noqa: E402
+
+SIZES          = [10_000, 100_000]   # 1_000_000 con --sizes (tarda varios minutos)
+SEED           = 42
+GENERATOR      = 2       # subir cuando cambie la forma de generar las bases
+TIMING_REPEAT  = 3       # corridas por consulta (se toma la mínima)
+TIMING_BUDGET  = 10.0    # s por consulta: no repetir las que ya tardan esto
+ADVISE_GAIN    = 0.25    # mejora mínima de tiempo para recomendar un índice
+TIME_TOLERANCE = 2.0     # --check: factor de tiempo tolerado sobre la referencia
+MIN_DELTA      = 0.05    # --check: s mínimos de diferencia para contar como regresión
+
+# ── Esquema ────────────────────────────────────────────────────
+def stage(name):
+    """Módulo de un script numerado (02, 08, 10, 11...) por su nombre de archivo."""
+    return importlib.import_module(name)
+
+def base_schema():
+    """SCHEMA de 02_load_sqlite.py."""
+    return stage("02_load_sqlite").SCHEMA
+
+def create_schema(conn):
+    """Esquema completo: el de 02 más las tablas que agregan 08, 10 y 11."""
+    conn.executescript(base_schema())
+    stage("08_normalize_geo").ensure_schema(conn)
+    stage("10_abstract_topics").ensure_schema(conn)
+    stage("11_dedup_briefs").ensure_schema(conn)
+
+def schema_digest():
+    """Huella del SQL de esquema (para regenerar las bases si cambia)."""
+    sources = [SCRIPTS_DIR / f for f in ("02_load_sqlite.py", "08_normalize_geo.py",
+                                         "10_abstract_topics.py", "11_dedup_briefs.py")]
+    ddl = [base_schema()] + [re.findall(r'conn\.executescript\("""(.*?)"""',
+                                        p.read_text(encoding="utf-8"), re.S)
+                             for p in sources[1:]]
+    return hashlib.sha1(json.dumps(ddl).encode("utf-8")).hexdigest()[:16]
+
+# ── Base sintética ─────────────────────────────────────────────
+# Distribuciones tipo Zipf (pocos ítems muy frecuentes, cola larga),
+# como las keywords, donantes y autores reales.
+FIRST_DAY = date(2019, 1, 1).toordinal()
+LAST_DAY  = date(2025, 12, 31).toordinal()
+
+# Entidades de financiación y tags: (tipo, cantidad, relaciones por
+# brief mín–máx, columna de staging equivalente)
+FUNDING = [
+    ("donor",              300, 1, 3, "cg_contributor_donor"),
+    ("initiative",          40, 0, 1, "cg_contributor_initiative"),
+    ("programAccelerator",  10, 0, 1, "cg_contributor_programAccelerator"),
+    ("affiliation",        500, 1, 3, "cg_contributor_affiliation"),
+    ("crp",                 15, 0, 1, "cg_contributor_crp"),
+    ("project",           2000, 0, 1, "cg_identifier_project"),
+]
+TAGS = [
+    ("sdg",        17, 0, 3, "cg_subject_sdg"),
+    ("impactArea",  5, 0, 2, "cg_subject_impactArea"),
+    ("actionArea",  3, 0, 1, "cg_subject_actionArea"),
+]
+
+def zipf_p(n, s=1.1):
+    p = 1.0 / np.arange(1, n + 1) ** s
+    return p / p.sum()
+
+def links(rng, n_briefs, n_items, lo, hi, s=1.1):
+    """Pares únicos (brief, ítem): de lo a hi ítems por brief, ítems con Zipf."""
+    per   = rng.integers(lo, hi + 1, n_briefs)
+    b     = np.repeat(np.arange(n_briefs), per)
+    items = rng.choice(n_items, size=len(b), p=zipf_p(n_items, s))
+    pairs = np.unique(b.astype(np.int64) * n_items + items)
+    return pairs // n_items, pairs % n_items
+
+def period_columns(days):
+    """Claves de periodo de periods.period_keys, vectorizadas sobre ordinales."""
+    dates   = (days - date(1970, 1, 1).toordinal()).astype("datetime64[D]")
+    year    = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+    month   = dates.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    quarter = (month - 1) // 3 + 1
+    return {
+        "issued_date":  np.datetime_as_string(dates),
+        "year":         year,
+        "quarter":      quarter,
+        "year_quarter": np.char.add(np.char.add(year.astype(str), "Q"), quarter.astype(str)),
+        PERIOD_COLUMNS["day"]:     days,
+        PERIOD_COLUMNS["week"]:    (days - 1) // 7,
+        PERIOD_COLUMNS["month"]:   year * 12 + month - 1,
+        PERIOD_COLUMNS["quarter"]: year * 4 + quarter - 1,
+    }
+
+def maybe(rng, n, frac, values):
+    """values con una fracción `frac` de filas; el resto, cadena vacía."""
+    return np.where(rng.random(n) < frac, values, "")
+
+def has_links(b, n):
+    """Valor de staging ('x' o '') según el brief tenga relaciones: para quality.py."""
+    return np.where(np.bincount(b, minlength=n) > 0, "x", "")
+
+def generate(conn, n, seed=SEED):
+    """
+    Llena una base vacía con n briefs y sus relaciones, y el perfil de
+    completitud que 02 calcularía del staging equivalente.
+    """
+    rng = np.random.default_rng(seed)
+    geo_mod = stage("08_normalize_geo")
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    create_schema(conn)
+
+    # Briefs: más publicaciones en los años recientes
+    span = LAST_DAY - FIRST_DAY + 1
+    days = FIRST_DAY + np.floor(span * np.sqrt(rng.random(n))).astype(np.int64)
+    cols = period_columns(days)
+    ids  = np.char.add("10568/", (100000 + np.arange(n)).astype(str))
+    series = np.char.add("Series ", rng.choice(50, n, p=zipf_p(50)).astype(str))
+    staging = {
+        "brief_id":      ids,
+        "title":         np.full(n, "Brief"),
+        "issued_date":   cols["issued_date"],
+        "year":          cols["year"],
+        "year_quarter":  cols["year_quarter"],
+        "abstract":      maybe(rng, n, 0.85, "Abstract"),
+        "language":      maybe(rng, n, 0.90, "en"),
+        "series_raw":    maybe(rng, n, 0.60, series),
+        "access_rights": maybe(rng, n, 0.95, "Open Access"),
+    }
+    conn.executemany("""
+        INSERT INTO briefs (brief_id, uuid, title, issued_date, year, quarter, year_quarter,
+                            period_day, period_week, period_month, period_quarter,
+                            type_raw, abstract, language, series_raw, access_rights)
+        VALUES (?,?,?,?,?,?,?,?,?,?,?,'Brief',?,?,?,?)
+    """, zip(ids.tolist(), [f"uuid-{i}" for i in range(n)], [f"Brief {i}" for i in range(n)],
+             cols["issued_date"].tolist(), cols["year"].tolist(), cols["quarter"].tolist(),
+             cols["year_quarter"].tolist(),
+             *(cols[PERIOD_COLUMNS[g]].tolist() for g in ("day", "week", "month", "quarter")),
+             np.char.add(staging["abstract"], np.where(staging["abstract"] != "",
+                                                       " of brief " + ids, "")).tolist(),
+             staging["language"].tolist(), staging["series_raw"].tolist(),
+             staging["access_rights"].tolist()))
+
+    # Keywords: variantes raw que comparten la forma normalizada
+    n_kw = max(2000, n // 5)
+    conn.executemany("INSERT INTO keywords VALUES (?, ?, ?)",
+                     ((k + 1, f"Keyword {k}", f"keyword {k * 9 // 10}") for k in range(n_kw)))
+    b, k = links(rng, n, n_kw, 2, 8)
+    conn.executemany("INSERT INTO brief_keywords VALUES (?, ?)",
+                     zip(ids[b].tolist(), (k + 1).tolist()))
+    staging["dcterms_subject"] = has_links(b, n)
+
+    # Geografía: países y regiones M49 reales, ya normalizados (como tras 08)
+    hierarchy = geo_mod.build_hierarchy()
+    conn.executemany("INSERT INTO m49_areas VALUES (?,?,?,?,?,?,?,?)",
+                     [(code, *row) for code, row in hierarchy.items()])
+    areas = [(code, row) for code, row in hierarchy.items() if row[1] in ("country", "region")]
+    conn.executemany("""
+        INSERT INTO geo (geo_id, geo_type, value_raw, value_norm, m49_code, m49_region,
+                         m49_subregion, m49_intermediate, iso_alpha3)
+        VALUES (?,?,?,?,?,?,?,?,?)
+    """, [(i + 1, row[1], row[0], row[0].lower(), code, row[4], row[5], row[6], row[2])
+          for i, (code, row) in enumerate(areas)])
+    countries = np.array([i for i, (_, row) in enumerate(areas) if row[1] == "country"])
+    regions   = np.array([i for i, (_, row) in enumerate(areas) if row[1] == "region"])
+    b, c = links(rng, n, len(countries), 1, 3)
+    b2, r = links(rng, n, len(regions), 0, 1)
+    conn.executemany("INSERT INTO brief_geo VALUES (?, ?)",
+                     zip(ids[np.concatenate([b, b2])].tolist(),
+                         (np.concatenate([countries[c], regions[r]]) + 1).tolist()))
+    staging["cg_coverage_country"] = has_links(b, n)
+    staging["cg_coverage_region"]  = has_links(b2, n)
+
+    # Autores
+    n_auth = max(1000, n // 2)
+    conn.executemany("INSERT INTO authors VALUES (?, ?, ?, ?)",
+                     ((a + 1, f"Author {a}", f"author {a}", a + 1) for a in range(n_auth)))
+    b, a = links(rng, n, n_auth, 1, 6, s=0.9)
+    conn.executemany("INSERT INTO brief_authors VALUES (?, ?, ?)",
+                     zip(ids[b].tolist(), (a + 1).tolist(), [1] * len(b)))
+    staging["dc_contributor_author"] = has_links(b, n)
+
+    # Financiación
+    next_id = 1
+    for entity_type, count, lo, hi, column in FUNDING:
+        conn.executemany("INSERT INTO funding_entities VALUES (?, ?, ?, ?)",
+                         ((next_id + e, entity_type, f"{entity_type} {e}", f"{entity_type} {e}")
+                          for e in range(count)))
+        b, e = links(rng, n, count, lo, hi)
+        conn.executemany("INSERT INTO brief_funding VALUES (?, ?)",
+                         zip(ids[b].tolist(), (e + next_id).tolist()))
+        staging[column] = has_links(b, n)
+        next_id += count
+
+    # SDGs, impact areas, action areas
+    for tag_type, count, lo, hi, column in TAGS:
+        b, t = links(rng, n, count, lo, hi, s=0.5)
+        conn.executemany("INSERT INTO brief_tags VALUES (?, ?, ?)",
+                         zip(ids[b].tolist(), [tag_type] * len(b), [f"{tag_type} {v}" for v in t]))
+        staging[column] = has_links(b, n)
+
+    # Temas de abstracts (10) y near-duplicados (11): 2 % de briefs en pares
+    conn.executemany("INSERT INTO topics VALUES (?, ?, ?)",
+                     ((t, f"topic {t}", "") for t in range(20)))
+    b, t = links(rng, n, 20, 0, 2, s=0.7)
+    conn.executemany("INSERT INTO brief_topics VALUES (?, ?, ?)",
+                     zip(ids[b].tolist(), t.tolist(), rng.random(len(b)).round(3).tolist()))
+    dup  = rng.choice(n - 1, size=n // 100, replace=False)
+    rows = [(ids[d], ids[d], ids[d], 1.0) for d in dup] + \
+           [(ids[d + 1], ids[d], ids[d], 0.9) for d in dup]
+    conn.execute("DELETE FROM brief_duplicates")
+    conn.executemany("INSERT OR IGNORE INTO brief_duplicates VALUES (?, ?, ?, ?)", rows)
+
+    conn.commit()
+    quality.save(conn, quality.profile(pd.DataFrame(staging)))
+    conn.execute("ANALYZE")
+    conn.commit()
+
+def synthetic_db(n):
+    """Base de n briefs en WORK_DIR/n{n}/ (se regenera si cambió algo)."""
+    work   = WORK_DIR / f"n{n}"
+    path   = work / DB_NAME
+    stamp  = work / "stamp.json"
+    wanted = {"n": n, "seed": SEED, "generator": GENERATOR, "schema": schema_digest()}
+    if path.exists() and stamp.exists() and json.loads(stamp.read_text()) == wanted:
+        return work
+    log(f"Generando base sintética de {n:,} briefs...")
+    start = time.perf_counter()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    stamp.unlink(missing_ok=True)
+    conn = sqlite3.connect(path)
+    generate(conn, n)
+    conn.close()
+    stamp.write_text(json.dumps(wanted))
+    log(f"  {path.stat().st_size / 2**20:,.0f} MB en {time.perf_counter() - start:.1f} s")
+    return work
+
+# ── Captura de consultas ───────────────────────────────────────
+def capture(conn, fn):
+    """SQL (con parámetros ya sustituidos) de las consultas que ejecuta fn(conn)."""
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn(conn)
+    finally:
+        conn.set_trace_callback(None)
+    return [s for s in statements if s.lstrip().upper().startswith(("SELECT", "WITH"))]
+
+def analytical_queries(conn):
+    """
+    {clave: SQL} de todas las consultas analíticas, capturadas llamando
+    a las funciones de 03 (reports.py), 05 y 06. Una misma consulta que
+    aparece en varias funciones queda con la primera clave.
+    """
+    reports  = stage("reports")
+    temporal = stage("05_temporal_analysis")
+    visual   = stage("06_visualizations")
+
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    quarters = [r[0] for r in conn.execute("SELECT DISTINCT period_quarter FROM briefs "
+                                           "ORDER BY period_quarter DESC LIMIT 2")]
+    last = temporal.period_label("quarter", quarters[0])
+    jobs = []
+
+    # 03: reporte exploratorio completo y el resto de los reportes (con
+    # sus valores por defecto), sin filtro y con rango de trimestres
+    explored = {name for name, _ in reports.EXPLORE}
+    for name, params in reports.EXPLORE + [(n, {}) for n in reports.REPORTS if n not in explored]:
+        ranges = [{}, {"from_quarter": f"{int(last[:4]) - 1}Q1", "to_quarter": last}]
+        for rng in ranges if "from_quarter" in reports.REPORTS[name].defaults else ranges[:1]:
+            resolved = reports.resolve(name, {**params, **rng}, tables)
+            if resolved:
+                sql, bind = reports.render_sql(*resolved)
+                key = f"03/{reports.stem(*resolved)}"
+                jobs.append((key, lambda c, sql=sql, bind=bind: c.execute(sql, bind).fetchall()))
+
+    # 05: lectura completa, incremental (últimos periodos) y huellas, por dimensión
+    for name, dim in temporal.DIMENSIONS.items():
+        if not temporal.available(conn, name):
+            continue
+        for once in (False, True):
+            d   = temporal.count_once(dim) if once else dim
+            tag = f"05/{name}{'+once' if once else ''}"
+            jobs += [
+                (f"{tag}/brief_item_incidence",
+                 lambda c, d=d, once=once: temporal.brief_item_incidence(c, d, None, once=once)),
+                (f"{tag}/brief_item_incidence[incremental]",
+                 lambda c, d=d, once=once: temporal.brief_item_incidence(c, d, quarters, once=once)),
+                (f"{tag}/period_fingerprints",
+                 lambda c, d=d, once=once: temporal.period_fingerprints(c, d, once=once)),
+            ]
+    for once in (False, True):
+        jobs.append((f"05/briefs_per_period{'+once' if once else ''}",
+                     lambda c, once=once: temporal.briefs_per_period(c, once=once)))
+
+    # 06: briefs por trimestre
+    jobs.append(("06/briefs_per_quarter", lambda c: visual.briefs_per_period(c, "quarter")))
+
+    queries, seen = {}, set()
+    for key, fn in jobs:
+        for i, sql in enumerate(capture(conn, fn)):
+            norm = " ".join(sql.split())
+            if norm not in seen:
+                seen.add(norm)
+                queries[f"{key}#{i}"] = sql
+    return queries
+
+# ── Planes y tiempos ───────────────────────────────────────────
+def query_plan(conn, sql):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+def plan_flags(plan):
+    """
+    Marcas de un plan: full_scan:<tabla> (SCAN sin índice), auto_index
+    (índice automático), temp_btree (ordenamiento/agrupación en una tabla
+    temporal) y correlated (subconsulta que se re-ejecuta por fila).
+    """
+    flags = []
+    for line in plan:
+        m = re.match(r"SCAN (\w+)(?: AS (\w+))?$", line.strip())
+        if m:
+            flags.append(f"full_scan:{m.group(2) or m.group(1)}")
+        if "AUTOMATIC" in line:
+            flags.append("auto_index")
+        if "USE TEMP B-TREE" in line:
+            flags.append("temp_btree")
+        if "CORRELATED" in line:
+            flags.append("correlated")
+    return sorted(set(flags))
+
+def timed(conn, sql, repeat=TIMING_REPEAT):
+    """Tiempo mínimo de `repeat` ejecuciones completas (fetchall)."""
+    best, spent = float("inf"), 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        elapsed = time.perf_counter() - start
+        best, spent = min(best, elapsed), spent + elapsed
+        if spent > TIMING_BUDGET:
+            break
+    return best
+
+# ── Asesor de índices ──────────────────────────────────────────
+SQL_WORDS = {"on", "where", "join", "left", "inner", "group", "order", "limit", "having",
+             "using", "as", "cross", "natural"}
+
+def aliases(sql):
+    """{alias: tabla} de las tablas nombradas en FROM/JOIN."""
+    out = {}
+    for table, alias in re.findall(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", sql, re.I):
+        if alias.lower() in SQL_WORDS or not alias:
+            alias = table
+        out[alias] = table
+    return out
+
+def table_columns(conn, table):
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+
+def rowid_alias(conn, table):
+    """Columna INTEGER PRIMARY KEY de la tabla (alias del rowid) o None."""
+    pk = [r for r in conn.execute(f"PRAGMA table_info({table})") if r[5]]
+    return pk[0][1] if len(pk) == 1 and pk[0][2].upper() == "INTEGER" else None
+
+def existing_indexes(conn, table):
+    """Columnas de cada índice de la tabla (incluidos los de PRIMARY KEY y UNIQUE)."""
+    return [tuple(r[2] for r in conn.execute(f"PRAGMA index_info('{idx[1]}')"))
+            for idx in conn.execute(f"PRAGMA index_list('{table}')")]
+
+def candidates(conn, sql, alias, table):
+    """
+    Índices candidatos para una tabla: sus columnas con predicado
+    (igualdad/join primero, después rangos), solas o juntas, y la
+    versión cubriente con el resto de las columnas que lee la consulta
+    (así el plan no vuelve a la tabla). Una tabla sin alias (p. ej.
+    dentro de una subconsulta) también se reconoce por columnas sin
+    calificar. Nunca empiezan por el alias del rowid: la tabla ya está
+    ordenada por él.
+    """
+    prefix = rf"\b{alias}\." if alias != table else rf"(?:\b{alias}\.|(?<![\w.]))"
+    refs   = [c for c in table_columns(conn, table) if re.search(rf"{prefix}{c}\b", sql)]
+    equal  = [c for c in refs
+              if re.search(rf"{prefix}{c}\s*(=|IN\b)|=\s*{prefix}{c}\b", sql, re.I)]
+    ranged = [c for c in refs if c not in equal
+              and re.search(rf"{prefix}{c}\s*(<|>|BETWEEN\b|IS\b)", sql, re.I)]
+    preds  = equal + ranged
+    rest   = [c for c in refs if c not in preds]
+
+    out = [(c,) for c in preds]
+    if len(preds) > 1:
+        out.append(tuple(preds))
+    if preds and rest:
+        out.append(tuple(preds + rest))
+    have  = existing_indexes(conn, table)
+    rowid = rowid_alias(conn, table)
+    return [c for c in dict.fromkeys(out)
+            if c[0] != rowid and not any(h[:len(c)] == c for h in have)]
+
+def advise(conn, sql, seconds, flags):
+    """
+    Prueba los candidatos (CREATE INDEX dentro de una transacción que se
+    deshace) de las tablas escaneadas y después del resto de las tablas
+    de la consulta: un índice en otra tabla puede cambiar el orden de
+    los joins (p. ej. partir de funding_entities por tipo en vez de
+    recorrer briefs). Devuelve los que quitan una marca sin hacer más
+    lenta la consulta o bajan el tiempo al menos ADVISE_GAIN, el mejor
+    primero.
+    """
+    tables  = aliases(sql)
+    scanned = [f.split(":", 1)[1] for f in flags if f.startswith("full_scan:")]
+    advice  = []
+    for alias in dict.fromkeys(scanned + list(tables)):
+        table = tables.get(alias, alias)
+        if table not in tables.values():
+            continue
+        for cols in candidates(conn, sql, alias, table):
+            conn.execute("BEGIN")
+            try:
+                conn.execute(f"CREATE INDEX advisor_tmp ON {table}({', '.join(cols)})")
+                plan  = query_plan(conn, sql)
+                after = timed(conn, sql)
+            finally:
+                conn.execute("ROLLBACK")
+            new_flags = plan_flags(plan)
+            removed   = sorted(set(flags) - set(new_flags))
+            gain      = 1 - after / seconds if seconds else 0.0
+            if gain >= ADVISE_GAIN or (removed and gain >= 0):
+                advice.append({
+                    "index":   f"CREATE INDEX IF NOT EXISTS idx_{table}_{'_'.join(cols)} "
+                               f"ON {table}({', '.join(cols)});",
+                    "removes": removed,
+                    "seconds": round(after, 5),
+                    "gain":    round(gain, 3),
+                    "plan":    plan,
+                })
+    return sorted(advice, key=lambda a: (-len(a["removes"]), -a["gain"]))
+
+# ── Suite ──────────────────────────────────────────────────────
+def capture_queries(n):
+    """
+    Consultas capturadas sobre la base de n briefs. El SQL no depende
+    del tamaño (las bases comparten esquema y rango de fechas), así que
+    basta con capturarlas en la más chica.
+    """
+    work = synthetic_db(n)
+    conn = sqlite3.connect(work / DB_NAME)
+    # Las funciones de 05/06 usan rutas relativas y 06 crea outputs/ al importarse
+    cwd = os.getcwd()
+    os.chdir(work)
+    try:
+        return analytical_queries(conn)
+    finally:
+        os.chdir(cwd)
+        conn.close()
+
+def run_size(n, queries, use_advisor=True):
+    work = synthetic_db(n)
+    conn = sqlite3.connect(work / DB_NAME, isolation_level=None)
+    # función SQL que period_fingerprints de 05 registra en su conexión
+    conn.create_function("label_hash", 1, stage("05_temporal_analysis").label_hash,
+                         deterministic=True)
+    log(f"{n:,} briefs: {len(queries)} consultas")
+    results = {}
+    for key, sql in queries.items():
+        plan    = query_plan(conn, sql)
+        flags   = plan_flags(plan)
+        seconds = timed(conn, sql)
+        results[key] = {"sql": " ".join(sql.split()), "plan": plan,
+                        "seconds": round(seconds, 5), "flags": flags,
+                        "advice": advise(conn, sql, seconds, flags) if use_advisor and flags else []}
+        log(f"  {seconds * 1000:9.1f} ms  {key}  {' '.join(flags)}")
+    conn.close()
+    return results
+
+def compare(current, baseline):
+    """
+    Regresiones (marcas nuevas, tiempos fuera de tolerancia o consultas
+    sin referencia que ya traen marcas) y consultas nuevas sin marcas.
+    """
+    regressions, new = [], []
+    for size, queries in current.items():
+        ref = baseline.get(size, {})
+        for key, r in queries.items():
+            if key not in ref and r["flags"]:
+                regressions.append(f"{size} {key}: sin referencia, con {', '.join(r['flags'])}")
+                continue
+            if key not in ref:
+                new.append(f"{size} {key}")
+                continue
+            gained = sorted(set(r["flags"]) - set(ref[key]["flags"]))
+            if gained:
+                regressions.append(f"{size} {key}: plan nuevo con {', '.join(gained)}")
+            if (r["seconds"] > ref[key]["seconds"] * TIME_TOLERANCE
+                    and r["seconds"] - ref[key]["seconds"] > MIN_DELTA):
+                regressions.append(f"{size} {key}: {ref[key]['seconds']:.3f} s → "
+                                   f"{r['seconds']:.3f} s")
+    return regressions, new
+
+def report(results):
+    """Índices recomendados, agrupados, con las consultas que mejoran."""
+    by_index = {}
+    for size, queries in results.items():
+        for key, r in queries.items():
+            if r["advice"]:
+                best = r["advice"][0]
+                by_index.setdefault(best["index"], []).append((size, key, best))
+    if not by_index:
+        log("\nSin índices recomendados.")
+        return
+    log("\n── Índices recomendados ─────────────────────────────────")
+    for index, uses in sorted(by_index.items(), key=lambda x: -len(x[1])):
+        log(index)
+        for size, key, best in uses:
+            extra = f"quita {', '.join(best['removes'])}; " if best["removes"] else ""
+            log(f"    {size:>8} {key}: {extra}tiempo {-best['gain']:+.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help="cantidades de briefs de las bases sintéticas")
+    parser.add_argument("--no-advisor", action="store_true", help="no probar índices")
+    parser.add_argument("--check", action="store_true",
+                        help=f"comparar con {BASELINE.name}; exit 1 si hay regresiones")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help=f"guardar esta corrida como {BASELINE.name}")
+    args = parser.parse_args()
+
+    log(f"SQLite {sqlite3.sqlite_version} | tamaños: {', '.join(f'{n:,}' for n in args.sizes)}")
+    queries = capture_queries(min(args.sizes))
+    results = {str(n): run_size(n, queries, not args.no_advisor) for n in args.sizes}
+
+    RESULTS.parent.mkdir(parents=True, exist_ok=True)
+    RESULTS.write_text(json.dumps({"sqlite": sqlite3.sqlite_version,
+                                   "run_at": datetime.now().isoformat(timespec="seconds"),
+                                   "sizes": results}, indent=1, ensure_ascii=False),
+                       encoding="utf-8")
+    log(f"\nResultados: {RESULTS}")
+    report(results)
+
+    if args.update_baseline:
+        baseline = json.loads(BASELINE.read_text(encoding="utf-8")) if BASELINE.exists() else {}
+        baseline.update({size: {key: {"flags": r["flags"], "seconds": r["seconds"]}
+                                for key, r in queries.items()}
+                         for size, queries in results.items()})
+        BASELINE.write_text(json.dumps(baseline, indent=1, sort_keys=True), encoding="utf-8")
+        log(f"Referencia actualizada: {BASELINE}")
+
+    if args.check:
+        if not BASELINE.exists():
+            raise FileNotFoundError(f"No existe {BASELINE} (correr con --update-baseline)")
+        regressions, new = compare(results, json.loads(BASELINE.read_text(encoding="utf-8")))
+        for item in new:
+            log(f"  Nueva (sin referencia): {item}")
+        for item in regressions:
+            log(f"  ✗ {item}")
+        if regressions:
+            sys.exit(1)
+        log("✓ Sin regresiones respecto de la referencia")
+
+if __name__ == "__main__":
+    main()
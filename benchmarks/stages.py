@@ -0,0 +1,373 @@
+"""
+stages.py
+Benchmark de punta a punta de las etapas del pipeline: tiempo,
+throughput y memoria de las funciones centrales de cada script sobre
+corpus sintéticos fijos (synth_corpus.py).
+
+Casos (uno por función; los de 06, uno por gráfico):
+
+    01/extract_record            páginas JSON → registros de staging
+    02/load                      staging → base SQLite (base vacía)
+    04/normalize_keywords        KEYWORD_MAP sobre la base recién cargada
+    05/keywords_by_quarter       brief_item_incidence + items_by_period
+    05/cooccurrence_by_quarter   cooccurrence_by_period
+    06/<figura>                  cada plot_* de 06 con su porción de datos
+
+Cada caso corre en un proceso nuevo (así el pico de RSS es solo suyo) y
+se mide:
+
+- seconds: mínimo de REPEAT corridas (o las que entren en TIMING_BUDGET);
+  la preparación (leer el staging, copiar la base...) no se cronometra,
+- throughput: unidades del caso (ítems, filas, relaciones, briefs) por s,
+- peak_rss_mb / rss_delta_mb: pico de memoria residente del proceso y
+  cuánto lo subió la función sobre lo que ya usaba la preparación,
+- alloc_peak_mb / alloc_blocks: en una corrida extra con tracemalloc
+  (incluye los buffers de numpy), el pico de memoria asignada y los
+  bloques que la función deja vivos en su resultado.
+
+    python benchmarks/stages.py                       # 1k y 10k briefs
+    python benchmarks/stages.py --cases 05/ --sizes 100000
+    python benchmarks/stages.py --update-baseline     # fijar referencia
+    python benchmarks/stages.py --check               # exit 1 si hay regresión
+
+--check compara contra benchmarks/stages_baseline.json: falla si un caso
+tarda más de TIME_TOLERANCE veces lo de la referencia (y al menos
+MIN_DELTA s más) o si su pico de asignaciones o de RSS crece más de
+MEM_TOLERANCE veces (y al menos MIN_MEM_DELTA MB). Las bases que usan
+los casos (tras 02 y tras 04) quedan junto a cada corpus en
+benchmarks/.work/corpus/ y se regeneran si cambian el corpus, 02 o 04.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT        = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = ROOT / "scripts"
+RESULTS     = ROOT / "benchmarks" / "results" / "stages.json"
+BASELINE    = ROOT / "benchmarks" / "stages_baseline.json"
+DB_NAME     = Path("data/db/cgspace_briefs.sqlite")
+BENCH_DIR   = Path("bench")      # dentro del directorio de cada corpus
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import synth_corpus                  # noqa: E402
+from instrumentation import log      # noqa: E402
+
+SIZES          = [1_000, 10_000]
+REPEAT         = 3       # corridas por caso (se toma la mínima)
+TIMING_BUDGET  = 30.0    # s por caso: no repetir los que ya tardan esto
+TIME_TOLERANCE = 1.5     # --check: factor de tiempo tolerado sobre la referencia
+MIN_DELTA      = 0.05    # --check: s mínimos de diferencia para contar como regresión
+MEM_TOLERANCE  = 1.25    # --check: factor de memoria tolerado
+MIN_MEM_DELTA  = 20.0    # --check: MB mínimos de diferencia para contar como regresión
+
+# Figuras de 06 (claves de figure_inputs)
+FIGURES = ["top5_per_quarter", "heatmap_keywords", "emerging_vs_stable",
+           "emerging_trends", "briefs_distribution"]
+
+def stage(name):
+    """Módulo de un script numerado por su nombre de archivo."""
+    return importlib.import_module(name)
+
+# ── Memoria ────────────────────────────────────────────────────
+def peak_rss():
+    """Pico de memoria residente del proceso actual, en MB."""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + \
+                       [(f, ctypes.c_size_t) for f in (
+                           "PeakWorkingSetSize", "WorkingSetSize",
+                           "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                           "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                           "PagefileUsage", "PeakPagefileUsage")]
+
+        counters = Counters(cb=ctypes.sizeof(Counters))
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                 ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize / 2**20
+    # ru_maxrss conserva el pico del padre a través de fork+exec; VmHWM es
+    # solo de este proceso
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 2**10
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10   # bytes / KB
+
+# ── Datos de cada corpus ───────────────────────────────────────
+def fixture(n):
+    """
+    Corpus de n briefs (synth_corpus.corpus) con las bases que usan los
+    casos: BENCH_DIR/loaded.sqlite (tras 02, entrada de 04) y
+    data/db/ (tras 04, entrada de 05 y 06). Se regeneran si cambian el
+    corpus o el código de 02/04.
+    """
+    work   = synth_corpus.corpus(n)
+    bench  = work / BENCH_DIR
+    stamp  = bench / "stamp.json"
+    h      = hashlib.sha1((work / "stamp.json").read_bytes())
+    for script in ("02_load_sqlite.py", "04_normalize.py", "periods.py", "quality.py",
+                   "item_types.py"):
+        h.update((SCRIPTS_DIR / script).read_bytes())
+    wanted = {"digest": h.hexdigest()}
+    if (stamp.exists() and json.loads(stamp.read_text()) == wanted
+            and (bench / "loaded.sqlite").exists() and (work / DB_NAME).exists()):
+        return work
+
+    log(f"Preparando bases de {n:,} briefs (02 y 04)...")
+    bench.mkdir(parents=True, exist_ok=True)
+    stamp.unlink(missing_ok=True)
+    for old in (work / DB_NAME).parent.glob(f"{DB_NAME.name}*"):
+        old.unlink()
+    env = {**os.environ, "PYTHONIOENCODING": "utf-8"}
+    with open(bench / "fixture.log", "w", encoding="utf-8") as out:
+        for script in ("02_load_sqlite.py", "04_normalize.py"):
+            code = subprocess.run([sys.executable, str(SCRIPTS_DIR / script)], cwd=work,
+                                  stdout=out, stderr=subprocess.STDOUT, env=env).returncode
+            if code:
+                raise RuntimeError(f"{script} falló (exit {code}); ver {bench / 'fixture.log'}")
+            if script.startswith("02"):
+                shutil.copyfile(work / DB_NAME, bench / "loaded.sqlite")
+    stamp.write_text(json.dumps(wanted))
+    return work
+
+# ── Casos ──────────────────────────────────────────────────────
+# setup(work) → (argumentos de run, unidades procesadas). Con fresh, la
+# preparación se repite antes de cada corrida (run modifica la base).
+Case = namedtuple("Case", ["setup", "run", "unit", "fresh"])
+
+def setup_extract(work):
+    harvest = stage("01_harvest_rest")
+    items = []
+    for path in sorted((work / "data" / "raw" / "brief").glob("p*.json")):
+        page = json.loads(path.read_text(encoding="utf-8"))
+        items += [o["_embedded"]["indexableObject"]
+                  for o in page["_embedded"]["searchResult"]["_embedded"]["objects"]]
+    return (harvest.extract_record, items), len(items)
+
+def run_extract(extract_record, items):
+    return [extract_record(item) for item in items]
+
+def setup_load(work):
+    loader = stage("02_load_sqlite")
+    df     = pd.read_parquet(work / "data" / "staging" / "brief" / f"brief_{synth_corpus.SNAPSHOT}_000.parquet")
+    path   = work / BENCH_DIR / "load.sqlite"
+    path.unlink(missing_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(loader.SCHEMA)
+    return (loader.load, conn, df), len(df)
+
+def run_load(load, conn, df):
+    load(conn, df)
+    conn.close()
+
+def setup_normalize(work):
+    normalize = stage("04_normalize")
+    path = work / BENCH_DIR / "normalize.sqlite"
+    shutil.copyfile(work / BENCH_DIR / "loaded.sqlite", path)
+    conn  = sqlite3.connect(path)
+    links = conn.execute("SELECT COUNT(*) FROM brief_keywords").fetchone()[0]
+    return (normalize.normalize_keywords, conn, normalize.KEYWORD_MAP), links
+
+def run_normalize(normalize_keywords, conn, mapping):
+    normalize_keywords(conn, mapping)
+    conn.commit()
+    conn.close()
+
+def setup_temporal(work):
+    temporal = stage("05_temporal_analysis")
+    conn = sqlite3.connect(work / DB_NAME)
+    n = conn.execute("SELECT COUNT(*) FROM briefs").fetchone()[0]
+    return (temporal, conn), n
+
+def run_keywords_by_quarter(temporal, conn):
+    inc = temporal.brief_item_incidence(conn, temporal.DIMENSIONS["keywords"],
+                                        granularity="quarter")
+    return temporal.items_by_period(inc, granularity="quarter")
+
+def setup_cooccurrence(work):
+    (temporal, conn), n = setup_temporal(work)
+    inc = temporal.brief_item_incidence(conn, temporal.DIMENSIONS["keywords"],
+                                        granularity="quarter")
+    return (temporal.cooccurrence_by_period, inc, temporal.MIN_COOCCUR), n
+
+def run_cooccurrence(cooccurrence_by_period, inc, min_freq):
+    return cooccurrence_by_period(inc, min_freq=min_freq)
+
+def setup_figure(stem, work):
+    """Porción de datos de la figura, como la arma 06 a partir de la matriz de 05."""
+    (temporal, conn), _ = setup_temporal(work)
+    visual = stage("06_visualizations")
+    m = run_keywords_by_quarter(temporal, conn)
+    inputs = visual.figure_inputs(m, temporal.identify_emerging(m),
+                                  temporal.identify_stable(m), visual.briefs_per_period(conn))
+    fn, data = inputs[stem]
+    return (fn, data, visual.Render(visual.DPI, visual.FORMATS, visual.FIG_DIR, "quarter")), 1
+
+def run_figure(fn, data, render):
+    return fn(data, render)
+
+CASES = {
+    "01/extract_record":          Case(setup_extract, run_extract, "ítems", False),
+    "02/load":                    Case(setup_load, run_load, "filas", True),
+    "04/normalize_keywords":      Case(setup_normalize, run_normalize, "relaciones", True),
+    "05/keywords_by_quarter":     Case(setup_temporal, run_keywords_by_quarter, "briefs", False),
+    "05/cooccurrence_by_quarter": Case(setup_cooccurrence, run_cooccurrence, "briefs", False),
+    **{f"06/{stem}": Case(partial(setup_figure, stem), run_figure, "figuras", False)
+       for stem in FIGURES},
+}
+
+# ── Medición ───────────────────────────────────────────────────
+def measure(name, work, repeat=REPEAT):
+    """
+    Corre un caso en el proceso actual (un proceso nuevo por caso, ver
+    run_case). La salida de los scripts se descarta.
+    """
+    work  = Path(work)
+    os.chdir(work)
+    case  = CASES[name]
+    state = None
+    times = []
+    with open(os.devnull, "w", encoding="utf-8") as null, contextlib.redirect_stdout(null):
+        for i in range(repeat):
+            if state is None or case.fresh:
+                state, units = case.setup(work)
+            if i == 0:
+                before = peak_rss()
+            start = time.perf_counter()
+            case.run(*state)
+            times.append(time.perf_counter() - start)
+            if sum(times) > TIMING_BUDGET:
+                break
+        after = peak_rss()
+
+        # Asignaciones: una corrida más con tracemalloc (más lenta, no se cronometra)
+        if case.fresh:
+            state, units = case.setup(work)
+        tracemalloc.start()
+        result = case.run(*state)
+        _, alloc_peak = tracemalloc.get_traced_memory()
+        blocks = sum(s.count for s in tracemalloc.take_snapshot().statistics("filename"))
+        tracemalloc.stop()
+        del result
+
+    seconds = min(times)
+    return {"seconds": round(seconds, 5), "runs": len(times), "units": units,
+            "unit": case.unit, "throughput": round(units / seconds, 1) if seconds else None,
+            "peak_rss_mb": round(after, 1), "rss_delta_mb": round(max(after - before, 0), 1),
+            "alloc_peak_mb": round(alloc_peak / 2**20, 2), "alloc_blocks": blocks}
+
+def run_case(name, work, repeat=REPEAT):
+    """measure() en un proceso nuevo (spawn: igual en Windows y Linux)."""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(measure, (name, str(work), repeat))
+
+def run_size(n, names, repeat=REPEAT):
+    work = fixture(n)
+    log(f"{n:,} briefs: {len(names)} casos")
+    results = {}
+    for name in names:
+        r = results[name] = run_case(name, work, repeat)
+        log(f"  {r['seconds'] * 1000:9.1f} ms  {r['throughput'] or 0:>11,.1f} {r['unit']}/s  "
+            f"RSS {r['peak_rss_mb']:6.0f} MB (+{r['rss_delta_mb']:.0f})  "
+            f"asig. {r['alloc_peak_mb']:7.1f} MB  {r['alloc_blocks']:>8,} bloques  {name}")
+    return results
+
+def compare(current, baseline):
+    """Regresiones (tiempo o memoria fuera de tolerancia) y casos nuevos."""
+    regressions, new = [], []
+    for size, cases in current.items():
+        ref = baseline.get(size, {})
+        for name, r in cases.items():
+            if name not in ref:
+                new.append(f"{size} {name}")
+                continue
+            old = ref[name]
+            if (r["seconds"] > old["seconds"] * TIME_TOLERANCE
+                    and r["seconds"] - old["seconds"] > MIN_DELTA):
+                regressions.append(f"{size} {name}: {old['seconds']:.3f} s → {r['seconds']:.3f} s")
+            for key, label in (("alloc_peak_mb", "asignaciones"), ("rss_delta_mb", "RSS")):
+                if (r[key] > old[key] * MEM_TOLERANCE
+                        and r[key] - old[key] > MIN_MEM_DELTA):
+                    regressions.append(f"{size} {name}: {label} {old[key]:.1f} MB → "
+                                       f"{r[key]:.1f} MB")
+    return regressions, new
+
+# ── Main ───────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help="cantidades de briefs de los corpus sintéticos")
+    parser.add_argument("--cases", nargs="+", default=None,
+                        help="solo los casos que empiezan con estos prefijos (p. ej. 05/)")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="corridas por caso")
+    parser.add_argument("--check", action="store_true",
+                        help=f"comparar con {BASELINE.name}; exit 1 si hay regresiones")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help=f"guardar esta corrida como {BASELINE.name}")
+    args = parser.parse_args()
+
+    names = [c for c in CASES if not args.cases or c.startswith(tuple(args.cases))]
+    if not names:
+        raise SystemExit(f"Ningún caso coincide con {args.cases}; hay: {', '.join(CASES)}")
+    log(f"Python {platform.python_version()} | numpy {np.__version__} | "
+        f"{os.cpu_count()} CPUs | tamaños: {', '.join(f'{n:,}' for n in args.sizes)}")
+    results = {str(n): run_size(n, names, args.repeat) for n in args.sizes}
+
+    RESULTS.parent.mkdir(parents=True, exist_ok=True)
+    RESULTS.write_text(json.dumps({"python": platform.python_version(),
+                                   "numpy": np.__version__, "platform": platform.platform(),
+                                   "cpus": os.cpu_count(),
+                                   "run_at": datetime.now().isoformat(timespec="seconds"),
+                                   "sizes": results}, indent=1, ensure_ascii=False),
+                       encoding="utf-8")
+    log(f"\nResultados: {RESULTS}")
+
+    if args.update_baseline:
+        baseline = json.loads(BASELINE.read_text(encoding="utf-8")) if BASELINE.exists() else {}
+        for size, cases in results.items():
+            baseline.setdefault(size, {}).update(
+                {name: {k: r[k] for k in ("seconds", "alloc_peak_mb", "rss_delta_mb")}
+                 for name, r in cases.items()})
+        BASELINE.write_text(json.dumps(baseline, indent=1, sort_keys=True), encoding="utf-8")
+        log(f"Referencia actualizada: {BASELINE}")
+
+    if args.check:
+        if not BASELINE.exists():
+            raise FileNotFoundError(f"No existe {BASELINE} (correr con --update-baseline)")
+        regressions, new = compare(results, json.loads(BASELINE.read_text(encoding="utf-8")))
+        for item in new:
+            log(f"  Nuevo (sin referencia): {item}")
+        for item in regressions:
+            log(f"  ✗ {item}")
+        if regressions:
+            sys.exit(1)
+        log("✓ Sin regresiones respecto de la referencia")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,551 @@
+"""
+synth_corpus.py
+Corpus sintético de Briefs con la forma de CGSpace, para probar las
+etapas a 10–100× el tamaño real.
+
+Para N briefs y una semilla escribe, en un directorio de trabajo con la
+estructura data/ del proyecto:
+
+- data/raw/brief/pNNNN_{SNAPSHOT}.json: páginas de la API discover de
+  DSpace 7 con la misma forma que las que guarda 01_harvest_rest.py
+- data/staging/brief/brief_{SNAPSHOT}_000.parquet: el staging que arma
+  01 con esas páginas (con extract_record de 01: mismas columnas y
+  formato), en una sola parte
+
+Los scripts se corren desde ese directorio, como en el proyecto:
+
+    python benchmarks/synth_corpus.py 100000
+    cd benchmarks/.work/corpus/n100000 && python ../../../../scripts/run_pipeline.py
+
+Qué imita:
+- keywords: conceptos con frecuencia Zipf (pocos muy usados, cola larga)
+  y un vocabulario que crece con N; variantes de mayúsculas, los alias
+  que corrige 04 (KEYWORD_MAP) y la forma en español en los briefs en
+  español (--spanish)
+- autores (con variantes de iniciales, para 07), países con los nombres
+  y alias de 08, regiones, donantes, iniciativas y afiliaciones:
+  multi-valor, cada uno con su Zipf
+- SDGs e impact areas con las variantes de mayúsculas que corrige 04
+- fechas entre --start y --end con más publicaciones hacia el final
+  (--growth), algunas incompletas ("2024-05", "2024") como en la API
+- abstracts armados con las keywords del brief y palabras de relleno
+  (temas de 10), y una fracción de near-duplicados (--duplicates, 11)
+
+Misma N, semilla y opciones → mismos archivos. El directorio se
+reutiliza mientras no cambien (stamp.json), salvo con --force.
+"""
+
+import argparse
+import importlib
+import json
+import sys
+import time
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import date, datetime
+from pathlib import Path
+
+ROOT        = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = ROOT / "scripts"
+WORK_DIR    = ROOT / "benchmarks" / ".work" / "corpus"
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from instrumentation import log         # noqa: E402
+from periods import parse_issued_date   # noqa: E402
+
+SEED       = 42
+GENERATOR  = 2          # subir cuando cambie la forma de generar el corpus
+SNAPSHOT   = "20260101" # fecha de "cosecha" de los archivos (fija: determinismo)
+PAGE_SIZE  = 100        # como 01_harvest_rest.py
+CHUNK      = 10_000     # briefs generados (y escritos al staging) por bloque
+
+START      = "2019-01-01"
+END        = "2025-12-31"
+GROWTH     = 1.0        # 0 = uniforme; 1 = publicaciones crecen linealmente
+SPANISH    = 0.15       # fracción de briefs en español
+DUPLICATES = 0.02       # fracción de briefs re-publicados casi iguales
+
+def stage(name):
+    """Módulo de un script numerado (01, 04, 08) por su nombre de archivo."""
+    return importlib.import_module(name)
+
+# ── Vocabularios ───────────────────────────────────────────────
+# (inglés, español). Los conceptos de keywords combinan estas palabras:
+# "noun", "adj noun", "adj noun for noun2", "adj noun for noun2 in place"
+NOUNS = [
+    ("water", "agua"), ("soil", "suelo"), ("seed", "semilla"), ("rice", "arroz"),
+    ("maize", "maíz"), ("wheat", "trigo"), ("cattle", "ganado"), ("fisheries", "pesca"),
+    ("forests", "bosques"), ("markets", "mercados"), ("diets", "dietas"),
+    ("gender", "género"), ("youth", "juventud"), ("policy", "política"),
+    ("finance", "financiamiento"), ("insurance", "seguros"), ("irrigation", "riego"),
+    ("pests", "plagas"), ("disease", "enfermedades"), ("drought", "sequía"),
+    ("land", "tierra"), ("value chains", "cadenas de valor"), ("extension", "extensión"),
+    ("innovation", "innovación"), ("resilience", "resiliencia"),
+    ("biodiversity", "biodiversidad"), ("emissions", "emisiones"), ("dairy", "lechería"),
+    ("cassava", "yuca"), ("beans", "frijol"), ("potato", "papa"),
+    ("agroforestry", "agroforestería"), ("fertilizer", "fertilizantes"),
+    ("food systems", "sistemas alimentarios"), ("poverty", "pobreza"),
+    ("migration", "migración"), ("employment", "empleo"), ("data", "datos"),
+    ("genebanks", "bancos de germoplasma"), ("nutrition", "nutrición"),
+]
+ADJECTIVES = [
+    ("sustainable", "sostenible"), ("smallholder", "campesino"), ("digital", "digital"),
+    ("climate-smart", "climáticamente inteligente"), ("rural", "rural"),
+    ("urban", "urbano"), ("local", "local"), ("inclusive", "inclusivo"),
+    ("improved", "mejorado"), ("integrated", "integrado"), ("community", "comunitario"),
+    ("national", "nacional"), ("regenerative", "regenerativo"), ("public", "público"),
+    ("private", "privado"), ("informal", "informal"), ("resilient", "resiliente"),
+    ("adaptive", "adaptativo"), ("participatory", "participativo"),
+    ("gender-responsive", "con enfoque de género"), ("low-emission", "de bajas emisiones"),
+    ("biofortified", "biofortificado"), ("irrigated", "irrigado"),
+    ("rainfed", "de secano"), ("mixed", "mixto"),
+]
+PLACES = [
+    ("africa", "áfrica"), ("asia", "asia"), ("latin america", "américa latina"),
+    ("drylands", "zonas áridas"), ("highlands", "tierras altas"), ("deltas", "deltas"),
+    ("small islands", "islas pequeñas"), ("cities", "ciudades"),
+    ("fragile states", "estados frágiles"), ("mountains", "montañas"),
+]
+
+# Relleno de abstracts, de más a menos frecuente (se elige con Zipf)
+FILLER = {
+    "en": ("the of and to in for on with this brief that from by are as we farmers "
+           "results study evidence approach households women production systems use "
+           "across support program practices impact adoption income change policy "
+           "research partners countries scaling options data analysis findings "
+           "recommendations investment capacity institutions knowledge tools access "
+           "services outcomes local national levels improve increase reduce key").split(),
+    "es": ("de la el en y para los las con este resumen que por del se una un como "
+           "productores resultados estudio evidencia enfoque hogares mujeres producción "
+           "sistemas uso apoyo programa prácticas impacto adopción ingresos cambio "
+           "política investigación socios países escalamiento opciones datos análisis "
+           "hallazgos recomendaciones inversión capacidades instituciones conocimiento "
+           "herramientas acceso servicios mejorar aumentar reducir clave").split(),
+}
+FILLER = {lang: np.array(words) for lang, words in FILLER.items()}
+# Léxico de la cola larga (términos técnicos, nombres propios): palabras
+# sintéticas de 2–3 sílabas. Sin él, los abstracts comparten demasiados
+# trigramas y 11 los toma por near-duplicados.
+SYLLABLES     = [c + v for c in "bdfgklmnprstvz" for v in "aeiou"]
+LEXICON_SIZE  = 20_000
+LEXICON_SHARE = 0.35    # fracción de palabras del abstract tomadas del léxico
+
+# {district}: término del léxico como nombre de lugar, para que los
+# títulos no se repitan entre briefs sin abstract
+TITLES = {
+    "en": ["{kw1} and {kw2} in {district}, {country}", "Scaling {kw1} for {kw2} in {district}",
+           "{kw1}: lessons from {district}, {country}", "How {kw1} supports {kw2} in {district}",
+           "{kw1} in {district} ({country}): evidence and options"],
+    "es": ["{kw1} y {kw2} en {district}, {country}", "Escalamiento de {kw1} para {kw2} en {district}",
+           "{kw1}: lecciones de {district}, {country}", "Cómo {kw1} apoya {kw2} en {district}",
+           "{kw1} en {district} ({country}): evidencia y opciones"],
+}
+
+CENTERS = [
+    ("ILRI", "International Livestock Research Institute"),
+    ("IFPRI", "International Food Policy Research Institute"),
+    ("CIAT", "International Center for Tropical Agriculture"),
+    ("IITA", "International Institute of Tropical Agriculture"),
+    ("CIMMYT", "International Maize and Wheat Improvement Center"),
+    ("IRRI", "International Rice Research Institute"),
+    ("IWMI", "International Water Management Institute"),
+    ("CIFOR-ICRAF", "Center for International Forestry Research and World Agroforestry"),
+    ("WorldFish", "WorldFish"),
+    ("CIP", "International Potato Center"),
+    ("ICARDA", "International Center for Agricultural Research in the Dry Areas"),
+    ("ICRISAT", "International Crops Research Institute for the Semi-Arid Tropics"),
+    ("AfricaRice", "Africa Rice Center"),
+    ("Bioversity", "Bioversity International"),
+]
+SERIES_KINDS = ["Brief", "Policy Brief", "Innovation Profile", "Info Note", "Research Brief"]
+DONORS = ["CGIAR Trust Fund", "Bill & Melinda Gates Foundation",
+          "Foreign, Commonwealth & Development Office", "United States Agency for "
+          "International Development", "European Commission", "Netherlands Ministry of "
+          "Foreign Affairs", "International Fund for Agricultural Development",
+          "Australian Centre for International Agricultural Research", "World Bank",
+          "Swiss Agency for Development and Cooperation"]
+SURNAMES = ["Smith", "Otieno", "Mwangi", "Kumar", "Singh", "García", "López", "Nguyen",
+            "Tran", "Wang", "Li", "Zhang", "Ouédraogo", "Traoré", "Diallo", "Okafor",
+            "Abebe", "Tesfaye", "Banda", "Phiri", "Rahman", "Hossain", "Silva", "Pereira",
+            "Martínez", "Rodríguez", "Müller", "Schmidt", "Dubois", "Martin", "Brown",
+            "Wilson", "Kariuki", "Njoroge", "Mensah", "Boateng", "Sharma", "Das", "Ali",
+            "Hassan"]
+GIVEN = ["John", "Mary", "James", "Grace", "Peter", "Esther", "David", "Fatima", "Juan",
+         "María", "Wei", "Mei", "Amina", "Joseph", "Sarah", "Daniel", "Ruth", "Samuel",
+         "Anne", "Paul", "Ahmed", "Aisha", "Luis", "Ana", "Kwame", "Abena", "Ravi",
+         "Priya", "Tomás", "Lucía"]
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# Países más frecuentes primero (el resto sigue en el orden de 08)
+FOCUS = ["Kenya", "Ethiopia", "India", "Nigeria", "Bangladesh", "Tanzania", "Uganda",
+         "Colombia", "Viet Nam", "Ghana", "Malawi", "Mali", "Burkina Faso", "Nepal",
+         "Mozambique", "Zambia", "Peru", "Guatemala", "Philippines", "Egypt"]
+
+def zipf_p(n, s=1.1):
+    p = 1.0 / np.arange(1, n + 1) ** s
+    return p / p.sum()
+
+def lexicon(size=LEXICON_SIZE):
+    ns = len(SYLLABLES)
+    return np.array([SYLLABLES[k % ns] + SYLLABLES[k // ns % ns] + (SYLLABLES[k // ns**2 % ns]
+                                                           if k >= ns * ns else "")
+                     for k in range(size)])
+
+_CDF = {}
+
+def zipf_draw(rng, n, size, s=1.0):
+    """
+    `size` índices en [0, n) con Zipf. La CDF se calcula una vez por
+    (n, s): rng.choice(p=...) la recalcula en cada llamada.
+    """
+    if (n, s) not in _CDF:
+        _CDF[n, s] = np.cumsum(zipf_p(n, s))
+    return np.minimum(np.searchsorted(_CDF[n, s], rng.random(size), side="right"), n - 1)
+
+def keyword_concepts(n_kw, normalize):
+    """
+    [(inglés, español, [alias])] de n_kw conceptos, en orden de
+    frecuencia: primero los conceptos de KEYWORD_MAP de 04 (con sus
+    variantes como alias), después los combinados de NOUNS/ADJECTIVES.
+    """
+    concepts = {}
+    for raw, canon in normalize.KEYWORD_MAP.items():
+        en, es, aliases = concepts.get(canon, (canon, None, []))
+        if es is None and not raw.isascii():
+            es = raw
+        else:
+            aliases.append(raw)
+        concepts[canon] = (en, es, aliases)
+    nn, na = len(NOUNS), len(ADJECTIVES)
+    i = 0
+    while len(concepts) < n_kw and i < nn * (1 + na + na * nn + na * nn * len(PLACES)):
+        k, i = i, i + 1
+        if k < nn:
+            (en, es) = NOUNS[k]
+        else:
+            k -= nn
+            (a_en, a_es), (n_en, n_es) = ADJECTIVES[k % na], NOUNS[k // na % nn]
+            en, es = f"{a_en} {n_en}", f"{n_es} {a_es}"
+            k //= na * nn
+            if k:
+                (m_en, m_es) = NOUNS[(k - 1) % nn]
+                en, es = f"{en} for {m_en}", f"{es} para {m_es}"
+                if (k - 1) // nn:
+                    (p_en, p_es) = PLACES[((k - 1) // nn - 1) % len(PLACES)]
+                    en, es = f"{en} in {p_en}", f"{es} en {p_es}"
+        concepts.setdefault(en, (en, es, []))
+    return list(concepts.values())[:n_kw]
+
+def person(p):
+    """Nombre canónico 'Apellido, Nombre X.' de la persona p."""
+    ns, ng = len(SURNAMES), len(GIVEN)
+    surname, given, m = SURNAMES[p % ns], GIVEN[p // ns % ng], p // (ns * ng)
+    if m:
+        given += f" {LETTERS[(m - 1) % 26]}."
+    if m > 26:
+        surname += " " + SURNAMES[(m - 1) // 26 % ns]
+    return f"{surname}, {given}"
+
+def vocabularies(n, normalize, geo):
+    """Listas de valores (en orden de frecuencia) que crecen con N."""
+    countries = sorted(geo.COUNTRIES, key=lambda c: (c[2] not in FOCUS,
+                                                    FOCUS.index(c[2]) if c[2] in FOCUS else 0))
+    aliases = {}
+    for alias, code in geo.ALIASES.items():
+        aliases.setdefault(code, []).append(alias)
+    regions = [(code, name) for code, name, level, _ in geo.M49_AREAS if level != "world"]
+    centers = [abbr for abbr, _ in CENTERS]
+    return {
+        "keywords":     keyword_concepts(max(500, n // 10), normalize),
+        "authors":      max(200, n // 2),
+        "countries":    [(name, aliases.get(code, [])) for code, _, name, _ in countries],
+        "regions":      [(name, aliases.get(code, [])) for code, name in regions],
+        "donors":       DONORS + [f"{NOUNS[k % len(NOUNS)][0].title()} Fund {k // len(NOUNS) + 1}"
+                                  for k in range(max(40, n // 500))],
+        "initiatives":  [f"{a.title()} {b}" for a, _ in NOUNS[:8] for b, _ in NOUNS[8:13]],
+        "affiliations": centers + [f"University of {p.title()} {k}"
+                                   for k in range(max(10, n // 1000)) for p, _ in PLACES],
+        "series":       [f"{abbr} {kind}" for abbr in centers for kind in SERIES_KINDS],
+        "sdgs":         variants(normalize.SDG_MAP),
+        "impact_areas": variants(normalize.IMPACT_MAP),
+        "lexicon":      lexicon(),
+    }
+
+def variants(mapping):
+    """[(valor canónico, [variantes])] a partir de un mapa variante → canónico de 04."""
+    out = {}
+    for raw, canon in mapping.items():
+        out.setdefault(canon, []).append(raw)
+    return list(out.items())
+
+# ── Generación por bloques ─────────────────────────────────────
+def sample_multi(rng, count, n_items, lo, hi, s=1.1):
+    """Para `count` briefs: listas de lo a hi índices distintos, con Zipf."""
+    per  = rng.integers(lo, hi + 1, count)
+    flat = rng.choice(n_items, size=int(per.sum()), p=zipf_p(n_items, s))
+    return [list(dict.fromkeys(x.tolist())) for x in np.split(flat, np.cumsum(per)[:-1])]
+
+def issued_dates(rng, count, opts):
+    """Fechas ISO (algunas incompletas) con densidad creciente hacia --end."""
+    first = date.fromisoformat(opts.start).toordinal()
+    span  = date.fromisoformat(opts.end).toordinal() - first + 1
+    days  = first + np.floor(span * rng.random(count) ** (1 / (1 + opts.growth))).astype(int)
+    precision = rng.random(count)
+    out = []
+    for d, p in zip(days.tolist(), precision.tolist()):
+        iso = date.fromordinal(d).isoformat()
+        out.append(iso if p < 0.90 else iso[:7] if p < 0.97 else iso[:4])
+    return out
+
+def pick(rng, value, aliases, spanish, p_alias=0.15):
+    """Valor canónico o, a veces, un alias (en español, el alias con acentos si hay)."""
+    if spanish:
+        accented = [a for a in aliases if not a.isascii()]
+        if accented:
+            return accented[0]
+    if aliases and rng.random() < p_alias:
+        return aliases[rng.integers(len(aliases))]
+    return value
+
+def keyword_text(rng, concept, spanish):
+    en, es, aliases = concept
+    if spanish and es:
+        return es
+    u = rng.random()
+    if aliases and u < 0.10:
+        return aliases[rng.integers(len(aliases))]
+    return en.title() if u > 0.95 else en
+
+def abstract_text(rng, keywords, lang, n_words, lexicon):
+    """
+    Palabras frecuentes del idioma (Zipf) mezcladas con términos de la
+    cola larga del léxico (LEXICON_SHARE) y las keywords del brief.
+    """
+    filler = FILLER[lang]
+    common = filler[zipf_draw(rng, len(filler), n_words, 0.9)]
+    rare   = lexicon[zipf_draw(rng, len(lexicon), n_words)]
+    words  = np.where(rng.random(n_words) < LEXICON_SHARE, rare, common).tolist()
+    for kw in keywords:
+        words.insert(int(rng.integers(len(words) + 1)), kw)
+    text = " ".join(words)
+    return text[0].upper() + text[1:] + "."
+
+def values(items, lang=None):
+    """Lista de valores de metadata de DSpace 7."""
+    return [{"value": v, "language": lang, "authority": None, "confidence": -1, "place": i}
+            for i, v in enumerate(items)]
+
+def generate_chunk(rng, first, count, vocab, opts):
+    """Ítems (indexableObject de DSpace) first..first+count-1."""
+    n_kw = len(vocab["keywords"])
+    draws = {
+        "keywords":     sample_multi(rng, count, n_kw, 2, 8),
+        "authors":      sample_multi(rng, count, vocab["authors"], 1, 6, s=0.9),
+        "countries":    sample_multi(rng, count, len(vocab["countries"]), 1, 3, s=1.2),
+        "regions":      sample_multi(rng, count, len(vocab["regions"]), 0, 2),
+        "donors":       sample_multi(rng, count, len(vocab["donors"]), 0, 3),
+        "initiatives":  sample_multi(rng, count, len(vocab["initiatives"]), 0, 1, s=0.8),
+        "affiliations": sample_multi(rng, count, len(vocab["affiliations"]), 1, 3),
+        "series":       sample_multi(rng, count, len(vocab["series"]), 0, 1),
+        "sdgs":         sample_multi(rng, count, len(vocab["sdgs"]), 0, 3, s=0.6),
+        "impact_areas": sample_multi(rng, count, len(vocab["impact_areas"]), 0, 2, s=0.5),
+    }
+    dates    = issued_dates(rng, count, opts)
+    spanish  = rng.random(count) < opts.spanish
+    lengths  = np.clip(rng.lognormal(np.log(150), 0.4, count), 40, 400).astype(int)
+    missing  = rng.random((count, 4))   # abstract, idioma, licencia, acceso
+    dup_of   = np.where(rng.random(count) < opts.duplicates,
+                        rng.integers(0, np.maximum(np.arange(count), 1)), -1)
+
+    items = []
+    for i in range(count):
+        lang = "es" if spanish[i] else "en"
+        d    = {k: v[i] for k, v in draws.items()}
+        kws  = [keyword_text(rng, vocab["keywords"][k], spanish[i]) for k in d["keywords"]]
+        ctry = [pick(rng, *vocab["countries"][c], spanish[i]) for c in d["countries"]]
+        pattern = TITLES[lang][rng.integers(len(TITLES[lang]))]
+        district = vocab["lexicon"][zipf_draw(rng, LEXICON_SIZE, 1)[0]]
+        title    = pattern.format(kw1=kws[0].capitalize(), kw2=kws[-1], country=ctry[0],
+                                  district=district.capitalize())
+        abstract = abstract_text(rng, kws, lang, lengths[i], vocab["lexicon"]) if missing[i, 0] < 0.85 else None
+        issued   = dates[i]
+
+        if dup_of[i] >= 0 and dup_of[i] < i:
+            # re-publicación: mismo título y abstract con un agregado, fecha posterior
+            orig     = items[dup_of[i]]["metadata"]
+            title    = orig["dc.title"][0]["value"]
+            abstract = (orig["dcterms.abstract"][0]["value"] + " Updated edition."
+                        if "dcterms.abstract" in orig else abstract)
+            issued   = max(issued, orig["dcterms.issued"][0]["value"])
+
+        authors = []
+        for a in d["authors"]:
+            name = person(a)
+            if rng.random() < 0.2:   # variante con iniciales
+                surname, given = name.split(", ")
+                name = f"{surname}, {'.'.join(g[0] for g in given.split())}."
+            authors.append(name)
+        center = CENTERS[d["affiliations"][0] % len(CENTERS)]
+
+        handle = f"10568/{100000 + first + i}"
+        meta = {
+            "dc.title":              values([title], lang),
+            "dcterms.type":          values(["Brief"], lang),
+            "dcterms.issued":        values([issued]),
+            "dcterms.language":      values([lang]) if missing[i, 1] < 0.95 else [],
+            "dcterms.publisher":     values([center[1]]),
+            "dcterms.isPartOf":      values([vocab["series"][s] for s in d["series"]]),
+            "dcterms.accessRights":  values(["Open Access" if missing[i, 3] < 0.9
+                                             else "Limited Access"]),
+            "dcterms.license":       values(["CC-BY-4.0"]) if missing[i, 2] < 0.8 else [],
+            "dcterms.subject":       values(kws, lang),
+            "dc.contributor.author": values(authors),
+            "dc.identifier.uri":     values([f"https://hdl.handle.net/{handle}"]),
+            "cg.coverage.country":   values(ctry),
+            "cg.coverage.region":    values([pick(rng, *vocab["regions"][r], spanish[i])
+                                             for r in d["regions"]]),
+            "cg.contributor.donor":  values([vocab["donors"][x] for x in d["donors"]]),
+            "cg.contributor.initiative":  values([vocab["initiatives"][x]
+                                                  for x in d["initiatives"]]),
+            "cg.contributor.affiliation": values([vocab["affiliations"][x]
+                                                  for x in d["affiliations"]]),
+            "cg.subject.sdg":        values([pick(rng, *vocab["sdgs"][x], False, 0.3)
+                                             for x in d["sdgs"]]),
+            "cg.subject.impactArea": values([pick(rng, *vocab["impact_areas"][x], False, 0.3)
+                                             for x in d["impact_areas"]]),
+            "cg.reviewStatus":       values(["Internal Review"]),
+        }
+        if abstract:
+            meta["dcterms.abstract"] = values([abstract], lang)
+        item_uuid = str(uuid.UUID(bytes=rng.bytes(16), version=4))
+        items.append({
+            "id": item_uuid, "uuid": item_uuid, "name": title, "handle": handle,
+            "metadata": {k: v for k, v in meta.items() if v},
+            "inArchive": True, "discoverable": True, "withdrawn": False,
+            "lastModified": f"{SNAPSHOT[:4]}-{SNAPSHOT[4:6]}-{SNAPSHOT[6:]}T00:00:00.000+00:00",
+            "entityType": None, "type": "item",
+        })
+    return items
+
+# ── Escritura ──────────────────────────────────────────────────
+def page(objects, number, n, page_size):
+    """Respuesta de /discover/search/objects con una página de resultados."""
+    return {
+        "id": None, "scope": None, "query": None, "configuration": "default",
+        "appliedFilters": [{"filter": "itemtype", "operator": "equals",
+                            "value": "Brief", "label": "Brief"}],
+        "sort": {"by": "score", "order": "DESC"}, "type": "discover",
+        "_embedded": {"searchResult": {
+            "_embedded": {"objects": [{"hitHighlights": None, "type": "discover",
+                                       "_embedded": {"indexableObject": o}}
+                                      for o in objects]},
+            "page": {"number": number, "size": page_size,
+                     "totalPages": -(-n // page_size), "totalElements": n},
+        }},
+    }
+
+def staging_rows(items, harvest):
+    """Filas de staging como las arma 01 (extract_record + periodos)."""
+    harvested_at = datetime.strptime(SNAPSHOT, "%Y%m%d").isoformat()
+    rows = []
+    for item in items:
+        row = harvest.extract_record(item)
+        _, year, quarter, year_quarter, _ = parse_issued_date(row.get("issued_date", ""))
+        row.update(year=year, quarter=quarter, year_quarter=year_quarter,
+                   item_type="brief", brief_flag=1, last_harvested_at=harvested_at)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def write_corpus(work, n, seed, opts):
+    harvest   = stage("01_harvest_rest")
+    vocab     = vocabularies(n, stage("04_normalize"), stage("08_normalize_geo"))
+    raw_dir   = work / "data" / "raw" / "brief"
+    staging   = work / "data" / "staging" / "brief" / f"brief_{SNAPSHOT}_000.parquet"
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    staging.parent.mkdir(parents=True, exist_ok=True)
+    for old in raw_dir.glob(f"p*_{SNAPSHOT}.json"):
+        old.unlink()
+
+    rng     = np.random.default_rng(seed)
+    writer  = None
+    pending = []
+    number  = 0
+    for first in range(0, n, CHUNK):
+        items = generate_chunk(rng, first, min(CHUNK, n - first), vocab, opts)
+        table = pa.Table.from_pandas(staging_rows(items, harvest), preserve_index=False,
+                                     schema=writer.schema if writer else None)
+        writer = writer or pq.ParquetWriter(staging.with_suffix(".tmp"), table.schema)
+        writer.write_table(table)
+
+        if opts.pages:
+            pending += items
+            while len(pending) >= opts.page_size or (pending and first + CHUNK >= n):
+                objects, pending = pending[:opts.page_size], pending[opts.page_size:]
+                path = raw_dir / f"p{number:04d}_{SNAPSHOT}.json"
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(page(objects, number, n, opts.page_size), f,
+                              ensure_ascii=False, indent=2)
+                number += 1
+        log(f"  {first + len(items):>9,} / {n:,} briefs")
+    writer.close()
+    staging.with_suffix(".tmp").replace(staging)
+    return staging, number
+
+def corpus(n, seed=SEED, work=None, force=False, **options):
+    """
+    Directorio de trabajo con el corpus de n briefs (se genera si no
+    existe o si cambió algún parámetro). Las opciones son las de la
+    línea de comandos (start, end, growth, spanish, duplicates,
+    page_size, pages).
+    """
+    defaults = {"start": START, "end": END, "growth": GROWTH, "spanish": SPANISH,
+                "duplicates": DUPLICATES, "page_size": PAGE_SIZE, "pages": True}
+    opts   = argparse.Namespace(**{**defaults, **options})
+    work   = Path(work) if work else WORK_DIR / f"n{n}"
+    stamp  = work / "stamp.json"
+    wanted = {"n": n, "seed": seed, "generator": GENERATOR, **vars(opts)}
+    if not force and stamp.exists() and json.loads(stamp.read_text()) == wanted:
+        return work
+    log(f"Generando corpus sintético de {n:,} briefs en {work}...")
+    start = time.perf_counter()
+    stamp.unlink(missing_ok=True)
+    staging, pages = write_corpus(work, n, seed, opts)
+    stamp.parent.mkdir(parents=True, exist_ok=True)
+    stamp.write_text(json.dumps(wanted))
+    log(f"  {staging.stat().st_size / 2**20:,.1f} MB de staging | {pages} páginas JSON "
+        f"| {time.perf_counter() - start:.1f} s")
+    return work
+
+# ── Main ───────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("n", type=int, help="cantidad de briefs")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--out", type=Path, help=f"directorio de trabajo (por defecto "
+                                                 f"{WORK_DIR.relative_to(ROOT)}/n<N>)")
+    parser.add_argument("--start", default=START, help="primera fecha de publicación")
+    parser.add_argument("--end", default=END, help="última fecha de publicación")
+    parser.add_argument("--growth", type=float, default=GROWTH,
+                        help="0 = fechas uniformes; mayor = más briefs recientes")
+    parser.add_argument("--spanish", type=float, default=SPANISH,
+                        help="fracción de briefs en español")
+    parser.add_argument("--duplicates", type=float, default=DUPLICATES,
+                        help="fracción de briefs re-publicados casi iguales")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--no-pages", action="store_true",
+                        help="solo el staging, sin las páginas JSON (más rápido)")
+    parser.add_argument("--force", action="store_true", help="regenerar aunque exista")
+    args = parser.parse_args()
+
+    work = corpus(args.n, args.seed, args.out, args.force,
+                  start=args.start, end=args.end, growth=args.growth, spanish=args.spanish,
+                  duplicates=args.duplicates, page_size=args.page_size,
+                  pages=not args.no_pages)
+    log(f"✓ Corpus en {work}")
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,51 @@
 """
 01_harvest_rest.py
-Cosecha de Briefs desde la REST API de DSpace 7 (CGSpace).
+Cosecha de ítems desde la REST API de DSpace 7 (CGSpace), por tipo.
+
+Cada tipo de ítem (Brief, Journal Article, Report...; ver item_types.py)
+se cosecha en su propio hilo, en paralelo con los demás, y se guarda en
+su partición. Todos los hilos comparten un solo límite de tasa (una
+petición cada PAUSE_SECS, ver ratelimit.py): CGSpace recibe el mismo
+ritmo que cosechando un tipo a la vez. Las particiones son
+data/raw/<slug>/ (páginas JSON) y data/staging/<slug>/ (Parquet, en
+partes de PART_ROWS filas para no juntar todo en memoria).
+
+La cosecha es incremental: state.json de cada partición guarda el
+lastModified más reciente visto, y la corrida siguiente pide solo los
+ítems modificados desde entonces. 02 carga solo las partes nuevas.
+
+    python scripts/01_harvest_rest.py                          # Briefs
+    python scripts/01_harvest_rest.py --types "Journal Article" Report
+    python scripts/01_harvest_rest.py --types all --full       # todo, desde cero
 """
 
+import argparse
 import requests
 import time
 import json
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from pathlib import Path
+from urllib.parse import quote
+
+import item_types
+from periods import parse_issued_date
+from instrumentation import log, span
+from ratelimit import RateLimiter
 
 # ── Configuración ──────────────────────────────────────────────
 BASE_URL    = "https://cgspace.cgiar.org/server/api/discover/search/objects"
 PAGE_SIZE   = 100
-PAUSE_SECS  = 3
+PAUSE_SECS  = 3        # entre peticiones, sumando todos los hilos
 RETRY_WAIT  = 60
 MAX_RETRIES = 5
+PART_ROWS   = 50_000   # filas por parte de staging
+MAX_WORKERS = 4        # tipos cosechados a la vez (cortesía con el servidor)
 
 CUTOFF_DATE = (datetime.today() - timedelta(days=730)).strftime("%Y-%m-%d")
+RUN         = datetime.now().strftime("%Y%m%d-%H%M%S")
 
-RAW_DIR     = Path("data/raw")
-STAGING_DIR = Path("data/staging")
-LOG_DIR     = Path("data/logs")
-TODAY       = datetime.today().strftime("%Y%m%d")
+LIMITER = RateLimiter(1 / PAUSE_SECS)
 
 FIELDS_TO_EXTRACT = [
     "dc.title",
@@ -53,22 +76,14 @@ FIELDS_TO_EXTRACT = [
     "cg.reviewStatus",
 ]
 
-# ── Logging ────────────────────────────────────────────────────
-LOG_PATH = LOG_DIR / f"harvest_{TODAY}.log"
-
-def log(msg):
-    ts   = datetime.now().strftime("%H:%M:%S")
-    line = f"[{ts}] {msg}"
-    print(line)
-    with open(LOG_PATH, "a", encoding="utf-8") as f:
-        f.write(line + "\n")
-
 # ── HTTP con reintentos ────────────────────────────────────────
 def get_json(url):
-    """GET con reintentos. La URL se pasa completa para evitar
-    que requests re-codifique las comas de los filtros."""
+    """GET con reintentos, respetando el límite de tasa compartido. La
+    URL se pasa completa para evitar que requests re-codifique las comas
+    de los filtros."""
     headers = {"User-Agent": "pipeline_cgspace/0.1 (investigacion personal)"}
     for attempt in range(1, MAX_RETRIES + 1):
+        LIMITER.wait()
         try:
             r = requests.get(url, headers=headers, timeout=30)
             if r.status_code == 429:
@@ -91,6 +106,8 @@ def extract_record(item):
         "brief_id" : item.get("handle", ""),
         "uuid"     : item.get("uuid", ""),
         "uri"      : "",
+        # para la cosecha incremental (ver harvest_type)
+        "last_modified": item.get("lastModified", ""),
     }
 
     uri_list = meta.get("dc.identifier.uri", [])
@@ -127,59 +144,83 @@ def extract_record(item):
 
     return row
 
-# ── Parsear fecha ──────────────────────────────────────────────
-def parse_issued_date(date_str):
-    if not date_str:
-        return None, None, None, None
-    for fmt, length in [("%Y-%m-%d", 10), ("%Y-%m", 7), ("%Y", 4)]:
-        try:
-            d       = datetime.strptime(date_str[:length], fmt)
-            year    = d.year
-            quarter = (d.month - 1) // 3 + 1
-            return date_str, year, quarter, f"{year}Q{quarter}"
-        except ValueError:
-            continue
-    return date_str, None, None, None
-
-# ── Cosecha principal ──────────────────────────────────────────
-def harvest():
-    log("=" * 60)
-    log(f"Inicio cosecha REST — cutoff: {CUTOFF_DATE}")
-    log("=" * 60)
-
-    all_rows    = []
+# ── Cosecha de un tipo ─────────────────────────────────────────
+def read_state(name):
+    path = item_types.staging_dir(name) / "state.json"
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+def write_state(name, state):
+    path = item_types.staging_dir(name) / "state.json"
+    tmp  = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+def search_url(name, page_num, since=None):
+    """
+    URL de una página del tipo. Se arma a mano para que requests no
+    re-codifique las comas de los filtros; solo se codifican los valores.
+    """
+    cutoff_year = CUTOFF_DATE[:4]
+    url = (f"{BASE_URL}"
+           f"?f.itemtype={quote(name)},equals"
+           f"&f.dateIssued=[{cutoff_year} TO {datetime.today().year}],equals")
+    if since:
+        # Solr espera fechas UTC "AAAA-MM-DDTHH:MM:SSZ" (sin milisegundos ni zona)
+        since = since[:19] + "Z"
+        url += f"&query={quote(f'lastModified:[{since} TO *]')}"
+    return url + f"&size={PAGE_SIZE}&page={page_num}"
+
+def write_part(name, rows, part):
+    """Escribe una parte de staging (atómica) y devuelve su ruta."""
+    s    = item_types.slug(name)
+    path = item_types.staging_dir(name) / f"{s}_{RUN}_{part:03d}.parquet"
+    tmp  = path.with_suffix(".tmp")
+    pd.DataFrame(rows).to_parquet(tmp, index=False)
+    tmp.replace(path)
+    log(f"  [{s}] Guardado: {path} ({len(rows)} filas)", item_type=s, rows=len(rows))
+    return path
+
+def harvest_type(name, full=False):
+    """
+    Cosecha un tipo de ítem: todas las páginas de la ventana (o, si hay
+    estado previo y no se pide `full`, solo lo modificado desde la
+    última corrida). El estado se actualiza solo al terminar bien: una
+    corrida cortada se repite desde el mismo punto. Devuelve un resumen.
+    """
+    s     = item_types.slug(name)
+    state = {} if full else read_state(name)
+    since = state.get("last_modified")
+    item_types.raw_dir(name).mkdir(parents=True, exist_ok=True)
+    item_types.staging_dir(name).mkdir(parents=True, exist_ok=True)
+    log(f"[{s}] Inicio cosecha '{name}' — cutoff: {CUTOFF_DATE}"
+        + (f" | modificados desde {since}" if since else " | completa"), item_type=s)
+
+    rows        = []
+    parts       = []
     page_num    = 0
     total_pages = None
-    total_items = None
+    added       = 0
     skipped     = 0
-
-    time.sleep(PAUSE_SECS)
+    newest      = since or ""
 
     while True:
-        # Construir URL completa sin que requests toque los parámetros
-        cutoff_year = CUTOFF_DATE[:4]
-        url = (f"{BASE_URL}"
-               f"?f.itemtype=Brief,equals"
-                f"&f.dateIssued=[{cutoff_year} TO 2026],equals"
-               f"&size={PAGE_SIZE}"
-               f"&page={page_num}")
-
-        log(f"\nPágina {page_num + 1}" +
+        log(f"\n[{s}] Página {page_num + 1}" +
             (f"/{total_pages}" if total_pages else "") +
-            f" — acumulados: {len(all_rows)}")
+            f" — acumulados: {added}")
 
-        data = get_json(url)
+        with span("fetch_page", item_type=s, page=page_num):
+            data = get_json(search_url(name, page_num, since))
 
         search_result = data.get("_embedded", {}).get("searchResult", {})
         page_info     = search_result.get("page", {})
 
         if total_pages is None:
             total_pages = page_info.get("totalPages", 0)
-            total_items = page_info.get("totalElements", 0)
-            log(f"  Total Briefs: {total_items} | Páginas: {total_pages}")
+            log(f"  [{s}] Total: {page_info.get('totalElements', 0)} | Páginas: {total_pages}",
+                item_type=s, total=page_info.get("totalElements", 0))
 
         # Guardar JSON crudo
-        raw_path = RAW_DIR / f"briefs_p{page_num:04d}_{TODAY}.json"
+        raw_path = item_types.raw_dir(name) / f"p{page_num:04d}_{RUN}.json"
         with open(raw_path, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
 
@@ -189,7 +230,7 @@ def harvest():
                    .get("objects", []))
 
         if not objects:
-            log("  Sin registros. Fin.")
+            log(f"  [{s}] Sin registros. Fin.")
             break
 
         page_added   = 0
@@ -202,7 +243,8 @@ def harvest():
 
             row        = extract_record(item)
             issued_raw = row.get("issued_date", "")
-            _, year, quarter, year_quarter = parse_issued_date(issued_raw)
+            _, year, quarter, year_quarter, _ = parse_issued_date(issued_raw)
+            newest     = max(newest, row["last_modified"] or "")
 
             # Filtro ventana temporal
             in_window = False
@@ -213,44 +255,83 @@ def harvest():
                 row["year"]              = year
                 row["quarter"]           = quarter
                 row["year_quarter"]      = year_quarter
-                row["brief_flag"]        = 1
+                row["item_type"]         = s
+                row["brief_flag"]        = int(name == "Brief")
                 row["last_harvested_at"] = datetime.now().isoformat()
-                all_rows.append(row)
+                rows.append(row)
                 page_added += 1
             else:
                 page_skipped += 1
-                skipped += 1
 
-        log(f"  Añadidos: {page_added} | Fuera de ventana: {page_skipped}")
+        added   += page_added
+        skipped += page_skipped
+        log(f"  [{s}] Añadidos: {page_added} | Fuera de ventana: {page_skipped}",
+            item_type=s, page=page_num, added=page_added, skipped=page_skipped)
+
+        if len(rows) >= PART_ROWS:
+            parts.append(write_part(name, rows, len(parts)))
+            rows = []
 
         # Parar si toda la página está fuera de ventana
         if page_skipped == len(objects) and page_num > 5:
-            log("  Página completa fuera de ventana. Deteniendo.")
+            log(f"  [{s}] Página completa fuera de ventana. Deteniendo.")
             break
 
         if page_num + 1 >= total_pages:
-            log("  Última página alcanzada.")
+            log(f"  [{s}] Última página alcanzada.")
             break
 
         page_num += 1
-        log(f"  Pausando {PAUSE_SECS}s...")
-        time.sleep(PAUSE_SECS)
 
-    # ── Guardar staging ────────────────────────────────────────
+    if rows:
+        parts.append(write_part(name, rows, len(parts)))
+    write_state(name, {"last_modified": newest or since, "run": RUN,
+                       "harvested_at": datetime.now().isoformat(timespec="seconds"),
+                       "cutoff": CUTOFF_DATE})
+    return {"type": name, "slug": s, "added": added, "skipped": skipped,
+            "parts": [str(p) for p in parts], "incremental": bool(since)}
+
+# ── Cosecha principal ──────────────────────────────────────────
+def harvest(names, full=False, workers=None):
+    """Cosecha los tipos en paralelo (un hilo por tipo, hasta `workers`)."""
+    workers = min(workers or MAX_WORKERS, len(names))
+    log("=" * 60)
+    log(f"Inicio cosecha REST — tipos: {', '.join(names)} | {workers} en paralelo"
+        f"{' | completa' if full else ''}")
+    log("=" * 60)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(harvest_type, name, full) for name in names}
+    summaries, failed = [], []
+    for name, future in futures.items():
+        try:
+            summaries.append(future.result())
+        except Exception as e:
+            failed.append(name)
+            log(f"✗ {name}: {e}", item_type=item_types.slug(name), error=type(e).__name__)
+
+    # ── Resumen ────────────────────────────────────────────────
     log(f"\n{'='*60}")
-    log(f"Cosecha completada: {len(all_rows)} registros | {skipped} descartados")
-
-    if all_rows:
-        df       = pd.DataFrame(all_rows)
-        out_path = STAGING_DIR / f"briefs_raw_{TODAY}.parquet"
-        df.to_parquet(out_path, index=False)
-        log(f"Guardado: {out_path}")
-        log(f"Columnas: {list(df.columns)}")
-        log(f"Rango fechas: {df['issued_date'].min()} → {df['issued_date'].max()}")
-        log(f"Registros por año:\n"
-            f"{df['year'].value_counts().sort_index().to_string()}")
-    else:
-        log("⚠ Sin registros para guardar.")
+    for r in summaries:
+        log(f"{r['type']}: {r['added']} registros en {len(r['parts'])} partes | "
+            f"{r['skipped']} fuera de ventana{' (incremental)' if r['incremental'] else ''}",
+            item_type=r["slug"], added=r["added"], parts=len(r["parts"]))
+    if not any(r["added"] for r in summaries):
+        log("⚠ Sin registros nuevos para guardar.")
+    if failed:
+        raise SystemExit(f"Cosecha fallida para: {', '.join(failed)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--types", nargs="+", default=None,
+                        help=f"tipos de ítem (nombres o slugs; 'all' = todos los conocidos); "
+                             f"por defecto {', '.join(item_types.DEFAULT_TYPES)}")
+    parser.add_argument("--full", action="store_true",
+                        help="ignorar el estado incremental y cosechar toda la ventana")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"tipos en paralelo (por defecto hasta {MAX_WORKERS})")
+    args = parser.parse_args()
+    harvest(item_types.resolve(args.types), args.full, args.workers)
 
 if __name__ == "__main__":
-    harvest()
\ No newline at end of file
+    main()
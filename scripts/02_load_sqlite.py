@@ -2,27 +2,33 @@
 02_load_sqlite.py
 Carga el Parquet de staging a SQLite.
 Crea las tablas normalizadas: briefs, keywords, geo, authors,
-funding_entities con sus tablas de relación.
+funding_entities con sus tablas de relación, y el perfil de
+completitud de la carga (quality_stats, ver quality.py).
+
+El staging está particionado por tipo de ítem (ver item_types.py) y en
+partes; staging_loads recuerda qué partes ya se cargaron (ruta, tamaño
+y fecha), así que cada corrida carga solo las nuevas o modificadas. Un
+ítem que vuelve a llegar reemplaza su fila y sus relaciones.
+
+    python scripts/02_load_sqlite.py                      # todas las particiones
+    python scripts/02_load_sqlite.py --types brief report
+    python scripts/02_load_sqlite.py --reload             # recargar todo el staging
 """
 
+import argparse
 import sqlite3
+from collections import Counter
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
 
+import item_types
+import quality
+from periods import PERIOD_COLUMNS, date_precision, parse_issued_date
+from instrumentation import log, span
+
 # ── Rutas ──────────────────────────────────────────────────────
-STAGING_DIR = Path("data/staging")
 DB_PATH     = Path("data/db/cgspace_briefs.sqlite")
-TODAY       = datetime.today().strftime("%Y%m%d")
-
-# Tomar el Parquet más reciente
-parquet_files = sorted(STAGING_DIR.glob("briefs_raw_*.parquet"))
-if not parquet_files:
-    raise FileNotFoundError("No hay archivos Parquet en data/staging/")
-PARQUET_PATH = parquet_files[-1]
-
-def log(msg):
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
 
 # ── Crear esquema ──────────────────────────────────────────────
 SCHEMA = """
@@ -36,8 +42,16 @@ CREATE TABLE IF NOT EXISTS briefs (
     year                INTEGER,
     quarter             INTEGER,
     year_quarter        TEXT,
+    -- claves enteras de periodo (ordinales, ver periods.py)
+    period_day          INTEGER,
+    period_week         INTEGER,
+    period_month        INTEGER,
+    period_quarter      INTEGER,
+    date_precision      TEXT,      -- day | month | year (ver periods.PRECISIONS)
+    quality_flags       INTEGER,   -- campos con valor (bits de quality.FIELD_BITS)
     type_raw            TEXT,
     brief_flag          INTEGER DEFAULT 1,
+    item_type           TEXT DEFAULT 'brief',  -- slug, ver item_types.py
     abstract            TEXT,
     language            TEXT,
     publisher           TEXT,
@@ -46,7 +60,8 @@ CREATE TABLE IF NOT EXISTS briefs (
     license             TEXT,
     cg_number           TEXT,
     cg_review_status    TEXT,
-    last_harvested_at   TEXT
+    last_harvested_at   TEXT,
+    last_modified       TEXT
 );
 
 -- Keywords
@@ -68,6 +83,12 @@ CREATE TABLE IF NOT EXISTS geo (
     geo_type     TEXT,  -- country | region | subregion
     value_raw    TEXT,
     value_norm   TEXT,
+    -- códigos ISO-3166 / UN M49, asignados por 08_normalize_geo.py
+    m49_code         INTEGER,
+    m49_region       INTEGER,
+    m49_subregion    INTEGER,
+    m49_intermediate INTEGER,
+    iso_alpha3       TEXT,
     UNIQUE (geo_type, value_raw)
 );
 
@@ -81,7 +102,8 @@ CREATE TABLE IF NOT EXISTS brief_geo (
 CREATE TABLE IF NOT EXISTS authors (
     author_id        INTEGER PRIMARY KEY AUTOINCREMENT,
     author_name_raw  TEXT UNIQUE,
-    author_name_norm TEXT
+    author_name_norm TEXT,
+    author_cluster_id INTEGER  -- asignado por 07_resolve_authors.py
 );
 
 CREATE TABLE IF NOT EXISTS brief_authors (
@@ -114,20 +136,91 @@ CREATE TABLE IF NOT EXISTS brief_tags (
     PRIMARY KEY (brief_id, tag_type, tag_value)
 );
 
+-- Perfil de completitud de lo cargado (quality.py): briefs con cada
+-- campo por alcance (all | year | quarter | series | item_type) y clave;
+-- 02 lo actualiza con el aporte de cada brief que carga o recarga
+CREATE TABLE IF NOT EXISTS quality_stats (
+    scope     TEXT,
+    key       TEXT,  -- '' | 2025 | 2025Q3 | nombre de la serie
+    field     TEXT,
+    n_briefs  INTEGER,
+    n_present INTEGER,
+    PRIMARY KEY (scope, key, field)
+) WITHOUT ROWID;
+
+-- Partes de staging ya cargadas (carga incremental)
+CREATE TABLE IF NOT EXISTS staging_loads (
+    path      TEXT PRIMARY KEY,
+    item_type TEXT,
+    rows      INTEGER,
+    size      INTEGER,
+    mtime     REAL,
+    loaded_at TEXT
+);
+
 -- Índices
 CREATE INDEX IF NOT EXISTS idx_briefs_year_quarter  ON briefs(year_quarter);
 CREATE INDEX IF NOT EXISTS idx_briefs_year          ON briefs(year);
 CREATE INDEX IF NOT EXISTS idx_briefs_issued        ON briefs(issued_date);
+CREATE INDEX IF NOT EXISTS idx_briefs_period_day    ON briefs(period_day);
+CREATE INDEX IF NOT EXISTS idx_briefs_period_week   ON briefs(period_week);
+CREATE INDEX IF NOT EXISTS idx_briefs_period_month  ON briefs(period_month);
+CREATE INDEX IF NOT EXISTS idx_briefs_period_qtr    ON briefs(period_quarter);
+CREATE INDEX IF NOT EXISTS idx_briefs_bid_qtr       ON briefs(brief_id, period_quarter);
+CREATE INDEX IF NOT EXISTS idx_briefs_item_type     ON briefs(item_type, period_quarter);
 CREATE INDEX IF NOT EXISTS idx_brief_keywords_bid   ON brief_keywords(brief_id);
 CREATE INDEX IF NOT EXISTS idx_brief_keywords_kid   ON brief_keywords(keyword_id);
 CREATE INDEX IF NOT EXISTS idx_keywords_norm        ON keywords(keyword_norm);
 CREATE INDEX IF NOT EXISTS idx_brief_geo_bid        ON brief_geo(brief_id);
+CREATE INDEX IF NOT EXISTS idx_brief_geo_gid        ON brief_geo(geo_id, brief_id);
+CREATE INDEX IF NOT EXISTS idx_brief_authors_aid    ON brief_authors(author_id, brief_id);
+CREATE INDEX IF NOT EXISTS idx_authors_cluster      ON authors(author_cluster_id);
 CREATE INDEX IF NOT EXISTS idx_geo_type_norm        ON geo(geo_type, value_norm);
+CREATE INDEX IF NOT EXISTS idx_geo_m49_code         ON geo(m49_code);
+CREATE INDEX IF NOT EXISTS idx_geo_m49_region       ON geo(m49_region);
+CREATE INDEX IF NOT EXISTS idx_geo_m49_subregion    ON geo(m49_subregion);
+CREATE INDEX IF NOT EXISTS idx_geo_m49_interm       ON geo(m49_intermediate);
 CREATE INDEX IF NOT EXISTS idx_brief_funding_bid    ON brief_funding(brief_id);
+CREATE INDEX IF NOT EXISTS idx_brief_funding_eid    ON brief_funding(entity_id, brief_id);
 CREATE INDEX IF NOT EXISTS idx_funding_type         ON funding_entities(entity_type);
 CREATE INDEX IF NOT EXISTS idx_brief_tags           ON brief_tags(tag_type, tag_value);
 """
 
+# Columnas agregadas después de la primera carga: (tabla, columna, tipo).
+# Se aplican con ALTER TABLE antes del esquema para que los índices nuevos
+# no fallen sobre bases existentes.
+MIGRATIONS = [
+    ("authors", "author_cluster_id", "INTEGER"),
+    ("geo",     "m49_code",          "INTEGER"),
+    ("geo",     "m49_region",        "INTEGER"),
+    ("geo",     "m49_subregion",     "INTEGER"),
+    ("geo",     "m49_intermediate",  "INTEGER"),
+    ("geo",     "iso_alpha3",        "TEXT"),
+    ("briefs",  "period_day",        "INTEGER"),
+    ("briefs",  "period_week",       "INTEGER"),
+    ("briefs",  "period_month",      "INTEGER"),
+    ("briefs",  "period_quarter",    "INTEGER"),
+    ("briefs",  "item_type",         "TEXT DEFAULT 'brief'"),
+    ("briefs",  "last_modified",     "TEXT"),
+    ("briefs",  "date_precision",    "TEXT"),
+    ("briefs",  "quality_flags",     "INTEGER"),
+]
+
+# Granularidades con columna propia en briefs (el año ya está en `year`)
+STORED_PERIODS = ["day", "week", "month", "quarter"]
+
+def migrate(conn):
+    """Agrega a una base existente las columnas que le falten; devuelve las agregadas."""
+    added = []
+    for table, col, decl in MIGRATIONS:
+        cols = {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+        if cols and col not in cols:
+            log(f"  Migrando: {table}.{col}")
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} {decl}")
+            added.append((table, col))
+    conn.commit()
+    return added
+
 # ── Helpers ────────────────────────────────────────────────────
 def split_multi(value):
     """Divide campos multi-valor separados por ' | '."""
@@ -141,11 +234,46 @@ def norm(text):
         return ""
     return str(text).strip().lower()
 
+# Tablas de relación de un ítem: se vacían antes de recargarlo
+RELATIONS = ["brief_keywords", "brief_geo", "brief_authors", "brief_funding", "brief_tags"]
+
+def clear_relations(cur, bids):
+    """Borra las relaciones de los ítems que se van a recargar."""
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS reload_ids (brief_id TEXT PRIMARY KEY)")
+    cur.execute("DELETE FROM reload_ids")
+    cur.executemany("INSERT OR IGNORE INTO reload_ids VALUES (?)", ((b,) for b in bids))
+    for table in RELATIONS:
+        cur.execute(f"DELETE FROM {table} WHERE brief_id IN (SELECT brief_id FROM reload_ids)")
+
+def lookup_id(cur, cache, key, insert, select):
+    """
+    Id de un valor de catálogo (keyword, geo, autor, entidad): lo inserta
+    si no existe y lo recuerda en `cache`, sin un SELECT por aparición.
+    """
+    if key not in cache:
+        cur.execute(insert[0], insert[1])
+        cur.execute(select, key)
+        cache[key] = cur.fetchone()[0]
+    return cache[key]
+
 # ── Carga ──────────────────────────────────────────────────────
-def load(conn, df):
+def load(conn, df, item_type="brief"):
     cur = conn.cursor()
 
-    log(f"Cargando {len(df)} registros...")
+    log(f"Cargando {len(df)} registros...", item_type=item_type, rows=len(df))
+    clear_relations(cur, [b for b in df["brief_id"] if b])
+    kw_ids, geo_ids, author_ids, entity_ids = {}, {}, {}, {}
+
+    # Perfil de completitud: aporte actual de los briefs que se recargan
+    # (se descuenta) y conteos netos {(claves, marcas): briefs} de la carga
+    cur.execute("""
+        SELECT b.brief_id, b.year, b.year_quarter, b.series_raw, b.item_type, b.quality_flags
+        FROM   briefs b JOIN reload_ids r ON r.brief_id = b.brief_id
+        WHERE  b.quality_flags IS NOT NULL
+    """)
+    cols    = [d[0] for d in cur.description]
+    profile = {r[0]: (quality.row_keys(dict(zip(cols, r))), r[-1]) for r in cur.fetchall()}
+    counts  = Counter()
 
     for _, row in df.iterrows():
         bid = row.get("brief_id", "")
@@ -153,22 +281,40 @@ def load(conn, df):
             continue
 
         # ── briefs ──────────────────────────────────────────
+        # año, trimestre y claves desde la fecha, con su precisión: una
+        # fecha "2025" no tiene trimestre (staging viejo lo anclaba a Q1)
+        issued = row.get("issued_date", "")
+        _, year, quarter, year_quarter, keys = parse_issued_date(issued)
+        year  = year if year is not None else row.get("year")
+        itype = row.get("item_type") or item_type
+        flags = quality.row_flags(row)
+        if bid in profile:
+            counts[profile[bid]] -= 1
+        profile[bid] = (quality.row_keys({"year": year, "year_quarter": year_quarter,
+                                          "series_raw": row.get("series_raw", ""),
+                                          "item_type": itype}), flags)
+        counts[profile[bid]] += 1
         cur.execute("""
             INSERT OR REPLACE INTO briefs
             (brief_id, uuid, uri, title, issued_date, year, quarter,
-             year_quarter, type_raw, brief_flag, abstract, language,
-             publisher, series_raw, access_rights, license,
-             cg_number, cg_review_status, last_harvested_at)
-            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+             year_quarter, period_day, period_week, period_month,
+             period_quarter, date_precision, quality_flags, type_raw,
+             brief_flag, abstract, language, publisher, series_raw,
+             access_rights, license, cg_number, cg_review_status,
+             last_harvested_at, item_type, last_modified)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
         """, (
             bid,
             row.get("uuid", ""),
             row.get("uri", ""),
             row.get("title", ""),
-            row.get("issued_date", ""),
-            row.get("year"),
-            row.get("quarter"),
-            row.get("year_quarter", ""),
+            issued,
+            year,
+            quarter,
+            year_quarter,
+            *(keys.get(g) for g in STORED_PERIODS),
+            date_precision(issued),
+            flags,
             row.get("type_raw", ""),
             row.get("brief_flag", 1),
             row.get("abstract", ""),
@@ -180,17 +326,17 @@ def load(conn, df):
             row.get("cg_number", ""),
             row.get("cg_reviewStatus", ""),
             row.get("last_harvested_at", ""),
+            itype,
+            row.get("last_modified", ""),
         ))
 
         # ── keywords ────────────────────────────────────────
         for kw in split_multi(row.get("dcterms_subject", "")):
-            kw_norm = norm(kw)
-            cur.execute("""
+            kid = lookup_id(cur, kw_ids, (kw,), ("""
                 INSERT OR IGNORE INTO keywords (keyword_raw, keyword_norm)
                 VALUES (?, ?)
-            """, (kw, kw_norm))
-            cur.execute("SELECT keyword_id FROM keywords WHERE keyword_raw = ?", (kw,))
-            kid = cur.fetchone()[0]
+            """, (kw, norm(kw))),
+                "SELECT keyword_id FROM keywords WHERE keyword_raw = ?")
             cur.execute("""
                 INSERT OR IGNORE INTO brief_keywords (brief_id, keyword_id)
                 VALUES (?, ?)
@@ -203,16 +349,13 @@ def load(conn, df):
             ("subregion",  "cg_coverage_subregion"),
         ]:
             for val in split_multi(row.get(col, "")):
-                val_norm = norm(val)
-                cur.execute("""
+                gid = lookup_id(cur, geo_ids, (geo_type, val), ("""
                     INSERT OR IGNORE INTO geo (geo_type, value_raw, value_norm)
                     VALUES (?, ?, ?)
-                """, (geo_type, val, val_norm))
-                cur.execute("""
+                """, (geo_type, val, norm(val))), """
                     SELECT geo_id FROM geo
                     WHERE geo_type = ? AND value_raw = ?
-                """, (geo_type, val))
-                gid = cur.fetchone()[0]
+                """)
                 cur.execute("""
                     INSERT OR IGNORE INTO brief_geo (brief_id, geo_id)
                     VALUES (?, ?)
@@ -220,15 +363,12 @@ def load(conn, df):
 
         # ── autores ──────────────────────────────────────────
         for order, author in enumerate(split_multi(row.get("dc_contributor_author", ""))):
-            author_norm = norm(author)
-            cur.execute("""
+            aid = lookup_id(cur, author_ids, (author,), ("""
                 INSERT OR IGNORE INTO authors (author_name_raw, author_name_norm)
                 VALUES (?, ?)
-            """, (author, author_norm))
-            cur.execute("""
+            """, (author, norm(author))), """
                 SELECT author_id FROM authors WHERE author_name_raw = ?
-            """, (author,))
-            aid = cur.fetchone()[0]
+            """)
             cur.execute("""
                 INSERT OR IGNORE INTO brief_authors (brief_id, author_id, author_order)
                 VALUES (?, ?, ?)
@@ -245,17 +385,14 @@ def load(conn, df):
         }
         for etype, col in funding_cols.items():
             for val in split_multi(row.get(col, "")):
-                val_norm = norm(val)
-                cur.execute("""
+                eid = lookup_id(cur, entity_ids, (etype, val), ("""
                     INSERT OR IGNORE INTO funding_entities
                     (entity_type, entity_raw, entity_norm)
                     VALUES (?, ?, ?)
-                """, (etype, val, val_norm))
-                cur.execute("""
+                """, (etype, val, norm(val))), """
                     SELECT entity_id FROM funding_entities
                     WHERE entity_type = ? AND entity_raw = ?
-                """, (etype, val))
-                eid = cur.fetchone()[0]
+                """)
                 cur.execute("""
                     INSERT OR IGNORE INTO brief_funding (brief_id, entity_id)
                     VALUES (?, ?)
@@ -274,21 +411,104 @@ def load(conn, df):
                     VALUES (?, ?, ?)
                 """, (bid, tag_type, val))
 
+    quality.apply(conn, counts)
+    conn.commit()
+
+def backfill_periods(conn):
+    """
+    Recalcula año, trimestre y claves de periodo de los briefs cargados
+    antes de que existiera date_precision: las fechas incompletas tenían
+    las claves finas ancladas al día 1.
+    """
+    rows = conn.execute("""
+        SELECT brief_id, issued_date FROM briefs
+        WHERE  date_precision IS NULL AND issued_date IS NOT NULL AND issued_date != ''
+    """).fetchall()
+    if not rows:
+        return
+    cols = ", ".join(f"{PERIOD_COLUMNS[g]} = ?" for g in STORED_PERIODS)
+    updates = []
+    for bid, issued in rows:
+        _, year, quarter, year_quarter, keys = parse_issued_date(issued)
+        if keys:
+            updates.append((year, quarter, year_quarter,
+                            *(keys[g] for g in STORED_PERIODS), date_precision(issued), bid))
+    conn.executemany(f"""
+        UPDATE briefs SET year = ?, quarter = ?, year_quarter = ?, {cols}, date_precision = ?
+        WHERE  brief_id = ?
+    """, updates)
+    conn.commit()
+    log(f"  Claves de periodo y precisión de fecha recalculadas en {len(updates)} briefs")
+
+# ── Partes de staging ──────────────────────────────────────────
+def pending_parts(conn, slugs=None, reload=False):
+    """
+    Partes de staging (slug, ruta) por cargar: las que no están en
+    staging_loads o cambiaron de tamaño o fecha desde que se cargaron.
+    """
+    loaded = {path: (size, mtime) for path, size, mtime
+              in conn.execute("SELECT path, size, mtime FROM staging_loads")}
+    parts = []
+    for slug, path in item_types.staging_parts(slugs):
+        st = path.stat()
+        if reload or loaded.get(path.as_posix()) != (st.st_size, st.st_mtime):
+            parts.append((slug, path))
+    return parts
+
+def record_part(conn, slug, path, rows):
+    st = path.stat()
+    conn.execute("INSERT OR REPLACE INTO staging_loads VALUES (?, ?, ?, ?, ?, ?)",
+                 (path.as_posix(), slug, rows, st.st_size, st.st_mtime,
+                  datetime.now().isoformat(timespec="seconds")))
     conn.commit()
 
 # ── Main ───────────────────────────────────────────────────────
 def main():
-    log(f"Leyendo: {PARQUET_PATH}")
-    df = pd.read_parquet(PARQUET_PATH)
-    log(f"Registros en staging: {len(df)}")
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--types", nargs="+", default=None,
+                        help="tipos de ítem a cargar (nombres o slugs; por defecto todas "
+                             "las particiones de staging)")
+    parser.add_argument("--reload", action="store_true",
+                        help="recargar todas las partes aunque ya estén cargadas")
+    args  = parser.parse_args()
+    slugs = None if not args.types else [item_types.slug(t) for t in item_types.resolve(args.types)]
+
+    if not item_types.staging_parts(slugs):
+        raise FileNotFoundError("No hay archivos Parquet en data/staging/")
 
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
     log(f"Conectando a: {DB_PATH}")
     conn = sqlite3.connect(DB_PATH)
+    # WAL (queda grabado en el archivo): serve_api.py y los reportes leen
+    # mientras se carga sin bloquear ni ser bloqueados
+    conn.execute("PRAGMA journal_mode = WAL")
+    added = migrate(conn)
     conn.executescript(SCHEMA)
 
-    load(conn, df)
+    # Briefs cargados antes de guardar sus marcas de completitud: su
+    # aporte no se puede descontar del perfil, así que se rehace desde
+    # cero y se recargan todas las partes (olvidarlas en staging_loads
+    # retoma la recarga si la corrida se corta)
+    if ("briefs", "quality_flags") in added:
+        log("⚠ Briefs sin marcas de completitud: se recarga todo el staging")
+        conn.execute("DELETE FROM quality_stats")
+        conn.execute("DELETE FROM staging_loads")
+        conn.commit()
+        slugs = None
+
+    parts = pending_parts(conn, slugs, args.reload)
+    log(f"Partes de staging por cargar: {len(parts)}", parts=len(parts))
+    for slug, path in parts:
+        log(f"Leyendo: {path}", item_type=slug)
+        df = pd.read_parquet(path)
+        with span("load", item_type=slug, rows=len(df)):
+            load(conn, df, slug)
+        record_part(conn, slug, path, len(df))
+    backfill_periods(conn)
+
+    n_stats = conn.execute("SELECT COUNT(*) FROM quality_stats").fetchone()[0]
+    log(f"  Perfil de completitud: {n_stats} filas en quality_stats")
     conn.close()
 
     log("✓ Carga completada.")
@@ -300,7 +520,9 @@ def main():
                   "brief_geo", "brief_funding"]:
         n = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
         log(f"  {table}: {n} filas")
+    for slug, n in conn.execute("SELECT item_type, COUNT(*) FROM briefs GROUP BY item_type"):
+        log(f"  briefs[{slug}]: {n} filas", item_type=slug, rows=n)
     conn.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -2,180 +2,69 @@
 03_explore_db.py
 Primeras consultas exploratorias sobre la base SQLite.
 Responde las 5 preguntas del proyecto con los datos disponibles.
+
+Las consultas están declaradas en reports.py (con parámetros, caché por
+versión de la base y ejecución concurrente). Sin argumentos corre el
+reporte exploratorio completo; con --report, reportes sueltos:
+
+    python scripts/03_explore_db.py --report top --dimension countries --top 5 \\
+        --from 2024Q1 --to 2025Q4 --format json csv
 """
 
-import sqlite3
-import pandas as pd
+import argparse
+import time
 from pathlib import Path
 
-DB_PATH = Path("data/db/cgspace_briefs.sqlite")
+from reports import DIMENSIONS, EXPLORE, FORMATS, REPORTS, WORKERS, export, run_reports, stem, title
+from instrumentation import log
+
+OUT_DIR = Path("outputs/reports")
 
-def q(conn, sql, title=""):
-    """Ejecuta una query y muestra el resultado."""
-    if title:
-        print(f"\n{'='*60}")
-        print(f"  {title}")
-        print(f"{'='*60}")
-    df = pd.read_sql_query(sql, conn)
+def show(i, name, params, df):
+    """Muestra un resultado como antes: título numerado y tabla."""
+    print(f"\n{'='*60}")
+    print(f"  {i}. {title(name, params)}")
+    print(f"{'='*60}")
     print(df.to_string(index=False))
-    return df
 
 def main():
-    conn = sqlite3.connect(DB_PATH)
-
-    # ── 1. Volumen por trimestre ───────────────────────────────
-    q(conn, """
-        SELECT year_quarter,
-               COUNT(*) as n_briefs
-        FROM   briefs
-        WHERE  year_quarter IS NOT NULL
-        GROUP  BY year_quarter
-        ORDER  BY year_quarter
-    """, "1. Briefs por trimestre")
-
-    # ── 2. Top 20 keywords ────────────────────────────────────
-    q(conn, """
-        SELECT k.keyword_norm,
-               COUNT(*) as n_briefs
-        FROM   brief_keywords bk
-        JOIN   keywords k ON bk.keyword_id = k.keyword_id
-        GROUP  BY k.keyword_norm
-        ORDER  BY n_briefs DESC
-        LIMIT  20
-    """, "2. Top 20 keywords")
-
-    # ── 3. Top 15 países ──────────────────────────────────────
-    q(conn, """
-        SELECT g.value_norm as country,
-               COUNT(*) as n_briefs
-        FROM   brief_geo bg
-        JOIN   geo g ON bg.geo_id = g.geo_id
-        WHERE  g.geo_type = 'country'
-        GROUP  BY g.value_norm
-        ORDER  BY n_briefs DESC
-        LIMIT  15
-    """, "3. Top 15 países")
-
-    # ── 4. Top 10 regiones ────────────────────────────────────
-    q(conn, """
-        SELECT g.value_norm as region,
-               COUNT(*) as n_briefs
-        FROM   brief_geo bg
-        JOIN   geo g ON bg.geo_id = g.geo_id
-        WHERE  g.geo_type = 'region'
-        GROUP  BY g.value_norm
-        ORDER  BY n_briefs DESC
-        LIMIT  10
-    """, "4. Top 10 regiones")
-
-    # ── 5. Top iniciativas ────────────────────────────────────
-    q(conn, """
-        SELECT fe.entity_raw,
-               COUNT(*) as n_briefs
-        FROM   brief_funding bf
-        JOIN   funding_entities fe ON bf.entity_id = fe.entity_id
-        WHERE  fe.entity_type = 'initiative'
-        GROUP  BY fe.entity_raw
-        ORDER  BY n_briefs DESC
-        LIMIT  15
-    """, "5. Top iniciativas")
-
-    # ── 6. Top programas/aceleradores ─────────────────────────
-    q(conn, """
-        SELECT fe.entity_raw,
-               COUNT(*) as n_briefs
-        FROM   brief_funding bf
-        JOIN   funding_entities fe ON bf.entity_id = fe.entity_id
-        WHERE  fe.entity_type = 'programAccelerator'
-        GROUP  BY fe.entity_raw
-        ORDER  BY n_briefs DESC
-        LIMIT  10
-    """, "6. Top programas/aceleradores")
-
-    # ── 7. Top donors ─────────────────────────────────────────
-    q(conn, """
-        SELECT fe.entity_raw,
-               COUNT(*) as n_briefs
-        FROM   brief_funding bf
-        JOIN   funding_entities fe ON bf.entity_id = fe.entity_id
-        WHERE  fe.entity_type = 'donor'
-        GROUP  BY fe.entity_raw
-        ORDER  BY n_briefs DESC
-        LIMIT  10
-    """, "7. Top donors")
-
-    # ── 8. Top SDGs ───────────────────────────────────────────
-    q(conn, """
-        SELECT tag_value,
-               COUNT(*) as n_briefs
-        FROM   brief_tags
-        WHERE  tag_type = 'sdg'
-        GROUP  BY tag_value
-        ORDER  BY n_briefs DESC
-    """, "8. SDGs")
-
-    # ── 9. Top impact areas ───────────────────────────────────
-    q(conn, """
-        SELECT tag_value,
-               COUNT(*) as n_briefs
-        FROM   brief_tags
-        WHERE  tag_type = 'impactArea'
-        GROUP  BY tag_value
-        ORDER  BY n_briefs DESC
-    """, "9. Impact areas")
-
-    # ── 10. Keywords por trimestre (top 5 por trimestre) ──────
-    q(conn, """
-        SELECT b.year_quarter,
-               k.keyword_norm,
-               COUNT(*) as n
-        FROM   brief_keywords bk
-        JOIN   briefs b  ON bk.brief_id   = b.brief_id
-        JOIN   keywords k ON bk.keyword_id = k.keyword_id
-        WHERE  b.year_quarter IS NOT NULL
-        GROUP  BY b.year_quarter, k.keyword_norm
-        HAVING COUNT(*) >= 3
-        ORDER  BY b.year_quarter, n DESC
-    """, "10. Keywords por trimestre (frecuencia >= 3)")
-
-    # ── 11. Series más frecuentes ─────────────────────────────
-    q(conn, """
-        SELECT series_raw,
-               COUNT(*) as n_briefs
-        FROM   briefs
-        WHERE  series_raw IS NOT NULL AND series_raw != ''
-        GROUP  BY series_raw
-        ORDER  BY n_briefs DESC
-        LIMIT  15
-    """, "11. Series más frecuentes")
-
-    # ── 12. Completitud de metadatos ──────────────────────────
-    q(conn, """
-        SELECT
-            COUNT(*) as total,
-            ROUND(100.0 * SUM(CASE WHEN abstract     != '' THEN 1 END) / COUNT(*), 1) as pct_abstract,
-            ROUND(100.0 * SUM(CASE WHEN language     != '' THEN 1 END) / COUNT(*), 1) as pct_language,
-            ROUND(100.0 * SUM(CASE WHEN series_raw   != '' THEN 1 END) / COUNT(*), 1) as pct_series,
-            ROUND(100.0 * SUM(CASE WHEN access_rights!= '' THEN 1 END) / COUNT(*), 1) as pct_access
-        FROM briefs
-    """, "12. Completitud general de metadatos")
-
-    q(conn, """
-        SELECT
-            b.year,
-            COUNT(DISTINCT b.brief_id)                                          as total_briefs,
-            COUNT(DISTINCT bg.brief_id)                                         as con_pais,
-            COUNT(DISTINCT bf.brief_id)                                         as con_funding,
-            COUNT(DISTINCT bk.brief_id)                                         as con_keywords
-        FROM      briefs b
-        LEFT JOIN brief_geo      bg ON b.brief_id = bg.brief_id
-        LEFT JOIN brief_funding  bf ON b.brief_id = bf.brief_id
-        LEFT JOIN brief_keywords bk ON b.brief_id = bk.brief_id
-        GROUP BY  b.year
-        ORDER BY  b.year
-    """, "13. Completitud por año")
-
-    conn.close()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--report", nargs="+", choices=list(REPORTS),
+                        help="reportes a correr (por defecto, el exploratorio completo)")
+    parser.add_argument("--dimension", choices=list(DIMENSIONS),
+                        help="dimensión de los reportes top")
+    parser.add_argument("--top", type=int, help="cantidad de filas de los reportes top")
+    parser.add_argument("--from", dest="from_quarter", help="primer trimestre (2024Q1)")
+    parser.add_argument("--to", dest="to_quarter", help="último trimestre (2025Q4)")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=[],
+                        help=f"exportar cada resultado a {OUT_DIR}")
+    parser.add_argument("--no-cache", action="store_true", help="consultar aunque haya caché")
+    parser.add_argument("--quiet", action="store_true", help="no imprimir las tablas")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    # Parámetros de la línea de comandos: solo los que acepta cada reporte
+    given = {k: v for k, v in [("dimension", args.dimension), ("top", args.top),
+                               ("from_quarter", args.from_quarter),
+                               ("to_quarter", args.to_quarter)] if v is not None}
+    base  = EXPLORE if not args.report else [(name, {}) for name in args.report]
+    jobs  = [(name, {**params, **{k: v for k, v in given.items()
+                                  if k in REPORTS[name].defaults}})
+             for name, params in base]
+
+    start   = time.perf_counter()
+    results = run_reports(jobs, workers=args.workers, use_cache=not args.no_cache)
+    elapsed = time.perf_counter() - start
+
+    for i, (name, params, df, _) in enumerate(results, 1):
+        if not args.quiet:
+            show(i, name, params, df)
+        for fmt in args.format:
+            export(df, stem(name, params), fmt, OUT_DIR)
+
+    cached = sum(hit for *_, hit in results)
+    log(f"\n{len(results)} reportes en {elapsed:.2f} s | {cached} desde caché"
+        + (f" | exportados a {OUT_DIR} ({', '.join(args.format)})" if args.format else ""))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
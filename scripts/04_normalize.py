@@ -7,10 +7,9 @@ Corrige: SDGs, impact areas, action areas y keywords duplicadas.
 import sqlite3
 from pathlib import Path
 
-DB_PATH = Path("data/db/cgspace_briefs.sqlite")
+from instrumentation import log
 
-def log(msg):
-    print(msg)
+DB_PATH = Path("data/db/cgspace_briefs.sqlite")
 
 # ── Diccionarios de normalización ──────────────────────────────
 
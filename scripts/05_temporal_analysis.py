@@ -1,260 +1,968 @@
 """
 05_temporal_analysis.py
-Análisis temporal de keywords: identificar términos emergentes,
-en declive, y patrones de co-ocurrencia por trimestre.
+Análisis temporal por dimensión: identificar ítems emergentes, en
+declive, estables y patrones de co-ocurrencia por periodo.
+
+Dimensiones (ver DIMENSIONS): keywords, países, donantes, iniciativas,
+SDGs, impact areas y temas de abstracts (10_abstract_topics.py). Cada
+dimensión se analiza en un proceso del pool (--workers) y escribe su
+propio juego de artefactos.
+
+Con --count-once, los clusters de near-duplicados de 11_dedup_briefs.py
+cuentan como un solo brief.
+
+Con --types, solo los ítems de esos tipos (ver item_types.py): las
+consultas leen su partición por el índice de briefs(item_type, ...) y
+las salidas, artefactos y caché llevan el sufijo __<tipos>
+(keywords_by_quarter__journal_article+report). Sin --types, todos los
+tipos cargados.
+
+La granularidad (trimestre por defecto; también día, semana, mes o año)
+se elige con --granularity y usa las claves enteras de periodo que
+guarda 02_load_sqlite.py.
 """
 
+import argparse
+import json
+import os
 import sqlite3
+import zlib
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from collections import defaultdict
-from datetime import datetime
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from scipy import sparse
+from scipy.special import erfc
 
-DB_PATH = Path("data/db/cgspace_briefs.sqlite")
-OUT_DIR = Path("outputs/tables")
+import item_types
+from artifacts import CountMatrix, register, save_matrix, save_table
+from periods import GRANULARITIES, PERIOD_COLUMNS, PRECISIONS, period_label
+from instrumentation import log, span
+
+DB_PATH  = Path("data/db/cgspace_briefs.sqlite")
+OUT_DIR  = Path("outputs/tables")
+PRODUCER = "05_temporal_analysis"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-def log(msg):
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
-
-# ── 1. Keywords por trimestre ──────────────────────────────────
-def keywords_by_quarter(conn):
-    """
-    Matriz de keywords × trimestres con frecuencias.
-    """
-    log("Construyendo matriz keywords × trimestre...")
-    
-    df = pd.read_sql_query("""
-        SELECT 
-            b.year_quarter,
-            k.keyword_norm,
-            COUNT(*) as n_briefs
-        FROM   brief_keywords bk
-        JOIN   briefs b  ON bk.brief_id = b.brief_id
-        JOIN   keywords k ON bk.keyword_id = k.keyword_id
-        WHERE  b.year_quarter IS NOT NULL
-        GROUP  BY b.year_quarter, k.keyword_norm
-    """, conn)
-    
-    # Pivot: keywords como filas, trimestres como columnas
-    pivot = df.pivot_table(
-        index='keyword_norm',
-        columns='year_quarter',
-        values='n_briefs',
-        fill_value=0
+GRANULARITY = "quarter"
+
+# ── Dimensiones ────────────────────────────────────────────────
+# items: (item_id entero, etiqueta). Varios ids con la misma etiqueta
+#        (p. ej. variantes raw de una keyword) cuentan como un solo ítem.
+# links: (brief_id, item_id) de los briefs que tienen el ítem.
+# label: nombre de la columna índice en los CSV; short: prefijo de los
+#        pares de co-ocurrencia (kw1, kw2...); title: para el reporte.
+Dimension = namedtuple("Dimension", ["items", "links", "label", "short", "title"])
+
+def funding_dimension(entity_type, label, short, title):
+    return Dimension(
+        f"SELECT entity_id, entity_norm FROM funding_entities WHERE entity_type = '{entity_type}'",
+        f"""SELECT bf.brief_id, bf.entity_id AS item_id
+            FROM   brief_funding bf
+            JOIN   funding_entities fe ON fe.entity_id = bf.entity_id
+            WHERE  fe.entity_type = '{entity_type}'""",
+        label, short, title)
+
+def tag_dimension(tag_type, label, short, title):
+    # brief_tags no tiene tabla de valores: el rowid de cada fila hace de
+    # id y la etiqueta agrupa las filas con el mismo valor
+    return Dimension(
+        f"SELECT rowid, tag_value FROM brief_tags WHERE tag_type = '{tag_type}'",
+        f"SELECT brief_id, rowid AS item_id FROM brief_tags WHERE tag_type = '{tag_type}'",
+        label, short, title)
+
+DIMENSIONS = {
+    "keywords": Dimension(
+        "SELECT keyword_id, keyword_norm FROM keywords",
+        "SELECT brief_id, keyword_id AS item_id FROM brief_keywords",
+        "keyword_norm", "kw", "KEYWORDS"),
+    "countries": Dimension(
+        # códigos ISO alpha-3 de 08_normalize_geo.py; texto normalizado si falta
+        "SELECT geo_id, COALESCE(iso_alpha3, value_norm) FROM geo WHERE geo_type = 'country'",
+        """SELECT bg.brief_id, bg.geo_id AS item_id
+           FROM   brief_geo bg
+           JOIN   geo g ON g.geo_id = bg.geo_id
+           WHERE  g.geo_type = 'country'""",
+        "country", "country", "PAÍSES"),
+    "donors":       funding_dimension("donor", "donor", "donor", "DONANTES"),
+    "initiatives":  funding_dimension("initiative", "initiative", "initiative", "INICIATIVAS"),
+    "sdgs":         tag_dimension("sdg", "sdg", "sdg", "SDGs"),
+    "impact_areas": tag_dimension("impactArea", "impact_area", "area", "IMPACT AREAS"),
+    "topics": Dimension(
+        # pesos por brief de 10_abstract_topics.py (ya filtrados por peso mínimo)
+        "SELECT topic_id, label FROM topics",
+        "SELECT brief_id, topic_id AS item_id FROM brief_topics",
+        "topic", "topic", "TEMAS (ABSTRACTS)"),
+}
+
+def available(conn, name):
+    """La dimensión existe en esta base (p. ej. topics requiere correr 10)."""
+    try:
+        conn.execute(f"SELECT 1 FROM ({DIMENSIONS[name].links}) LIMIT 1")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+# Conteo único de near-duplicados (--count-once): solo se leen los briefs
+# canónicos de cada cluster de brief_duplicates, y las relaciones de los
+# duplicados pasan al canónico (el cluster tiene la unión de sus ítems).
+CANONICAL = """b.brief_id NOT IN (SELECT brief_id FROM brief_duplicates
+                                  WHERE  brief_id <> canonical_id)"""
+
+def count_once(dim):
+    return dim._replace(links=f"""
+        SELECT COALESCE(d.canonical_id, l.brief_id) AS brief_id, l.item_id
+        FROM   ({dim.links}) l
+        LEFT JOIN brief_duplicates d ON d.brief_id = l.brief_id""")
+
+def brief_scope(once=False, types=None):
+    """
+    Condiciones extra sobre briefs (alias b), como " AND ...": solo
+    canónicos (`once`) y solo la partición de los tipos `types` (slugs).
+    """
+    conds = ([CANONICAL] if once else []) + ([item_types.sql_filter(types)] if types else [])
+    return "".join(f" AND {c}" for c in conds)
+
+def scoped(name, types=None):
+    """Nombre de salida de un análisis restringido a `types`."""
+    return f"{name}__{item_types.tag(types)}" if types else name
+
+def imprecise_briefs(conn, granularity):
+    """
+    Briefs cuya fecha no alcanza la granularidad (p. ej. solo "2025" a
+    nivel mes): 02 deja su clave en NULL y el análisis no los cuenta.
+    """
+    if "date_precision" not in {r[1] for r in conn.execute("PRAGMA table_info(briefs)")}:
+        return 0
+    ok = [p for p, gs in PRECISIONS.items() if granularity in gs]
+    return conn.execute(f"""
+        SELECT COUNT(*) FROM briefs
+        WHERE  date_precision NOT IN ({', '.join(repr(p) for p in ok)})
+    """).fetchone()[0]
+
+def has_duplicates(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master "
+                        "WHERE name = 'brief_duplicates'").fetchone() is not None
+
+# Caché de resultados por periodo (Parquet + manifest con fingerprints).
+# Subir CACHE_VERSION cuando cambie la forma de calcular los resultados.
+CACHE_DIR     = Path("data/cache/temporal")
+CACHE_VERSION = 3
+MIN_COOCCUR   = 5
+
+# Ventanas de comparación para emergentes / en declive
+EARLY_WINDOW  = 3      # primeros N periodos
+RECENT_WINDOW = 2      # últimos N periodos
+
+# Motor de tendencias
+TREND_WINDOW  = None   # últimos N periodos a analizar (None = todos)
+TREND_ALPHA   = 0.05   # significancia de Mann-Kendall
+TREND_CHUNK   = 4096   # filas por bloque al densificar
+BURST_S       = 2.0    # razón tasa en ráfaga / tasa base (Kleinberg)
+BURST_GAMMA   = 1.0    # costo de entrar en ráfaga (× ln T)
+
+# Incidencia binaria briefs × ítems: X[b, k] = 1 si el brief b tiene
+# el ítem items[k]; brief_p[b] es el índice del periodo del brief
+# en `periods` (claves enteras, ver periods.py).
+Incidence = namedtuple("Incidence", ["X", "brief_p", "items", "periods"])
+
+def period_axis(keys):
+    """Eje continuo de periodos: de la clave mínima a la máxima, sin huecos."""
+    keys = np.asarray(keys, dtype=np.int64)
+    if len(keys) == 0:
+        return keys
+    return np.arange(keys.min(), keys.max() + 1)
+
+def labels_for(periods, granularity):
+    return np.array([period_label(granularity, k) for k in periods], dtype=str)
+
+# ── 1. Ítems por periodo ───────────────────────────────────────
+def brief_item_incidence(conn, dim, periods=None, granularity=GRANULARITY, once=False,
+                         types=None):
+    """
+    Lee la relación brief–ítem de la dimensión como enteros (rowid del
+    brief e item_id) y la codifica en una matriz de incidencia dispersa.
+    Las etiquetas se leen una sola vez de la tabla de ítems.
+    Si se pasan `periods` (claves enteras), solo esos periodos; si no,
+    todos, sobre un eje continuo (los periodos sin briefs quedan en cero).
+    Con `once`, solo briefs canónicos (ver count_once); con `types`,
+    solo esa partición.
+    """
+    log(f"Leyendo incidencia briefs × {dim.label}...")
+    
+    col = PERIOD_COLUMNS[granularity]
+    where, params = f"WHERE b.{col} IS NOT NULL", ()
+    if periods is not None:
+        where += f" AND b.{col} IN ({','.join('?' * len(periods))})"
+        params = tuple(int(p) for p in periods)
+    where += brief_scope(once, types)
+    
+    # Ítems: item_id → índice de la etiqueta (orden alfabético)
+    it_rows  = conn.execute(dim.items).fetchall()
+    it_ids   = np.array([r[0] for r in it_rows], dtype=np.int64)
+    items, it_label_idx = np.unique(np.array([r[1] or '' for r in it_rows], dtype=str),
+                                    return_inverse=True)
+    it_code  = np.full(it_ids.max() + 1 if len(it_ids) else 1, -1, dtype=np.int64)
+    it_code[it_ids] = it_label_idx
+    
+    # Briefs: rowid → fila de la matriz, con su periodo
+    b_rows   = np.array(conn.execute(f"SELECT b.rowid, b.{col} FROM briefs b {where}",
+                                     params).fetchall(), dtype=np.int64).reshape(-1, 2)
+    b_rowids = b_rows[:, 0]
+    periods  = (np.unique(b_rows[:, 1]) if periods is not None
+                else period_axis(b_rows[:, 1]))
+    brief_p  = np.searchsorted(periods, b_rows[:, 1])
+    b_pos    = np.full(b_rowids.max() + 1 if len(b_rowids) else 1, -1, dtype=np.int64)
+    b_pos[b_rowids] = np.arange(len(b_rowids))
+    
+    pairs = np.array(conn.execute(f"""
+        SELECT b.rowid, l.item_id
+        FROM   ({dim.links}) l
+        JOIN   briefs b ON l.brief_id = b.brief_id
+        {where}
+    """, params).fetchall(), dtype=np.int64).reshape(-1, 2)
+    pairs = pairs[it_code[pairs[:, 1]] >= 0]
+    
+    X = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.int32),
+         (b_pos[pairs[:, 0]], it_code[pairs[:, 1]])),
+        shape=(len(b_rowids), len(items))
+    )
+    X.data[:] = 1   # ids distintos con la misma etiqueta cuentan una vez
+    
+    log(f"  {X.shape[0]} briefs × {X.shape[1]} {dim.label} ({X.nnz} relaciones)")
+    
+    return Incidence(X, brief_p, items, periods)
+
+def items_by_period(inc, granularity=GRANULARITY):
+    """
+    Matriz dispersa de ítems × periodos con frecuencias:
+    Xᵀ · P, con P la indicadora brief × periodo.
+    """
+    log("Construyendo matriz ítems × periodo...")
+    
+    P = sparse.csr_matrix(
+        (np.ones(len(inc.brief_p), dtype=np.int32),
+         (np.arange(len(inc.brief_p)), inc.brief_p)),
+        shape=(len(inc.brief_p), len(inc.periods))
     )
+    counts = (inc.X.T @ P).tocsr()
     
-    # Ordenar columnas por trimestre
-    quarters = sorted(pivot.columns)
-    pivot = pivot[quarters]
+    # Descartar ítems sin ninguna mención en el periodo leído
+    used   = np.flatnonzero(counts.getnnz(axis=1))
+    counts = counts[used]
     
-    log(f"  Matriz: {len(pivot)} keywords × {len(quarters)} trimestres")
+    log(f"  Matriz: {counts.shape[0]} ítems × {len(inc.periods)} periodos "
+        f"({counts.nnz} celdas no nulas)")
     
-    return pivot
+    return CountMatrix(counts, inc.items[used], inc.periods,
+                       labels_for(inc.periods, granularity))
+
+def counts_long(m):
+    """CountMatrix → formato largo (period, item, n_briefs)."""
+    coo = m.counts.tocoo()
+    return pd.DataFrame({
+        'period'  : m.periods[coo.col],
+        'item'    : m.items[coo.row],
+        'n_briefs': coo.data,
+    })
+
+def count_matrix(df, periods, granularity=GRANULARITY):
+    """Formato largo → CountMatrix sobre el eje continuo que cubre `periods`."""
+    items, it_idx = np.unique(df['item'].to_numpy(dtype=str), return_inverse=True)
+    periods = period_axis(periods)
+    counts = sparse.csr_matrix(
+        (df['n_briefs'].to_numpy(dtype=np.int32),
+         (it_idx, np.searchsorted(periods, df['period'].to_numpy(dtype=np.int64)))),
+        shape=(len(items), len(periods))
+    )
+    return CountMatrix(counts, items, periods, labels_for(periods, granularity))
+
+# ── Reducciones sobre la matriz ────────────────────────────────
+def window_sum(m, cols):
+    """Suma por ítem sobre un subconjunto de columnas (producto matriz × vector)."""
+    mask = np.zeros(len(m.periods), dtype=np.int32)
+    mask[cols] = 1
+    return m.counts @ mask
+
+def matrix_frame(m, rows=None):
+    """DataFrame denso de las filas pedidas (todas si rows es None)."""
+    counts = m.counts if rows is None else m.counts[rows]
+    items  = m.items if rows is None else m.items[rows]
+    return pd.DataFrame(
+        counts.toarray(),
+        index=pd.Index(items, name='item'),
+        columns=list(m.labels)
+    )
+
+def select_rows(m, mask, metrics, sort_by):
+    """
+    Densifica solo las filas seleccionadas y agrega las métricas
+    derivadas como columnas, ordenadas por `sort_by` descendente.
+    """
+    rows = np.flatnonzero(mask)
+    df = matrix_frame(m, rows)
+    for name, values in metrics.items():
+        df[name] = values[rows]
+    return df.sort_values(sort_by, ascending=False, kind='stable')
 
 # ── 2. Identificar emergentes ──────────────────────────────────
-def identify_emerging(pivot, min_recent=5, min_growth=3):
+def identify_emerging(m, min_recent=5, min_growth=3,
+                      early=EARLY_WINDOW, recent=RECENT_WINDOW):
     """
-    Keywords emergentes: ausentes en primeros trimestres,
-    frecuentes en últimos trimestres.
+    Ítems emergentes: ausentes en primeros periodos,
+    frecuentes en últimos periodos.
     
     Criterios:
-    - Frecuencia en últimos 2 trimestres >= min_recent
-    - Frecuencia en primeros 3 trimestres < min_growth
+    - Frecuencia en últimos `recent` periodos >= min_recent
+    - Frecuencia en primeros `early` periodos < min_growth
     """
-    log("\nIdentificando keywords emergentes...")
+    log("\nIdentificando emergentes...")
     
-    quarters = list(pivot.columns)
-    if len(quarters) < 5:
-        log("  ⚠ Insuficientes trimestres para análisis de emergencia")
+    if len(m.periods) < early + recent:
+        log("  ⚠ Insuficientes periodos para análisis de emergencia")
         return pd.DataFrame()
     
-    recent = quarters[-2:]      # últimos 2 trimestres
-    early  = quarters[:3]       # primeros 3 trimestres
-    
-    pivot['recent_freq'] = pivot[recent].sum(axis=1)
-    pivot['early_freq']  = pivot[early].sum(axis=1)
-    pivot['growth']      = pivot['recent_freq'] - pivot['early_freq']
+    recent_freq = window_sum(m, slice(-recent, None))
+    early_freq  = window_sum(m, slice(None, early))
+    growth      = recent_freq - early_freq
     
-    emerging = pivot[
-        (pivot['recent_freq'] >= min_recent) &
-        (pivot['early_freq'] < min_growth)
-    ].copy()
-    
-    emerging = emerging.sort_values('growth', ascending=False)
+    emerging = select_rows(
+        m,
+        (recent_freq >= min_recent) & (early_freq < min_growth),
+        {'recent_freq': recent_freq, 'early_freq': early_freq, 'growth': growth},
+        'growth'
+    )
     
-    log(f"  Keywords emergentes: {len(emerging)}")
+    log(f"  Emergentes: {len(emerging)}")
     
     return emerging
 
 # ── 3. Identificar en declive ──────────────────────────────────
-def identify_declining(pivot, min_early=5, max_recent=2):
+def identify_declining(m, min_early=5, max_recent=2,
+                       early=EARLY_WINDOW, recent=RECENT_WINDOW):
     """
-    Keywords en declive: frecuentes en primeros trimestres,
-    raras en últimos trimestres.
+    Ítems en declive: frecuentes en primeros periodos,
+    raras en últimos periodos.
     """
-    log("\nIdentificando keywords en declive...")
+    log("\nIdentificando en declive...")
     
-    quarters = list(pivot.columns)
-    if len(quarters) < 5:
+    if len(m.periods) < early + recent:
         return pd.DataFrame()
     
-    recent = quarters[-2:]
-    early  = quarters[:3]
-    
-    if 'recent_freq' not in pivot.columns:
-        pivot['recent_freq'] = pivot[recent].sum(axis=1)
-        pivot['early_freq']  = pivot[early].sum(axis=1)
-        pivot['decline']     = pivot['early_freq'] - pivot['recent_freq']
-    else:
-        pivot['decline'] = pivot['early_freq'] - pivot['recent_freq']
-    
-    declining = pivot[
-        (pivot['early_freq'] >= min_early) &
-        (pivot['recent_freq'] <= max_recent)
-    ].copy()
+    recent_freq = window_sum(m, slice(-recent, None))
+    early_freq  = window_sum(m, slice(None, early))
+    decline     = early_freq - recent_freq
     
-    declining = declining.sort_values('decline', ascending=False)
+    declining = select_rows(
+        m,
+        (early_freq >= min_early) & (recent_freq <= max_recent),
+        {'recent_freq': recent_freq, 'early_freq': early_freq, 'decline': decline},
+        'decline'
+    )
     
-    log(f"  Keywords en declive: {len(declining)}")
+    log(f"  En declive: {len(declining)}")
     
     return declining
 
-# ── 4. Co-ocurrencia por trimestre ─────────────────────────────
-def cooccurrence_by_quarter(conn, quarter, min_freq=3):
-    """
-    Pares de keywords que co-ocurren en el mismo brief
-    para un trimestre específico.
+# ── 4. Co-ocurrencia por periodo ───────────────────────────────
+def cooccurrence_by_period(inc, min_freq=3):
     """
-    log(f"\nCalculando co-ocurrencia para {quarter}...")
+    Pares de ítems que co-ocurren en el mismo brief, para todos los
+    periodos en una sola pasada.
     
-    df = pd.read_sql_query("""
-        SELECT 
-            bk1.brief_id,
-            k1.keyword_norm as kw1,
-            k2.keyword_norm as kw2
-        FROM   brief_keywords bk1
-        JOIN   brief_keywords bk2 ON bk1.brief_id = bk2.brief_id
-        JOIN   keywords k1 ON bk1.keyword_id = k1.keyword_id
-        JOIN   keywords k2 ON bk2.keyword_id = k2.keyword_id
-        JOIN   briefs b ON bk1.brief_id = b.brief_id
-        WHERE  b.year_quarter = ?
-          AND  k1.keyword_norm < k2.keyword_norm
-    """, conn, params=(quarter,))
-    
-    # Contar pares
-    pairs = df.groupby(['kw1', 'kw2']).size().reset_index(name='n_cooccur')
-    pairs = pairs[pairs['n_cooccur'] >= min_freq]
-    pairs = pairs.sort_values('n_cooccur', ascending=False)
+    Cada ítem se replica por periodo (columna q·K + k) y un único
+    producto XᵀX produce una matriz diagonal por bloques: el bloque q
+    tiene los conteos de pares del periodo q y su diagonal la
+    frecuencia de cada ítem. Se agrega PMI y Jaccard por par.
+    """
+    log("\nCalculando co-ocurrencia por periodo...")
     
-    log(f"  Pares con freq >= {min_freq}: {len(pairs)}")
+    X, brief_p, items, periods = inc
+    K = len(items)
     
-    return pairs
+    # Apilar: desplazar las columnas de cada brief al bloque de su periodo
+    X = X.tocoo()
+    stacked = sparse.csr_matrix(
+        (X.data, (X.row, brief_p[X.row] * K + X.col)),
+        shape=(X.shape[0], len(periods) * K)
+    )
+    C = (stacked.T @ stacked).tocsr()
+    
+    # Frecuencia de cada ítem y briefs por periodo
+    kw_freq   = C.diagonal()
+    n_briefs  = np.bincount(brief_p, minlength=len(periods))
+    
+    pairs = sparse.triu(C, k=1).tocoo()
+    keep  = pairs.data >= min_freq
+    row, col, n_ab = pairs.row[keep], pairs.col[keep], pairs.data[keep]
+    
+    n_a, n_b = kw_freq[row], kw_freq[col]
+    q        = row // K
+    
+    out = pd.DataFrame({
+        'period'      : periods[q],
+        'item1'       : items[row % K],
+        'item2'       : items[col % K],
+        'n_cooccur'   : n_ab,
+        'pmi'         : np.log(n_ab * n_briefs[q] / (n_a * n_b)),
+        'jaccard'     : n_ab / (n_a + n_b - n_ab),
+    })
+    out = out.sort_values(['period', 'n_cooccur', 'item1', 'item2'],
+                          ascending=[True, False, True, True],
+                          ignore_index=True)
+    
+    log(f"  {len(periods)} periodos | pares con freq >= {min_freq}: {len(out)}")
+    
+    return out
 
-# ── 5. Top keywords estables ───────────────────────────────────
-def identify_stable(pivot, min_avg=10):
+# ── Caché incremental por periodo ──────────────────────────────
+# Número de handle de b (10568/123 → 123) y mezcla entera de dos valores
+# en SQL puro (sin desbordar 2^63): cambia si un ítem pasa de un brief a
+# otro del mismo periodo, algo que las sumas de ids no ven
+HANDLE = "CAST(substr(b.brief_id, instr(b.brief_id, '/') + 1) AS INTEGER)"
+
+def sql_mix(x, y):
+    return f"((({x}) % 1000003 * 1000033 + ({y})) % 2147483647 * 48271 % 2147483647)"
+
+def label_hash(label):
+    return zlib.crc32((label or "").encode("utf-8"))
+
+def period_fingerprints(conn, dim, granularity=GRANULARITY, once=False, types=None):
     """
-    Keywords estables: presentes consistentemente a lo largo
-    de todos los trimestres con frecuencia alta.
+    Huella de los datos de cada periodo para una dimensión: briefs y
+    suma de sus números de handle (entra o sale un brief), relaciones
+    brief–ítem y una suma de hashes (brief, ítem) de cada relación
+    (04_normalize reasigna keywords, un ítem cambia de brief) y una de
+    hashes (ítem, etiqueta) de los ítems presentes: el caché guarda
+    etiquetas, así que renombrar un ítem (temas de 10, países de 08)
+    invalida los periodos donde aparece.
+    No se usa last_harvested_at: 01 re-cosecha toda la ventana y 02
+    re-sella cada fila en cada corrida, lo que invalidaría todo a diario.
     """
-    log("\nIdentificando keywords estables...")
-    
-    pivot['avg_freq'] = pivot.mean(axis=1)
-    pivot['cv']       = pivot.std(axis=1) / (pivot['avg_freq'] + 1e-10)
-    
-    stable = pivot[pivot['avg_freq'] >= min_avg].copy()
-    stable = stable.sort_values('avg_freq', ascending=False)
+    conn.create_function("label_hash", 1, label_hash, deterministic=True)
+    col   = PERIOD_COLUMNS[granularity]
+    where = f"WHERE b.{col} IS NOT NULL" + brief_scope(once, types)
+    # Consultas agrupadas separadas en vez de un LEFT JOIN contra la
+    # subconsulta de relaciones: el join desde las relaciones usa el
+    # índice de briefs
+    briefs = conn.execute(f"""
+        SELECT b.{col}, COUNT(*), SUM({HANDLE})
+        FROM   briefs b
+        {where}
+        GROUP  BY b.{col}
+    """).fetchall()
+    links = {p: rest for p, *rest in conn.execute(f"""
+        SELECT b.{col}, COUNT(l.item_id), SUM(l.item_id), SUM({sql_mix(HANDLE, 'l.item_id')})
+        FROM   ({dim.links}) l
+        JOIN   briefs b ON b.brief_id = l.brief_id
+        {where}
+        GROUP  BY b.{col}
+    """)}
+    labels = dict(conn.execute(f"""
+        WITH it(item_id, label) AS ({dim.items}),
+             present AS (SELECT DISTINCT b.{col} AS period, l.item_id
+                         FROM   ({dim.links}) l
+                         JOIN   briefs b ON b.brief_id = l.brief_id
+                         {where})
+        SELECT present.period, SUM({sql_mix('label_hash(it.label)', 'present.item_id')})
+        FROM   present
+        JOIN   it ON it.item_id = present.item_id
+        GROUP  BY present.period
+    """))
+    return {str(p): "|".join(str(v) for v in (n_briefs, *links.get(p, (0, 0, 0)),
+                                               labels.get(p, 0), handles))
+            for p, n_briefs, handles in briefs}
+
+def cache_paths(cache_dir, period):
+    return (cache_dir / f"counts_{period}.parquet",
+            cache_dir / f"cooccurrence_{period}.parquet")
+
+def read_manifest(cache_dir, min_freq):
+    """Manifest del caché; vacío si no existe o si cambió versión/parámetros."""
+    path = cache_dir / "manifest.json"
+    if path.exists():
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        if manifest.get("version") == CACHE_VERSION and manifest.get("min_freq") == min_freq:
+            return manifest
+    return {"version": CACHE_VERSION, "min_freq": min_freq, "periods": {}}
+
+def write_manifest(cache_dir, manifest):
+    path = cache_dir / "manifest.json"
+    tmp  = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+def incremental_results(conn, name, granularity=GRANULARITY, min_freq=MIN_COOCCUR, once=False,
+                        types=None):
+    """
+    Conteos y co-ocurrencia de todos los periodos de la dimensión
+    `name`, recalculando solo los periodos nuevos o cuya huella cambió;
+    el resto se lee del caché. Devuelve (CountMatrix, co-ocurrencia en
+    formato largo). Con `once` o `types` usa un caché propio. Sin
+    periodos con datos (tipo sin filas, base vacía) devuelve (None, None).
+    """
+    dim       = count_once(DIMENSIONS[name]) if once else DIMENSIONS[name]
+    cache_dir = CACHE_DIR / name / scoped(f"{granularity}_once" if once else granularity, types)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    fingerprints = period_fingerprints(conn, dim, granularity, once, types)
+    manifest     = read_manifest(cache_dir, min_freq)
+    cached       = manifest["periods"]
+    
+    stale = sorted(int(p) for p, fp in fingerprints.items()
+                   if cached.get(p) != fp
+                   or not all(path.exists() for path in cache_paths(cache_dir, p)))
+    log(f"Caché temporal ({scoped(name, types)}, {granularity}): "
+        f"{len(fingerprints) - len(stale)} periodos vigentes | "
+        f"{len(stale)} a recalcular "
+        f"{[period_label(granularity, p) for p in stale] if stale else ''}")
+    
+    if stale:
+        inc  = brief_item_incidence(conn, dim, stale, granularity, once, types)
+        long = counts_long(items_by_period(inc, granularity))
+        cooc = cooccurrence_by_period(inc, min_freq=min_freq)
+        for p in stale:
+            counts_path, cooc_path = cache_paths(cache_dir, p)
+            long[long['period'] == p].to_parquet(counts_path, index=False)
+            cooc[cooc['period'] == p].to_parquet(cooc_path, index=False)
+            cached[str(p)] = fingerprints[str(p)]
+    
+    # Periodos que ya no están en la base (p. ej. fuera de ventana)
+    for p in set(cached) - set(fingerprints):
+        for path in cache_paths(cache_dir, p):
+            path.unlink(missing_ok=True)
+        del cached[p]
+    
+    write_manifest(cache_dir, manifest)
+    
+    periods = sorted(int(p) for p in fingerprints)
+    if not periods:
+        log(f"  sin datos para {name}/{item_types.tag(types) or 'todos'}")
+        return None, None
+    long = pd.concat([pd.read_parquet(cache_paths(cache_dir, p)[0]) for p in periods],
+                     ignore_index=True)
+    cooc = pd.concat([pd.read_parquet(cache_paths(cache_dir, p)[1]) for p in periods],
+                     ignore_index=True)
+    
+    m = count_matrix(long, periods, granularity)
+    log(f"  Matriz: {len(m.items)} {dim.label} × {len(m.periods)} periodos "
+        f"({m.counts.nnz} celdas no nulas)")
+    
+    return m, cooc
+
+# ── 5. Ítems estables ──────────────────────────────────────────
+def identify_stable(m, min_avg=10):
+    """
+    Ítems estables: presentes consistentemente a lo largo
+    de todos los periodos con frecuencia alta.
+    """
+    log("\nIdentificando estables...")
+    
+    # Media y desviación estándar muestral por fila sin densificar:
+    # var = (Σx² − n·media²) / (n − 1)
+    n        = len(m.periods)
+    avg_freq = np.asarray(m.counts.sum(axis=1)).ravel() / n
+    sq_sum   = np.asarray(m.counts.multiply(m.counts).sum(axis=1)).ravel()
+    var      = np.maximum(sq_sum - n * avg_freq ** 2, 0) / max(n - 1, 1)
+    cv       = np.sqrt(var) / (avg_freq + 1e-10)
+    
+    stable = select_rows(
+        m,
+        avg_freq >= min_avg,
+        {'avg_freq': avg_freq, 'cv': cv},
+        'avg_freq'
+    )
     
-    log(f"  Keywords estables (freq promedio >= {min_avg}): {len(stable)}")
+    log(f"  Estables (freq promedio >= {min_avg}): {len(stable)}")
     
     return stable
 
-# ── 6. Guardar outputs ─────────────────────────────────────────
-def save_outputs(pivot, emerging, declining, stable):
+# ── 6. Tendencias estadísticas ─────────────────────────────────
+def briefs_per_period(conn, granularity=GRANULARITY, once=False, types=None):
+    """Total de briefs por periodo (denominador de las ráfagas)."""
+    col = PERIOD_COLUMNS[granularity]
+    return pd.Series(dict(conn.execute(f"""
+        SELECT b.{col}, COUNT(*)
+        FROM   briefs b
+        WHERE  b.{col} IS NOT NULL{brief_scope(once, types)}
+        GROUP  BY b.{col}
+    """).fetchall()), dtype=float)
+
+def mann_kendall(Y):
     """
-    Guarda todos los resultados como CSV.
+    Mann-Kendall por fila de un bloque denso (filas × T).
+    S = Σ_{a<b} sign(y_b − y_a) sin armar la matriz T × T, con memoria
+    O(filas × T) aun con T de miles de días. Los conteos son enteros
+    chicos: si hay menos valores distintos que periodos, por valor v,
+    S += Σ_{b: y_b = v} (#{a<b: y_a < v} − #{a<b: y_a > v}) con sumas
+    acumuladas; si no, por desfase k = b − a. La varianza corrige
+    empates con Σ_grupos t(t−1)(2t+5), sacando los grupos de valores
+    iguales de las corridas de cada fila ordenada. p bilateral por
+    aproximación normal.
     """
-    log("\nGuardando outputs...")
-    
-    # Matriz completa
-    pivot.to_csv(OUT_DIR / "keywords_by_quarter.csv")
-    log(f"  ✓ {OUT_DIR}/keywords_by_quarter.csv")
-    
-    # Emergentes
-    if not emerging.empty:
-        emerging.to_csv(OUT_DIR / "keywords_emerging.csv")
-        log(f"  ✓ {OUT_DIR}/keywords_emerging.csv")
-    
-    # En declive
-    if not declining.empty:
-        declining.to_csv(OUT_DIR / "keywords_declining.csv")
-        log(f"  ✓ {OUT_DIR}/keywords_declining.csv")
+    n, T = Y.shape
+    Y    = np.rint(Y).astype(np.int32)                # conteos enteros
+    S    = np.zeros(n, dtype=np.int64)
+    vmax = int(Y.max()) if Y.size else 0
+    if Y.size and Y.min() >= 0 and vmax + 1 < T // 2:
+        before = np.arange(T)                         # posiciones previas a b
+        lt     = np.zeros((n, T), dtype=np.int32)     # #{a<b: y_a < v}
+        for v in range(vmax + 1):
+            at  = Y == v
+            le  = np.cumsum(at, axis=1, dtype=np.int32) - at + lt   # #{a<b: y_a <= v}
+            S  += np.where(at, lt - (before - le), 0).sum(axis=1)
+            lt  = le
+    else:
+        for k in range(1, T):
+            d  = Y[:, k:] - Y[:, :-k]
+            S += np.count_nonzero(d > 0, axis=1) - np.count_nonzero(d < 0, axis=1)
+    
+    srt   = np.sort(Y, axis=1)
+    new   = np.ones((n, T), dtype=bool)               # inicio de cada grupo de empates
+    new[:, 1:] = srt[:, 1:] != srt[:, :-1]
+    t     = np.bincount(np.cumsum(new.ravel()) - 1).astype(np.float64)
+    row   = np.repeat(np.arange(n), new.sum(axis=1))
+    ties  = np.bincount(row, weights=t * (t - 1) * (2 * t + 5), minlength=n)
+    var   = (T * (T - 1) * (2 * T + 5) - ties) / 18
+    
+    z = np.zeros(len(S))
+    ok = var > 0
+    z[ok] = (S[ok] - np.sign(S[ok])) / np.sqrt(var[ok])
+    
+    tau = S / (T * (T - 1) / 2)
+    p   = erfc(np.abs(z) / np.sqrt(2))
+    return tau, p
+
+def kleinberg_bursts(R, d, s=BURST_S, gamma=BURST_GAMMA):
+    """
+    Autómata de dos estados de Kleinberg (versión binomial) resuelto con
+    Viterbi para todas las filas a la vez; el bucle es sobre periodos.
+    R: conteos (filas × T), d: briefs por periodo (T).
+    Devuelve (peso total de ráfaga, periodos en ráfaga, ráfaga activa al final).
+    """
+    n_rows, T = R.shape
+    eps = 1e-12
+    p0  = np.clip(R.sum(axis=1) / max(d.sum(), 1), eps, 1 - eps)
+    p1  = np.clip(s * p0, eps, 1 - eps)
+    
+    def cost(p, t):
+        return -(R[:, t] * np.log(p) + (d[t] - R[:, t]) * np.log(1 - p))
+    
+    up    = gamma * np.log(T)
+    c0    = cost(p0, 0)
+    c1    = cost(p1, 0) + up
+    back1 = np.zeros((n_rows, T), dtype=bool)   # estado previo al estado 1
+    back0 = np.zeros((n_rows, T), dtype=bool)   # estado previo al estado 0
+    for t in range(1, T):
+        from0, from1 = c0 + up, c1
+        back1[:, t] = from1 < from0
+        back0[:, t] = c1 < c0                  # bajar no cuesta
+        c0, c1 = np.minimum(c0, c1) + cost(p0, t), np.minimum(from0, from1) + cost(p1, t)
+    
+    # Backtracking vectorizado
+    state = c1 < c0
+    states = np.zeros((n_rows, T), dtype=bool)
+    for t in range(T - 1, -1, -1):
+        states[:, t] = state
+        state = np.where(state, back1[:, t], back0[:, t])
+    
+    weight = np.zeros(n_rows)
+    for t in range(T):
+        weight += np.where(states[:, t], cost(p0, t) - cost(p1, t), 0)
+    
+    return weight, states.sum(axis=1), states[:, -1]
+
+def trend_scores(m, totals, window=TREND_WINDOW, chunk=TREND_CHUNK):
+    """
+    Para cada ítem, sobre los últimos `window` periodos: pendiente de
+    mínimos cuadrados, tau y p de Mann-Kendall y ráfagas de Kleinberg.
+    Todo vectorizado sobre la matriz; la densificación es por bloques
+    de `chunk` filas para acotar memoria.
+    """
+    log("\nCalculando tendencias (pendiente, Mann-Kendall, ráfagas)...")
+    
+    cols    = slice(-window, None) if window else slice(None)
+    periods = m.periods[cols]
+    labels  = m.labels[cols]
+    Y       = m.counts[:, cols].tocsr()
+    T       = len(periods)
+    if T < 3:
+        log("  ⚠ Insuficientes periodos para tendencias")
+        return pd.DataFrame()
     
-    # Estables
-    if not stable.empty:
-        stable[['avg_freq', 'cv']].to_csv(OUT_DIR / "keywords_stable.csv")
-        log(f"  ✓ {OUT_DIR}/keywords_stable.csv")
+    # Pendiente OLS contra t = 0..T−1: Σ(t − t̄)·y / Σ(t − t̄)²
+    tc    = np.arange(T) - (T - 1) / 2
+    slope = (Y @ tc) / (tc ** 2).sum()
+    total = np.asarray(Y.sum(axis=1)).ravel()
+    d     = totals.reindex(periods).fillna(0).to_numpy(dtype=float)
+    
+    tau    = np.empty(Y.shape[0])
+    p      = np.empty(Y.shape[0])
+    weight = np.empty(Y.shape[0])
+    n_burst = np.empty(Y.shape[0], dtype=np.int64)
+    active  = np.empty(Y.shape[0], dtype=bool)
+    for start in range(0, Y.shape[0], chunk):
+        rows  = slice(start, start + chunk)
+        block = Y[rows].toarray().astype(np.float32)
+        tau[rows], p[rows] = mann_kendall(block)
+        weight[rows], n_burst[rows], active[rows] = kleinberg_bursts(block, d)
+    
+    trends = pd.DataFrame({
+        'total'        : total,
+        'slope'        : slope,
+        'mk_tau'       : tau,
+        'mk_p'         : p,
+        'burst_weight' : weight,
+        'burst_periods': n_burst,
+        'burst_active' : active,
+    }, index=pd.Index(m.items, name='item'))
+    trends = trends[trends['total'] > 0]
+    
+    log(f"  {len(trends)} ítems × {T} periodos ({labels[0]} → {labels[-1]})")
+    
+    return trends
+
+def identify_trending(trends, alpha=TREND_ALPHA, min_total=5):
+    """
+    Tendencias monótonas significativas (Mann-Kendall p < alpha),
+    separadas en crecientes y decrecientes, ordenadas por pendiente.
+    """
+    if trends.empty:
+        return trends, trends
+    sig = trends[(trends['mk_p'] < alpha) & (trends['total'] >= min_total)]
+    rising  = sig[sig['mk_tau'] > 0].sort_values('slope', ascending=False, kind='stable')
+    falling = sig[sig['mk_tau'] < 0].sort_values('slope', ascending=True, kind='stable')
+    log(f"  Tendencia creciente: {len(rising)} | decreciente: {len(falling)} (p < {alpha})")
+    return rising, falling
+
+# ── 7. Guardar outputs ─────────────────────────────────────────
+def out_path(stem, granularity, types=None):
+    """Nombre de salida; las granularidades distintas de trimestre llevan sufijo."""
+    suffix = "" if granularity == "quarter" else f"_{granularity}"
+    return OUT_DIR / f"{scoped(stem + suffix, types)}.csv"
+
+def metrics_only(df, m):
+    """Quita las columnas de conteo por periodo (ya están en la matriz)."""
+    return df.drop(columns=[c for c in m.labels if c in df.columns])
 
-# ── 7. Reporte de hallazgos ────────────────────────────────────
-def report(emerging, declining, stable, pivot):
+def save_outputs(name, m, cooccur, emerging, declining, stable, trends,
+                 granularity=GRANULARITY, once=False, types=None):
     """
-    Reporte narrativo de hallazgos.
+    Guarda los resultados de una dimensión como artefactos binarios
+    (matriz .npz y métricas en Parquet, ver artifacts.py) y exporta CSV
+    legibles. Los artefactos se registran desde el proceso principal:
+    devuelve sus entradas de manifest.
     """
+    log(f"\nGuardando outputs ({name})...")
+    dim  = DIMENSIONS[name]
+    meta = {"granularity": granularity, "dimension": name, "count_once": once,
+            **({"item_types": sorted(types)} if types else {})}
+    sfx  = scoped("", types)
+    
+    # Artefactos: la matriz de conteos y cada tabla de métricas por separado
+    entries = save_matrix(f"{name}_by_{granularity}{sfx}", m, PRODUCER, defer=True, **meta)
+    tables  = [("emerging",  emerging),
+               ("declining", declining),
+               ("stable",    stable),
+               ("trends",    trends)]
+    for stem, df in tables:
+        entries.update(save_table(f"{name}_{stem}_{granularity}{sfx}", metrics_only(df, m),
+                                  PRODUCER, defer=True, **meta))
+    # Co-ocurrencia con la clave entera del periodo
+    entries.update(save_table(f"{name}_cooccurrence_{granularity}{sfx}",
+                              cooccur.reset_index(drop=True), PRODUCER, defer=True, **meta))
+    log(f"  ✓ artefactos: {name}_by_{granularity}{sfx} + {len(tables) + 1} tablas")
+    
+    # Exportación CSV: la matriz en formato largo, solo celdas no nulas (con
+    # días o semanas la versión densa no cabe en memoria); emergentes y
+    # declive con sus conteos
+    path = OUT_DIR / f"{name}_by_{granularity}{sfx}.csv"
+    coo  = m.counts.tocoo()
+    pd.DataFrame({dim.label: m.items[coo.row], 'period': m.labels[coo.col],
+                  'n_briefs': coo.data}).to_csv(path, index=False)
+    log(f"  ✓ {path}")
+    
+    for stem, df in [("emerging",  emerging),
+                     ("declining", declining),
+                     ("stable",    metrics_only(stable, m)),
+                     ("trends",    trends)]:
+        if not df.empty:
+            path = out_path(f"{name}_{stem}", granularity, types)
+            df.rename_axis(dim.label).to_csv(path)
+            log(f"  ✓ {path}")
+    
+    # Co-ocurrencia de todos los periodos (con etiqueta legible) y del último
+    stem    = "cooccurrence" if name == "keywords" else f"{name}_cooccurrence"
+    cooccur = cooccur.assign(period=labels_for(cooccur['period'], granularity)).rename(
+        columns={'item1': f"{dim.short}1", 'item2': f"{dim.short}2"})
+    path = OUT_DIR / f"{stem}_by_{granularity}{sfx}.csv"
+    cooccur.to_csv(path, index=False)
+    log(f"  ✓ {path}")
+    
+    last = m.labels[-1]
+    path = OUT_DIR / f"{stem}_{last}{sfx}.csv"
+    cooccur[cooccur['period'] == last].drop(columns='period').to_csv(path, index=False)
+    log(f"  ✓ {path}")
+    
+    return entries
+
+# ── 8. Reporte de hallazgos ────────────────────────────────────
+def summarize(m, emerging, declining, stable, rising, trends, top=10):
+    """Lo que necesita el reporte; pequeño para volver del proceso hijo."""
+    bursting = (trends[trends['burst_active']].sort_values('burst_weight', ascending=False)
+                if not trends.empty else trends)
+    total_per_p = pd.Series(np.asarray(m.counts.sum(axis=0)).ravel(), index=m.labels)
+    return {
+        "emerging" : emerging.head(top),
+        "declining": declining.head(top),
+        "stable"   : stable.head(top),
+        "rising"   : rising.head(top),
+        "bursting" : bursting.head(top),
+        "per_period": total_per_p,
+    }
+
+def report(name, summary):
+    """
+    Reporte narrativo de hallazgos de una dimensión.
+    """
+    title = DIMENSIONS[name].title
     log("\n" + "="*60)
-    log("ANÁLISIS TEMPORAL — HALLAZGOS")
+    log(f"ANÁLISIS TEMPORAL — HALLAZGOS ({title})")
     log("="*60)
     
+    emerging, declining, stable = summary["emerging"], summary["declining"], summary["stable"]
+    rising, bursting            = summary["rising"], summary["bursting"]
+    
     if not emerging.empty:
-        log("\n📈 TOP 10 KEYWORDS EMERGENTES:")
-        for idx, row in emerging.head(10).iterrows():
+        log(f"\n📈 TOP 10 {title} EMERGENTES:")
+        for idx, row in emerging.iterrows():
             log(f"  • {idx:30s} crecimiento: +{int(row['growth'])}")
     
     if not declining.empty:
-        log("\n📉 TOP 10 KEYWORDS EN DECLIVE:")
-        for idx, row in declining.head(10).iterrows():
+        log(f"\n📉 TOP 10 {title} EN DECLIVE:")
+        for idx, row in declining.iterrows():
             log(f"  • {idx:30s} declive: -{int(row['decline'])}")
     
     if not stable.empty:
-        log("\n🔄 TOP 10 KEYWORDS ESTABLES:")
-        for idx, row in stable.head(10).iterrows():
+        log(f"\n🔄 TOP 10 {title} ESTABLES:")
+        for idx, row in stable.iterrows():
             log(f"  • {idx:30s} freq promedio: {row['avg_freq']:.1f}")
     
+    if not rising.empty:
+        log("\n📐 TOP 10 TENDENCIAS CRECIENTES (Mann-Kendall):")
+        for idx, row in rising.iterrows():
+            log(f"  • {idx:30s} pendiente: {row['slope']:+.2f}/periodo  "
+                f"tau: {row['mk_tau']:.2f}  p: {row['mk_p']:.3f}")
+    
+    if not bursting.empty:
+        log("\n💥 TOP 10 RÁFAGAS ACTIVAS (Kleinberg):")
+        for idx, row in bursting.iterrows():
+            log(f"  • {idx:30s} peso: {row['burst_weight']:.1f}  "
+                f"periodos: {int(row['burst_periods'])}")
+    
     # Variabilidad temporal general
     log("\n📊 VARIABILIDAD TEMPORAL:")
-    # Solo usar columnas de trimestres (no las derivadas)
-    quarter_cols = [col for col in pivot.columns if 'Q' in str(col)]
-    total_per_q = pivot[quarter_cols].sum(axis=0)
-    log(f"  Trimestre con más keywords: {total_per_q.idxmax()} ({int(total_per_q.max())} menciones)")
-    log(f"  Trimestre con menos keywords: {total_per_q.idxmin()} ({int(total_per_q.min())} menciones)")
+    per_period = summary["per_period"]
+    log(f"  Periodo con más menciones: {per_period.idxmax()} ({int(per_period.max())})")
+    log(f"  Periodo con menos menciones: {per_period.idxmin()} ({int(per_period.min())})")
 
-# ── Main ───────────────────────────────────────────────────────
-def main():
+# ── Análisis de una dimensión ──────────────────────────────────
+def analyze_dimension(name, granularity=GRANULARITY, trend_window=TREND_WINDOW, once=False,
+                      types=None):
+    """
+    Pipeline completo para una dimensión, con su propia conexión (se
+    ejecuta en un proceso del pool). Devuelve (entradas de manifest,
+    resumen para el reporte); sin datos, ({}, None) y no escribe nada.
+    """
+    log(f"── Dimensión: {scoped(name, types)} ──")
     conn = sqlite3.connect(DB_PATH)
     
-    # 1. Construir matriz
-    pivot = keywords_by_quarter(conn)
+    # 1. Construir matriz y co-ocurrencia (solo periodos cambiados)
+    with span("incremental_results", dimension=name, granularity=granularity):
+        m, cooccur = incremental_results(conn, name, granularity, once=once, types=types)
+    if m is None:
+        conn.close()
+        return {}, None
     
     # 2. Identificar patrones
-    emerging  = identify_emerging(pivot)
-    declining = identify_declining(pivot)
-    stable    = identify_stable(pivot)
-
-    # 3. Co-ocurrencia para último trimestre
-    quarter_cols = [col for col in pivot.columns if 'Q' in str(col)]
-    last_q = sorted(quarter_cols)[-1]
-    cooccur = cooccurrence_by_quarter(conn, last_q, min_freq=5)
-    cooccur.to_csv(OUT_DIR / f"cooccurrence_{last_q}.csv", index=False)
-    log(f"  ✓ {OUT_DIR}/cooccurrence_{last_q}.csv")
+    emerging  = identify_emerging(m)
+    declining = identify_declining(m)
+    stable    = identify_stable(m)
+    
+    # 3. Tendencias estadísticas sobre toda la matriz
+    with span("trend_scores", dimension=name, items=len(m.items)):
+        trends      = trend_scores(m, briefs_per_period(conn, granularity, once, types),
+                                   window=trend_window)
+    rising, falling = identify_trending(trends)
+    conn.close()
     
     # 4. Guardar
-    save_outputs(pivot, emerging, declining, stable)
-    
-    # 5. Reporte
-    report(emerging, declining, stable, pivot)
+    entries = save_outputs(name, m, cooccur, emerging, declining, stable, trends,
+                           granularity, once, types)
     
+    return entries, summarize(m, emerging, declining, stable, rising, trends)
+
+# ── Main ───────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--granularity", choices=GRANULARITIES, default=GRANULARITY)
+    parser.add_argument("--trend-window", type=int, default=TREND_WINDOW,
+                        help="últimos N periodos para las tendencias (todos por defecto)")
+    parser.add_argument("--dimensions", nargs="+", choices=list(DIMENSIONS),
+                        default=list(DIMENSIONS))
+    parser.add_argument("--workers", type=int, default=None,
+                        help="procesos en paralelo (por defecto, uno por dimensión "
+                             "hasta el número de CPUs)")
+    parser.add_argument("--count-once", action="store_true",
+                        help="contar cada cluster de near-duplicados (11_dedup_briefs.py) "
+                             "una sola vez")
+    parser.add_argument("--types", nargs="+", default=None,
+                        help="solo estos tipos de ítem (nombres o slugs, ver item_types.py; "
+                             "por defecto todos los cargados)")
+    args  = parser.parse_args()
+    types = (tuple(sorted({item_types.slug(t) for t in item_types.resolve(args.types)}))
+             if args.types else None)
+    
+    conn    = sqlite3.connect(DB_PATH)
+    missing = [name for name in args.dimensions if not available(conn, name)]
+    once    = args.count_once and has_duplicates(conn)
+    coarse  = imprecise_briefs(conn, args.granularity)
     conn.close()
+    if args.count_once and not once:
+        log("⚠ Sin tabla brief_duplicates (correr 11_dedup_briefs.py): se cuentan todos los briefs")
+    if coarse:
+        log(f"⚠ {coarse} briefs con fecha menos precisa que {args.granularity} "
+            f"(solo año o año-mes) quedan fuera del análisis")
+    if missing:
+        log(f"⚠ Dimensiones sin tablas en la base (se omiten): {', '.join(missing)}")
+    dims    = [name for name in args.dimensions if name not in missing]
+    workers = args.workers or min(len(dims), os.cpu_count() or 1)
+    log(f"Análisis temporal: {', '.join(dims)} | {args.granularity} | {workers} procesos"
+        f"{' | cada cluster de duplicados una vez' if once else ''}"
+        f"{f' | tipos: {item_types.tag(types)}' if types else ''}")
+    
+    jobs = [(name, args.granularity, args.trend_window, once, types) for name in dims]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(analyze_dimension, *zip(*jobs)))
+    else:
+        results = [analyze_dimension(*job) for job in jobs]
+    
+    # Manifest de artefactos: un solo escritor
+    entries = {}
+    for dim_entries, _ in results:
+        entries.update(dim_entries)
+    if entries:
+        register(entries)
+    
+    # Reporte, en orden de dimensión
+    for name, (_, summary) in zip(dims, results):
+        if summary is not None:
+            report(name, summary)
+    
     log("\n✓ Análisis completado.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -2,47 +2,147 @@
 06_visualizations.py
 Genera visualizaciones del análisis temporal:
 - Evolución de keywords emergentes
-- Heatmap de keywords × trimestres
-- Top keywords por trimestre
-- Distribución de briefs por trimestre
+- Heatmap de keywords × periodos
+- Top keywords por periodo
+- Distribución de briefs por periodo
+
+Los periodos son los de --granularity (trimestres por defecto), la
+misma que usó 05 para los artefactos.
+
+Lee los artefactos binarios de 05 (ver artifacts.py) y los conteos de
+la base una sola vez y los pasa a cada gráfico; no vuelve a parsear los
+CSV. Los gráficos se dibujan en paralelo en un pool de procesos con el
+backend Agg (sin pantalla), así el total lo marca el gráfico más lento.
+
+Cada gráfico recibe solo su porción exacta de datos (figure_inputs) y
+se identifica por un hash de esa porción, de los parámetros de dibujo y
+del código fuente que dibuja. Si el hash coincide con el del manifest
+(outputs/figures_manifest.json) y los archivos existen, no se vuelve a
+dibujar: una corrida sin cambios en los datos termina casi al instante.
+
+--granularity: granularidad de los artefactos de 05 (day … year).
+--draft: baja resolución y solo PNG, para iterar rápido. Los borradores
+  van a outputs/figures/drafts/ con su propio manifest y nunca pisan
+  las figuras finales.
+--force: redibujar todo aunque el hash no haya cambiado.
 """
 
+import argparse
+import hashlib
+import json
+import os
 import sqlite3
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 from datetime import datetime
 
+import periods
+from artifacts import load_matrix, load_table
+from periods import GRANULARITIES, PERIOD_COLUMNS, period_label
+from instrumentation import log, span
+
 # Configuración
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
 
 DB_PATH = Path("data/db/cgspace_briefs.sqlite")
-TAB_DIR = Path("outputs/tables")
-FIG_DIR = Path("outputs/figures")
+FIG_DIR   = Path("outputs/figures")
+DRAFT_DIR = FIG_DIR / "drafts"
 FIG_DIR.mkdir(parents=True, exist_ok=True)
 
-def log(msg):
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+# Resolución, formatos, directorio de salida y granularidad de cada gráfico
+Render = namedtuple("Render", ["dpi", "formats", "out_dir", "granularity"])
+DPI       = 300
+DRAFT_DPI = 72
+FORMATS   = ["png"]
 
-# ── 1. Evolución de keywords emergentes ────────────────────────
-def plot_emerging_trends():
+GRANULARITY  = "quarter"
+PERIOD_NAMES = {"day": "Día", "week": "Semana", "month": "Mes",
+                "quarter": "Trimestre", "year": "Año"}
+# Periodo resaltado en la distribución de briefs (Q4, diciembre)
+HIGHLIGHT    = {"quarter": (4, 3), "month": (12, 11)}
+
+# Caché de figuras: hash de datos + parámetros + código de dibujo por
+# gráfico (este script y las etiquetas de periods.py)
+FIG_MANIFEST   = FIG_DIR.parent / "figures_manifest.json"
+DRAFT_MANIFEST = DRAFT_DIR / "figures_manifest.json"
+PLOT_SOURCE    = hashlib.sha1(Path(__file__).read_bytes()
+                              + Path(periods.__file__).read_bytes()).hexdigest()
+TOP_EMERGING   = 10   # líneas de plot_emerging_trends
+TOP_HEATMAP    = 30   # filas del heatmap
+TOP_PER_PERIOD = 5    # barras por periodo
+MAX_PANELS     = 40   # últimos periodos en plot_top_per_period
+TOP_COMPARE    = 3    # emergentes y estables en plot_emerging_vs_stable
+
+def save_figure(fig, stem, render):
+    """Guarda la figura en cada formato pedido y la cierra."""
+    paths = []
+    render.out_dir.mkdir(parents=True, exist_ok=True)
+    for fmt in render.formats:
+        path = render.out_dir / f"{stem}.{fmt}"
+        with span("savefig", figure=stem, format=fmt, dpi=render.dpi):
+            fig.savefig(path, dpi=render.dpi, bbox_inches='tight')
+        paths.append(path)
+    plt.close(fig)
+    for path in paths:
+        log(f"  ✓ {path}")
+    return paths
+
+# ── Carga de artefactos ────────────────────────────────────────
+def briefs_per_period(conn, granularity=GRANULARITY):
+    """Briefs por periodo (también la usa benchmarks/query_plans.py)."""
+    col    = PERIOD_COLUMNS[granularity]
+    briefs = pd.read_sql_query(f"""
+        SELECT {col} as period, COUNT(*) as n_briefs
+        FROM   briefs
+        WHERE  {col} IS NOT NULL
+        GROUP  BY {col}
+        ORDER  BY {col}
+    """, conn)
+    briefs['label'] = [period_label(granularity, k) for k in briefs['period']]
+    size, last = HIGHLIGHT.get(granularity, (0, None))
+    briefs['highlight'] = (briefs['period'] % size == last) if size else False
+    return briefs
+
+def load_inputs(granularity=GRANULARITY):
     """
-    Líneas de tiempo para top 10 keywords emergentes.
+    Matriz keyword × periodo y métricas de 05, y briefs por periodo de
+    la base, leídos una sola vez.
     """
-    log("\nGraficando evolución de keywords emergentes...")
-    
-    # Cargar datos
-    matrix = pd.read_csv(TAB_DIR / "keywords_by_quarter.csv", index_col=0)
-    emerging = pd.read_csv(TAB_DIR / "keywords_emerging.csv", index_col=0)
+    log("Cargando artefactos del análisis temporal...")
+    m        = load_matrix(f"keywords_by_{granularity}")
+    emerging = load_table(f"keywords_emerging_{granularity}")
+    stable   = load_table(f"keywords_stable_{granularity}")
     
-    # Top 10 emergentes
-    top10 = emerging.head(10).index.tolist()
+    conn   = sqlite3.connect(DB_PATH)
+    briefs = briefs_per_period(conn, granularity)
+    conn.close()
     
-    # Filtrar solo trimestres (no columnas derivadas)
-    quarter_cols = [col for col in matrix.columns if 'Q' in str(col) and 'recent' not in col and 'early' not in col]
-    data = matrix.loc[top10, quarter_cols]
+    log(f"  {len(m.items)} keywords × {len(m.labels)} periodos ({granularity}) | "
+        f"{len(emerging)} emergentes | {len(stable)} estables | "
+        f"{briefs['n_briefs'].sum()} briefs")
+    return m, emerging, stable, briefs
+
+def rows_frame(m, keywords):
+    """DataFrame denso (keywords × periodos) solo de las keywords pedidas."""
+    pos  = {k: i for i, k in enumerate(m.items)}
+    rows = [pos[k] for k in keywords]
+    return pd.DataFrame(m.counts[rows].toarray(), index=list(keywords), columns=list(m.labels))
+
+# ── 1. Evolución de keywords emergentes ────────────────────────
+def plot_emerging_trends(data, render):
+    """
+    Líneas de tiempo para top 10 keywords emergentes
+    (data: keywords × periodos).
+    """
+    log("\nGraficando evolución de keywords emergentes...")
     
     # Plot
     fig, ax = plt.subplots(figsize=(12, 6))
@@ -50,7 +150,7 @@ def plot_emerging_trends():
     for keyword in data.index:
         ax.plot(data.columns, data.loc[keyword], marker='o', label=keyword, linewidth=2)
     
-    ax.set_xlabel('Trimestre', fontsize=12)
+    ax.set_xlabel(PERIOD_NAMES[render.granularity], fontsize=12)
     ax.set_ylabel('Frecuencia (# briefs)', fontsize=12)
     ax.set_title('Evolución de Keywords Emergentes (Top 10)', fontsize=14, fontweight='bold')
     ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=9)
@@ -58,29 +158,15 @@ def plot_emerging_trends():
     plt.xticks(rotation=45)
     plt.tight_layout()
     
-    out_path = FIG_DIR / "emerging_trends.png"
-    plt.savefig(out_path, dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    log(f"  ✓ {out_path}")
+    return save_figure(fig, "emerging_trends", render)
 
-# ── 2. Heatmap de keywords × trimestres ────────────────────────
-def plot_heatmap():
+# ── 2. Heatmap de keywords × periodos ──────────────────────────
+def plot_heatmap(top30, render):
     """
-    Heatmap de top 30 keywords por trimestre.
+    Heatmap de top 30 keywords por periodo.
     """
-    log("\nGenerando heatmap keywords × trimestres...")
-    
-    # Cargar datos
-    matrix = pd.read_csv(TAB_DIR / "keywords_by_quarter.csv", index_col=0)
-    
-    # Filtrar solo trimestres
-    quarter_cols = [col for col in matrix.columns if 'Q' in str(col) and 'recent' not in col]
-    data = matrix[quarter_cols]
-    
-    # Top 30 por frecuencia total
-    data['total'] = data.sum(axis=1)
-    top30 = data.nlargest(30, 'total').drop('total', axis=1)
+    name = PERIOD_NAMES[render.granularity]
+    log("\nGenerando heatmap keywords × periodos...")
     
     # Plot
     fig, ax = plt.subplots(figsize=(10, 12))
@@ -95,92 +181,72 @@ def plot_heatmap():
         ax=ax
     )
     
-    ax.set_title('Heatmap: Top 30 Keywords por Trimestre', fontsize=14, fontweight='bold')
-    ax.set_xlabel('Trimestre', fontsize=12)
+    ax.set_title(f'Heatmap: Top 30 Keywords por {name}', fontsize=14, fontweight='bold')
+    ax.set_xlabel(name, fontsize=12)
     ax.set_ylabel('Keyword', fontsize=12)
     plt.tight_layout()
     
-    out_path = FIG_DIR / "heatmap_keywords.png"
-    plt.savefig(out_path, dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    log(f"  ✓ {out_path}")
+    return save_figure(fig, "heatmap_keywords", render)
 
-# ── 3. Distribución de briefs por trimestre ────────────────────
-def plot_briefs_distribution():
+# ── 3. Distribución de briefs por periodo ──────────────────────
+def plot_briefs_distribution(df, render):
     """
-    Barras: cantidad de briefs por trimestre.
+    Barras: cantidad de briefs por periodo (ver briefs_per_period).
     """
-    log("\nGraficando distribución de briefs por trimestre...")
-    
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("""
-        SELECT year_quarter, COUNT(*) as n_briefs
-        FROM   briefs
-        WHERE  year_quarter IS NOT NULL
-        GROUP  BY year_quarter
-        ORDER  BY year_quarter
-    """, conn)
-    conn.close()
+    name = PERIOD_NAMES[render.granularity]
+    log("\nGraficando distribución de briefs por periodo...")
     
     # Plot
     fig, ax = plt.subplots(figsize=(10, 6))
     
-    bars = ax.bar(df['year_quarter'], df['n_briefs'], color='steelblue', alpha=0.7, edgecolor='black')
+    bars = ax.bar(df['label'], df['n_briefs'], color='steelblue', alpha=0.7, edgecolor='black')
     
-    # Resaltar Q4s
-    for i, (q, n) in enumerate(zip(df['year_quarter'], df['n_briefs'])):
-        if 'Q4' in q:
-            bars[i].set_color('coral')
-            bars[i].set_alpha(0.8)
+    # Resaltar Q4 / diciembre
+    for i in np.flatnonzero(df['highlight'].to_numpy()):
+        bars[i].set_color('coral')
+        bars[i].set_alpha(0.8)
     
-    ax.set_xlabel('Trimestre', fontsize=12)
+    ax.set_xlabel(name, fontsize=12)
     ax.set_ylabel('Número de Briefs', fontsize=12)
-    ax.set_title('Distribución de Briefs por Trimestre', fontsize=14, fontweight='bold')
+    ax.set_title(f'Distribución de Briefs por {name}', fontsize=14, fontweight='bold')
     ax.grid(True, axis='y', alpha=0.3)
     plt.xticks(rotation=45)
     plt.tight_layout()
     
-    out_path = FIG_DIR / "briefs_distribution.png"
-    plt.savefig(out_path, dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    log(f"  ✓ {out_path}")
+    return save_figure(fig, "briefs_distribution", render)
 
-# ── 4. Top 5 keywords por trimestre (small multiples) ──────────
-def plot_top5_per_quarter():
+# ── 4. Top 5 keywords por periodo (small multiples) ────────────
+def plot_top_per_period(data, render):
     """
-    Grid de barras: top 5 keywords en cada trimestre.
+    Grid de barras: top 5 keywords en cada periodo
+    (data: period, keyword, n; ver top_per_period).
     """
-    log("\nGraficando top 5 keywords por trimestre...")
-    
-    # Cargar datos
-    matrix = pd.read_csv(TAB_DIR / "keywords_by_quarter.csv", index_col=0)
+    name = PERIOD_NAMES[render.granularity]
+    log("\nGraficando top 5 keywords por periodo...")
     
-    # Filtrar trimestres
-    quarter_cols = [col for col in matrix.columns if 'Q' in str(col) and 'recent' not in col]
-    data = matrix[quarter_cols]
+    period_cols = list(data['period'].unique())
     
     # Crear grid
-    n_quarters = len(quarter_cols)
+    n_periods = len(period_cols)
     ncols = 3
-    nrows = (n_quarters + ncols - 1) // ncols
+    nrows = (n_periods + ncols - 1) // ncols
     
     fig, axes = plt.subplots(nrows, ncols, figsize=(15, 4 * nrows))
-    axes = axes.flatten() if n_quarters > 1 else [axes]
+    axes = axes.flatten() if n_periods > 1 else [axes]
     
-    for i, quarter in enumerate(quarter_cols):
+    for i, period in enumerate(period_cols):
         if i >= len(axes):
             break
         
         ax = axes[i]
-        top5 = data[quarter].nlargest(5)
+        rows = data[(data['period'] == period) & (data['n'] > 0)]
+        top5 = pd.Series(rows['n'].to_numpy(), index=rows['keyword'].to_numpy())
         
         ax.barh(range(len(top5)), top5.values, color='teal', alpha=0.7)
         ax.set_yticks(range(len(top5)))
         ax.set_yticklabels(top5.index, fontsize=9)
         ax.set_xlabel('Frecuencia', fontsize=9)
-        ax.set_title(quarter, fontsize=11, fontweight='bold')
+        ax.set_title(period, fontsize=11, fontweight='bold')
         ax.invert_yaxis()
         ax.grid(True, axis='x', alpha=0.3)
     
@@ -188,52 +254,44 @@ def plot_top5_per_quarter():
     for j in range(i + 1, len(axes)):
         axes[j].axis('off')
     
-    plt.suptitle('Top 5 Keywords por Trimestre', fontsize=16, fontweight='bold')
+    plt.suptitle(f'Top 5 Keywords por {name}', fontsize=16, fontweight='bold')
     plt.tight_layout(rect=[0, 0, 1, 0.97])
     
-    out_path = FIG_DIR / "top5_per_quarter.png"
-    plt.savefig(out_path, dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    log(f"  ✓ {out_path}")
+    return save_figure(fig, f"top5_per_{render.granularity}", render)
 
 # ── 5. Comparación emergentes vs estables ──────────────────────
-def plot_emerging_vs_stable():
+def plot_emerging_vs_stable(data, render):
     """
-    Comparación de evolución: emergentes vs estables.
+    Comparación de evolución: emergentes vs estables
+    (data: (grupo, keyword) × periodos).
     """
     log("\nComparando keywords emergentes vs estables...")
     
-    # Cargar datos
-    matrix = pd.read_csv(TAB_DIR / "keywords_by_quarter.csv", index_col=0)
-    emerging = pd.read_csv(TAB_DIR / "keywords_emerging.csv", index_col=0)
-    stable = pd.read_csv(TAB_DIR / "keywords_stable.csv", index_col=0)
-    
-    # Filtrar trimestres
-    quarter_cols = [col for col in matrix.columns if 'Q' in str(col) and 'recent' not in col]
-    
     # Top 3 emergentes y top 3 estables
-    top_emerging = emerging.head(3).index.tolist()
-    top_stable = stable.head(3).index.tolist()
+    name         = PERIOD_NAMES[render.granularity]
+    period_cols  = list(data.columns)
+    group        = data.index.get_level_values(0)
+    emerging     = data[group == 'emerging'].droplevel(0)
+    stable       = data[group == 'stable'].droplevel(0)
     
     # Plot
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
     
     # Emergentes
-    for kw in top_emerging:
-        ax1.plot(quarter_cols, matrix.loc[kw, quarter_cols], marker='o', label=kw, linewidth=2)
+    for kw, row in emerging.iterrows():
+        ax1.plot(period_cols, row, marker='o', label=kw, linewidth=2)
     ax1.set_title('Keywords Emergentes (Top 3)', fontsize=12, fontweight='bold')
-    ax1.set_xlabel('Trimestre')
+    ax1.set_xlabel(name)
     ax1.set_ylabel('Frecuencia')
     ax1.legend(fontsize=9)
     ax1.grid(True, alpha=0.3)
     plt.setp(ax1.xaxis.get_majorticklabels(), rotation=45)
     
     # Estables
-    for kw in top_stable:
-        ax2.plot(quarter_cols, matrix.loc[kw, quarter_cols], marker='s', label=kw, linewidth=2)
+    for kw, row in stable.iterrows():
+        ax2.plot(period_cols, row, marker='s', label=kw, linewidth=2)
     ax2.set_title('Keywords Estables (Top 3)', fontsize=12, fontweight='bold')
-    ax2.set_xlabel('Trimestre')
+    ax2.set_xlabel(name)
     ax2.set_ylabel('Frecuencia')
     ax2.legend(fontsize=9)
     ax2.grid(True, alpha=0.3)
@@ -241,27 +299,118 @@ def plot_emerging_vs_stable():
     
     plt.tight_layout()
     
-    out_path = FIG_DIR / "emerging_vs_stable.png"
-    plt.savefig(out_path, dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    log(f"  ✓ {out_path}")
+    return save_figure(fig, "emerging_vs_stable", render)
+
+# ── Porción de datos de cada gráfico ───────────────────────────
+def top_per_period(m, n=TOP_PER_PERIOD, panels=MAX_PANELS):
+    """
+    Top n keywords de cada uno de los últimos `panels` periodos en
+    formato largo (period, keyword, n). Un periodo sin keywords queda
+    como una fila con n = 0, para que el gráfico conserve su panel.
+    """
+    by_col = m.counts.tocsc()
+    rows   = []
+    for i in range(max(len(m.labels) - panels, 0), len(m.labels)):
+        col = by_col[:, i]
+        top = pd.Series(col.data, index=m.items[col.indices]).nlargest(n)
+        rows += [(m.labels[i], k, int(v)) for k, v in top.items()] or [(m.labels[i], '', 0)]
+    return pd.DataFrame(rows, columns=['period', 'keyword', 'n'])
+
+def figure_inputs(m, emerging, stable, briefs, granularity=GRANULARITY):
+    """
+    {nombre de figura: (función, porción exacta de datos)}, en orden de
+    costo de dibujo (los más lentos primero, para que el pool no termine
+    esperándolos).
+    """
+    total = np.asarray(m.counts.sum(axis=1)).ravel()
+    return {
+        f"top5_per_{granularity}": (plot_top_per_period, top_per_period(m)),
+        "heatmap_keywords":    (plot_heatmap,
+                                rows_frame(m, m.items[np.argsort(-total, kind='stable')[:TOP_HEATMAP]])),
+        "emerging_vs_stable":  (plot_emerging_vs_stable,
+                                pd.concat({'emerging': rows_frame(m, emerging.head(TOP_COMPARE).index),
+                                           'stable':   rows_frame(m, stable.head(TOP_COMPARE).index)})),
+        "emerging_trends":     (plot_emerging_trends, rows_frame(m, emerging.head(TOP_EMERGING).index)),
+        "briefs_distribution": (plot_briefs_distribution, briefs),
+    }
+
+# ── Caché de figuras ───────────────────────────────────────────
+def figure_hash(stem, data, render):
+    """Hash de la porción de datos (valores, índice y columnas), de los parámetros y del código."""
+    h = hashlib.sha1(json.dumps([stem, PLOT_SOURCE, matplotlib.__version__, sns.__version__,
+                                 render.dpi, render.formats, render.granularity,
+                                 [str(c) for c in data.columns]]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+def read_fig_manifest(path):
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))
+    return {}
+
+def write_fig_manifest(manifest, path):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+def is_fresh(manifest, stem, key, out_dir):
+    info = manifest.get(stem)
+    return (info is not None and info["hash"] == key
+            and all((out_dir / f).exists() for f in info["files"]))
 
 # ── Main ───────────────────────────────────────────────────────
 def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--granularity", choices=GRANULARITIES, default=GRANULARITY,
+                        help="granularidad de los artefactos de 05 (por defecto, trimestre)")
+    parser.add_argument("--draft", action="store_true",
+                        help=f"borrador: {DRAFT_DPI} dpi y solo PNG, en {DRAFT_DIR}")
+    parser.add_argument("--formats", nargs="+", default=FORMATS,
+                        help="formatos de salida (png, pdf, svg...); --draft usa solo png")
+    parser.add_argument("--force", action="store_true",
+                        help="redibujar todo, aunque los datos no hayan cambiado")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="procesos en paralelo (por defecto, uno por gráfico "
+                             "hasta el número de CPUs)")
+    args = parser.parse_args()
+    if args.draft:
+        render, manifest_path = Render(DRAFT_DPI, ["png"], DRAFT_DIR, args.granularity), DRAFT_MANIFEST
+    else:
+        render, manifest_path = Render(DPI, args.formats, FIG_DIR, args.granularity), FIG_MANIFEST
+    
     log("="*60)
-    log("GENERANDO VISUALIZACIONES")
+    log("GENERANDO VISUALIZACIONES" + (" (borrador)" if args.draft else ""))
     log("="*60)
     
-    plot_briefs_distribution()
-    plot_emerging_trends()
-    plot_heatmap()
-    plot_top5_per_quarter()
-    plot_emerging_vs_stable()
+    inputs   = figure_inputs(*load_inputs(args.granularity), args.granularity)
+    manifest = read_fig_manifest(manifest_path)
+    keys     = {stem: figure_hash(stem, data, render) for stem, (_, data) in inputs.items()}
+    jobs     = [stem for stem in inputs
+                if args.force or not is_fresh(manifest, stem, keys[stem], render.out_dir)]
+    log(f"{len(jobs)} de {len(inputs)} gráficos a dibujar | {render.dpi} dpi | "
+        f"{', '.join(render.formats)}"
+        + (f" | sin cambios: {', '.join(s for s in inputs if s not in jobs)}"
+           if len(jobs) < len(inputs) else ""))
+    
+    workers = min(args.workers or os.cpu_count() or 1, len(jobs))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(inputs[stem][0], inputs[stem][1], render): stem
+                       for stem in jobs}
+            paths = {futures[f]: f.result() for f in as_completed(futures)}
+    else:
+        paths = {stem: inputs[stem][0](inputs[stem][1], render) for stem in jobs}
+    
+    # Manifest de figuras: solo el proceso principal escribe
+    for stem, files in paths.items():
+        manifest[stem] = {"hash": keys[stem], "files": [p.name for p in files],
+                          "rendered_at": datetime.now().isoformat(timespec="seconds")}
+    if paths:
+        write_fig_manifest(manifest, manifest_path)
     
     log("\n" + "="*60)
     log("✓ Todas las visualizaciones generadas")
-    log(f"✓ Ver en: {FIG_DIR}")
+    log(f"✓ Ver en: {render.out_dir}")
     log("="*60)
 
 if __name__ == "__main__":
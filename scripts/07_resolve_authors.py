@@ -0,0 +1,228 @@
+"""
+07_resolve_authors.py
+Resolución de autores: agrupa variantes del mismo nombre
+("Smith, J." / "Smith, John") bajo un author_cluster_id canónico.
+
+Estrategia:
+1. Bloqueo: cada nombre cae en un bloque (apellido + inicial del nombre).
+   Solo se comparan nombres dentro del mismo bloque, así el costo crece
+   con el tamaño de los bloques y no con el cuadrado de la tabla.
+2. Dentro del bloque: nombres de pila compatibles (inicial vs nombre
+   completo), similitud de cadena y evidencia de contexto
+   (co-autores o afiliaciones compartidas).
+3. Union-find: los pares que superan el umbral se fusionan; el
+   cluster toma como id el author_id más bajo.
+"""
+
+import re
+import sqlite3
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from instrumentation import log
+
+DB_PATH = Path("data/db/cgspace_briefs.sqlite")
+
+# ── Parámetros de matching ─────────────────────────────────────
+MATCH_THRESHOLD = 0.90   # score mínimo para fusionar dos nombres
+COAUTHOR_BONUS  = 0.10   # si comparten al menos un co-autor
+AFFIL_BONUS     = 0.10   # si comparten al menos una afiliación
+TYPO_RATIO      = 0.85   # similitud mínima entre dos nombres de pila completos
+
+# ── Parseo de nombres ──────────────────────────────────────────
+def fold(text):
+    """Minúsculas sin acentos ni puntuación (salvo espacios)."""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+def parse_name(raw):
+    """
+    Devuelve (apellido, [nombres de pila]) en forma plegada.
+    CGSpace usa "Apellido, Nombres"; sin coma se toma la última
+    palabra como apellido.
+    """
+    if "," in raw:
+        surname, given = raw.split(",", 1)
+    else:
+        parts = raw.strip().split()
+        surname, given = (parts[-1], " ".join(parts[:-1])) if parts else ("", "")
+    # "P.K." y "Jean-Paul" se separan en tokens de nombre de pila
+    given_tokens = fold(given.replace(".", " ").replace("-", " ")).split()
+    return fold(surname), given_tokens
+
+def block_key(surname, given):
+    """Clave de bloqueo: apellido + inicial del primer nombre."""
+    return f"{surname}|{given[0][0] if given else ''}"
+
+def given_compatible(a, b):
+    """
+    Dos listas de nombres de pila son compatibles si, posición a
+    posición, coinciden las iniciales y los nombres completos son
+    iguales (o casi iguales, para tolerar erratas).
+    """
+    for x, y in zip(a, b):
+        if x[0] != y[0]:
+            return False
+        if len(x) > 1 and len(y) > 1 and x != y:
+            if SequenceMatcher(None, x, y).ratio() < TYPO_RATIO:
+                return False
+    return True
+
+def name_score(sa, ga, sb, gb):
+    """
+    Similitud de dos nombres con nombres de pila compatibles. Donde un
+    lado tiene solo la inicial, esa posición se compara como inicial
+    contra inicial: "Smith, J." y "Smith, John" coinciden en todo lo que
+    ambos dicen (apellido completo + inicial) y puntúan 1.0, en vez de
+    quedar penalizados por las letras que la inicial no escribe.
+    """
+    ga, gb = list(ga), list(gb)
+    for k, (x, y) in enumerate(zip(ga, gb)):
+        if len(x) == 1 or len(y) == 1:
+            ga[k], gb[k] = x[0], y[0]
+    return SequenceMatcher(None, " ".join([sa] + ga), " ".join([sb] + gb)).ratio()
+
+# ── Union-find ─────────────────────────────────────────────────
+def find(parent, x):
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+# ── Datos de contexto ──────────────────────────────────────────
+def load_context(conn, author_block):
+    """
+    Por autor: bloques de sus co-autores y afiliaciones de sus briefs.
+    Se usan bloques (no ids) para los co-autores porque ellos mismos
+    todavía no están resueltos.
+    """
+    coauthors = defaultdict(set)
+    by_brief  = defaultdict(list)
+    for bid, aid in conn.execute("SELECT brief_id, author_id FROM brief_authors"):
+        by_brief[bid].append(aid)
+    for aids in by_brief.values():
+        for aid in aids:
+            coauthors[aid].update(author_block[o] for o in aids
+                                  if o != aid and o in author_block)
+
+    affiliations = defaultdict(set)
+    for aid, eid in conn.execute("""
+        SELECT ba.author_id, bf.entity_id
+        FROM   brief_authors ba
+        JOIN   brief_funding bf      ON ba.brief_id  = bf.brief_id
+        JOIN   funding_entities fe   ON bf.entity_id = fe.entity_id
+        WHERE  fe.entity_type = 'affiliation'
+    """):
+        affiliations[aid].add(eid)
+
+    return coauthors, affiliations
+
+# ── Resolución ─────────────────────────────────────────────────
+def resolve_authors(conn):
+    """Calcula el cluster de cada autor. Devuelve {author_id: cluster_id}."""
+    log("Parseando nombres y construyendo bloques...")
+
+    names  = {}                 # author_id -> (apellido, [nombres])
+    blocks = defaultdict(list)  # clave -> [author_id]
+    for aid, raw in conn.execute("SELECT author_id, author_name_raw FROM authors"):
+        surname, given = parse_name(raw or "")
+        if not surname:
+            continue
+        names[aid] = (surname, given)
+        blocks[block_key(surname, given)].append(aid)
+
+    author_block = {aid: block_key(*names[aid]) for aid in names}
+    sizes = [len(v) for v in blocks.values()]
+    log(f"  {len(names)} autores en {len(blocks)} bloques "
+        f"(mayor bloque: {max(sizes, default=0)})")
+
+    coauthors, affiliations = load_context(conn, author_block)
+
+    # Pares candidatos con score, solo dentro de cada bloque
+    log("Comparando dentro de bloques...")
+    candidates = []
+    n_compared = 0
+    for aids in blocks.values():
+        for i in range(len(aids)):
+            a = aids[i]
+            sa, ga = names[a]
+            for b in aids[i + 1:]:
+                sb, gb = names[b]
+                n_compared += 1
+                if not given_compatible(ga, gb):
+                    continue
+                score = name_score(sa, ga, sb, gb)
+                if coauthors[a] & coauthors[b]:
+                    score += COAUTHOR_BONUS
+                if affiliations[a] & affiliations[b]:
+                    score += AFFIL_BONUS
+                if score >= MATCH_THRESHOLD:
+                    candidates.append((score, a, b))
+    log(f"  {n_compared} comparaciones | {len(candidates)} pares sobre umbral")
+
+    # Fusionar de mayor a menor score. Cada cluster guarda sus variantes
+    # de nombre de pila para no unir "John" y "James" a través de "J."
+    parent   = {aid: aid for aid in names}
+    variants = {aid: [names[aid][1]] for aid in names}
+    merges   = 0
+    for _, a, b in sorted(candidates, reverse=True):
+        ra, rb = find(parent, a), find(parent, b)
+        if ra == rb:
+            continue
+        if not all(given_compatible(x, y) for x in variants[ra] for y in variants[rb]):
+            continue
+        root, child = min(ra, rb), max(ra, rb)
+        parent[child] = root
+        variants[root].extend(variants.pop(child))
+        merges += 1
+
+    clusters = {aid: find(parent, aid) for aid in names}
+    log(f"  Fusiones: {merges} | clusters: {len(set(clusters.values()))}")
+    return clusters
+
+def save_clusters(conn, clusters):
+    """Escribe author_cluster_id (columna e índice los crea 02_load_sqlite.py)."""
+    # Autores sin apellido parseable quedan como su propio cluster
+    conn.execute("UPDATE authors SET author_cluster_id = author_id")
+    conn.executemany(
+        "UPDATE authors SET author_cluster_id = ? WHERE author_id = ?",
+        [(cid, aid) for aid, cid in clusters.items() if cid != aid]
+    )
+    conn.commit()
+
+def report(conn):
+    """Muestra los clusters con más variantes."""
+    log("\n── Clusters con más variantes ──────────────────────────")
+    rows = conn.execute("""
+        SELECT c.author_name_raw, COUNT(*) as n,
+               GROUP_CONCAT(a.author_name_raw, ' / ')
+        FROM   authors a
+        JOIN   authors c ON a.author_cluster_id = c.author_id
+        GROUP  BY a.author_cluster_id
+        HAVING COUNT(*) > 1
+        ORDER  BY n DESC
+        LIMIT  15
+    """).fetchall()
+    for canon, n, members in rows:
+        log(f"  {n:3d}  {canon}  ←  {members}")
+
+def main():
+    conn = sqlite3.connect(DB_PATH)
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(authors)")}
+    if "author_cluster_id" not in cols:
+        log("❌ authors sin author_cluster_id: correr 02_load_sqlite.py (migra la base)")
+        raise SystemExit(1)
+
+    clusters = resolve_authors(conn)
+    save_clusters(conn, clusters)
+    report(conn)
+
+    conn.close()
+    log("\n✓ Resolución de autores completada.")
+
+if __name__ == "__main__":
+    main()
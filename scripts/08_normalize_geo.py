@@ -0,0 +1,446 @@
+"""
+08_normalize_geo.py
+Normalización geográfica: mapea los valores de `geo` (país, región,
+subregión) a códigos numéricos ISO-3166 / UN M49.
+
+Los códigos M49 de países coinciden con ISO-3166 numérico, así que un
+único espacio de enteros cubre países y áreas. Cada fila de `geo` guarda
+su propio código y sus ancestros (región, subregión, región intermedia)
+ya resueltos, de modo que las agregaciones suben de nivel con un
+GROUP BY sobre enteros, sin joins por texto ni recursión.
+"""
+
+import re
+import sqlite3
+import unicodedata
+from pathlib import Path
+
+from instrumentation import log
+
+DB_PATH = Path("data/db/cgspace_briefs.sqlite")
+
+# ── Jerarquía M49 ──────────────────────────────────────────────
+# (código, nombre, nivel, código padre)
+M49_AREAS = [
+    (1,   "World",                           "world",        None),
+    (2,   "Africa",                          "region",       1),
+    (19,  "Americas",                        "region",       1),
+    (142, "Asia",                            "region",       1),
+    (150, "Europe",                          "region",       1),
+    (9,   "Oceania",                         "region",       1),
+    (15,  "Northern Africa",                 "subregion",    2),
+    (202, "Sub-Saharan Africa",              "subregion",    2),
+    (14,  "Eastern Africa",                  "intermediate", 202),
+    (17,  "Middle Africa",                   "intermediate", 202),
+    (18,  "Southern Africa",                 "intermediate", 202),
+    (11,  "Western Africa",                  "intermediate", 202),
+    (419, "Latin America and the Caribbean", "subregion",    19),
+    (29,  "Caribbean",                       "intermediate", 419),
+    (13,  "Central America",                 "intermediate", 419),
+    (5,   "South America",                   "intermediate", 419),
+    (21,  "Northern America",                "subregion",    19),
+    (143, "Central Asia",                    "subregion",    142),
+    (30,  "Eastern Asia",                    "subregion",    142),
+    (35,  "South-eastern Asia",              "subregion",    142),
+    (34,  "Southern Asia",                   "subregion",    142),
+    (145, "Western Asia",                    "subregion",    142),
+    (151, "Eastern Europe",                  "subregion",    150),
+    (154, "Northern Europe",                 "subregion",    150),
+    (39,  "Southern Europe",                 "subregion",    150),
+    (155, "Western Europe",                  "subregion",    150),
+    (53,  "Australia and New Zealand",       "subregion",    9),
+    (54,  "Melanesia",                       "subregion",    9),
+    (57,  "Micronesia",                      "subregion",    9),
+    (61,  "Polynesia",                       "subregion",    9),
+]
+
+# Países: (ISO numérico, ISO alpha-3, nombre, área M49 más específica)
+COUNTRIES = [
+    # Eastern Africa
+    (108, "BDI", "Burundi", 14),                    (174, "COM", "Comoros", 14),
+    (262, "DJI", "Djibouti", 14),                   (232, "ERI", "Eritrea", 14),
+    (231, "ETH", "Ethiopia", 14),                   (404, "KEN", "Kenya", 14),
+    (450, "MDG", "Madagascar", 14),                 (454, "MWI", "Malawi", 14),
+    (480, "MUS", "Mauritius", 14),                  (175, "MYT", "Mayotte", 14),
+    (508, "MOZ", "Mozambique", 14),                 (638, "REU", "Réunion", 14),
+    (646, "RWA", "Rwanda", 14),                     (690, "SYC", "Seychelles", 14),
+    (706, "SOM", "Somalia", 14),                    (728, "SSD", "South Sudan", 14),
+    (800, "UGA", "Uganda", 14),                     (834, "TZA", "Tanzania", 14),
+    (894, "ZMB", "Zambia", 14),                     (716, "ZWE", "Zimbabwe", 14),
+    (86,  "IOT", "British Indian Ocean Territory", 14),
+    (260, "ATF", "French Southern Territories", 14),
+    # Middle Africa
+    (24,  "AGO", "Angola", 17),                     (120, "CMR", "Cameroon", 17),
+    (140, "CAF", "Central African Republic", 17),   (148, "TCD", "Chad", 17),
+    (178, "COG", "Congo", 17),                      (180, "COD", "Democratic Republic of the Congo", 17),
+    (226, "GNQ", "Equatorial Guinea", 17),          (266, "GAB", "Gabon", 17),
+    (678, "STP", "Sao Tome and Principe", 17),
+    # Southern Africa
+    (72,  "BWA", "Botswana", 18),                   (748, "SWZ", "Eswatini", 18),
+    (426, "LSO", "Lesotho", 18),                    (516, "NAM", "Namibia", 18),
+    (710, "ZAF", "South Africa", 18),
+    # Western Africa
+    (204, "BEN", "Benin", 11),                      (854, "BFA", "Burkina Faso", 11),
+    (132, "CPV", "Cabo Verde", 11),                 (384, "CIV", "Côte d'Ivoire", 11),
+    (270, "GMB", "Gambia", 11),                     (288, "GHA", "Ghana", 11),
+    (324, "GIN", "Guinea", 11),                     (624, "GNB", "Guinea-Bissau", 11),
+    (430, "LBR", "Liberia", 11),                    (466, "MLI", "Mali", 11),
+    (478, "MRT", "Mauritania", 11),                 (562, "NER", "Niger", 11),
+    (566, "NGA", "Nigeria", 11),                    (654, "SHN", "Saint Helena", 11),
+    (686, "SEN", "Senegal", 11),                    (694, "SLE", "Sierra Leone", 11),
+    (768, "TGO", "Togo", 11),
+    # Northern Africa
+    (12,  "DZA", "Algeria", 15),                    (818, "EGY", "Egypt", 15),
+    (434, "LBY", "Libya", 15),                      (504, "MAR", "Morocco", 15),
+    (729, "SDN", "Sudan", 15),                      (788, "TUN", "Tunisia", 15),
+    (732, "ESH", "Western Sahara", 15),
+    # Caribbean
+    (660, "AIA", "Anguilla", 29),                   (28,  "ATG", "Antigua and Barbuda", 29),
+    (533, "ABW", "Aruba", 29),                      (44,  "BHS", "Bahamas", 29),
+    (52,  "BRB", "Barbados", 29),                   (535, "BES", "Bonaire, Sint Eustatius and Saba", 29),
+    (92,  "VGB", "British Virgin Islands", 29),     (136, "CYM", "Cayman Islands", 29),
+    (192, "CUB", "Cuba", 29),                       (531, "CUW", "Curaçao", 29),
+    (212, "DMA", "Dominica", 29),                   (214, "DOM", "Dominican Republic", 29),
+    (308, "GRD", "Grenada", 29),                    (312, "GLP", "Guadeloupe", 29),
+    (332, "HTI", "Haiti", 29),                      (388, "JAM", "Jamaica", 29),
+    (474, "MTQ", "Martinique", 29),                 (500, "MSR", "Montserrat", 29),
+    (630, "PRI", "Puerto Rico", 29),                (652, "BLM", "Saint Barthélemy", 29),
+    (659, "KNA", "Saint Kitts and Nevis", 29),      (662, "LCA", "Saint Lucia", 29),
+    (663, "MAF", "Saint Martin", 29),               (670, "VCT", "Saint Vincent and the Grenadines", 29),
+    (534, "SXM", "Sint Maarten", 29),               (780, "TTO", "Trinidad and Tobago", 29),
+    (796, "TCA", "Turks and Caicos Islands", 29),   (850, "VIR", "United States Virgin Islands", 29),
+    # Central America
+    (84,  "BLZ", "Belize", 13),                     (188, "CRI", "Costa Rica", 13),
+    (222, "SLV", "El Salvador", 13),                (320, "GTM", "Guatemala", 13),
+    (340, "HND", "Honduras", 13),                   (484, "MEX", "Mexico", 13),
+    (558, "NIC", "Nicaragua", 13),                  (591, "PAN", "Panama", 13),
+    # South America
+    (32,  "ARG", "Argentina", 5),                   (68,  "BOL", "Bolivia", 5),
+    (74,  "BVT", "Bouvet Island", 5),               (76,  "BRA", "Brazil", 5),
+    (152, "CHL", "Chile", 5),                       (170, "COL", "Colombia", 5),
+    (218, "ECU", "Ecuador", 5),                     (238, "FLK", "Falkland Islands", 5),
+    (254, "GUF", "French Guiana", 5),               (328, "GUY", "Guyana", 5),
+    (600, "PRY", "Paraguay", 5),                    (604, "PER", "Peru", 5),
+    (239, "SGS", "South Georgia and the South Sandwich Islands", 5),
+    (740, "SUR", "Suriname", 5),                    (858, "URY", "Uruguay", 5),
+    (862, "VEN", "Venezuela", 5),
+    # Northern America
+    (60,  "BMU", "Bermuda", 21),                    (124, "CAN", "Canada", 21),
+    (304, "GRL", "Greenland", 21),                  (666, "SPM", "Saint Pierre and Miquelon", 21),
+    (840, "USA", "United States", 21),
+    # Central Asia
+    (398, "KAZ", "Kazakhstan", 143),                (417, "KGZ", "Kyrgyzstan", 143),
+    (762, "TJK", "Tajikistan", 143),                (795, "TKM", "Turkmenistan", 143),
+    (860, "UZB", "Uzbekistan", 143),
+    # Eastern Asia
+    (156, "CHN", "China", 30),                      (344, "HKG", "Hong Kong", 30),
+    (446, "MAC", "Macao", 30),                      (408, "PRK", "North Korea", 30),
+    (392, "JPN", "Japan", 30),                      (496, "MNG", "Mongolia", 30),
+    (410, "KOR", "South Korea", 30),                (158, "TWN", "Taiwan", 30),
+    # South-eastern Asia
+    (96,  "BRN", "Brunei", 35),                     (116, "KHM", "Cambodia", 35),
+    (360, "IDN", "Indonesia", 35),                  (418, "LAO", "Laos", 35),
+    (458, "MYS", "Malaysia", 35),                   (104, "MMR", "Myanmar", 35),
+    (608, "PHL", "Philippines", 35),                (702, "SGP", "Singapore", 35),
+    (764, "THA", "Thailand", 35),                   (626, "TLS", "Timor-Leste", 35),
+    (704, "VNM", "Vietnam", 35),
+    # Southern Asia
+    (4,   "AFG", "Afghanistan", 34),                (50,  "BGD", "Bangladesh", 34),
+    (64,  "BTN", "Bhutan", 34),                     (356, "IND", "India", 34),
+    (364, "IRN", "Iran", 34),                       (462, "MDV", "Maldives", 34),
+    (524, "NPL", "Nepal", 34),                      (586, "PAK", "Pakistan", 34),
+    (144, "LKA", "Sri Lanka", 34),
+    # Western Asia
+    (51,  "ARM", "Armenia", 145),                   (31,  "AZE", "Azerbaijan", 145),
+    (48,  "BHR", "Bahrain", 145),                   (196, "CYP", "Cyprus", 145),
+    (268, "GEO", "Georgia", 145),                   (368, "IRQ", "Iraq", 145),
+    (376, "ISR", "Israel", 145),                    (400, "JOR", "Jordan", 145),
+    (414, "KWT", "Kuwait", 145),                    (422, "LBN", "Lebanon", 145),
+    (512, "OMN", "Oman", 145),                      (634, "QAT", "Qatar", 145),
+    (682, "SAU", "Saudi Arabia", 145),              (275, "PSE", "Palestine", 145),
+    (760, "SYR", "Syria", 145),                     (792, "TUR", "Türkiye", 145),
+    (784, "ARE", "United Arab Emirates", 145),      (887, "YEM", "Yemen", 145),
+    # Eastern Europe
+    (112, "BLR", "Belarus", 151),                   (100, "BGR", "Bulgaria", 151),
+    (203, "CZE", "Czechia", 151),                   (348, "HUN", "Hungary", 151),
+    (616, "POL", "Poland", 151),                    (498, "MDA", "Moldova", 151),
+    (642, "ROU", "Romania", 151),                   (643, "RUS", "Russia", 151),
+    (703, "SVK", "Slovakia", 151),                  (804, "UKR", "Ukraine", 151),
+    # Northern Europe
+    (248, "ALA", "Åland Islands", 154),             (208, "DNK", "Denmark", 154),
+    (233, "EST", "Estonia", 154),                   (234, "FRO", "Faroe Islands", 154),
+    (246, "FIN", "Finland", 154),                   (831, "GGY", "Guernsey", 154),
+    (352, "ISL", "Iceland", 154),                   (372, "IRL", "Ireland", 154),
+    (833, "IMN", "Isle of Man", 154),               (832, "JEY", "Jersey", 154),
+    (428, "LVA", "Latvia", 154),                    (440, "LTU", "Lithuania", 154),
+    (578, "NOR", "Norway", 154),                    (744, "SJM", "Svalbard and Jan Mayen", 154),
+    (752, "SWE", "Sweden", 154),                    (826, "GBR", "United Kingdom", 154),
+    # Southern Europe
+    (8,   "ALB", "Albania", 39),                    (20,  "AND", "Andorra", 39),
+    (70,  "BIH", "Bosnia and Herzegovina", 39),     (191, "HRV", "Croatia", 39),
+    (292, "GIB", "Gibraltar", 39),                  (300, "GRC", "Greece", 39),
+    (336, "VAT", "Holy See", 39),                   (380, "ITA", "Italy", 39),
+    (470, "MLT", "Malta", 39),                      (499, "MNE", "Montenegro", 39),
+    (807, "MKD", "North Macedonia", 39),            (620, "PRT", "Portugal", 39),
+    (674, "SMR", "San Marino", 39),                 (688, "SRB", "Serbia", 39),
+    (705, "SVN", "Slovenia", 39),                   (724, "ESP", "Spain", 39),
+    # Western Europe
+    (40,  "AUT", "Austria", 155),                   (56,  "BEL", "Belgium", 155),
+    (250, "FRA", "France", 155),                    (276, "DEU", "Germany", 155),
+    (438, "LIE", "Liechtenstein", 155),             (442, "LUX", "Luxembourg", 155),
+    (492, "MCO", "Monaco", 155),                    (528, "NLD", "Netherlands", 155),
+    (756, "CHE", "Switzerland", 155),
+    # Oceania
+    (36,  "AUS", "Australia", 53),                  (162, "CXR", "Christmas Island", 53),
+    (166, "CCK", "Cocos (Keeling) Islands", 53),    (334, "HMD", "Heard Island and McDonald Islands", 53),
+    (554, "NZL", "New Zealand", 53),                (574, "NFK", "Norfolk Island", 53),
+    (242, "FJI", "Fiji", 54),                       (540, "NCL", "New Caledonia", 54),
+    (598, "PNG", "Papua New Guinea", 54),           (90,  "SLB", "Solomon Islands", 54),
+    (548, "VUT", "Vanuatu", 54),
+    (316, "GUM", "Guam", 57),                       (296, "KIR", "Kiribati", 57),
+    (584, "MHL", "Marshall Islands", 57),           (583, "FSM", "Micronesia (Federated States of)", 57),
+    (520, "NRU", "Nauru", 57),                      (580, "MNP", "Northern Mariana Islands", 57),
+    (585, "PLW", "Palau", 57),                      (581, "UMI", "United States Minor Outlying Islands", 57),
+    (16,  "ASM", "American Samoa", 61),             (184, "COK", "Cook Islands", 61),
+    (258, "PYF", "French Polynesia", 61),           (570, "NIU", "Niue", 61),
+    (612, "PCN", "Pitcairn", 61),                   (882, "WSM", "Samoa", 61),
+    (772, "TKL", "Tokelau", 61),                    (776, "TON", "Tonga", 61),
+    (798, "TUV", "Tuvalu", 61),                     (876, "WLF", "Wallis and Futuna", 61),
+]
+
+# Variantes observadas (inglés formal ONU, español, abreviaturas) → código
+ALIASES = {
+    # Países
+    "United Republic of Tanzania"                 : 834,
+    "Tanzania, United Republic of"                : 834,
+    "Viet Nam"                                    : 704,
+    "Lao PDR"                                     : 418,
+    "Lao People's Democratic Republic"            : 418,
+    "Congo, Democratic Republic of"               : 180,
+    "Congo, DR"                                   : 180,
+    "Congo DR"                                    : 180,
+    "DR Congo"                                    : 180,
+    "DRC"                                         : 180,
+    "Republic of the Congo"                       : 178,
+    "Congo, Republic of"                          : 178,
+    "Ivory Coast"                                 : 384,
+    "Cote d'Ivoire"                               : 384,
+    "Bolivia (Plurinational State of)"            : 68,
+    "Venezuela (Bolivarian Republic of)"          : 862,
+    "Iran (Islamic Republic of)"                  : 364,
+    "Syrian Arab Republic"                        : 760,
+    "Russian Federation"                          : 643,
+    "Republic of Korea"                           : 410,
+    "Korea, Republic of"                          : 410,
+    "Democratic People's Republic of Korea"       : 408,
+    "Republic of Moldova"                         : 498,
+    "Turkey"                                      : 792,
+    "Swaziland"                                   : 748,
+    "Cape Verde"                                  : 132,
+    "Czech Republic"                              : 203,
+    "Macedonia"                                   : 807,
+    "United States of America"                    : 840,
+    "USA"                                         : 840,
+    "UK"                                          : 826,
+    "United Kingdom of Great Britain and Northern Ireland" : 826,
+    "Great Britain"                               : 826,
+    "Burma"                                       : 104,
+    "East Timor"                                  : 626,
+    "The Gambia"                                  : 270,
+    "Gambia, The"                                 : 270,
+    "State of Palestine"                          : 275,
+    "Palestinian Territories"                     : 275,
+    "Brunei Darussalam"                           : 96,
+    "Micronesia, Federated States of"             : 583,
+    "Hong Kong SAR"                               : 344,
+    "Netherlands (Kingdom of the)"                : 528,
+    "Sao Tomé and Príncipe"                       : 678,
+    # Países en español
+    "Kenia"                                       : 404,
+    "Etiopía"                                     : 231,
+    "Tanzanía"                                    : 834,
+    "México"                                      : 484,
+    "Perú"                                        : 604,
+    "Brasil"                                      : 76,
+    "Panamá"                                      : 591,
+    "Haití"                                       : 332,
+    "República Dominicana"                        : 214,
+    "Costa de Marfil"                             : 384,
+    "Estados Unidos"                              : 840,
+    "Camerún"                                     : 120,
+    "Níger"                                       : 562,
+    "Malí"                                        : 466,
+    "Marruecos"                                   : 504,
+    "Egipto"                                      : 818,
+    "Sudáfrica"                                   : 710,
+    "Filipinas"                                   : 608,
+    "Camboya"                                     : 116,
+    "Tailandia"                                   : 764,
+    # Regiones (vocabulario CGSpace y variantes)
+    "West Africa"                                 : 11,
+    "East Africa"                                 : 14,
+    "Central Africa"                              : 17,
+    "North Africa"                                : 15,
+    "South Asia"                                  : 34,
+    "Southeast Asia"                              : 35,
+    "South East Asia"                             : 35,
+    "East Asia"                                   : 30,
+    "West Asia"                                   : 145,
+    "Middle East"                                 : 145,
+    "Latin America"                               : 419,
+    "Latin America & the Caribbean"               : 419,
+    "North America"                               : 21,
+    "America"                                     : 19,
+    "Pacific"                                     : 9,
+    # Regiones en español
+    "África"                                      : 2,
+    "África Oriental"                             : 14,
+    "África Occidental"                           : 11,
+    "América Latina"                              : 419,
+    "América Latina y el Caribe"                  : 419,
+    "Centroamérica"                               : 13,
+    "América Central"                             : 13,
+    "Sudamérica"                                  : 5,
+    "América del Sur"                             : 5,
+    "Caribe"                                      : 29,
+}
+
+# ── Diccionario precomputado ───────────────────────────────────
+def fold(text):
+    """Clave de búsqueda: minúsculas, sin acentos ni puntuación."""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+def build_hierarchy():
+    """
+    Tabla de áreas (países + áreas M49) con sus ancestros resueltos:
+    {código: (nombre, nivel, alpha3, padre, región, subregión, intermedia)}
+    """
+    areas = {code: (name, level, None, parent)
+             for code, name, level, parent in M49_AREAS}
+    for code, alpha3, name, parent in COUNTRIES:
+        areas[code] = (name, "country", alpha3, parent)
+
+    hierarchy = {}
+    for code, (name, level, alpha3, parent) in areas.items():
+        ancestors = {"region": None, "subregion": None, "intermediate": None}
+        node = code
+        while node is not None:
+            node_level = areas[node][1]
+            if node_level in ancestors:
+                ancestors[node_level] = node
+            node = areas[node][3]
+        hierarchy[code] = (name, level, alpha3, parent,
+                           ancestors["region"], ancestors["subregion"],
+                           ancestors["intermediate"])
+    return hierarchy
+
+def build_lookup(hierarchy):
+    """Texto plegado → código M49 (nombres, alpha-3 y alias)."""
+    lookup = {}
+    for code, (name, level, alpha3, *_rest) in hierarchy.items():
+        lookup[fold(name)] = code
+        if alpha3:
+            lookup[fold(alpha3)] = code
+    for alias, code in ALIASES.items():
+        lookup[fold(alias)] = code
+    return lookup
+
+# ── Aplicar a la base ──────────────────────────────────────────
+# Columnas de código en `geo` (las agrega la migración de 02_load_sqlite.py)
+GEO_COLUMNS = ["m49_code", "m49_region", "m49_subregion", "m49_intermediate", "iso_alpha3"]
+
+def ensure_schema(conn):
+    """
+    Tabla de referencia `m49_areas`. Las columnas de código de `geo` y
+    sus índices los crea 02_load_sqlite.py.
+    """
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS m49_areas (
+            m49_code         INTEGER PRIMARY KEY,
+            name             TEXT,
+            level            TEXT,  -- country | intermediate | subregion | region | world
+            iso_alpha3       TEXT,
+            parent_code      INTEGER,
+            m49_region       INTEGER,
+            m49_subregion    INTEGER,
+            m49_intermediate INTEGER
+        );
+    """)
+
+def normalize_geo(conn, hierarchy, lookup):
+    """Asigna códigos a cada fila de `geo`. Devuelve los valores sin mapear."""
+    cur = conn.cursor()
+
+    cur.execute("DELETE FROM m49_areas")
+    cur.executemany("""
+        INSERT INTO m49_areas
+        (m49_code, name, level, iso_alpha3, parent_code,
+         m49_region, m49_subregion, m49_intermediate)
+        VALUES (?,?,?,?,?,?,?,?)
+    """, [(code, *row) for code, row in hierarchy.items()])
+
+    updates  = []
+    unmapped = []
+    for geo_id, geo_type, value_raw in cur.execute(
+            "SELECT geo_id, geo_type, value_raw FROM geo").fetchall():
+        code = lookup.get(fold(value_raw))
+        if code is None:
+            unmapped.append((geo_type, value_raw))
+            updates.append((None, None, None, None, None, geo_id))
+            continue
+        name, level, alpha3, _, region, subregion, intermediate = hierarchy[code]
+        updates.append((code, region, subregion, intermediate, alpha3, geo_id))
+
+    cur.executemany("""
+        UPDATE geo
+        SET    m49_code = ?, m49_region = ?, m49_subregion = ?,
+               m49_intermediate = ?, iso_alpha3 = ?
+        WHERE  geo_id = ?
+    """, updates)
+    conn.commit()
+
+    log(f"  Valores geo: {len(updates)} | mapeados: {len(updates) - len(unmapped)} "
+        f"| sin mapear: {len(unmapped)}")
+    return unmapped
+
+def report(conn, unmapped):
+    """Rollup país → región y valores pendientes de catálogo."""
+    log("\n── Briefs por región M49 (países + regiones) ───────────")
+    for name, n in conn.execute("""
+        SELECT a.name, COUNT(DISTINCT bg.brief_id) as n
+        FROM   brief_geo bg
+        JOIN   geo g       ON bg.geo_id = g.geo_id
+        JOIN   m49_areas a ON a.m49_code = g.m49_region
+        GROUP  BY g.m49_region
+        ORDER  BY n DESC
+    """):
+        log(f"  {n:5d}  {name}")
+
+    if unmapped:
+        log("\n── Valores sin mapear (agregar a ALIASES) ──────────────")
+        for geo_type, value in sorted(unmapped)[:30]:
+            log(f"  [{geo_type}] {value}")
+
+def main():
+    conn = sqlite3.connect(DB_PATH)
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(geo)")}
+    if not set(GEO_COLUMNS) <= cols:
+        log("❌ geo sin columnas M49: correr 02_load_sqlite.py (migra la base)")
+        raise SystemExit(1)
+
+    hierarchy = build_hierarchy()
+    lookup    = build_lookup(hierarchy)
+    log(f"Diccionario geo: {len(hierarchy)} áreas | {len(lookup)} claves")
+
+    ensure_schema(conn)
+    unmapped = normalize_geo(conn, hierarchy, lookup)
+    report(conn, unmapped)
+
+    conn.close()
+    log("\n✓ Normalización geográfica completada.")
+
+if __name__ == "__main__":
+    main()
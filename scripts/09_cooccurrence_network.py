@@ -0,0 +1,415 @@
+"""
+09_cooccurrence_network.py
+Red de co-ocurrencia por periodo: comunidades, centralidad y deriva.
+
+Lee el artefacto de co-ocurrencia de 05 (pares de ítems por periodo) y,
+para cada periodo, arma un grafo no dirigido ponderado en CSR:
+- grado y grado ponderado
+- PageRank (iteración de potencias)
+- intermediación (Brandes por lotes de fuentes, muestreado en grafos grandes)
+- comunidades (propagación de etiquetas ponderada) y modularidad
+
+Las comunidades se encadenan entre periodos consecutivos por Jaccard de
+miembros, con un id persistente, para seguir cómo se forman, continúan
+o se disuelven. Los resultados por periodo quedan en caché: solo se
+recalculan los periodos cuyas aristas cambiaron.
+"""
+
+import argparse
+import hashlib
+import json
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from collections import namedtuple
+from scipy import sparse
+
+from artifacts import load_table, save_table
+from periods import GRANULARITIES, period_label
+from instrumentation import log
+
+OUT_DIR  = Path("outputs/tables")
+PRODUCER = "09_cooccurrence_network"
+OUT_DIR.mkdir(parents=True, exist_ok=True)
+
+DIMENSION   = "keywords"
+GRANULARITY = "quarter"
+WEIGHT      = "n_cooccur"   # peso de arista (columna de la co-ocurrencia)
+
+# Caché por periodo (Parquet + manifest con fingerprints de aristas)
+CACHE_DIR     = Path("data/cache/network")
+CACHE_VERSION = 1
+
+# ── Parámetros de los algoritmos ───────────────────────────────
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOL     = 1e-10
+PAGERANK_MAX_ITER = 200
+BETWEENNESS_SAMPLES = 256   # fuentes muestreadas (exacto si hay menos nodos)
+BETWEENNESS_BATCH   = 64    # fuentes por lote de BFS
+LPA_MAX_ITER     = 100
+SEED             = 42
+MATCH_THRESHOLD  = 0.3      # Jaccard mínimo para que una comunidad continúe
+TOP_MEMBERS      = 5
+
+# Grafo no dirigido: A simétrica en CSR (pesos), nodes[i] = etiqueta del nodo i
+Graph = namedtuple("Graph", ["A", "nodes"])
+
+# ── 1. Grafo ───────────────────────────────────────────────────
+def build_graph(edges):
+    """Pares (item1, item2, peso) → Graph con la matriz de adyacencia simétrica."""
+    nodes, idx = np.unique(
+        np.concatenate([edges['item1'].to_numpy(dtype=str), edges['item2'].to_numpy(dtype=str)]),
+        return_inverse=True
+    )
+    n = len(edges)
+    i, j = idx[:n], idx[n:]
+    w = edges[WEIGHT].to_numpy(dtype=np.float64)
+    A = sparse.csr_matrix((np.concatenate([w, w]), (np.concatenate([i, j]), np.concatenate([j, i]))),
+                          shape=(len(nodes), len(nodes)))
+    return Graph(A, nodes)
+
+# ── 2. Centralidad ─────────────────────────────────────────────
+def pagerank(A, damping=PAGERANK_DAMPING, tol=PAGERANK_TOL, max_iter=PAGERANK_MAX_ITER):
+    """PageRank ponderado por iteración de potencias sobre la CSR."""
+    N = A.shape[0]
+    out_w    = np.asarray(A.sum(axis=1)).ravel()
+    dangling = out_w == 0
+    inv      = np.divide(1.0, out_w, out=np.zeros(N), where=~dangling)
+    At       = A.T.tocsr()
+    r = np.full(N, 1.0 / N)
+    for _ in range(max_iter):
+        r_new = damping * (At @ (r * inv) + r[dangling].sum() / N) + (1 - damping) / N
+        if np.abs(r_new - r).sum() < tol:
+            return r_new
+        r = r_new
+    return r
+
+def betweenness(A, samples=BETWEENNESS_SAMPLES, batch=BETWEENNESS_BATCH, seed=SEED):
+    """
+    Intermediación normalizada (caminos más cortos en saltos) con el
+    algoritmo de Brandes en forma matricial: un lote de fuentes avanza
+    su BFS a la vez con productos CSR × denso, y la acumulación de
+    dependencias recorre los niveles hacia atrás. Con más de `samples`
+    nodos se muestrean fuentes y se reescala (estimador insesgado).
+    """
+    N = A.shape[0]
+    if N < 3:
+        return np.zeros(N)
+    B = A.copy()
+    B.data[:] = 1.0
+
+    rng     = np.random.default_rng(seed)
+    sources = np.arange(N) if N <= samples else np.sort(rng.choice(N, samples, replace=False))
+    bc      = np.zeros(N)
+
+    for start in range(0, len(sources), batch):
+        src = sources[start:start + batch]
+        s   = len(src)
+        rows = np.arange(s)
+
+        sigma = np.zeros((s, N))
+        depth = np.full((s, N), -1, dtype=np.int32)
+        sigma[rows, src] = 1
+        depth[rows, src] = 0
+
+        # BFS hacia adelante: conteo de caminos más cortos por nivel
+        frontier, d = sigma.copy(), 0
+        while True:
+            nxt = (B @ frontier.T).T
+            nxt[depth >= 0] = 0
+            reached = nxt > 0
+            if not reached.any():
+                break
+            d += 1
+            depth[reached] = d
+            sigma += nxt
+            frontier = nxt
+
+        # Acumulación hacia atrás: δ(v) = Σ_w σ(v)/σ(w)·(1 + δ(w))
+        delta = np.zeros((s, N))
+        for level in range(d, 0, -1):
+            coef = np.where(depth == level, (1 + delta) / np.where(sigma > 0, sigma, 1), 0)
+            back = (B @ coef.T).T
+            delta += np.where(depth == level - 1, sigma * back, 0)
+        delta[rows, src] = 0
+        bc += delta.sum(axis=0)
+
+    bc *= N / len(sources)
+    return bc / ((N - 1) * (N - 2))   # no dirigido: /2 pares y /2 por doble conteo
+
+# ── 3. Comunidades ─────────────────────────────────────────────
+def label_propagation(A, max_iter=LPA_MAX_ITER, seed=SEED):
+    """
+    Propagación de etiquetas ponderada, semi-síncrona: en cada ronda una
+    mitad aleatoria de los nodos adopta la etiqueta con más peso entre
+    sus vecinos (A @ one-hot de etiquetas), solo si mejora a la actual.
+    Evita la oscilación del modo síncrono sin un bucle por nodo.
+    Devuelve etiquetas compactas 0..C−1 ordenadas por tamaño.
+    """
+    N = A.shape[0]
+    labels = np.arange(N)
+    rng    = np.random.default_rng(seed)
+    for _ in range(max_iter):
+        L      = sparse.csr_matrix((np.ones(N), (np.arange(N), labels)), shape=(N, N))
+        scores = (A @ L).tocsr()
+        best   = np.asarray(scores.argmax(axis=1)).ravel()
+        gain   = (np.asarray(scores.max(axis=1).todense()).ravel()
+                  - np.asarray(scores[np.arange(N), labels]).ravel())
+        improve = gain > 1e-12
+        if not improve.any():
+            break
+        update = improve & (rng.random(N) < 0.5)
+        if not update.any():
+            update = improve
+        labels = np.where(update, best, labels)
+
+    # Compactar: comunidad 0 = la más grande
+    uniq, inv, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    order = np.argsort(-sizes, kind='stable')
+    rank  = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank[inv]
+
+def modularity(A, labels):
+    """Modularidad ponderada Q = Σ_c [w_in(c)/2m − (d_c/2m)²]."""
+    two_m = A.sum()
+    if two_m == 0:
+        return 0.0
+    coo   = A.tocoo()
+    w_in  = np.bincount(labels[coo.row], weights=coo.data * (labels[coo.row] == labels[coo.col]),
+                        minlength=labels.max() + 1)
+    d_c   = np.bincount(labels, weights=np.asarray(A.sum(axis=1)).ravel())
+    return float((w_in / two_m - (d_c / two_m) ** 2).sum())
+
+# ── 4. Análisis por periodo ────────────────────────────────────
+def analyze_period(edges):
+    """Métricas de nodo de un periodo + modularidad de la partición."""
+    g  = build_graph(edges)
+    A  = g.A
+    community = label_propagation(A)
+    nodes = pd.DataFrame({
+        'item'           : g.nodes,
+        'degree'         : A.getnnz(axis=1),
+        'weighted_degree': np.asarray(A.sum(axis=1)).ravel(),
+        'pagerank'       : pagerank(A),
+        'betweenness'    : betweenness(A),
+        'community_local': community,
+    })
+    return nodes, modularity(A, community)
+
+def edges_fingerprint(edges):
+    """Huella de las aristas de un periodo (independiente del orden de filas)."""
+    h = pd.util.hash_pandas_object(edges[['item1', 'item2', WEIGHT]], index=False)
+    return hashlib.sha1(np.sort(h.to_numpy()).tobytes()).hexdigest()
+
+def read_manifest(cache_dir):
+    path = cache_dir / "manifest.json"
+    if path.exists():
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        if manifest.get("version") == CACHE_VERSION:
+            return manifest
+    return {"version": CACHE_VERSION, "periods": {}}
+
+def write_manifest(cache_dir, manifest):
+    path = cache_dir / "manifest.json"
+    tmp  = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+def network_by_period(cooc, dimension, granularity):
+    """
+    Métricas de nodo de todos los periodos, recalculando solo los que
+    cambiaron. Devuelve (nodos en formato largo, modularidad por periodo).
+    """
+    cache_dir = CACHE_DIR / dimension / granularity
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(cache_dir)
+    cached   = manifest["periods"]
+
+    groups  = {str(p): e for p, e in cooc.groupby('period', sort=True)}
+    fps     = {p: edges_fingerprint(e) for p, e in groups.items()}
+    stale   = [p for p in groups
+               if cached.get(p, {}).get("fingerprint") != fps[p]
+               or not (cache_dir / f"nodes_{p}.parquet").exists()]
+    log(f"Caché de red ({dimension}, {granularity}): {len(groups) - len(stale)} periodos vigentes | "
+        f"{len(stale)} a recalcular")
+
+    for p in stale:
+        nodes, q = analyze_period(groups[p])
+        nodes.to_parquet(cache_dir / f"nodes_{p}.parquet", index=False)
+        cached[p] = {"fingerprint": fps[p], "modularity": q}
+        log(f"  {period_label(granularity, p)}: {len(nodes)} nodos | "
+            f"{len(groups[p])} aristas | {nodes['community_local'].max() + 1} comunidades | Q = {q:.3f}")
+
+    for p in set(cached) - set(groups):
+        (cache_dir / f"nodes_{p}.parquet").unlink(missing_ok=True)
+        del cached[p]
+    write_manifest(cache_dir, manifest)
+
+    periods = sorted(groups, key=int)
+    if not periods:
+        return pd.DataFrame(), pd.Series(dtype=float)
+    nodes = pd.concat([pd.read_parquet(cache_dir / f"nodes_{p}.parquet").assign(period=int(p))
+                       for p in periods], ignore_index=True)
+    q = pd.Series({int(p): cached[p]["modularity"] for p in periods}, name='modularity')
+    return nodes, q
+
+# ── 5. Deriva de comunidades ───────────────────────────────────
+def track_communities(nodes, threshold=MATCH_THRESHOLD):
+    """
+    Encadena comunidades de periodos consecutivos. La matriz de Jaccard
+    entre comunidades sale de un producto de incidencias dispersas
+    (comunidad × ítem); el emparejamiento es voraz por Jaccard
+    descendente. Emparejadas heredan el id persistente; el resto son
+    nuevas. Devuelve (nodos con `community`, tabla de comunidades).
+    """
+    log("\nSiguiendo comunidades entre periodos...")
+
+    items, item_idx = np.unique(nodes['item'].to_numpy(dtype=str), return_inverse=True)
+    nodes = nodes.assign(item_idx=item_idx, community=-1)
+
+    rows, next_id = [], 0
+    prev = None   # (incidencia, ids persistentes, tamaños) del periodo anterior
+    for p, grp in nodes.groupby('period', sort=True):
+        local = grp['community_local'].to_numpy()
+        C     = local.max() + 1
+        M     = sparse.csr_matrix((np.ones(len(grp)), (local, grp['item_idx'].to_numpy())),
+                                  shape=(C, len(items)))
+        sizes = np.bincount(local, minlength=C)
+        ids   = np.full(C, -1)
+        jac_prev = np.zeros(C)
+
+        if prev is not None:
+            M_prev, ids_prev, sizes_prev = prev
+            inter = (M_prev @ M.T).toarray()
+            jac   = inter / (sizes_prev[:, None] + sizes[None, :] - inter)
+            used_prev = np.zeros(len(ids_prev), dtype=bool)
+            for flat in np.argsort(-jac, axis=None, kind='stable'):
+                a, b = divmod(flat, C)
+                if jac[a, b] < threshold:
+                    break
+                if used_prev[a] or ids[b] >= 0:
+                    continue
+                ids[b], jac_prev[b], used_prev[a] = ids_prev[a], jac[a, b], True
+            for a in np.flatnonzero(~used_prev):
+                rows.append({'period': p, 'community': ids_prev[a], 'size': 0,
+                             'top_items': '', 'jaccard_prev': 0.0, 'event': 'disuelta'})
+
+        new = ids < 0
+        ids[new] = np.arange(next_id, next_id + new.sum())
+        next_id += new.sum()
+
+        persistent = ids[local]
+        nodes.loc[grp.index, 'community'] = persistent
+        ranked = grp.assign(community=persistent).sort_values('pagerank', ascending=False)
+        for c in range(C):
+            members = ranked[ranked['community_local'] == c]['item'].head(TOP_MEMBERS)
+            rows.append({
+                'period'      : p,
+                'community'   : ids[c],
+                'size'        : int(sizes[c]),
+                'top_items'   : " | ".join(members),
+                'jaccard_prev': float(jac_prev[c]),
+                'event'       : 'nueva' if prev is not None and new[c]
+                                else ('inicial' if prev is None else 'continúa'),
+            })
+        prev = (M, ids, sizes)
+
+    communities = pd.DataFrame(rows).sort_values(['period', 'size'], ascending=[True, False],
+                                                 kind='stable', ignore_index=True)
+    log(f"  {next_id} comunidades persistentes en {nodes['period'].nunique()} periodos")
+
+    nodes = nodes[['period', 'item', 'community', 'degree', 'weighted_degree',
+                   'pagerank', 'betweenness']]
+    return nodes, communities
+
+def centrality_drift(nodes):
+    """Cambio de PageRank y de posición entre los dos últimos periodos."""
+    periods = np.sort(nodes['period'].unique())
+    if len(periods) < 2:
+        return pd.DataFrame()
+    prev, last = (nodes[nodes['period'] == p].set_index('item') for p in periods[-2:])
+    both = prev[['pagerank', 'community']].join(last[['pagerank', 'community']],
+                                                how='outer', lsuffix='_prev', rsuffix='_last')
+    both[['pagerank_prev', 'pagerank_last']] = both[['pagerank_prev', 'pagerank_last']].fillna(0)
+    both[['community_prev', 'community_last']] = both[['community_prev', 'community_last']].astype('Int64')
+    both['rank_prev'] = both['pagerank_prev'].rank(ascending=False, method='min')
+    both['rank_last'] = both['pagerank_last'].rank(ascending=False, method='min')
+    both['pagerank_change'] = both['pagerank_last'] - both['pagerank_prev']
+    both['rank_change']     = both['rank_prev'] - both['rank_last']
+    both['switched']        = (both['community_prev'] != both['community_last']) \
+                              & both['community_prev'].notna() & both['community_last'].notna()
+    return both.sort_values('pagerank_change', ascending=False, kind='stable')
+
+# ── 6. Guardar y reportar ──────────────────────────────────────
+def save_outputs(nodes, communities, drift, q, dimension, granularity):
+    log("\nGuardando outputs...")
+    meta = {"granularity": granularity, "dimension": dimension}
+    save_table(f"{dimension}_network_nodes_{granularity}", nodes, PRODUCER, **meta)
+    save_table(f"{dimension}_network_communities_{granularity}", communities, PRODUCER, **meta)
+    save_table(f"{dimension}_network_drift_{granularity}", drift, PRODUCER, **meta)
+    log(f"  ✓ artefactos: {dimension}_network_{{nodes,communities,drift}}_{granularity}")
+
+    label = lambda df: df.assign(period=[period_label(granularity, p) for p in df['period']])
+    for stem, df, index in [("nodes", label(nodes), False),
+                            ("communities", label(communities), False),
+                            ("drift", drift, True)]:
+        path = OUT_DIR / f"{dimension}_network_{stem}_by_{granularity}.csv"
+        df.to_csv(path, index=index)
+        log(f"  ✓ {path}")
+
+    path = OUT_DIR / f"{dimension}_network_modularity_by_{granularity}.csv"
+    q.rename(index=lambda p: period_label(granularity, p)).rename_axis('period').to_csv(path)
+    log(f"  ✓ {path}")
+
+def report(nodes, communities, drift, q, granularity):
+    log("\n" + "="*60)
+    log("RED DE CO-OCURRENCIA — HALLAZGOS")
+    log("="*60)
+
+    last = nodes['period'].max()
+    top  = nodes[nodes['period'] == last].nlargest(10, 'pagerank')
+    log(f"\n⭐ TOP 10 PAGERANK ({period_label(granularity, last)}):")
+    for _, row in top.iterrows():
+        log(f"  • {row['item']:30s} pagerank: {row['pagerank']:.4f}  "
+            f"intermediación: {row['betweenness']:.3f}  comunidad: {row['community']}")
+
+    log("\n🧩 COMUNIDADES POR PERIODO:")
+    for p, grp in communities.groupby('period', sort=True):
+        events = grp['event'].value_counts()
+        log(f"  {period_label(granularity, p)}: Q = {q.get(p, 0):.3f} | "
+            + " | ".join(f"{e}: {n}" for e, n in events.items()))
+
+    if not drift.empty:
+        log("\n📈 MAYOR SUBIDA DE CENTRALIDAD (último vs anterior):")
+        for idx, row in drift.head(10).iterrows():
+            log(f"  • {idx:30s} Δ pagerank: {row['pagerank_change']:+.4f}  "
+                f"Δ posición: {row['rank_change']:+.0f}")
+
+# ── Main ───────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--dimension", default=DIMENSION,
+                        help="dimensión analizada por 05 (keywords, countries...)")
+    parser.add_argument("--granularity", choices=GRANULARITIES, default=GRANULARITY)
+    args = parser.parse_args()
+    dim, g = args.dimension, args.granularity
+
+    cooc = load_table(f"{dim}_cooccurrence_{g}")
+    log(f"Co-ocurrencia ({dim}, {g}): {len(cooc)} aristas en {cooc['period'].nunique()} periodos")
+
+    nodes, q = network_by_period(cooc, dim, g)
+    if nodes.empty:
+        log("⚠ Sin aristas: nada que analizar")
+        return
+
+    nodes, communities = track_communities(nodes)
+    drift = centrality_drift(nodes)
+
+    save_outputs(nodes, communities, drift, q, dim, g)
+    report(nodes, communities, drift, q, g)
+
+    log("\n✓ Análisis de red completado.")
+
+if __name__ == "__main__":
+    main()
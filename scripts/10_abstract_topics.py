@@ -0,0 +1,438 @@
+"""
+10_abstract_topics.py
+Temas latentes sobre los abstracts de los briefs (briefs.abstract).
+
+1. Tokenización en streaming: los abstracts se leen de la base por
+   lotes y cada término (unigramas y bigramas) se proyecta con hashing
+   a un espacio fijo de N_FEATURES columnas. No hay vocabulario en
+   memoria; la frecuencia documental se acumula en un vector fijo.
+2. TF-IDF sublineal normalizado (IDF con los conteos acumulados).
+3. NMF online por mini-lotes (Mairal et al. 2010): el estado del
+   modelo son W (features × temas) y las estadísticas suficientes
+   A = Σ hhᵀ y B = Σ xhᵀ, de tamaño fijo. Cada corrida solo entrena
+   con los briefs nuevos o con abstract cambiado; los abstracts
+   editados o vaciados descuentan antes sus términos de la frecuencia
+   documental.
+4. Pesos por brief en `brief_topics` y temas en `topics`; como W e IDF
+   cambian con cada actualización, se reasignan todos los briefs. La
+   dimensión "topics" de 05_temporal_analysis.py los analiza en el tiempo.
+
+La memoria queda acotada por N_FEATURES × N_TOPICS y el tamaño de lote,
+no por el tamaño del corpus.
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import unicodedata
+import zlib
+import numpy as np
+from pathlib import Path
+from scipy import sparse
+
+from instrumentation import log
+
+DB_PATH   = Path("data/db/cgspace_briefs.sqlite")
+MODEL_DIR = Path("data/models/topics")
+
+# ── Parámetros ─────────────────────────────────────────────────
+N_FEATURES   = 2 ** 18   # columnas del espacio hasheado
+N_TOPICS     = 20
+BATCH_SIZE   = 512       # abstracts por mini-lote
+FIT_EPOCHS   = 3         # pasadas sobre el corpus al construir el modelo desde cero
+TRANSFORM_ITER = 100     # iteraciones multiplicativas para los pesos H
+MIN_WEIGHT   = 0.10      # peso mínimo (normalizado) para guardar brief–tema
+MIN_TOKENS   = 5         # abstracts más cortos se ignoran
+LABEL_TERMS  = 3         # términos en la etiqueta del tema
+TOP_BUCKETS  = 15        # buckets por tema cuyos términos se recuerdan
+SEED         = 42
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9]{2,}")
+
+STOPWORDS = set("""
+a about above after again against all also among an and any are as at be because been
+before being below between both but by can could did do does doing down during each
+few for from further had has have having here how however i if in into is it its itself
+may more most must no nor not of off on once only or other our out over own paper
+per same should so some such than that the their them then there these they this those
+through to too under until up us use used using very was we were what when where which
+while who whom why will with within would brief briefs policy also new key based two
+study results findings report
+al como con del desde donde el en entre era es esta este esto estos fue ha han hay la
+las lo los mas muy no nos o para pero por que se ser si sin sobre su sus también un una
+uno y
+au aux avec ce ces dans de des du elle en est et il ils la le les leur mais ne nous ou
+par pas plus pour qui sur une
+""".split())
+
+# ── 1. Tokenización y hashing ──────────────────────────────────
+def fold(text):
+    """Minúsculas sin acentos (el tokenizador solo usa ASCII)."""
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return text.lower()
+
+def terms(text):
+    """Unigramas sin stopwords y bigramas de unigramas consecutivos."""
+    tokens = [t for t in TOKEN_RE.findall(fold(text)) if t not in STOPWORDS]
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+def bucket(term):
+    """Columna del término: crc32 es estable entre corridas (hash() no)."""
+    return zlib.crc32(term.encode("utf-8")) % N_FEATURES
+
+def hash_batch(texts):
+    """
+    Lote de textos → (matriz dispersa de conteos docs × N_FEATURES,
+    términos y buckets de cada doc, para etiquetar temas sin re-tokenizar).
+    """
+    rows, cols, docs = [], [], []
+    for i, text in enumerate(texts):
+        t = terms(text)
+        b = [bucket(x) for x in t]
+        rows.extend([i] * len(b))
+        cols.extend(b)
+        docs.append((t, b))
+    X = sparse.csr_matrix((np.ones(len(cols), dtype=np.float32), (rows, cols)),
+                          shape=(len(texts), N_FEATURES))
+    X.sum_duplicates()
+    return X, docs
+
+def tfidf(X, df, n_docs):
+    """TF sublineal × IDF suavizado, filas con norma L2 = 1."""
+    X = X.copy()
+    X.data = 1 + np.log(X.data)
+    idf = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+    X = X @ sparse.diags(idf)
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    return sparse.diags(1 / np.maximum(norms, 1e-12)) @ X
+
+# ── 2. Estado del modelo ───────────────────────────────────────
+def new_model():
+    rng = np.random.default_rng(SEED)
+    W = rng.random((N_FEATURES, N_TOPICS), dtype=np.float32)
+    W /= np.linalg.norm(W, axis=0)
+    return {
+        "W"     : W,
+        "A"     : np.zeros((N_TOPICS, N_TOPICS), dtype=np.float64),
+        "B"     : np.zeros((N_FEATURES, N_TOPICS), dtype=np.float32),
+        "df"    : np.zeros(N_FEATURES, dtype=np.int64),
+        "n_docs": 0,
+        "version": 1,
+        "bucket_terms": {},
+    }
+
+def load_model():
+    """Estado guardado o None si no existe / cambió la configuración."""
+    meta_path = MODEL_DIR / "meta.json"
+    if not meta_path.exists():
+        return None
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    if meta["n_features"] != N_FEATURES or meta["n_topics"] != N_TOPICS:
+        log("  ⚠ Configuración del modelo cambió: se reconstruye")
+        return None
+    with np.load(MODEL_DIR / "state.npz") as z:
+        model = {k: z[k] for k in ("W", "A", "B", "df")}
+    model.update(n_docs=meta["n_docs"], version=meta["version"],
+                 bucket_terms=meta["bucket_terms"])
+    return model
+
+def save_model(model):
+    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = MODEL_DIR / "state.tmp.npz"
+    np.savez(tmp, W=model["W"], A=model["A"], B=model["B"], df=model["df"])
+    tmp.replace(MODEL_DIR / "state.npz")
+    meta = {"n_features": N_FEATURES, "n_topics": N_TOPICS, "n_docs": int(model["n_docs"]),
+            "version": model["version"], "bucket_terms": model["bucket_terms"]}
+    (MODEL_DIR / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2),
+                                         encoding="utf-8")
+
+# ── 3. NMF online ──────────────────────────────────────────────
+# Solo las filas de W de buckets ya vistos (df > 0) participan: el resto
+# conserva su inicialización aleatoria hasta que aparezca un término ahí.
+def active_rows(model):
+    return np.flatnonzero(model["df"])
+
+def transform(X, W, n_iter=TRANSFORM_ITER):
+    """Pesos H ≥ 0 con W fija: actualizaciones multiplicativas sobre (docs × temas)."""
+    XW  = np.asarray(X @ W)
+    WtW = W.T @ W
+    H   = np.maximum(XW, 1e-4)
+    for _ in range(n_iter):
+        H *= XW / np.maximum(H @ WtW, 1e-12)
+    return H
+
+def partial_fit(model, X):
+    """Un mini-lote: pesos del lote, estadísticas A y B, y W por coordenadas."""
+    rows = active_rows(model)
+    A    = model["A"]
+    W, X = model["W"][rows], X[:, rows]
+    H = transform(X, W)
+    A += H.T @ H
+    B  = model["B"][rows] + np.asarray(X.T @ H, dtype=np.float32)
+    for j in range(N_TOPICS):
+        if A[j, j] < 1e-12:
+            continue
+        W[:, j] += (B[:, j] - W @ A[:, j].astype(np.float32)) / A[j, j]
+        np.maximum(W[:, j], 0, out=W[:, j])
+        W[:, j] /= max(np.linalg.norm(W[:, j]), 1.0)
+    model["W"][rows] = W
+    model["B"][rows] = B
+
+# ── 4. Lectura en streaming ────────────────────────────────────
+def ensure_schema(conn):
+    """
+    Crea las tablas que falten. Devuelve True si brief_topic_docs viene
+    de antes de guardar los buckets de cada documento: esos abstracts no
+    se pueden descontar de df y el modelo debe reconstruirse.
+    """
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS topics (
+            topic_id  INTEGER PRIMARY KEY,
+            label     TEXT,
+            top_terms TEXT
+        );
+        CREATE TABLE IF NOT EXISTS brief_topics (
+            brief_id TEXT REFERENCES briefs(brief_id),
+            topic_id INTEGER REFERENCES topics(topic_id),
+            weight   REAL,
+            PRIMARY KEY (brief_id, topic_id)
+        );
+        -- abstracts ya procesados (hash para detectar cambios) y buckets
+        -- distintos que sumaron a df (int32; NULL si era demasiado corto)
+        CREATE TABLE IF NOT EXISTS brief_topic_docs (
+            brief_id      TEXT PRIMARY KEY REFERENCES briefs(brief_id),
+            abstract_hash TEXT,
+            model_version INTEGER,
+            buckets       BLOB
+        );
+        CREATE INDEX IF NOT EXISTS idx_brief_topics_tid ON brief_topics(topic_id);
+    """)
+    if "buckets" in {r[1] for r in conn.execute("PRAGMA table_info(brief_topic_docs)")}:
+        return False
+    conn.execute("ALTER TABLE brief_topic_docs ADD COLUMN buckets BLOB")
+    return conn.execute("SELECT COUNT(*) FROM brief_topic_docs").fetchone()[0] > 0
+
+def abstract_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def pending_briefs(conn, version, rebuild):
+    """
+    Ids de briefs a procesar: sin procesar, con abstract cambiado o
+    procesados con otra versión del modelo. Con `rebuild`, todos.
+    """
+    done = {} if rebuild else dict(conn.execute(
+        "SELECT brief_id, abstract_hash FROM brief_topic_docs WHERE model_version = ?",
+        (version,)))
+    pending = []
+    for bid, text in conn.execute(
+            "SELECT brief_id, abstract FROM briefs WHERE abstract IS NOT NULL AND abstract != ''"):
+        if done.get(bid) != abstract_hash(text):
+            pending.append(bid)
+    return pending
+
+def emptied_briefs(conn):
+    """Briefs procesados cuyo abstract quedó vacío o que ya no están en la base."""
+    return [bid for (bid,) in conn.execute("""
+        SELECT d.brief_id FROM brief_topic_docs d
+        LEFT JOIN briefs b ON b.brief_id = d.brief_id
+        WHERE  b.abstract IS NULL OR b.abstract = ''
+    """)]
+
+def retract(conn, model, brief_ids):
+    """
+    Descuenta de df y n_docs los abstracts procesados antes de estos
+    briefs (editados o vaciados) y borra sus filas: el documento nuevo,
+    si lo hay, vuelve a sumar en fit(). A y B conservan su aporte, que
+    se diluye con los lotes siguientes.
+    """
+    n = 0
+    for start in range(0, len(brief_ids), BATCH_SIZE):
+        ids = brief_ids[start:start + BATCH_SIZE]
+        marks = ','.join('?' * len(ids))
+        for (blob,) in conn.execute(f"""
+                SELECT buckets FROM brief_topic_docs
+                WHERE  brief_id IN ({marks}) AND buckets IS NOT NULL
+            """, ids):
+            model["df"][np.frombuffer(blob, dtype=np.int32)] -= 1
+            n += 1
+        conn.execute(f"DELETE FROM brief_topic_docs WHERE brief_id IN ({marks})", ids)
+        conn.execute(f"DELETE FROM brief_topics WHERE brief_id IN ({marks})", ids)
+    model["n_docs"] -= n
+    return n
+
+def stream_batches(conn, brief_ids, batch_size=BATCH_SIZE):
+    """Lotes (ids, textos) leídos de la base; nunca todo el corpus en memoria."""
+    for start in range(0, len(brief_ids), batch_size):
+        ids = brief_ids[start:start + batch_size]
+        rows = conn.execute(f"""
+            SELECT brief_id, abstract FROM briefs
+            WHERE  brief_id IN ({','.join('?' * len(ids))})
+        """, ids).fetchall()
+        rows = [(bid, text) for bid, text in rows
+                if len(TOKEN_RE.findall(fold(text))) >= MIN_TOKENS]
+        if rows:
+            yield [r[0] for r in rows], [r[1] for r in rows]
+
+# ── 5. Etiquetas de temas ──────────────────────────────────────
+def top_buckets(model):
+    """Índices de los TOP_BUCKETS buckets más pesados de cada tema (temas × TOP_BUCKETS)."""
+    rows = active_rows(model)
+    W    = model["W"][rows]
+    k    = min(TOP_BUCKETS, len(rows))
+    if k == 0:
+        return np.zeros((N_TOPICS, 0), dtype=np.int64)
+    part = np.argpartition(-W, k - 1, axis=0)[:k]
+    best = np.take_along_axis(part, np.argsort(-np.take_along_axis(W, part, axis=0), axis=0), axis=0)
+    return rows[best].T
+
+def collect_bucket_terms(model, docs):
+    """
+    El hashing pierde el término; para etiquetar, se cuentan solo los
+    términos que caen en los buckets más pesados de cada tema (un
+    conjunto chico), y se acumulan entre corridas.
+    """
+    top  = set(top_buckets(model).ravel().tolist())
+    seen = model["bucket_terms"]
+    for t, b in docs:
+        for term, col in zip(t, b):
+            if col in top:
+                counts = seen.setdefault(str(col), {})
+                counts[term] = counts.get(term, 0) + 1
+    # Podar buckets que ya no están entre los principales
+    model["bucket_terms"] = {b: c for b, c in seen.items() if int(b) in top}
+
+def topic_labels(model):
+    """Por tema: (etiqueta corta, top términos) a partir de los buckets."""
+    seen, top = model["bucket_terms"], top_buckets(model)
+    labels = []
+    for j in range(N_TOPICS):
+        words = []
+        for b in top[j]:
+            counts = seen.get(str(b))
+            if counts:
+                words.append(max(counts, key=counts.get))
+        label = " / ".join(words[:LABEL_TERMS]) or f"tema {j}"
+        labels.append((f"T{j:02d} {label}", ", ".join(words)))
+    return labels
+
+# ── 6. Pipeline ────────────────────────────────────────────────
+def fit(conn, model, brief_ids, epochs):
+    """
+    Actualiza el modelo con los abstracts pedidos (streaming por lotes).
+    En la primera pasada suma cada documento a df y registra sus buckets
+    en brief_topic_docs para poder descontarlo si cambia.
+    """
+    for epoch in range(epochs):
+        n = 0
+        for ids, texts in stream_batches(conn, brief_ids):
+            X, docs = hash_batch(texts)
+            if epoch == 0:
+                model["df"] += np.bincount(X.indices, minlength=N_FEATURES)
+                model["n_docs"] += X.shape[0]
+                conn.executemany("INSERT OR REPLACE INTO brief_topic_docs VALUES (?,?,?,?)", [
+                    (bid, abstract_hash(text), model["version"],
+                     X.indices[X.indptr[i]:X.indptr[i + 1]].astype(np.int32).tobytes())
+                    for i, (bid, text) in enumerate(zip(ids, texts))])
+            partial_fit(model, tfidf(X, model["df"], model["n_docs"]))
+            collect_bucket_terms(model, docs)
+            n += X.shape[0]
+        log(f"  Pasada {epoch + 1}/{epochs}: {n} abstracts")
+
+def mark_short(conn, model, brief_ids):
+    """Registra los pendientes que fit() no usó (abstract demasiado corto)."""
+    for start in range(0, len(brief_ids), BATCH_SIZE):
+        ids = brief_ids[start:start + BATCH_SIZE]
+        rows = conn.execute(f"""
+            SELECT brief_id, abstract FROM briefs
+            WHERE  brief_id IN ({','.join('?' * len(ids))})
+        """, ids).fetchall()
+        conn.executemany("INSERT OR IGNORE INTO brief_topic_docs VALUES (?,?,?,NULL)",
+                         [(bid, abstract_hash(text), model["version"]) for bid, text in rows])
+
+def assign(conn, model, brief_ids):
+    """Pesos de tema de cada brief (normalizados a suma 1) en brief_topics."""
+    cur = conn.cursor()
+    n_rows = 0
+    for ids, texts in stream_batches(conn, brief_ids):
+        rows = active_rows(model)
+        X = tfidf(hash_batch(texts)[0], model["df"], model["n_docs"])
+        H = transform(X[:, rows], model["W"][rows])
+        H /= np.maximum(H.sum(axis=1, keepdims=True), 1e-12)
+        cur.executemany("DELETE FROM brief_topics WHERE brief_id = ?", [(b,) for b in ids])
+        r, c = np.nonzero(H >= MIN_WEIGHT)
+        cur.executemany("INSERT INTO brief_topics (brief_id, topic_id, weight) VALUES (?,?,?)",
+                        [(ids[i], int(j), float(H[i, j])) for i, j in zip(r, c)])
+        n_rows += len(r)
+    conn.commit()
+    return n_rows
+
+def save_topics(conn, model):
+    labels = topic_labels(model)
+    conn.execute("DELETE FROM topics")
+    conn.executemany("INSERT INTO topics (topic_id, label, top_terms) VALUES (?,?,?)",
+                     [(j, label, top) for j, (label, top) in enumerate(labels)])
+    conn.commit()
+    return labels
+
+def report(conn, labels):
+    log("\n── Temas ───────────────────────────────────────────────")
+    sizes = dict(conn.execute("SELECT topic_id, COUNT(*) FROM brief_topics GROUP BY topic_id"))
+    for j, (label, _) in enumerate(labels):
+        log(f"  {sizes.get(j, 0):5d} briefs  {label}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--rebuild", action="store_true",
+                        help="descartar el modelo y reentrenar con todo el corpus")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    legacy = ensure_schema(conn)
+    if legacy and not args.rebuild:
+        log("  ⚠ brief_topic_docs sin buckets por documento: se reconstruye")
+
+    model   = None if args.rebuild or legacy else load_model()
+    rebuild = model is None
+    if rebuild:
+        previous = load_model() if args.rebuild or legacy else None
+        model = new_model()
+        model["version"] = previous["version"] + 1 if previous else 1
+    log(f"Modelo de temas v{model['version']}: {N_TOPICS} temas × {N_FEATURES} features "
+        f"| {model['n_docs']} abstracts acumulados")
+
+    if rebuild:
+        conn.execute("DELETE FROM brief_topics")
+        conn.execute("DELETE FROM brief_topic_docs")
+    pending = pending_briefs(conn, model["version"], rebuild)
+    emptied = emptied_briefs(conn)
+    log(f"Abstracts a procesar: {len(pending)} | vaciados o eliminados: {len(emptied)}")
+    if not pending and not emptied:
+        log("✓ Sin cambios.")
+        conn.close()
+        return
+
+    n_old = retract(conn, model, pending + emptied)
+    if n_old:
+        log(f"  {n_old} abstracts anteriores descontados de la frecuencia documental")
+    if pending:
+        fit(conn, model, pending, FIT_EPOCHS if rebuild else 1)
+        mark_short(conn, model, pending)
+    save_model(model)
+    conn.commit()
+
+    # W e IDF cambiaron: los pesos de todos los briefs quedan viejos
+    n_rows = assign(conn, model, [bid for (bid,) in conn.execute(
+        "SELECT brief_id FROM brief_topic_docs WHERE buckets IS NOT NULL")])
+    log(f"  {n_rows} relaciones brief–tema (peso >= {MIN_WEIGHT})")
+
+    labels = save_topics(conn, model)
+    report(conn, labels)
+
+    conn.close()
+    log("\n✓ Temas de abstracts actualizados.")
+
+if __name__ == "__main__":
+    main()
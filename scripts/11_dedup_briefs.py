@@ -0,0 +1,302 @@
+"""
+11_dedup_briefs.py
+Detección de briefs casi duplicados (versiones re-editadas o
+re-publicadas de un mismo brief) con MinHash + LSH.
+
+1. Shingles: trigramas de palabras de título + abstract, sin acentos.
+   Cada shingle se reduce a un entero de 32 bits.
+2. Firma MinHash de NUM_PERM valores por brief: mínimo de cada
+   hash (a·x + b) mod 2^64 (32 bits altos) sobre los shingles, por lotes
+   con numpy. Las firmas se guardan en caché por brief con el hash del
+   texto: en cada carga solo se firman los briefs nuevos o editados.
+3. LSH por bandas: la firma se corta en BANDS bandas de ROWS valores;
+   dos briefs son candidatos si coinciden en alguna banda completa.
+   Solo los candidatos se comparan (similitud estimada = fracción de
+   valores de la firma que coinciden) y se aceptan con >= THRESHOLD.
+4. Los pares aceptados se agrupan en clusters (componentes conexas) y
+   se guardan en `brief_duplicates`, con el brief canónico de cada
+   cluster (el más antiguo) y como cluster_id el handle más chico. `05_temporal_analysis.py --count-once`
+   cuenta cada cluster una sola vez.
+
+El costo es lineal en el número de briefs (firmas y bandas); solo los
+pares candidatos, pocos en la práctica, se comparan entre sí.
+"""
+
+import re
+import sqlite3
+import unicodedata
+import zlib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from instrumentation import log, span
+
+DB_PATH    = Path("data/db/cgspace_briefs.sqlite")
+CACHE_PATH = Path("data/cache/dedup/signatures.npz")
+OUT_DIR    = Path("outputs/tables")
+
+# ── Parámetros ─────────────────────────────────────────────────
+SHINGLE_K  = 3          # palabras por shingle
+NUM_PERM   = 128        # largo de la firma
+BANDS      = 32         # BANDS × ROWS = NUM_PERM
+ROWS       = 4          # umbral LSH ≈ (1/BANDS)^(1/ROWS) ≈ 0.42
+THRESHOLD  = 0.7        # similitud estimada mínima para aceptar un par
+MAX_BUCKET = 200        # buckets más grandes se enlazan en estrella (ver candidate_pairs)
+BATCH_SIZE = 2000       # briefs por lote al calcular firmas
+SEED       = 42
+
+HASH_SCHEME = 1         # subir si cambia la familia de hashes (invalida la caché)
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# ── 1. Shingles ────────────────────────────────────────────────
+def fold(text):
+    """Minúsculas sin acentos."""
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return text.lower()
+
+def shingles(text):
+    """
+    Trigramas de palabras como enteros de 32 bits. Los textos con menos
+    de SHINGLE_K palabras forman un único shingle.
+    """
+    tokens = TOKEN_RE.findall(fold(text))
+    if len(tokens) < SHINGLE_K:
+        return [zlib.crc32(" ".join(tokens).encode())] if tokens else []
+    return [zlib.crc32(" ".join(tokens[i:i + SHINGLE_K]).encode())
+            for i in range(len(tokens) - SHINGLE_K + 1)]
+
+def text_hash(title, abstract):
+    return zlib.crc32(f"{title or ''}\n{abstract or ''}".encode("utf-8"))
+
+# ── 2. MinHash ─────────────────────────────────────────────────
+def permutations(num_perm=NUM_PERM, seed=SEED):
+    """
+    Coeficientes (a, b) de 64 bits de los hashes multiply-shift, fijos por
+    semilla (a impar: la multiplicación mod 2^64 es una biyección).
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 64, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 1 << 64, size=num_perm, dtype=np.uint64)
+    return a, b
+
+def minhash(texts, a, b):
+    """
+    Firmas (len(texts) × NUM_PERM, uint32) de un lote. Los shingles del
+    lote se concatenan y el mínimo por brief se toma con reduceat, una
+    permutación a la vez. Los textos sin palabras quedan con firma
+    máxima (nunca coinciden en una banda con textos reales).
+    """
+    sig   = np.full((len(texts), len(a)), np.iinfo(np.uint32).max, dtype=np.uint32)
+    shs   = [shingles(t) for t in texts]
+    sizes = np.array([len(s) for s in shs])
+    rows  = np.flatnonzero(sizes)
+    if not len(rows):
+        return sig
+    x      = np.fromiter((h for s in shs for h in s), dtype=np.uint64, count=int(sizes.sum()))
+    starts = np.concatenate([[0], np.cumsum(sizes[rows])[:-1]])
+    for k in range(len(a)):
+        # multiply-shift: a·x + b en aritmética mod 2^64 (numpy desborda
+        # sin aviso) y los 32 bits altos como hash, que son los que mezclan
+        # todos los bits de x
+        v = (a[k] * x + b[k]) >> np.uint64(32)
+        sig[rows, k] = np.minimum.reduceat(v, starts).astype(np.uint32)
+    return sig
+
+def load_cache():
+    """Firmas previas: ({brief_id: (hash del texto, fila)}, matriz)."""
+    if not CACHE_PATH.exists():
+        return {}, None
+    with np.load(CACHE_PATH) as z:
+        if (z["sig"].shape[1] != NUM_PERM or int(z["seed"]) != SEED
+                or "scheme" not in z.files or int(z["scheme"]) != HASH_SCHEME):
+            return {}, None
+        return ({bid: (h, i) for i, (bid, h) in enumerate(zip(z["ids"], z["hashes"]))},
+                z["sig"])
+
+def signatures(conn):
+    """
+    Firmas de todos los briefs, reutilizando las de caché cuyo texto no
+    cambió. Devuelve (DataFrame de briefs, matriz de firmas).
+    """
+    briefs = pd.read_sql_query("""
+        SELECT rowid, brief_id, title, abstract, issued_date
+        FROM   briefs
+        ORDER  BY rowid
+    """, conn)
+    hashes = np.array([text_hash(t, ab) for t, ab in zip(briefs['title'], briefs['abstract'])],
+                      dtype=np.int64)
+
+    cached, cs = load_cache()
+    sig  = np.empty((len(briefs), NUM_PERM), dtype=np.uint32)
+    hit  = np.zeros(len(briefs), dtype=bool)
+    for i, (bid, h) in enumerate(zip(briefs['brief_id'], hashes)):
+        c = cached.get(bid)
+        if c is not None and c[0] == h:
+            sig[i] = cs[c[1]]
+            hit[i] = True
+
+    todo = np.flatnonzero(~hit)
+    log(f"Firmas MinHash: {hit.sum()} en caché | {len(todo)} a calcular")
+    a, b = permutations()
+    for start in range(0, len(todo), BATCH_SIZE):
+        idx   = todo[start:start + BATCH_SIZE]
+        texts = [f"{briefs.at[i, 'title'] or ''} {briefs.at[i, 'abstract'] or ''}" for i in idx]
+        sig[idx] = minhash(texts, a, b)
+
+    if len(todo):
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CACHE_PATH.with_suffix(".tmp.npz")
+        np.savez(tmp, ids=briefs['brief_id'].to_numpy(dtype=str), hashes=hashes,
+                 sig=sig, seed=np.int64(SEED), scheme=np.int64(HASH_SCHEME))
+        tmp.replace(CACHE_PATH)
+
+    return briefs.drop(columns=['abstract']), sig
+
+# ── 3. LSH ─────────────────────────────────────────────────────
+def candidate_pairs(sig):
+    """
+    Pares (i, j), i < j, que coinciden en al menos una banda. Cada
+    banda se agrupa con np.unique sobre sus bytes; solo los buckets con
+    dos o más briefs generan pares. Un bucket con más de MAX_BUCKET
+    briefs (texto repetido muchas veces, p. ej. una plantilla) se enlaza
+    en estrella contra su primer brief, para no generar pares cuadráticos:
+    las componentes conexas resultantes son las mismas si el bucket es
+    homogéneo.
+    """
+    empty = (sig == np.iinfo(np.uint32).max).all(axis=1)
+    pairs = []
+    for band in range(BANDS):
+        cols = np.ascontiguousarray(sig[:, band * ROWS:(band + 1) * ROWS])
+        keys = cols.view(np.dtype((np.void, cols.dtype.itemsize * ROWS))).ravel()
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        inverse = inverse.ravel()
+        shared  = np.flatnonzero(counts[inverse] > 1)
+        shared  = shared[~empty[shared]]
+        if not len(shared):
+            continue
+        order   = shared[np.argsort(inverse[shared], kind="stable")]
+        buckets = np.split(order, np.flatnonzero(np.diff(inverse[order])) + 1)
+        for members in buckets:
+            if len(members) > MAX_BUCKET:
+                pairs.append(np.column_stack([np.full(len(members) - 1, members[0]), members[1:]]))
+            else:
+                i, j = np.triu_indices(len(members), k=1)
+                pairs.append(np.column_stack([members[i], members[j]]))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(pairs), axis=0)
+
+def similarity(sig, i, j):
+    """Jaccard estimada: fracción de valores de la firma que coinciden."""
+    return (sig[i] == sig[j]).mean(axis=1)
+
+# ── 4. Clusters ────────────────────────────────────────────────
+def handle_key(handle):
+    """Orden de handles "prefijo/número" por número (10568/9 antes que 10568/10)."""
+    prefix, _, local = handle.rpartition("/")
+    return (prefix, int(local)) if local.isdigit() else (prefix, float("inf"), local)
+
+def clusters(briefs, sig, pairs):
+    """
+    Componentes conexas de los pares aceptados. El canónico de cada
+    cluster es el brief más antiguo (issued_date; a igual fecha, el
+    primero cargado). El cluster_id es el handle más chico del cluster:
+    no depende del orden de carga y solo cambia si ese brief sale del
+    cluster. Devuelve un DataFrame brief_id, cluster_id, canonical_id,
+    similarity (con el canónico).
+    """
+    n = len(briefs)
+    G = sparse.coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+    _, comp = connected_components(G, directed=False)
+    sizes   = np.bincount(comp)
+    members = np.flatnonzero(sizes[comp] > 1)
+    if not len(members):
+        return pd.DataFrame(columns=['brief_id', 'cluster_id', 'canonical_id', 'similarity'])
+
+    df = pd.DataFrame({'row': members, 'comp': comp[members],
+                       'issued': briefs['issued_date'].to_numpy()[members]})
+    df = df.sort_values(['comp', 'issued', 'row'], na_position='last', kind="stable")
+    canon = df.groupby('comp')['row'].transform('first').to_numpy()
+    rows  = df['row'].to_numpy()
+    ids   = briefs['brief_id'].to_numpy()
+    first = pd.Series(ids[rows], index=df.index).groupby(df['comp']).transform(
+        lambda h: min(h, key=handle_key))
+    return pd.DataFrame({
+        'brief_id':     ids[rows],
+        'cluster_id':   first.to_numpy(),
+        'canonical_id': ids[canon],
+        'similarity':   similarity(sig, rows, canon).round(3),
+    })
+
+def ensure_schema(conn):
+    # cluster_id era el rowid del canónico: la tabla se rehace en cada corrida
+    types = {r[1]: r[2] for r in conn.execute("PRAGMA table_info(brief_duplicates)")}
+    if types.get("cluster_id") == "INTEGER":
+        conn.execute("DROP TABLE brief_duplicates")
+    conn.executescript("""
+        -- Solo briefs en clusters de 2 o más (el canónico incluido)
+        CREATE TABLE IF NOT EXISTS brief_duplicates (
+            brief_id     TEXT PRIMARY KEY REFERENCES briefs(brief_id),
+            cluster_id   TEXT,      -- handle más chico del cluster
+            canonical_id TEXT REFERENCES briefs(brief_id),
+            similarity   REAL   -- Jaccard estimada con el canónico
+        );
+        CREATE INDEX IF NOT EXISTS idx_brief_duplicates_cid ON brief_duplicates(cluster_id);
+        -- cubriente para el filtro de canónicos de 05 --count-once
+        CREATE INDEX IF NOT EXISTS idx_brief_duplicates_can ON brief_duplicates(brief_id, canonical_id);
+    """)
+
+def save_clusters(conn, dup):
+    with conn:
+        conn.execute("DELETE FROM brief_duplicates")
+        conn.executemany("INSERT INTO brief_duplicates VALUES (?, ?, ?, ?)",
+                         dup.itertuples(index=False, name=None))
+
+# ── Reporte ────────────────────────────────────────────────────
+def report(briefs, dup, top=10):
+    n_clusters = dup['cluster_id'].nunique()
+    extra      = len(dup) - n_clusters
+    log(f"\n{'─' * 60}")
+    log(f"Clusters de near-duplicados: {n_clusters} ({len(dup)} briefs)")
+    log(f"Briefs que sobran al contar cada cluster una vez: {extra} "
+        f"({extra / max(len(briefs), 1):.1%} del total)")
+    if not n_clusters:
+        return
+    titles = briefs.set_index('brief_id')['title']
+    sizes  = dup.groupby('canonical_id').size().sort_values(ascending=False).head(top)
+    log("\n── Clusters más grandes ─────────────────────────────────")
+    for canonical, size in sizes.items():
+        title = (titles.get(canonical) or '')[:70]
+        log(f"  {size:>4} briefs  {canonical}  {title}")
+
+# ── Main ───────────────────────────────────────────────────────
+def main():
+    conn = sqlite3.connect(DB_PATH)
+    ensure_schema(conn)
+
+    with span("signatures"):
+        briefs, sig = signatures(conn)
+
+    with span("lsh", briefs=len(briefs)):
+        pairs = candidate_pairs(sig)
+        sims  = similarity(sig, pairs[:, 0], pairs[:, 1]) if len(pairs) else np.empty(0)
+    pairs = pairs[sims >= THRESHOLD]
+    log(f"LSH ({BANDS} bandas × {ROWS}): {len(sims)} pares candidatos | "
+        f"{len(pairs)} con similitud >= {THRESHOLD}")
+
+    dup = clusters(briefs, sig, pairs)
+    save_clusters(conn, dup)
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    dup.to_csv(OUT_DIR / "brief_duplicates.csv", index=False)
+    log(f"  ✓ {OUT_DIR / 'brief_duplicates.csv'}")
+
+    report(briefs, dup)
+    conn.close()
+    log("\n✓ Detección de duplicados completada.")
+
+if __name__ == "__main__":
+    main()
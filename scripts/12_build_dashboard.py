@@ -0,0 +1,180 @@
+"""
+12_build_dashboard.py
+Dashboard estático e interactivo (HTML + JS, sin servidor) sobre los
+artefactos de 05_temporal_analysis.py.
+
+Exporta los datos pre-agregados en trozos chicos bajo
+outputs/dashboard/data/ y copia la interfaz de scripts/dashboard/:
+
+- meta.js            periodos, briefs por periodo y dimensiones
+- {dim}/topk.js      top TOP_K ítems de cada periodo, con su nombre
+- {dim}/trends.js    crecientes, decrecientes y en ráfaga (tendencias de 05)
+- {dim}/names.js     nombres y totales de todos los ítems, por ranking
+                     (solo se carga al buscar)
+- {dim}/counts_N.js  conteos dispersos por periodo de CHUNK_SIZE ítems
+                     consecutivos del ranking (se cargan al elegir ítems)
+
+Cada trozo es un .js que llama a Dashboard.chunk(nombre, datos): así se
+carga con <script> y funciona abriendo index.html desde el disco, sin
+las restricciones de fetch() sobre file://. La interfaz solo pide los
+trozos que muestra, por lo que el tamaño de la dimensión (100k keywords)
+no afecta la carga inicial.
+"""
+
+import argparse
+import json
+import shutil
+import sqlite3
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from pathlib import Path
+
+from artifacts import has_artifact, load_matrix, load_table, read_manifest
+from periods import GRANULARITIES, PERIOD_COLUMNS
+from instrumentation import log
+
+DB_PATH    = Path("data/db/cgspace_briefs.sqlite")
+OUT_DIR    = Path("outputs/dashboard")
+ASSETS_DIR = Path(__file__).resolve().parent / "dashboard"
+ASSETS     = ["index.html", "dashboard.js", "dashboard.css"]
+
+GRANULARITY = "quarter"
+CHUNK_SIZE  = 2000    # ítems por trozo de conteos
+TOP_K       = 50      # ítems por periodo en topk.js
+TOP_TRENDS  = 50      # ítems por lista de tendencias
+TREND_ALPHA = 0.05    # significancia de Mann-Kendall (igual que 05)
+
+# Títulos de las dimensiones de 05 (las desconocidas usan su nombre)
+TITLES = {
+    "keywords":     "Keywords",
+    "countries":    "Países",
+    "donors":       "Donantes",
+    "initiatives":  "Iniciativas",
+    "sdgs":         "SDGs",
+    "impact_areas": "Impact areas",
+    "topics":       "Temas (abstracts)",
+}
+
+# ── Escritura de trozos ────────────────────────────────────────
+def write_chunk(name, data):
+    """data/{name}.js con Dashboard.chunk(name, data). Devuelve su tamaño en bytes."""
+    path = OUT_DIR / "data" / f"{name}.js"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    path.write_text(f"Dashboard.chunk({json.dumps(name)},{body});\n", encoding="utf-8")
+    return path.stat().st_size
+
+def dimensions(granularity):
+    """Dimensiones con matriz de conteos de 05 en esta granularidad."""
+    suffix = f"_by_{granularity}"
+    return [name[:-len(suffix)] for name, info in sorted(read_manifest().items())
+            if name.endswith(suffix) and info["kind"] == "matrix"]
+
+def briefs_per_period(periods, granularity):
+    col  = PERIOD_COLUMNS[granularity]
+    conn = sqlite3.connect(DB_PATH)
+    n    = dict(conn.execute(f"""
+        SELECT {col}, COUNT(*) FROM briefs WHERE {col} IS NOT NULL GROUP BY {col}
+    """).fetchall())
+    conn.close()
+    return [int(n.get(int(p), 0)) for p in periods]
+
+# ── Trozos por dimensión ───────────────────────────────────────
+def top_per_period(m, order, k=TOP_K):
+    """[[ranking, nombre, conteo], ...] de los k ítems mayores de cada periodo."""
+    rank   = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    by_col = m.counts.tocsc()
+    out = []
+    for j in range(by_col.shape[1]):
+        col = by_col[:, j]
+        top = np.argsort(-col.data, kind="stable")[:k]
+        out.append([[int(rank[col.indices[i]]), str(m.items[col.indices[i]]), int(col.data[i])]
+                    for i in top])
+    return out
+
+def trend_lists(name, granularity, order, m):
+    """Crecientes y decrecientes significativos por pendiente; ráfagas activas."""
+    table = f"{name}_trends_{granularity}"
+    if not has_artifact(table):
+        return {"rising": [], "falling": [], "bursts": []}
+    trends = load_table(table)
+    rank   = pd.Series(np.arange(len(order)), index=m.items[order])
+    trends = trends[trends.index.isin(rank.index)]
+
+    def rows(df):
+        return [[int(rank[item]), str(item), round(float(r.slope), 4), round(float(r.mk_p), 4)]
+                for item, r in df.head(TOP_TRENDS).iterrows()]
+
+    significant = trends[trends['mk_p'] < TREND_ALPHA]
+    return {
+        "rising":  rows(significant[significant['slope'] > 0].sort_values('slope', ascending=False)),
+        "falling": rows(significant[significant['slope'] < 0].sort_values('slope')),
+        "bursts":  rows(trends[trends['burst_active'].astype(bool)]
+                        .sort_values('burst_weight', ascending=False)),
+    }
+
+def export_dimension(name, granularity):
+    """Escribe los trozos de una dimensión; devuelve su entrada de meta."""
+    m      = load_matrix(f"{name}_by_{granularity}")
+    counts = m.counts.tocsr()
+    total  = np.asarray(counts.sum(axis=1)).ravel()
+    order  = np.lexsort((m.items, -total))   # ranking: total desc, nombre
+    ranked = counts[order]
+
+    size = write_chunk(f"{name}/names", {"names": m.items[order].tolist(),
+                                         "totals": total[order].astype(int).tolist()})
+    size += write_chunk(f"{name}/topk", top_per_period(m, order))
+    size += write_chunk(f"{name}/trends", trend_lists(name, granularity, order, m))
+
+    n_chunks = (len(order) + CHUNK_SIZE - 1) // CHUNK_SIZE
+    for c in range(n_chunks):
+        block = ranked[c * CHUNK_SIZE:(c + 1) * CHUNK_SIZE]
+        # por ítem: [índices de periodo, conteos] (solo celdas no nulas)
+        rows  = [[block.indices[block.indptr[i]:block.indptr[i + 1]].tolist(),
+                  block.data[block.indptr[i]:block.indptr[i + 1]].astype(int).tolist()]
+                 for i in range(block.shape[0])]
+        size += write_chunk(f"{name}/counts_{c}", rows)
+
+    log(f"  {name:<14} {len(order):>7} ítems | {n_chunks} trozos de conteos | "
+        f"{size / 1024:,.0f} KB")
+    return {"title": TITLES.get(name, name), "n_items": len(order),
+            "n_chunks": n_chunks, "chunk_size": CHUNK_SIZE}
+
+# ── Main ───────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--granularity", choices=GRANULARITIES, default=GRANULARITY)
+    args = parser.parse_args()
+    g    = args.granularity
+
+    dims = dimensions(g)
+    if not dims:
+        raise FileNotFoundError(f"No hay matrices *_by_{g} en el manifest de artefactos "
+                                f"(¿se ejecutó 05_temporal_analysis.py --granularity {g}?)")
+    log(f"Dashboard: {', '.join(dims)} | {g}")
+
+    # Los trozos de una construcción anterior pueden sobrar (dimensiones o
+    # trozos que ya no existen): se regenera el directorio de datos
+    shutil.rmtree(OUT_DIR / "data", ignore_errors=True)
+    meta_dims = {name: export_dimension(name, g) for name in dims}
+
+    # Eje de periodos común: todas las matrices de 05 usan el mismo eje
+    m = load_matrix(f"{dims[0]}_by_{g}")
+    write_chunk("meta", {
+        "built_at":    datetime.now().isoformat(timespec="seconds"),
+        "granularity": g,
+        "periods":     m.labels.tolist(),
+        "briefs":      briefs_per_period(m.periods, g),
+        "top_k":       TOP_K,
+        "dimensions":  meta_dims,
+    })
+
+    for asset in ASSETS:
+        shutil.copyfile(ASSETS_DIR / asset, OUT_DIR / asset)
+
+    log(f"\n✓ Dashboard en {OUT_DIR / 'index.html'} (abrir directamente en el navegador)")
+
+if __name__ == "__main__":
+    main()
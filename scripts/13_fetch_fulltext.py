@@ -0,0 +1,411 @@
+"""
+13_fetch_fulltext.py
+Texto completo de los briefs a partir de sus bitstreams (PDF) en DSpace 7.
+
+1. Resolución: por cada brief con uuid, los bitstreams PDF del bundle
+   ORIGINAL (/core/items/<uuid>/bundles). Un pool de WORKERS hilos
+   comparte un límite de RATE peticiones por segundo; los 429 esperan
+   y se reintentan como en 01.
+2. Descarga: cada PDF se guarda una sola vez por checksum (MD5 de
+   DSpace, verificado al bajar) en data/fulltext/pdf/<ab>/<md5>.pdf.
+   Un PDF que ya se tiene (archivo o texto extraído) no se vuelve a
+   bajar, aunque lo comparta otro brief.
+3. Extracción: el texto de cada checksum nuevo se extrae en un pool de
+   procesos (pdftext.py) y se guarda comprimido con zlib en `fulltext`;
+   `bitstreams` une cada brief con sus checksums.
+
+Es incremental y reanudable: los ítems se procesan por lotes de BATCH
+y cada lote se confirma en la base; una corrida cortada sigue desde el
+último lote confirmado. Solo se re-resuelven los ítems nuevos o cuyo
+last_modified cambió (--retry: también los que fallaron). Si cambia
+pdftext.VERSION, el texto se vuelve a extraer de los PDFs guardados.
+
+La API se elige con --base-url (o CGSPACE_API): con
+benchmarks/bitstream_server.py se prueba contra un servidor local.
+
+    python scripts/13_fetch_fulltext.py --limit 200
+    python scripts/13_fetch_fulltext.py --types brief report --retry
+    python scripts/13_fetch_fulltext.py --base-url http://127.0.0.1:8765/server/api
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+import requests
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import item_types
+import pdftext
+from instrumentation import log, span
+from ratelimit import RateLimiter
+
+DB_PATH   = Path("data/db/cgspace_briefs.sqlite")
+PDF_DIR   = Path("data/fulltext/pdf")
+BASE_URL  = os.environ.get("CGSPACE_API", "https://cgspace.cgiar.org/server/api")
+
+# ── Parámetros ─────────────────────────────────────────────────
+WORKERS     = 4          # descargas simultáneas
+RATE        = 2.0        # peticiones por segundo, entre todos los hilos
+BATCH       = 200        # ítems por lote (unidad de confirmación y reanudación)
+TIMEOUT     = 60
+RETRY_WAIT  = 60
+MAX_RETRIES = 5
+MAX_BYTES   = 100 * 2**20   # PDFs más grandes se omiten
+BUNDLE      = "ORIGINAL"
+ZLIB_LEVEL  = 9
+USER_AGENT  = "pipeline_cgspace/0.1 (investigacion personal)"
+
+SCHEMA = """
+-- Ítems ya resueltos (con el last_modified de briefs de ese momento)
+CREATE TABLE IF NOT EXISTS fulltext_items (
+    brief_id      TEXT PRIMARY KEY REFERENCES briefs(brief_id),
+    uuid          TEXT,
+    last_modified TEXT,
+    n_pdfs        INTEGER,
+    status        TEXT,   -- ok | error
+    error         TEXT,
+    resolved_at   TEXT
+);
+
+-- PDFs de cada brief; checksum une con fulltext
+CREATE TABLE IF NOT EXISTS bitstreams (
+    bitstream_id TEXT,               -- uuid del bitstream en DSpace
+    brief_id     TEXT REFERENCES briefs(brief_id),
+    name         TEXT,
+    size_bytes   INTEGER,
+    checksum     TEXT,               -- MD5
+    status       TEXT,               -- ok | error | skipped
+    error        TEXT,
+    fetched_at   TEXT,
+    PRIMARY KEY (brief_id, bitstream_id)
+);
+
+-- Texto por checksum (un PDF compartido por varios briefs, una vez)
+CREATE TABLE IF NOT EXISTS fulltext (
+    checksum     TEXT PRIMARY KEY,
+    n_pages      INTEGER,
+    n_chars      INTEGER,
+    text_z       BLOB,               -- UTF-8 comprimido con zlib (ver read_text)
+    extractor    INTEGER,            -- pdftext.VERSION
+    error        TEXT,
+    extracted_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_bitstreams_checksum ON bitstreams(checksum, status);
+"""
+
+def read_text(blob):
+    """Texto de una fila de fulltext (text_z)."""
+    return zlib.decompress(blob).decode("utf-8") if blob else ""
+
+def pdf_path(checksum):
+    return PDF_DIR / checksum[:2] / f"{checksum}.pdf"
+
+# ── HTTP ───────────────────────────────────────────────────────
+class Client:
+    """GET con límite de tasa y reintentos; una sesión HTTP por hilo."""
+
+    def __init__(self, base_url, rate):
+        self.base_url = base_url.rstrip("/")
+        self.limiter  = RateLimiter(rate)
+        self.local    = threading.local()
+
+    def session(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+            self.local.session.headers["User-Agent"] = USER_AGENT
+        return self.local.session
+
+    def get(self, url, stream=False):
+        for attempt in range(1, MAX_RETRIES + 1):
+            self.limiter.wait()
+            try:
+                r = self.session().get(url, timeout=TIMEOUT, stream=stream)
+                if r.status_code == 429:
+                    wait = int(r.headers.get("Retry-After") or RETRY_WAIT * attempt)
+                    log(f"  429. Esperando {wait}s... (intento {attempt}/{MAX_RETRIES})")
+                    r.close()
+                    time.sleep(wait)
+                    continue
+                r.raise_for_status()
+                return r
+            except requests.exceptions.HTTPError:
+                raise                # 404, 403...: no se arreglan reintentando
+            except requests.exceptions.RequestException as e:
+                log(f"  Error intento {attempt}: {e}")
+                if attempt < MAX_RETRIES:
+                    time.sleep(10)
+        raise requests.exceptions.RetryError(f"Fallo tras {MAX_RETRIES} intentos en {url}")
+
+# ── Resolución y descarga ──────────────────────────────────────
+def pdf_bitstreams(client, uuid):
+    """Bitstreams PDF del bundle ORIGINAL de un ítem (dicts de la API)."""
+    data = client.get(f"{client.base_url}/core/items/{uuid}/bundles"
+                      f"?embed=bitstreams&size=100").json()
+    out  = []
+    for bundle in data.get("_embedded", {}).get("bundles", []):
+        if bundle.get("name") != BUNDLE:
+            continue
+        embedded = bundle.get("_embedded", {}).get("bitstreams")
+        if embedded is None:    # servidor sin embed: seguir el enlace
+            href     = bundle["_links"]["bitstreams"]["href"]
+            embedded = client.get(f"{href}?size=100").json()
+        out += [b for b in embedded.get("_embedded", {}).get("bitstreams", [])
+                if (b.get("name") or "").lower().endswith(".pdf")]
+    return out
+
+class Claims:
+    """
+    Checksums ya disponibles o en descarga: cada PDF se baja una vez.
+    Un hilo que pide un checksum que otro está bajando espera a que
+    termine; si esa descarga falla, el turno pasa al que esperaba (si no,
+    su brief quedaría en 'ok' sin archivo ni texto).
+    """
+
+    def __init__(self, known):
+        self.known   = set(known)
+        self.running = {}            # checksum → Event de la descarga en curso
+        self.lock    = threading.Lock()
+
+    def claim(self, checksum):
+        """True si este hilo debe bajar el PDF; False si ya está disponible."""
+        while True:
+            with self.lock:
+                if not checksum or checksum in self.known:
+                    return False
+                event = self.running.get(checksum)
+                if event is None:
+                    self.running[checksum] = threading.Event()
+                    return True
+            event.wait()
+
+    def release(self, checksum, ok):
+        """Fin de la descarga de `checksum`; despierta a los que esperaban."""
+        with self.lock:
+            event = self.running.pop(checksum, None)
+            if ok:
+                self.known.add(checksum)
+        if event is not None:
+            event.set()
+
+def download(client, bitstream, claims):
+    """
+    Baja un PDF a su ruta por checksum (vía .part, verificando el MD5).
+    Devuelve (checksum, estado, error).
+    """
+    expected = (bitstream.get("checkSum") or {}).get("value") or ""
+    size     = bitstream.get("sizeBytes") or 0
+    if size > MAX_BYTES:
+        return expected, "skipped", f"{size} bytes > MAX_BYTES"
+    if expected and not claims.claim(expected):
+        return expected, "ok", None
+    if expected and pdf_path(expected).exists():
+        claims.release(expected, True)
+        return expected, "ok", None
+
+    href = (bitstream.get("_links", {}).get("content", {}).get("href")
+            or f"{client.base_url}/core/bitstreams/{bitstream['uuid']}/content")
+    part = PDF_DIR / f"{bitstream['uuid']}.part"
+    part.parent.mkdir(parents=True, exist_ok=True)
+    md5     = hashlib.md5()
+    claimed = expected
+    try:
+        with client.get(href, stream=True) as r, open(part, "wb") as f:
+            n = 0
+            for block in r.iter_content(1 << 16):
+                n += len(block)
+                if n > MAX_BYTES:
+                    raise ValueError(f"más de {MAX_BYTES} bytes")
+                md5.update(block)
+                f.write(block)
+        checksum = md5.hexdigest()
+        if expected and checksum != expected.lower():
+            raise ValueError(f"MD5 {checksum} ≠ {expected}")
+        if not expected:
+            if not claims.claim(checksum):
+                part.unlink()
+                return checksum, "ok", None
+            claimed = checksum
+        pdf_path(checksum).parent.mkdir(parents=True, exist_ok=True)
+        part.replace(pdf_path(checksum))
+        claims.release(claimed, True)
+        return checksum, "ok", None
+    except Exception as e:
+        part.unlink(missing_ok=True)
+        if claimed:
+            claims.release(claimed, False)   # otro brief con el mismo PDF puede reintentar
+        return expected or None, "error", f"{type(e).__name__}: {e}"
+
+def fetch_item(client, claims, item):
+    """Resuelve y baja los PDFs de un ítem. Devuelve (item, filas de bitstreams, error)."""
+    brief_id, uuid, _ = item
+    now  = datetime.now().isoformat(timespec="seconds")
+    try:
+        bitstreams = pdf_bitstreams(client, uuid)
+    except Exception as e:
+        return item, [], f"{type(e).__name__}: {e}"
+    rows = []
+    for b in bitstreams:
+        checksum, status, error = download(client, b, claims)
+        rows.append((b["uuid"], brief_id, b.get("name"), b.get("sizeBytes"),
+                     checksum, status, error, now))
+    return item, rows, None
+
+# ── Base ───────────────────────────────────────────────────────
+def pending_items(conn, types=None, retry=False, limit=None):
+    """(brief_id, uuid, last_modified) de los briefs por resolver."""
+    where = " AND " + item_types.sql_filter(types) if types else ""
+    query = f"""
+        SELECT b.brief_id, b.uuid, COALESCE(b.last_modified, '')
+        FROM   briefs b
+        LEFT JOIN fulltext_items fi ON fi.brief_id = b.brief_id
+        WHERE  b.uuid IS NOT NULL AND b.uuid != ''{where}
+          AND  (fi.brief_id IS NULL
+                OR fi.last_modified IS NOT COALESCE(b.last_modified, '')
+                {"OR fi.status = 'error'" if retry else ""})
+        ORDER  BY b.rowid
+    """
+    if limit:
+        query += f" LIMIT {int(limit)}"
+    return conn.execute(query).fetchall()
+
+def known_checksums(conn):
+    """Checksums ya extraídos con esta versión o con el PDF en disco."""
+    known = {r[0] for r in conn.execute(
+        "SELECT checksum FROM fulltext WHERE extractor = ?", (pdftext.VERSION,))}
+    if PDF_DIR.exists():
+        known |= {p.stem for p in PDF_DIR.glob("*/*.pdf")}
+    return known
+
+def save_batch(conn, results):
+    """Guarda un lote de ítems resueltos (una transacción)."""
+    now = datetime.now().isoformat(timespec="seconds")
+    with conn:
+        for (brief_id, uuid, last_modified), rows, error in results:
+            conn.execute("DELETE FROM bitstreams WHERE brief_id = ?", (brief_id,))
+            conn.executemany("INSERT OR REPLACE INTO bitstreams VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             rows)
+            failed = error or next((r[6] for r in rows if r[5] == "error"), None)
+            conn.execute("INSERT OR REPLACE INTO fulltext_items VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (brief_id, uuid, last_modified, len(rows),
+                          "error" if failed else "ok", failed, now))
+
+# ── Extracción ─────────────────────────────────────────────────
+def extract_file(checksum):
+    """(checksum, páginas, caracteres, texto comprimido, error) de un PDF guardado."""
+    try:
+        text, pages = pdftext.extract(pdf_path(checksum).read_bytes())
+        return checksum, pages, len(text), zlib.compress(text.encode("utf-8"), ZLIB_LEVEL), None
+    except Exception as e:
+        return checksum, None, 0, None, f"{type(e).__name__}: {e}"
+
+def pending_extractions(conn):
+    """Checksums con PDF en disco y sin texto de la versión actual del extractor."""
+    rows = conn.execute("""
+        SELECT DISTINCT bs.checksum
+        FROM   bitstreams bs
+        LEFT JOIN fulltext ft ON ft.checksum = bs.checksum
+        WHERE  bs.status = 'ok' AND bs.checksum IS NOT NULL
+          AND  (ft.checksum IS NULL OR ft.extractor IS NOT ?)
+    """, (pdftext.VERSION,)).fetchall()
+    return [c for (c,) in rows if pdf_path(c).exists()]
+
+def extract_all(conn, checksums, workers, prune=False):
+    now  = datetime.now().isoformat(timespec="seconds")
+    done = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(checksums), BATCH):
+            chunk = checksums[start:start + BATCH]
+            rows  = list(pool.map(extract_file, chunk, chunksize=8))
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO fulltext VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 ((c, p, n, z, pdftext.VERSION, e, now) for c, p, n, z, e in rows))
+            failed += sum(r[4] is not None for r in rows)
+            done   += len(rows)
+            if prune:
+                for c, *_, e in rows:
+                    if e is None:
+                        pdf_path(c).unlink(missing_ok=True)
+            log(f"  Extraídos: {done}/{len(checksums)} ({failed} con error)",
+                done=done, total=len(checksums), failed=failed)
+
+# ── Reporte ────────────────────────────────────────────────────
+def report(conn):
+    items = dict(conn.execute("SELECT status, COUNT(*) FROM fulltext_items GROUP BY status"))
+    n_pdf, n_unique = conn.execute(
+        "SELECT COUNT(*), COUNT(DISTINCT checksum) FROM bitstreams WHERE status = 'ok'").fetchone()
+    n_text, chars, stored = conn.execute("""
+        SELECT COUNT(*), COALESCE(SUM(n_chars), 0), COALESCE(SUM(LENGTH(text_z)), 0)
+        FROM   fulltext WHERE error IS NULL
+    """).fetchone()
+    with_text = conn.execute("""
+        SELECT COUNT(DISTINCT bs.brief_id)
+        FROM   bitstreams bs
+        JOIN   fulltext ft ON ft.checksum = bs.checksum
+        WHERE  ft.n_chars > 0
+    """).fetchone()[0]
+    log(f"\n{'─' * 60}")
+    log(f"Ítems resueltos: {items.get('ok', 0)} ok | {items.get('error', 0)} con error")
+    log(f"PDFs: {n_pdf} ({n_unique} distintos por checksum)")
+    log(f"Textos: {n_text} | {chars:,} caracteres en {stored / 2**20:,.1f} MB comprimidos "
+        f"({stored / max(chars, 1):.0%})")
+    log(f"Briefs con texto completo: {with_text}", briefs=with_text)
+
+# ── Main ───────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--base-url", default=BASE_URL,
+                        help="raíz de la REST API de DSpace 7 (o CGSPACE_API)")
+    parser.add_argument("--types", nargs="+", default=None,
+                        help="solo estos tipos de ítem (por defecto, todos los cargados)")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="descargas simultáneas")
+    parser.add_argument("--rate", type=float, default=RATE,
+                        help="peticiones por segundo (0 = sin límite)")
+    parser.add_argument("--extract-workers", type=int, default=os.cpu_count() or 1,
+                        help="procesos de extracción de texto")
+    parser.add_argument("--limit", type=int, default=None, help="como máximo N ítems por corrida")
+    parser.add_argument("--retry", action="store_true", help="reintentar los ítems con error")
+    parser.add_argument("--prune", action="store_true",
+                        help="borrar cada PDF después de extraer su texto")
+    args  = parser.parse_args()
+    types = [item_types.slug(t) for t in item_types.resolve(args.types)] if args.types else None
+
+    conn = sqlite3.connect(DB_PATH)
+    conn.executescript(SCHEMA)
+    items = pending_items(conn, types, args.retry, args.limit)
+    log(f"Texto completo: {len(items)} ítems por resolver | {args.workers} descargas | "
+        f"{args.rate:g} pet/s | {args.base_url}", items=len(items))
+
+    client = Client(args.base_url, args.rate)
+    claims = Claims(known_checksums(conn))
+    done   = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for start in range(0, len(items), BATCH):
+            batch = items[start:start + BATCH]
+            with span("fetch_batch", items=len(batch)):
+                results = list(pool.map(lambda item: fetch_item(client, claims, item), batch))
+            save_batch(conn, results)
+            done += len(batch)
+            pdfs  = sum(len(rows) for _, rows, _ in results)
+            errs  = sum(1 for _, rows, e in results if e or any(r[5] == "error" for r in rows))
+            log(f"  Lote: {done}/{len(items)} ítems | {pdfs} PDFs | {errs} con error",
+                done=done, pdfs=pdfs, errors=errs)
+
+    checksums = pending_extractions(conn)
+    log(f"Extrayendo texto de {len(checksums)} PDFs ({args.extract_workers} procesos)...")
+    if checksums:
+        with span("extract", pdfs=len(checksums)):
+            extract_all(conn, checksums, args.extract_workers, args.prune)
+
+    report(conn)
+    conn.close()
+    log("\n✓ Texto completo actualizado.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+artifacts.py
+Almacén de resultados de análisis en formato binario tipado,
+compartido entre etapas (05 escribe, 06 y siguientes leen).
+
+- Matrices dispersas (conteos ítem × periodo): .npz sin comprimir
+  con los arreglos CSR y las etiquetas de ambos ejes.
+- Tablas de métricas: Parquet, con índice y tipos preservados.
+- manifest.json: qué artefactos hay, forma, columnas y quién los
+  escribió. Los lectores validan contra el manifest en vez de adivinar
+  columnas a partir de un CSV.
+
+Los CSV de outputs/tables quedan solo como exportación legible.
+"""
+
+import json
+import os
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+ARTIFACT_DIR  = Path("data/artifacts")
+MANIFEST_PATH = ARTIFACT_DIR / "manifest.json"
+LOCK_PATH     = ARTIFACT_DIR / "manifest.lock"
+LOCK_TIMEOUT  = 60     # segundos esperando el lock del manifest
+LOCK_STALE    = 300    # un lock más viejo que esto se considera abandonado
+
+# Matriz dispersa de conteos con ejes codificados como enteros:
+# counts[i, j] = briefs del periodo periods[j] con el ítem items[i]
+# (keyword, país, donante...). Solo se guardan las celdas distintas de
+# cero. `labels` son las etiquetas legibles de los periodos (2025Q3...).
+CountMatrix = namedtuple("CountMatrix", ["counts", "items", "periods", "labels"])
+
+# ── Manifest ───────────────────────────────────────────────────
+def read_manifest():
+    if MANIFEST_PATH.exists():
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    return {}
+
+@contextmanager
+def manifest_lock():
+    """
+    Exclusión entre procesos independientes que registran a la vez (p. ej.
+    etapas de 05 en paralelo desde run_pipeline.py): archivo .lock creado
+    con O_EXCL. Un lock más viejo que LOCK_STALE quedó de un proceso caído.
+    """
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        try:
+            fd = os.open(LOCK_PATH, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - LOCK_PATH.stat().st_mtime > LOCK_STALE:
+                    LOCK_PATH.unlink(missing_ok=True)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"No se pudo tomar {LOCK_PATH} en {LOCK_TIMEOUT} s")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        LOCK_PATH.unlink(missing_ok=True)
+
+def register(entries):
+    """
+    Agrega o reemplaza entradas {nombre: entrada} del manifest
+    (escritura atómica). Los procesos de un pool guardan con defer=True
+    y el proceso principal registra todo junto, sin carreras; entre
+    procesos independientes, el lock serializa la lectura y escritura.
+    """
+    ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
+    with manifest_lock():
+        manifest = read_manifest()
+        manifest.update(entries)
+        tmp = MANIFEST_PATH.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+        tmp.replace(MANIFEST_PATH)
+
+def entry(name, kind):
+    """Entrada del manifest; error claro si falta o es de otro tipo."""
+    info = read_manifest().get(name)
+    if info is None:
+        raise FileNotFoundError(f"Artefacto '{name}' no encontrado en {MANIFEST_PATH} "
+                                f"(¿se ejecutó la etapa que lo produce?)")
+    if info["kind"] != kind:
+        raise TypeError(f"Artefacto '{name}' es {info['kind']}, no {kind}")
+    return info
+
+def record(name, info, defer):
+    entries = {name: {**info, "written_at": datetime.now().isoformat(timespec="seconds")}}
+    if not defer:
+        register(entries)
+    return entries
+
+# ── Matrices ───────────────────────────────────────────────────
+def save_matrix(name, m, producer, defer=False, **meta):
+    """Guarda una CountMatrix como .npz (CSR + ejes). Devuelve su entrada."""
+    ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
+    path   = ARTIFACT_DIR / f"{name}.npz"
+    tmp    = path.with_suffix(".tmp.npz")
+    counts = m.counts.tocsr()
+    np.savez(tmp,
+             data=counts.data, indices=counts.indices, indptr=counts.indptr,
+             shape=np.array(counts.shape, dtype=np.int64),
+             items=np.asarray(m.items, dtype=str),
+             periods=np.asarray(m.periods, dtype=np.int64),
+             labels=np.asarray(m.labels, dtype=str))
+    tmp.replace(path)
+    return record(name, {"kind": "matrix", "file": path.name, "producer": producer,
+                         "shape": list(counts.shape), "nnz": int(counts.nnz), **meta}, defer)
+
+def load_matrix(name):
+    """Lee una CountMatrix guardada con save_matrix."""
+    info = entry(name, "matrix")
+    with np.load(ARTIFACT_DIR / info["file"]) as z:
+        counts = sparse.csr_matrix((z["data"], z["indices"], z["indptr"]),
+                                   shape=tuple(z["shape"]))
+        return CountMatrix(counts, z["items"], z["periods"], z["labels"])
+
+# ── Tablas ─────────────────────────────────────────────────────
+def save_table(name, df, producer, defer=False, **meta):
+    """Guarda un DataFrame como Parquet (con su índice). Devuelve su entrada."""
+    ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
+    path = ARTIFACT_DIR / f"{name}.parquet"
+    tmp  = path.with_suffix(".tmp.parquet")
+    df.to_parquet(tmp)
+    tmp.replace(path)
+    return record(name, {"kind": "table", "file": path.name, "producer": producer,
+                         "rows": len(df), "columns": [str(c) for c in df.columns], **meta}, defer)
+
+def load_table(name, columns=None):
+    """Lee una tabla; si se piden `columns`, verifica que existan."""
+    info = entry(name, "table")
+    if columns is not None:
+        missing = set(columns) - set(info["columns"])
+        if missing:
+            raise KeyError(f"Artefacto '{name}' sin columnas {sorted(missing)}")
+    return pd.read_parquet(ARTIFACT_DIR / info["file"], columns=columns)
+
+def has_artifact(name):
+    return name in read_manifest()
@@ -0,0 +1,267 @@
+// Dashboard de briefs: lee los trozos que escribe 12_build_dashboard.py.
+// Cada trozo es data/<nombre>.js y llama a Dashboard.chunk(nombre, datos);
+// se cargan con <script> a pedido, así funciona abriendo el HTML desde disco.
+
+const Dashboard = (() => {
+  const loaded = {}, pending = {};
+
+  function chunk(name, data) {
+    loaded[name] = data;
+    (pending[name] || []).forEach(p => p.resolve(data));
+    delete pending[name];
+  }
+
+  function load(name) {
+    if (name in loaded) return Promise.resolve(loaded[name]);
+    return new Promise((resolve, reject) => {
+      if (!pending[name]) {
+        pending[name] = [];
+        const s = document.createElement("script");
+        s.src = `data/${name}.js`;
+        s.onerror = () => {
+          (pending[name] || []).forEach(p => p.reject(new Error(`No se pudo cargar ${s.src}`)));
+          delete pending[name];
+        };
+        document.head.appendChild(s);
+      }
+      pending[name].push({resolve, reject});
+    });
+  }
+
+  return {chunk, load};
+})();
+
+// ── Estado (se refleja en la URL para compartir cortes) ────────────────
+const COLORS   = ["#1b9e77", "#d95f02", "#7570b3", "#e7298a", "#66a61e", "#e6ab02", "#a6761d", "#666"];
+const MAX_ITEMS = COLORS.length;
+const TOP_ROWS  = 30;
+const state = {dim: null, from: 0, to: 0, items: []};   // items: [{rank, name}]
+let meta = null;
+
+const $ = id => document.getElementById(id);
+
+function readHash() {
+  const h = new URLSearchParams(location.hash.slice(1));
+  return {dim: h.get("dim"), from: h.get("from"), to: h.get("to"),
+          items: h.get("items") ? h.get("items").split("|") : []};
+}
+
+function writeHash() {
+  const h = new URLSearchParams({dim: state.dim, from: meta.periods[state.from],
+                                 to: meta.periods[state.to]});
+  if (state.items.length) h.set("items", state.items.map(i => i.name).join("|"));
+  history.replaceState(null, "", "#" + h.toString());
+}
+
+// ── Gráficos SVG ───────────────────────────────────────────────────────
+const W = 600, H = 260, PAD = {l: 40, r: 10, t: 10, b: 50};
+
+function svg(tag, attrs, text) {
+  const el = document.createElementNS("http://www.w3.org/2000/svg", tag);
+  for (const [k, v] of Object.entries(attrs)) el.setAttribute(k, v);
+  if (text !== undefined) el.textContent = text;
+  return el;
+}
+
+function frame(container, labels, maxY) {
+  const root = svg("svg", {viewBox: `0 0 ${W} ${H}`, preserveAspectRatio: "none"});
+  const step = (W - PAD.l - PAD.r) / Math.max(labels.length, 1);
+  const y    = v => H - PAD.b - (v / (maxY || 1)) * (H - PAD.t - PAD.b);
+  const every = Math.ceil(labels.length / 24);
+  labels.forEach((lab, i) => {
+    if (i % every) return;
+    const x = PAD.l + step * (i + .5);
+    root.appendChild(svg("text", {class: "axis", x, y: H - PAD.b + 12,
+                                  transform: `rotate(45 ${x} ${H - PAD.b + 12})`}, lab));
+  });
+  [0, .5, 1].forEach(f => root.appendChild(
+    svg("text", {class: "axis", x: PAD.l - 4, y: y(maxY * f) + 3, "text-anchor": "end"},
+        Math.round(maxY * f))));
+  container.replaceChildren(root);
+  return {root, step, y};
+}
+
+function barChart(container, labels, values, classes) {
+  const {root, step, y} = frame(container, labels, Math.max(...values, 1));
+  values.forEach((v, i) => {
+    const rect = svg("rect", {class: "bar " + (classes[i] || ""), x: PAD.l + step * i + 1,
+                              y: y(v), width: Math.max(step - 2, 1), height: H - PAD.b - y(v)});
+    rect.appendChild(svg("title", {}, `${labels[i]}: ${v}`));
+    root.appendChild(rect);
+  });
+}
+
+function lineChart(container, labels, series) {
+  const maxY = Math.max(1, ...series.flatMap(s => s.values));
+  const {root, step, y} = frame(container, labels, maxY);
+  series.forEach(s => {
+    const pts = s.values.map((v, i) => `${PAD.l + step * (i + .5)},${y(v)}`).join(" ");
+    const line = svg("polyline", {class: "line", points: pts, stroke: s.color});
+    line.appendChild(svg("title", {}, s.name));
+    root.appendChild(line);
+  });
+}
+
+// ── Paneles ────────────────────────────────────────────────────────────
+function range() {
+  return {labels: meta.periods.slice(state.from, state.to + 1), lo: state.from, hi: state.to + 1};
+}
+
+function drawBriefs() {
+  const {labels, lo, hi} = range();
+  // En trimestres se resalta Q4, como en 06_visualizations.py
+  const classes = labels.map(l => meta.granularity === "quarter" && l.endsWith("Q4") ? "q4" : "");
+  barChart($("briefs-chart"), labels, meta.briefs.slice(lo, hi), classes);
+}
+
+async function drawTop() {
+  const topk = await Dashboard.load(`${state.dim}/topk`);
+  const {lo, hi} = range();
+  const sums = new Map();
+  for (const period of topk.slice(lo, hi))
+    for (const [rank, name, n] of period) {
+      const e = sums.get(rank) || {rank, name, n: 0};
+      e.n += n;
+      sums.set(rank, e);
+    }
+  const rows = [...sums.values()].sort((a, b) => b.n - a.n).slice(0, TOP_ROWS);
+  $("top-note").textContent = `Suma, en el rango, del top ${meta.top_k} de cada periodo.`;
+  $("top").tBodies[0].replaceChildren(...rows.map((r, i) => {
+    const tr = document.createElement("tr");
+    tr.innerHTML = `<td>${i + 1}</td><td class="item"></td><td>${r.n}</td>`;
+    tr.cells[1].textContent = r.name;
+    tr.onclick = () => addItem(r.rank, r.name);
+    return tr;
+  }));
+}
+
+async function drawTrends() {
+  const trends = await Dashboard.load(`${state.dim}/trends`);
+  for (const key of ["rising", "falling", "bursts"]) {
+    $(key).replaceChildren(...trends[key].map(([rank, name, slope, p]) => {
+      const li = document.createElement("li");
+      li.textContent = name + " ";
+      li.appendChild(document.createElement("small")).textContent =
+        `pendiente ${slope}, p=${p}`;
+      li.onclick = () => addItem(rank, name);
+      return li;
+    }));
+  }
+}
+
+async function itemSeries(rank) {
+  const dim   = meta.dimensions[state.dim];
+  const block = await Dashboard.load(`${state.dim}/counts_${Math.floor(rank / dim.chunk_size)}`);
+  const [cols, vals] = block[rank % dim.chunk_size];
+  const dense = new Array(meta.periods.length).fill(0);
+  cols.forEach((c, i) => { dense[c] = vals[i]; });
+  return dense;
+}
+
+async function drawItems() {
+  $("selected").replaceChildren(...state.items.map((it, i) => {
+    const chip = document.createElement("span");
+    chip.textContent = it.name + " ×";
+    chip.style.background = COLORS[i];
+    chip.onclick = () => { state.items.splice(i, 1); update(drawItems); };
+    return chip;
+  }));
+  const {labels, lo, hi} = range();
+  const series = await Promise.all(state.items.map(async (it, i) =>
+    ({name: it.name, color: COLORS[i], values: (await itemSeries(it.rank)).slice(lo, hi)})));
+  lineChart($("items-chart"), labels, series);
+}
+
+function addItem(rank, name) {
+  if (state.items.some(i => i.rank === rank)) return;
+  if (state.items.length >= MAX_ITEMS) state.items.shift();
+  state.items.push({rank, name});
+  update(drawItems);
+}
+
+// ── Búsqueda (la lista completa de nombres se carga solo al buscar) ────
+let lowered = {};
+
+async function names() {
+  const data = await Dashboard.load(`${state.dim}/names`);
+  if (!lowered[state.dim]) lowered[state.dim] = data.names.map(n => n.toLowerCase());
+  return data;
+}
+
+async function search(text) {
+  const q = text.trim().toLowerCase();
+  if (!q) { $("matches").replaceChildren(); return; }
+  const data = await names();
+  const low  = lowered[state.dim];
+  const prefix = [], inner = [];
+  for (let i = 0; i < low.length && prefix.length < 20; i++) {
+    const at = low[i].indexOf(q);
+    if (at === 0) prefix.push(i);
+    else if (at > 0 && inner.length < 20) inner.push(i);
+  }
+  $("matches").replaceChildren(...prefix.concat(inner).slice(0, 20).map(rank => {
+    const li = document.createElement("li");
+    li.textContent = `${data.names[rank]} (${data.totals[rank]})`;
+    li.onclick = () => { addItem(rank, data.names[rank]); $("search").value = "";
+                         $("matches").replaceChildren(); };
+    return li;
+  }));
+}
+
+// ── Controles ──────────────────────────────────────────────────────────
+function update(...panels) {
+  writeHash();
+  panels.forEach(p => p().catch(err => console.error(err)));
+}
+
+function drawAll() {
+  drawBriefs();
+  update(drawTop, drawTrends, drawItems);
+}
+
+function options(select, values, labels) {
+  select.replaceChildren(...values.map((v, i) => new Option(labels[i], v)));
+}
+
+async function init() {
+  meta = await Dashboard.load("meta");
+  const dims = Object.keys(meta.dimensions);
+  const h    = readHash();
+  state.dim  = dims.includes(h.dim) ? h.dim : dims[0];
+  const last = meta.periods.length - 1;
+  state.from = Math.max(0, meta.periods.indexOf(h.from));
+  state.to   = meta.periods.includes(h.to) ? meta.periods.indexOf(h.to) : last;
+
+  options($("dimension"), dims, dims.map(d =>
+    `${meta.dimensions[d].title} (${meta.dimensions[d].n_items.toLocaleString()})`));
+  options($("from"), meta.periods.map((_, i) => i), meta.periods);
+  options($("to"),   meta.periods.map((_, i) => i), meta.periods);
+  $("dimension").value = state.dim;
+  $("from").value = state.from;
+  $("to").value   = state.to;
+  $("built").textContent = `Datos: ${meta.built_at} · ${meta.granularity}`;
+
+  if (h.items.length) {
+    const data = await names();
+    for (const name of h.items) {
+      const rank = data.names.indexOf(name);
+      if (rank >= 0) state.items.push({rank, name});
+    }
+  }
+
+  $("dimension").onchange = e => { state.dim = e.target.value; state.items = []; drawAll(); };
+  $("from").onchange = e => { state.from = Math.min(+e.target.value, state.to);
+                              $("from").value = state.from; drawAll(); };
+  $("to").onchange = e => { state.to = Math.max(+e.target.value, state.from);
+                            $("to").value = state.to; drawAll(); };
+  let timer = null;
+  $("search").oninput = e => { clearTimeout(timer);
+                               timer = setTimeout(() => search(e.target.value), 150); };
+  drawAll();
+}
+
+init().catch(err => {
+  document.body.insertAdjacentHTML("afterbegin",
+    `<p style="color:#b00;padding:1em">Error cargando datos: ${err.message}. ` +
+    `¿Se ejecutó 12_build_dashboard.py?</p>`);
+});
@@ -0,0 +1,248 @@
+"""
+instrumentation.py
+Telemetría compartida por los scripts del pipeline: log estructurado
+con buffer, spans de tiempo y perfiles a pedido.
+
+- log(msg, **campos): imprime "[HH:MM:SS] msg" como siempre y guarda un
+  registro JSON (hora, etapa, pid, mensaje y los campos extra) en
+  data/logs/<etapa>_<fecha>.jsonl. Los registros se acumulan en memoria
+  y se escriben de a bloques (FLUSH_EVERY registros o FLUSH_SECS
+  segundos) y al terminar el proceso: no se abre el archivo por línea.
+- span(nombre, **campos): context manager que mide una operación y
+  registra su duración (y la excepción, si la hubo). Al terminar, un
+  registro "exit" con el tiempo total, el de CPU y el resumen de spans
+  por nombre (veces, total, máximo).
+- CGSPACE_PROFILE perfila la etapa sin tocar el código:
+
+      CGSPACE_PROFILE=cprofile                      # todas las etapas
+      CGSPACE_PROFILE=sample:05_temporal_analysis,figures
+      CGSPACE_PROFILE_INTERVAL=0.005                # s entre muestras
+
+  cprofile deja un .prof (pstats, snakeviz) y un .txt con las funciones
+  de mayor tiempo acumulado; sample (muestreo de la pila del hilo
+  principal, casi sin costo) deja las pilas en formato "folded"
+  (flamegraph.pl, speedscope) y un .txt con el tiempo propio y total
+  por función. Todo en data/logs/profiles/. Las etapas se nombran por
+  el script o por la etapa de run_pipeline.py (CGSPACE_STAGE).
+
+Los procesos hijos (pools de 05, 06, 10...) escriben sus propios
+registros y perfiles, con su pid.
+"""
+
+import atexit
+import cProfile
+import io
+import json
+import multiprocessing.util
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+LOG_DIR     = Path("data/logs")
+PROFILE_DIR = LOG_DIR / "profiles"
+FLUSH_EVERY = 200      # registros en memoria antes de escribir
+FLUSH_SECS  = 5.0      # o segundos desde la última escritura
+SAMPLE_SECS = 0.005    # intervalo de muestreo por defecto
+PROFILE_TOP = 40       # funciones en el resumen .txt de un perfil
+
+SCRIPT = Path(sys.argv[0]).stem if sys.argv and sys.argv[0] else "python"
+STAGE  = os.environ.get("CGSPACE_STAGE") or SCRIPT
+DAY    = datetime.today().strftime("%Y%m%d")
+
+_lock    = threading.Lock()
+_buffer  = []
+_spans   = {}          # nombre → [veces, segundos totales, máximo]
+_state   = {}          # inicio, última escritura, perfilador activo
+
+# ── Registros ──────────────────────────────────────────────────
+def log_path():
+    return LOG_DIR / f"{STAGE}_{DAY}.jsonl"
+
+def emit(event, **fields):
+    """Agrega un registro al buffer; escribe si el buffer está lleno o viejo."""
+    record = {"ts": datetime.now().isoformat(timespec="milliseconds"),
+              "stage": STAGE, "pid": os.getpid(), "event": event, **fields}
+    with _lock:
+        _buffer.append(record)
+        due = (len(_buffer) >= FLUSH_EVERY
+               or time.monotonic() - _state["flushed"] > FLUSH_SECS)
+    if due:
+        flush()
+
+def flush():
+    """Escribe los registros pendientes (una sola apertura del archivo)."""
+    with _lock:
+        records = _buffer[:]
+        _buffer.clear()
+        _state["flushed"] = time.monotonic()
+    if not records:
+        return
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    with open(log_path(), "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(r, ensure_ascii=False, default=str) + "\n"
+                        for r in records))
+
+def log(msg, **fields):
+    """Mensaje a consola con hora y, estructurado, al log JSONL de la etapa."""
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+    emit("log", msg=str(msg).strip(), **fields)
+
+@contextmanager
+def span(name, **fields):
+    """Mide el bloque y lo registra como un evento "span"."""
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        with _lock:
+            stats = _spans.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2]  = max(stats[2], seconds)
+        emit("span", span=name, seconds=round(seconds, 6),
+             **({"error": error} if error else {}), **fields)
+
+# ── Perfiles ───────────────────────────────────────────────────
+class Sampler(threading.Thread):
+    """
+    Muestreo estadístico: cada `interval` s lee la pila del hilo
+    principal (sys._current_frames) y cuenta cada pila distinta.
+    """
+    def __init__(self, interval):
+        super().__init__(name="instrumentation-sampler", daemon=True)
+        self.interval = interval
+        self.target   = threading.main_thread().ident
+        self.stacks   = Counter()
+        self.stopped  = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                             f":{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+def profile_mode():
+    """Modo de CGSPACE_PROFILE ("cprofile" o "sample") si aplica a esta etapa."""
+    value = os.environ.get("CGSPACE_PROFILE", "").strip()
+    if not value:
+        return None
+    mode, _, stages = value.partition(":")
+    if mode not in ("cprofile", "sample"):
+        print(f"⚠ CGSPACE_PROFILE={value!r}: se esperaba cprofile o sample", file=sys.stderr)
+        return None
+    if stages and not {STAGE, SCRIPT} & {s.strip() for s in stages.split(",")}:
+        return None
+    return mode
+
+def start_profile():
+    mode = profile_mode()
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif mode == "sample":
+        profiler = Sampler(float(os.environ.get("CGSPACE_PROFILE_INTERVAL", SAMPLE_SECS)))
+        profiler.start()
+    else:
+        profiler = None
+    _state["profiler"] = profiler
+
+def stop_profile():
+    """Detiene el perfil activo y lo guarda. Devuelve la ruta del perfil o None."""
+    profiler = _state.pop("profiler", None)
+    if profiler is None:
+        return None
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    # Sin with_suffix: las etapas de run_pipeline llevan punto (temporal.keywords)
+    base = f"{STAGE}_{datetime.now().strftime('%Y%m%d-%H%M%S')}_{os.getpid()}"
+
+    def path(ext):
+        return PROFILE_DIR / f"{base}{ext}"
+
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        profiler.dump_stats(path(".prof"))
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        path(".txt").write_text(out.getvalue(), encoding="utf-8")
+        return path(".prof")
+
+    profiler.stop()
+    stacks = profiler.stacks
+    total  = sum(stacks.values()) or 1
+    own, incl = Counter(), Counter()
+    for stack, n in stacks.items():
+        frames = stack.split(";")
+        own[frames[-1]] += n
+        for frame in set(frames):
+            incl[frame] += n
+    path(".folded").write_text(
+        "".join(f"{stack} {n}\n" for stack, n in stacks.most_common()), encoding="utf-8")
+    lines = [f"{sum(stacks.values())} muestras cada {profiler.interval * 1000:.1f} ms", "",
+             f"{'total':>7} {'propio':>7}  función"]
+    lines += [f"{n / total:7.1%} {own[frame] / total:7.1%}  {frame}"
+              for frame, n in incl.most_common(PROFILE_TOP)]
+    path(".txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path(".folded")
+
+# ── Ciclo de vida del proceso ──────────────────────────────────
+def shutdown():
+    """Al terminar: guarda el perfil, registra el resumen y vacía el buffer."""
+    if _state.get("done"):
+        return
+    _state["done"] = True
+    profile = stop_profile()
+    emit("exit", seconds=round(time.perf_counter() - _state["start"], 3),
+         cpu_seconds=round(time.process_time() - _state["cpu"], 3),
+         spans={name: {"n": n, "total": round(total, 4), "max": round(peak, 4)}
+                for name, (n, total, peak) in _spans.items()},
+         **({"profile": str(profile)} if profile else {}))
+    flush()
+
+def init():
+    _state.update(start=time.perf_counter(), cpu=time.process_time(),
+                  flushed=time.monotonic(), done=False)
+    start_profile()
+
+def finalize_in_child(_):
+    """
+    Los procesos de multiprocessing terminan con os._exit (sin atexit) y
+    al arrancar descartan los finalizadores heredados: se registra el
+    propio después de eso.
+    """
+    multiprocessing.util.Finalize(None, shutdown, exitpriority=10)
+
+def after_fork():
+    """Hijo creado con fork: sin los registros ni el perfil del padre."""
+    global _lock
+    _lock = threading.Lock()
+    _buffer.clear()
+    _spans.clear()
+    _state.clear()
+    init()
+
+init()
+atexit.register(shutdown)
+multiprocessing.util.register_after_fork(shutdown, finalize_in_child)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=after_fork)
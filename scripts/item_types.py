@@ -0,0 +1,108 @@
+"""
+item_types.py
+Tipos de ítem de DSpace (filtro itemtype del endpoint discover) y su
+partición en staging y en la base. Compartido por 01 (cosecha), 02
+(carga) y 05 (análisis por tipo).
+
+Cada tipo tiene un slug que nombra su partición:
+- staging: data/staging/<slug>/<slug>_<corrida>_<parte>.parquet y las
+  páginas crudas en data/raw/<slug>/, con el estado de la cosecha
+  incremental en data/staging/<slug>/state.json,
+- base: la columna briefs.item_type, con índices que empiezan por ella
+  (leer un tipo no recorre las filas de los demás).
+
+La tabla se sigue llamando `briefs` aunque tenga todos los tipos;
+brief_flag = 1 marca los Briefs.
+"""
+
+import re
+import unicodedata
+from pathlib import Path
+
+STAGING_DIR = Path("data/staging")
+RAW_DIR     = Path("data/raw")
+
+# Staging anterior a la partición por tipo: son Briefs
+LEGACY_STAGING = "briefs_raw_*.parquet"
+
+# Tipos de CGSpace → slug (los demás se derivan con slug())
+ITEM_TYPES = {
+    "Brief":              "brief",
+    "Journal Article":    "journal_article",
+    "Report":             "report",
+    "Working Paper":      "working_paper",
+    "Book Chapter":       "book_chapter",
+    "Book":               "book",
+    "Conference Paper":   "conference_paper",
+    "Poster":             "poster",
+    "Presentation":       "presentation",
+    "Thesis":             "thesis",
+    "Dataset":            "dataset",
+    "Manual":             "manual",
+    "Training Material":  "training_material",
+    "Case Study":         "case_study",
+    "Infographic":        "infographic",
+    "News Item":          "news_item",
+    "Blog Post":          "blog_post",
+    "Video":              "video",
+}
+DEFAULT_TYPES = ["Brief"]
+SLUG_RE       = re.compile(r"^[a-z0-9_]+$")
+
+def slug(name):
+    """Slug de un tipo: el de ITEM_TYPES o minúsculas ASCII con '_'."""
+    if name in ITEM_TYPES:
+        return ITEM_TYPES[name]
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+def resolve(names=None):
+    """
+    Nombres de tipo (como los filtra la API) a partir de lo que se pasó
+    por línea de comandos: nombres o slugs, "all" para todos los de
+    ITEM_TYPES, nada para DEFAULT_TYPES. Sin repetidos, en orden.
+    """
+    if not names:
+        return list(DEFAULT_TYPES)
+    by_slug = {s: n for n, s in ITEM_TYPES.items()}
+    out = []
+    for name in names:
+        out += list(ITEM_TYPES) if name == "all" else [by_slug.get(name, name)]
+    return list(dict.fromkeys(out))
+
+def staging_dir(name):
+    return STAGING_DIR / slug(name)
+
+def raw_dir(name):
+    return RAW_DIR / slug(name)
+
+def partitions():
+    """Slugs con partición de staging (incluye 'brief' si hay staging anterior)."""
+    found = {p.name for p in STAGING_DIR.glob("*") if p.is_dir() and any(p.glob("*.parquet"))}
+    if any(STAGING_DIR.glob(LEGACY_STAGING)):
+        found.add(ITEM_TYPES["Brief"])
+    return sorted(found)
+
+def staging_parts(slugs=None):
+    """
+    (slug, ruta) de las partes de staging de los tipos pedidos (todos si
+    slugs es None), en orden de corrida: el staging anterior primero y
+    después por nombre (<slug>_<AAAAMMDD-HHMMSS>_<parte>).
+    """
+    parts = []
+    for s in partitions() if slugs is None else slugs:
+        if s == ITEM_TYPES["Brief"]:
+            parts += [(s, p) for p in sorted(STAGING_DIR.glob(LEGACY_STAGING))]
+        parts += [(s, p) for p in sorted((STAGING_DIR / s).glob(f"{s}_*.parquet"))]
+    return parts
+
+def sql_filter(slugs, alias="b"):
+    """Condición SQL de la partición: alias.item_type IN (...)."""
+    bad = [s for s in slugs if not SLUG_RE.match(s)]
+    if bad:
+        raise ValueError(f"Slugs de tipo inválidos: {bad}")
+    return f"{alias}.item_type IN ({', '.join(repr(s) for s in sorted(slugs))})"
+
+def tag(slugs):
+    """Sufijo de nombres de salida para un conjunto de tipos ('' si no hay filtro)."""
+    return "+".join(sorted(slugs)) if slugs else ""
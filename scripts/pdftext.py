@@ -0,0 +1,381 @@
+"""
+pdftext.py
+Extracción de texto de PDFs sin dependencias (solo la biblioteca
+estándar), para 13_fetch_fulltext.py.
+
+Cubre lo que tienen los briefs de CGSpace: PDFs generados (Word,
+InDesign) con el texto en los content streams de cada página.
+- objetos sueltos y dentro de object streams (/ObjStm, PDF 1.5+),
+- filtros FlateDecode, ASCIIHexDecode y ASCII85Decode,
+- páginas en el orden del árbol /Pages (recursos heredados incluidos),
+- fuentes con /ToUnicode (bfchar y bfrange, códigos de 1 o 2 bytes);
+  sin ella, los bytes se leen como WinAnsi (cp1252),
+- operadores de texto Tj, TJ, ' y "; los saltos de línea salen de los
+  cambios de renglón (Td, TD, T*, Tm) y los espacios de los
+  desplazamientos dentro del renglón y de TJ.
+
+No cubre PDFs cifrados (PDFError), texto dentro de form XObjects ni
+escaneos (sin capa de texto: devuelve texto vacío).
+"""
+
+import base64
+import re
+import zlib
+
+VERSION = 1   # subir si cambia la extracción (13 re-extrae lo anterior)
+
+class PDFError(ValueError):
+    """El archivo no es un PDF legible por este extractor."""
+
+OBJ_RE     = re.compile(rb"(\d+)\s+(\d+)\s+obj\b(.*?)\bendobj", re.S)
+REF_RE     = re.compile(rb"(\d+)\s+\d+\s+R")
+STREAM_RE  = re.compile(rb"stream\r?\n")
+TOKEN_RE   = re.compile(rb"\s*(?:%[^\r\n]*|(\()|(<<|>>|<[0-9A-Fa-f\s]*>|\[|\]|\{|\})"
+                        rb"|(/[^\s/\[\]()<>{}%]*)|([^\s/\[\]()<>{}%]+))")
+HEX_RE     = re.compile(rb"<([0-9A-Fa-f]+)>")
+NUM_RE     = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+ENCRYPT_RE = re.compile(rb"/Encrypt\s*(?:\d+\s+\d+\s+R|<<)")
+ESCAPES    = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+LINE_OPS   = {b"T*", b"'", b'"'}
+TJ_SPACE   = -200      # desplazamiento de TJ (milésimas de em) que cuenta como espacio
+
+# ── Objetos ────────────────────────────────────────────────────
+def balanced(data, start, open_=b"<<", close=b">>"):
+    """Fin (exclusivo) del bloque <<...>> o [...] que empieza en `start`."""
+    depth, i = 0, start
+    while i < len(data):
+        if data.startswith(open_, i):
+            depth += 1
+            i += len(open_)
+        elif data.startswith(close, i):
+            depth -= 1
+            i += len(close)
+            if depth == 0:
+                return i
+        elif data[i:i + 1] == b"(":
+            i = skip_string(data, i)
+        else:
+            i += 1
+    return len(data)
+
+def skip_string(data, i):
+    """Fin de la cadena literal (...) que empieza en `i` (paréntesis anidados)."""
+    depth = 0
+    while i < len(data):
+        c = data[i:i + 1]
+        if c == b"\\":
+            i += 2
+            continue
+        if c == b"(":
+            depth += 1
+        elif c == b")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(data)
+
+def value(body, key):
+    """
+    Valor crudo de /key en un diccionario: "n g R", <<...>>, [...] o un
+    nombre/número. None si no está.
+    """
+    m = re.search(rb"/" + key + rb"(?![A-Za-z0-9])\s*", body)
+    if not m:
+        return None
+    i = m.end()
+    if body.startswith(b"<<", i):
+        return body[i:balanced(body, i)]
+    if body.startswith(b"[", i):
+        return body[i:balanced(body, i, b"[", b"]")]
+    ref = re.match(rb"\d+\s+\d+\s+R", body[i:])
+    if ref:
+        return ref.group(0)
+    return re.match(rb"/?[^\s/\[\]<>()]*", body[i:]).group(0)
+
+class Document:
+    """Objetos del PDF por número: (diccionario crudo, stream crudo o None)."""
+
+    def __init__(self, data):
+        if not data.startswith(b"%PDF"):
+            raise PDFError("no empieza con %PDF")
+        self.objects = {}
+        for m in OBJ_RE.finditer(data):
+            body = m.group(3)
+            s = STREAM_RE.search(body)
+            if s and b"endstream" in body[s.end():]:
+                raw = body[s.end():body.rindex(b"endstream")]
+                self.objects[int(m.group(1))] = (body[:s.start()], raw)
+            else:
+                self.objects[int(m.group(1))] = (body, None)
+        if ENCRYPT_RE.search(data):
+            raise PDFError("PDF cifrado")
+        for num, (head, _) in list(self.objects.items()):
+            if re.search(rb"/Type\s*/ObjStm", head):
+                self.unpack(num)
+        self.trailer = data[data.rfind(b"trailer"):] if b"trailer" in data else b""
+
+    def unpack(self, num):
+        """Objetos de un object stream: N pares "número offset" y los cuerpos."""
+        head, _ = self.objects[num]
+        raw   = self.stream(num)
+        first = int(value(head, b"First") or 0)
+        n     = int(value(head, b"N") or 0)
+        nums  = [int(x) for x in raw[:first].split()[:2 * n]]
+        pairs = list(zip(nums[::2], nums[1::2]))
+        for k, (obj, offset) in enumerate(pairs):
+            end = first + pairs[k + 1][1] if k + 1 < len(pairs) else len(raw)
+            self.objects.setdefault(obj, (raw[first + offset:end], None))
+
+    def get(self, raw):
+        """Resuelve una referencia "n g R" (los valores directos pasan igual)."""
+        for _ in range(32):
+            ref = REF_RE.fullmatch(raw.strip()) if raw else None
+            if not ref:
+                return raw
+            raw = self.objects.get(int(ref.group(1)), (b"", None))[0].strip()
+        return raw
+
+    def stream(self, num):
+        """Stream decodificado del objeto `num` (b"" si no tiene o no se puede)."""
+        head, raw = self.objects.get(num, (b"", None))
+        if raw is None:
+            return b""
+        filters = re.findall(rb"/(\w+)", self.get(value(head, b"Filter")) or b"")
+        try:
+            for f in filters:
+                if f in (b"FlateDecode", b"Fl"):
+                    raw = zlib.decompressobj().decompress(raw)
+                elif f in (b"ASCIIHexDecode", b"AHx"):
+                    raw = bytes.fromhex(re.sub(rb"[^0-9A-Fa-f]", b"", raw.split(b">")[0]).decode())
+                elif f in (b"ASCII85Decode", b"A85"):
+                    raw = base64.a85decode(raw.strip().split(b"~>")[0] + b"~>", adobe=True)
+                else:
+                    return b""          # imágenes (DCT, JBIG2...) y filtros no soportados
+        except (zlib.error, ValueError):
+            return b""
+        return raw
+
+    def refs(self, raw):
+        """
+        Números de objeto de una referencia o de un arreglo de referencias
+        (directo o indirecto). Una referencia a un stream es ese stream.
+        """
+        raw = (raw or b"").strip()
+        ref = REF_RE.fullmatch(raw)
+        if ref and self.objects.get(int(ref.group(1)), (b"", None))[1] is not None:
+            return [int(ref.group(1))]
+        array = self.get(raw) or b""
+        return [int(n) for n in REF_RE.findall(array)] if array.startswith(b"[") else []
+
+    def pages(self):
+        """Diccionarios de las páginas en orden, con sus /Resources (heredados)."""
+        root  = value(self.trailer, b"Root")
+        if root is None:
+            xref = [h for h, _ in self.objects.values() if re.search(rb"/Type\s*/XRef", h)]
+            root = value(xref[-1], b"Root") if xref else None
+        catalog = self.get(root) if root else None
+        out, seen = [], set()
+
+        def walk(num, resources):
+            if num in seen or num not in self.objects:
+                return
+            seen.add(num)
+            head = self.objects[num][0]
+            resources = value(head, b"Resources") or resources
+            kids = value(head, b"Kids")
+            if kids is not None:
+                for kid in self.refs(kids):
+                    walk(kid, resources)
+            elif re.search(rb"/Type\s*/Page(?![s\w])", head):
+                out.append((head, resources))
+
+        tree = REF_RE.match(value(catalog, b"Pages") or b"") if catalog else None
+        if tree:
+            walk(int(tree.group(1)), None)
+        if not out:    # sin árbol legible: las páginas en orden de objeto
+            out = [(h, value(h, b"Resources")) for _, (h, _) in sorted(self.objects.items())
+                   if re.search(rb"/Type\s*/Page(?![s\w])", h)]
+        return out
+
+# ── Fuentes ────────────────────────────────────────────────────
+def parse_cmap(data):
+    """(mapa código → texto, bytes por código) de un CMap /ToUnicode."""
+    def text(hexstr):
+        raw = bytes.fromhex(hexstr.decode())
+        return raw.decode("utf-16-be", "replace") if len(raw) % 2 == 0 else raw.decode("latin-1")
+
+    width = 1
+    space = re.search(rb"begincodespacerange\s*<([0-9A-Fa-f]+)>", data)
+    if space:
+        width = max(1, len(space.group(1)) // 2)
+    cmap = {}
+    for block in re.findall(rb"beginbfchar(.*?)endbfchar", data, re.S):
+        codes = HEX_RE.findall(block)
+        for src, dst in zip(codes[::2], codes[1::2]):
+            cmap[int(src, 16)] = text(dst)
+    for block in re.findall(rb"beginbfrange(.*?)endbfrange", data, re.S):
+        for lo, hi, dst in re.findall(rb"<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>\s*(<[0-9A-Fa-f]+>|\[.*?\])",
+                                      block, re.S):
+            lo, hi = int(lo, 16), int(hi, 16)
+            if dst.startswith(b"["):
+                for k, d in enumerate(HEX_RE.findall(dst)):
+                    cmap[lo + k] = text(d)
+            else:
+                raw  = bytes.fromhex(dst[1:-1].decode())
+                base = int.from_bytes(raw, "big")
+                for k in range(min(hi - lo + 1, 65536)):
+                    cmap[lo + k] = text((base + k).to_bytes(len(raw), "big").hex().encode())
+    return cmap, width
+
+def fonts(doc, resources, cache):
+    """{nombre de fuente: (cmap o None, bytes por código)} de los recursos de una página."""
+    out = {}
+    font_dict = doc.get(value(doc.get(resources) or b"", b"Font")) or b""
+    for name, num in re.findall(rb"/([^\s/\[\]<>()]+)\s+(\d+)\s+\d+\s+R", font_dict):
+        num = int(num)
+        if num not in cache:
+            head = doc.objects.get(num, (b"", None))[0]
+            to_unicode = REF_RE.match(value(head, b"ToUnicode") or b"")
+            if to_unicode:
+                cache[num] = parse_cmap(doc.stream(int(to_unicode.group(1))))
+            else:
+                two_byte = b"/Type0" in head or b"Identity-H" in head
+                cache[num] = (None, 2 if two_byte else 1)
+        out[name] = cache[num]
+    return out
+
+def decode(raw, font):
+    cmap, width = font or (None, 1)
+    if cmap is None:
+        if width == 2:     # CID sin ToUnicode: no hay forma fiable de leerlo
+            return ""
+        return raw.decode("cp1252", "replace")
+    if width == 2 and len(raw) % 2 == 0:
+        codes = [int.from_bytes(raw[i:i + 2], "big") for i in range(0, len(raw), 2)]
+    else:
+        codes = list(raw)
+    return "".join(cmap.get(c, "") for c in codes)
+
+# ── Content streams ────────────────────────────────────────────
+def literal(data, i):
+    """(bytes, fin) de la cadena literal (...) que empieza en `i`."""
+    out, depth, i = bytearray(), 1, i + 1
+    while i < len(data) and depth:
+        c = data[i:i + 1]
+        if c == b"\\":
+            nxt = data[i + 1:i + 2]
+            if nxt in ESCAPES:
+                out += ESCAPES[nxt]
+                i += 2
+            elif re.match(rb"[0-7]", nxt):
+                octal = re.match(rb"[0-7]{1,3}", data[i + 1:i + 4]).group(0)
+                out.append(int(octal, 8) & 0xFF)
+                i += 1 + len(octal)
+            elif nxt in (b"\r", b"\n"):
+                i += 2 + (data[i + 1:i + 3] == b"\r\n")
+            else:
+                out += nxt
+                i += 2
+            continue
+        if c == b"(":
+            depth += 1
+        elif c == b")":
+            depth -= 1
+            if not depth:
+                break
+        out += c
+        i += 1
+    return bytes(out), i + 1
+
+def tokens(data):
+    """Tokens de un content stream: (tipo, valor), tipo str, punct, name, num u op."""
+    i = 0
+    while i < len(data):
+        m = TOKEN_RE.match(data, i)
+        if not m or m.end() == i:
+            i += 1
+            continue
+        if m.group(1):
+            raw, i = literal(data, m.start(1))
+            yield "str", raw
+            continue
+        i = m.end()
+        if m.group(2):
+            tok = m.group(2)
+            if tok.startswith(b"<") and tok != b"<<":
+                hexstr = re.sub(rb"\s", b"", tok[1:-1])
+                yield "str", bytes.fromhex((hexstr + b"0" * (len(hexstr) % 2)).decode())
+            else:
+                yield "punct", tok
+        elif m.group(3):
+            yield "name", m.group(3)[1:]
+        elif m.group(4):
+            tok = m.group(4)
+            yield ("num" if NUM_RE.fullmatch(tok) else "op"), tok
+
+def page_text(data, page_fonts):
+    """Texto de un content stream con las fuentes de la página."""
+    out, stack, array, font, last_y = [], [], None, None, None
+    inline = False
+    for kind, tok in tokens(data):
+        if inline:                      # datos de una imagen en línea (BI ... ID ... EI)
+            inline = tok != b"EI"
+            continue
+        if kind == "punct" and tok == b"[":
+            array = []
+        elif kind == "punct" and tok == b"]":
+            stack.append(("array", array or []))
+            array = None
+        elif array is not None:
+            array.append((kind, tok))
+        elif kind != "op":
+            stack.append((kind, tok))
+        elif tok == b"ID":
+            inline = True
+            stack.clear()
+        else:
+            if tok == b"Tf" and len(stack) >= 2 and stack[-2][0] == "name":
+                font = page_fonts.get(stack[-2][1])
+            elif tok == b"Tm" and stack:
+                y = stack[-1][1]
+                if last_y is not None and y != last_y:
+                    out.append("\n")
+                last_y = y
+            elif tok in (b"Td", b"TD") and stack and stack[-1][0] == "num":
+                out.append("\n" if float(stack[-1][1]) else " ")
+            elif tok in LINE_OPS:
+                out.append("\n")
+            elif tok == b"ET":
+                out.append(" ")
+            if tok in (b"Tj", b"'", b'"') and stack and stack[-1][0] == "str":
+                out.append(decode(stack[-1][1], font))
+            elif tok == b"TJ" and stack and stack[-1][0] == "array":
+                for k, t in stack[-1][1]:
+                    if k == "str":
+                        out.append(decode(t, font))
+                    elif k == "num" and float(t) < TJ_SPACE:
+                        out.append(" ")
+            stack.clear()
+    return "".join(out)
+
+def clean(text):
+    """Espacios y líneas normalizados; une palabras cortadas con guion al final de línea."""
+    text = text.replace("\x00", "").replace("\u00ad", "")
+    text = re.sub(r"[ \t\r\f\v]+", " ", text)
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    text = re.sub(r" *\n *", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+# ── API ────────────────────────────────────────────────────────
+def extract(data):
+    """(texto, páginas) del PDF en `data` (bytes). PDFError si no se puede leer."""
+    doc   = Document(data)
+    pages = doc.pages()
+    cache = {}
+    texts = []
+    for head, resources in pages:
+        page_fonts = fonts(doc, resources, cache)
+        content    = b"\n".join(doc.stream(n) for n in doc.refs(value(head, b"Contents")))
+        texts.append(clean(page_text(content, page_fonts)))
+    return "\n\n".join(t for t in texts if t), len(pages)
@@ -0,0 +1,105 @@
+"""
+periods.py
+Claves enteras de periodo derivadas de issued_date.
+Compartido por 01 (cosecha), 02 (carga) y los scripts de análisis.
+
+Cada granularidad es un ordinal entero: periodos consecutivos difieren
+en 1, así que agrupar, ordenar y rellenar huecos es aritmética de
+enteros y no depende del orden de cadenas como "2025Q3".
+"""
+
+import re
+from datetime import date, datetime
+
+GRANULARITIES = ("day", "week", "month", "quarter", "year")
+
+# Columna de briefs que guarda cada clave (el año ya existía como `year`)
+PERIOD_COLUMNS = {
+    "day"     : "period_day",
+    "week"    : "period_week",
+    "month"   : "period_month",
+    "quarter" : "period_quarter",
+    "year"    : "year",
+}
+
+# Precisión de issued_date y granularidades que puede sostener: una fecha
+# "2025-03" no dice el día ni la semana, "2025" tampoco el mes ni el
+# trimestre. Las claves más finas que la precisión quedan en None (NULL
+# en la base) en vez de anclarse al día 1, que inflaba el 1 de enero
+# y el primer día de cada mes.
+PRECISIONS = {
+    "day"   : GRANULARITIES,
+    "month" : ("month", "quarter", "year"),
+    "year"  : ("year",),
+}
+
+def period_keys(d):
+    """Ordinales de un datetime.date para cada granularidad."""
+    quarter = (d.month - 1) // 3 + 1
+    return {
+        "day"     : d.toordinal(),
+        "week"    : (d.toordinal() - 1) // 7,   # semanas lunes–domingo
+        "month"   : d.year * 12 + d.month - 1,
+        "quarter" : d.year * 4 + quarter - 1,
+        "year"    : d.year,
+    }
+
+# (precisión, formato, largo del prefijo de issued_date)
+DATE_FORMATS = [("day", "%Y-%m-%d", 10), ("month", "%Y-%m", 7), ("year", "%Y", 4)]
+
+def parse_issued_date(date_str):
+    """
+    Devuelve (date_str, year, quarter, year_quarter, keys), con keys el
+    dict de claves enteras de period_keys(). En fechas incompletas
+    ("2025-03", "2025") las claves más finas que la precisión (ver
+    PRECISIONS) son None; con solo el año, también quarter y
+    year_quarter.
+    """
+    if not isinstance(date_str, str) or not date_str:
+        return None, None, None, None, {}
+    for precision, fmt, length in DATE_FORMATS:
+        try:
+            d = datetime.strptime(date_str[:length], fmt).date()
+        except ValueError:
+            continue
+        keys = {g: (k if g in PRECISIONS[precision] else None)
+                for g, k in period_keys(d).items()}
+        if keys["quarter"] is None:
+            return date_str, d.year, None, None, keys
+        quarter = (d.month - 1) // 3 + 1
+        return date_str, d.year, quarter, f"{d.year}Q{quarter}", keys
+    return date_str, None, None, None, {}
+
+def date_precision(date_str):
+    """'day', 'month' o 'year' según lo que dice issued_date; None si no se entiende."""
+    if not isinstance(date_str, str) or not date_str:
+        return None
+    for precision, fmt, length in DATE_FORMATS:
+        try:
+            datetime.strptime(date_str[:length], fmt)
+            return precision
+        except ValueError:
+            continue
+    return None
+
+def period_label(granularity, key):
+    """Etiqueta legible de una clave: 2025-03-14, 2025-W11, 2025-03, 2025Q1, 2025."""
+    key = int(key)
+    if granularity == "day":
+        return date.fromordinal(key).isoformat()
+    if granularity == "week":
+        iso = date.fromordinal(key * 7 + 1).isocalendar()
+        return f"{iso[0]}-W{iso[1]:02d}"
+    if granularity == "month":
+        return f"{key // 12}-{key % 12 + 1:02d}"
+    if granularity == "quarter":
+        return f"{key // 4}Q{key % 4 + 1}"
+    if granularity == "year":
+        return str(key)
+    raise ValueError(f"Granularidad desconocida: {granularity}")
+
+_LABEL_RE = re.compile(r"^\d{4}(-\d{2}-\d{2}|-W\d{2}|-\d{2}|Q[1-4])?$")
+
+def is_period_label(text):
+    """True si `text` tiene forma de etiqueta de periodo (cualquier granularidad)."""
+    return bool(_LABEL_RE.match(str(text)))
@@ -0,0 +1,162 @@
+"""
+quality.py
+Perfil de completitud de metadatos, calculado al cargar el staging.
+Compartido por 02 (lo mantiene en `quality_stats`) y
+benchmarks/query_plans.py (lo llena en las bases sintéticas).
+
+Por brief se marca qué campos tienen valor y esas marcas se suman por
+cada alcance (toda la base, año, trimestre, serie y tipo de ítem). Los
+reportes de completitud de reports.py leen esas sumas por clave
+primaria, sin recorrer briefs ni unir las tablas de relación.
+
+- profile(df): perfil completo de un DataFrame, en una pasada vectorizada.
+- row_flags / row_keys / apply: lo que usa 02 fila a fila durante la
+  carga. Cada brief guarda sus marcas (briefs.quality_flags) y, al
+  recargarse, su aporte anterior se descuenta de quality_stats antes de
+  sumar el nuevo: el perfil se mantiene sin volver a leer el staging.
+"""
+
+import pandas as pd
+
+# Campo del perfil → columnas de staging. Un brief tiene el campo si
+# alguna de sus columnas tiene valor (en las multi-valor, al menos un
+# valor entre los ' | ', igual que split_multi de 02).
+FIELDS = {
+    "title":         ["title"],
+    "issued_date":   ["issued_date"],
+    "abstract":      ["abstract"],
+    "language":      ["language"],
+    "publisher":     ["publisher"],
+    "series":        ["series_raw"],
+    "access_rights": ["access_rights"],
+    "license":       ["license"],
+    "authors":       ["dc_contributor_author"],
+    "keywords":      ["dcterms_subject"],
+    "country":       ["cg_coverage_country"],
+    "geo":           ["cg_coverage_country", "cg_coverage_region", "cg_coverage_subregion"],
+    "funding":       ["cg_contributor_donor", "cg_contributor_initiative",
+                      "cg_contributor_programAccelerator", "cg_contributor_crp",
+                      "cg_identifier_project", "cg_contributor_affiliation"],
+    "sdg":           ["cg_subject_sdg"],
+    "impact_area":   ["cg_subject_impactArea"],
+}
+
+# Columnas de un solo valor; el resto son multi-valor
+SCALAR = {"title", "issued_date", "abstract", "language", "publisher",
+          "series_raw", "access_rights", "license"}
+
+# Alcance → columna de staging con la clave ('' = sin valor)
+SCOPES = {
+    "all":       None,
+    "year":      "year",
+    "quarter":   "year_quarter",
+    "series":    "series_raw",
+    "item_type": "item_type",
+}
+
+# Bit de cada campo en briefs.quality_flags
+FIELD_BITS = {name: 1 << i for i, name in enumerate(FIELDS)}
+
+def has_value(s, multi):
+    """Serie booleana: la columna tiene valor (multi: algún valor no vacío entre '|')."""
+    text = s.astype("string").fillna("")
+    if multi:
+        return text.str.replace("|", "", regex=False).str.strip() != ""
+    return text != ""
+
+def presence(df):
+    """
+    (briefs, marcas): un brief por brief_id (el último gana, como el
+    INSERT OR REPLACE de 02) y DataFrame booleano brief × campo.
+    """
+    df   = df[df["brief_id"].fillna("") != ""].drop_duplicates("brief_id", keep="last")
+    none = pd.Series(False, index=df.index)
+    cols = {col: has_value(df[col], col not in SCALAR) if col in df else none
+            for field_cols in FIELDS.values() for col in field_cols}
+    flags = pd.DataFrame({name: pd.concat([cols[c] for c in field_cols], axis=1).any(axis=1)
+                          for name, field_cols in FIELDS.items()})
+    return df, flags
+
+def scope_keys(df, col):
+    """Clave de cada brief en un alcance ('' si no tiene valor)."""
+    if col is None or col not in df:
+        return pd.Series("", index=df.index)
+    keys = df[col]
+    if pd.api.types.is_float_dtype(keys):   # años con nulos se leen como float
+        keys = keys.astype("Int64")
+    return keys.astype("string").fillna("")
+
+def profile(df):
+    """
+    Filas de quality_stats (scope, key, field, n_briefs, n_present) del
+    DataFrame de staging.
+    """
+    df, flags = presence(df)
+    frames = []
+    for scope, col in SCOPES.items():
+        groups = flags.astype(int).groupby(scope_keys(df, col).values)
+        long   = groups.sum().stack().rename("n_present").reset_index()
+        long.columns = ["key", "field", "n_present"]
+        long.insert(0, "scope", scope)
+        long.insert(3, "n_briefs", long["key"].map(groups.size()))
+        frames.append(long)
+    return pd.concat(frames, ignore_index=True)
+
+# ── Fila a fila (carga de 02) ──────────────────────────────────
+def text(value):
+    """Valor de staging como texto, igual que has_value ('' si falta; 2025.0 → '2025')."""
+    if value is None or value is pd.NA or (isinstance(value, float) and value != value):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def row_flags(row):
+    """Marcas de presence() de una fila de staging, como máscara de FIELD_BITS."""
+    flags = 0
+    for name, cols in FIELDS.items():
+        for col in cols:
+            value = text(row.get(col))
+            if col not in SCALAR:
+                value = value.replace("|", "").strip()
+            if value:
+                flags |= FIELD_BITS[name]
+                break
+    return flags
+
+def row_keys(values):
+    """Clave de un brief en cada alcance de SCOPES; `values` = {columna: valor}."""
+    return tuple("" if col is None else text(values.get(col)) for col in SCOPES.values())
+
+def apply(conn, counts):
+    """
+    Suma a quality_stats los conteos netos {(claves, marcas): briefs} de
+    una carga: positivos los briefs que entran, negativos el aporte
+    anterior de los que se recargaron. No hace commit (va en la misma
+    transacción que la carga).
+    """
+    delta = {}   # (scope, key, field) → [n_briefs, n_present]
+    for (keys, flags), n in counts.items():
+        if not n:
+            continue
+        for scope, key in zip(SCOPES, keys):
+            for name, bit in FIELD_BITS.items():
+                d = delta.setdefault((scope, key, name), [0, 0])
+                d[0] += n
+                d[1] += n if flags & bit else 0
+    conn.executemany("""
+        INSERT INTO quality_stats VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (scope, key, field) DO UPDATE SET
+            n_briefs  = n_briefs  + excluded.n_briefs,
+            n_present = n_present + excluded.n_present
+    """, ((*k, n, p) for k, (n, p) in delta.items()))
+    conn.execute("DELETE FROM quality_stats WHERE n_briefs <= 0")
+
+def save(conn, stats):
+    """Reemplaza el perfil guardado (la tabla está en el SCHEMA de 02)."""
+    with conn:
+        conn.execute("DELETE FROM quality_stats")
+        conn.executemany("INSERT INTO quality_stats VALUES (?, ?, ?, ?, ?)",
+                         ((s, k, f, int(n), int(p))
+                          for s, k, f, n, p in stats[["scope", "key", "field", "n_briefs",
+                                                      "n_present"]].itertuples(index=False)))
@@ -0,0 +1,24 @@
+"""
+ratelimit.py
+Límite de peticiones por segundo compartido por los hilos de un
+proceso, para 01 (cosecha) y 13 (bitstreams): varios hilos contra
+CGSpace suman una sola tasa, no una por hilo.
+"""
+
+import threading
+import time
+
+class RateLimiter:
+    """Espaciado mínimo entre peticiones, compartido por los hilos."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.lock     = threading.Lock()
+        self.next     = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now       = time.monotonic()
+            slot      = max(now, self.next)
+            self.next = slot + self.interval
+        time.sleep(max(0.0, slot - now))
@@ -0,0 +1,455 @@
+"""
+reports.py
+Motor de reportes sobre la base SQLite: cada consulta se declara una
+sola vez en REPORTS, con sus parámetros (top-N, dimensión, rango de
+trimestres), y se ejecuta en un pool de hilos con conexiones de solo
+lectura. Compartido por 03_explore_db.py y los scripts que consultan
+la base para reportar.
+
+Los resultados se guardan en data/cache/reports/ como Parquet, con
+clave = versión de la base + nombre + parámetros: repetir un reporte
+sobre la base sin cambios no vuelve a consultarla.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+DB_PATH   = Path("data/db/cgspace_briefs.sqlite")
+CACHE_DIR = Path("data/cache/reports")
+WORKERS   = 4
+FORMATS   = ("json", "csv", "parquet")
+
+# Subir REPORT_VERSION cuando cambie el SQL de algún reporte
+REPORT_VERSION = 3
+
+# ── Declaración de reportes ────────────────────────────────────
+# sql:      consulta con parámetros con nombre (:top, :q_from, :q_to...)
+#           y {campos} de la dimensión, si la tiene.
+# defaults: parámetros aceptados y su valor por defecto.
+# requires: tablas necesarias; si faltan, se usa `fallback` (nombre,
+#           parámetros) o, sin fallback, el reporte se omite.
+Report = namedtuple("Report", ["title", "sql", "defaults", "requires", "fallback"],
+                    defaults=[(), None])
+
+# Dimensiones de los reportes top-N: título, columnas a mostrar, clave de
+# agrupación, tablas de relación y filtro. `x` es la tabla de relación
+# con brief_id. Igual que en los reportes, `fallback` es la dimensión a
+# usar si faltan tablas.
+Dimension = namedtuple("Dimension", ["title", "select", "group", "source", "where",
+                                     "requires", "fallback"], defaults=[(), None])
+
+DIMENSIONS = {
+    "keywords": Dimension(
+        "keywords",
+        "k.keyword_norm", "k.keyword_norm",
+        "brief_keywords x JOIN keywords k ON x.keyword_id = k.keyword_id", "1"),
+    "countries": Dimension(
+        # códigos ISO-3166 de 08_normalize_geo.py
+        "países (ISO-3166)",
+        "a.name as country, a.iso_alpha3", "g.m49_code",
+        """brief_geo x JOIN geo g       ON x.geo_id = g.geo_id
+                       JOIN m49_areas a ON a.m49_code = g.m49_code""",
+        "a.level = 'country'", ("m49_areas",), "countries_text"),
+    "countries_text": Dimension(
+        # antes de 08_normalize_geo.py: texto normalizado
+        "países",
+        "g.value_norm as country", "g.value_norm",
+        "brief_geo x JOIN geo g ON x.geo_id = g.geo_id", "g.geo_type = 'country'"),
+    "regions_text": Dimension(
+        "regiones",
+        "g.value_norm as region", "g.value_norm",
+        "brief_geo x JOIN geo g ON x.geo_id = g.geo_id", "g.geo_type = 'region'"),
+    "initiatives": Dimension(
+        "iniciativas",
+        "fe.entity_raw", "fe.entity_raw",
+        "brief_funding x JOIN funding_entities fe ON x.entity_id = fe.entity_id",
+        "fe.entity_type = 'initiative'"),
+    "programs": Dimension(
+        "programas/aceleradores",
+        "fe.entity_raw", "fe.entity_raw",
+        "brief_funding x JOIN funding_entities fe ON x.entity_id = fe.entity_id",
+        "fe.entity_type = 'programAccelerator'"),
+    "donors": Dimension(
+        "donors",
+        "fe.entity_raw", "fe.entity_raw",
+        "brief_funding x JOIN funding_entities fe ON x.entity_id = fe.entity_id",
+        "fe.entity_type = 'donor'"),
+    "sdgs": Dimension(
+        "SDGs",
+        "x.tag_value", "x.tag_value", "brief_tags x", "x.tag_type = 'sdg'"),
+    "impact_areas": Dimension(
+        "impact areas",
+        "x.tag_value", "x.tag_value", "brief_tags x", "x.tag_type = 'impactArea'"),
+    "series": Dimension(
+        "series",
+        "x.series_raw", "x.series_raw", "briefs x",
+        "x.series_raw IS NOT NULL AND x.series_raw != ''"),
+}
+
+# Filtro de rango de trimestres sobre el alias `b` de briefs
+QUARTER_RANGE = """(:q_from IS NULL OR b.period_quarter >= :q_from)
+               AND (:q_to   IS NULL OR b.period_quarter <= :q_to)"""
+
+RANGE = {"from_quarter": None, "to_quarter": None}
+
+# Sobre quality_stats (alias `s`): sin rango, el alcance `whole` (all o
+# year); con rango, los trimestres del rango, que están guardados como
+# etiqueta ('2025Q3') y se comparan con la etiqueta de :q_from / :q_to
+def stats_range(whole):
+    label = "(:{0} / 4) || 'Q' || (:{0} % 4 + 1)"
+    return f"""s.scope = CASE WHEN :q_from IS NULL AND :q_to IS NULL
+                                 THEN '{whole}' ELSE 'quarter' END
+               AND (:q_from IS NULL OR s.key >= {label.format('q_from')})
+               AND (:q_to   IS NULL OR (s.key <= {label.format('q_to')} AND s.key != ''))"""
+
+def field_sum(field, column):
+    return f"SUM(CASE WHEN s.field = '{field}' THEN s.{column} END)"
+
+def field_pct(field):
+    return (f"ROUND(100.0 * {field_sum(field, 'n_present')} / "
+            f"{field_sum(field, 'n_briefs')}, 1)")
+
+REPORTS = {
+    "briefs_by_quarter": Report(
+        "Briefs por trimestre",
+        f"""SELECT b.year_quarter,
+                   COUNT(*) as n_briefs
+            FROM   briefs b
+            WHERE  b.year_quarter IS NOT NULL AND {QUARTER_RANGE}
+            GROUP  BY b.period_quarter
+            ORDER  BY b.period_quarter""",
+        {**RANGE}),
+    "top": Report(
+        "Top {top} {dimension}",
+        f"""SELECT {{select}},
+                   COUNT(DISTINCT x.brief_id) as n_briefs
+            FROM   {{source}}
+            JOIN   briefs b ON b.brief_id = x.brief_id
+            WHERE  {{where}} AND {QUARTER_RANGE}
+            GROUP  BY {{group}}
+            ORDER  BY n_briefs DESC, 1
+            LIMIT  :top""",
+        {"dimension": "keywords", "top": 20, **RANGE}),
+    "m49_regions": Report(
+        "Briefs por región M49 (países + regiones)",
+        f"""SELECT a.name as region,
+                   COUNT(DISTINCT bg.brief_id) as n_briefs
+            FROM   brief_geo bg
+            JOIN   briefs b    ON b.brief_id = bg.brief_id
+            JOIN   geo g       ON bg.geo_id = g.geo_id
+            JOIN   m49_areas a ON a.m49_code = g.m49_region
+            WHERE  {QUARTER_RANGE}
+            GROUP  BY g.m49_region
+            ORDER  BY n_briefs DESC""",
+        # antes de 08_normalize_geo.py: top 10 regiones por texto
+        {**RANGE}, ("m49_areas",), ("top", {"dimension": "regions_text", "top": 10})),
+    "m49_subregions": Report(
+        "Briefs por subregión M49",
+        f"""SELECT r.name as region,
+                   a.name as subregion,
+                   COUNT(DISTINCT bg.brief_id) as n_briefs
+            FROM   brief_geo bg
+            JOIN   briefs b    ON b.brief_id = bg.brief_id
+            JOIN   geo g       ON bg.geo_id = g.geo_id
+            JOIN   m49_areas a ON a.m49_code = COALESCE(g.m49_intermediate, g.m49_subregion)
+            JOIN   m49_areas r ON r.m49_code = a.m49_region
+            WHERE  {QUARTER_RANGE}
+            GROUP  BY COALESCE(g.m49_intermediate, g.m49_subregion)
+            ORDER  BY r.name, n_briefs DESC""",
+        {**RANGE}, ("m49_areas",)),
+    "keywords_by_quarter": Report(
+        "Keywords por trimestre (frecuencia >= {min_freq})",
+        f"""SELECT b.year_quarter,
+                   k.keyword_norm,
+                   COUNT(*) as n
+            FROM   brief_keywords bk
+            JOIN   briefs b  ON bk.brief_id   = b.brief_id
+            JOIN   keywords k ON bk.keyword_id = k.keyword_id
+            WHERE  b.year_quarter IS NOT NULL AND {QUARTER_RANGE}
+            GROUP  BY b.year_quarter, k.keyword_norm
+            HAVING COUNT(*) >= :min_freq
+            ORDER  BY b.year_quarter, n DESC""",
+        {"min_freq": 3, **RANGE}),
+    # Completitud: lookups sobre el perfil que calcula 02 al cargar
+    # (quality_stats, ver quality.py). Sin el perfil (base cargada con
+    # un 02 anterior), las versiones *_scan recorren briefs.
+    "completeness": Report(
+        "Completitud general de metadatos",
+        f"""SELECT
+                COALESCE({field_sum('title', 'n_briefs')}, 0) as total,
+                {field_pct('abstract')}      as pct_abstract,
+                {field_pct('language')}      as pct_language,
+                {field_pct('series')}        as pct_series,
+                {field_pct('access_rights')} as pct_access
+            FROM quality_stats s
+            WHERE {stats_range('all')}""",
+        {**RANGE}, ("quality_stats",), ("completeness_scan", {})),
+    "completeness_by_year": Report(
+        "Completitud por año",
+        f"""SELECT
+                CAST(NULLIF(substr(s.key, 1, 4), '') AS INTEGER) as year,
+                {field_sum('title', 'n_briefs')}     as total_briefs,
+                {field_sum('geo', 'n_present')}      as con_pais,
+                {field_sum('funding', 'n_present')}  as con_funding,
+                {field_sum('keywords', 'n_present')} as con_keywords
+            FROM quality_stats s
+            WHERE {stats_range('year')}
+            GROUP BY 1
+            ORDER BY 1""",
+        {**RANGE}, ("quality_stats",), ("completeness_by_year_scan", {})),
+    "completeness_fields": Report(
+        "Completitud por campo",
+        f"""SELECT
+                s.field,
+                SUM(s.n_present) as n_briefs,
+                ROUND(100.0 * SUM(s.n_present) / SUM(s.n_briefs), 1) as pct
+            FROM quality_stats s
+            WHERE {stats_range('all')}
+            GROUP BY s.field
+            ORDER BY pct DESC, s.field""",
+        {**RANGE}, ("quality_stats",)),
+    "completeness_by_series": Report(
+        "Completitud de las {top} series con más briefs",
+        f"""SELECT
+                s.key as series,
+                {field_sum('title', 'n_briefs')} as total,
+                {field_pct('abstract')} as pct_abstract,
+                {field_pct('keywords')} as pct_keywords,
+                {field_pct('country')}  as pct_country,
+                {field_pct('funding')}  as pct_funding,
+                {field_pct('sdg')}      as pct_sdg
+            FROM quality_stats s
+            WHERE s.scope = 'series' AND s.key != ''
+            GROUP BY s.key
+            ORDER BY total DESC, series
+            LIMIT :top""",
+        {"top": 20}, ("quality_stats",)),
+    "completeness_scan": Report(
+        "Completitud general de metadatos",
+        f"""SELECT
+                COUNT(*) as total,
+                ROUND(100.0 * SUM(CASE WHEN abstract     != '' THEN 1 END) / COUNT(*), 1) as pct_abstract,
+                ROUND(100.0 * SUM(CASE WHEN language     != '' THEN 1 END) / COUNT(*), 1) as pct_language,
+                ROUND(100.0 * SUM(CASE WHEN series_raw   != '' THEN 1 END) / COUNT(*), 1) as pct_series,
+                ROUND(100.0 * SUM(CASE WHEN access_rights!= '' THEN 1 END) / COUNT(*), 1) as pct_access
+            FROM briefs b
+            WHERE {QUARTER_RANGE}""",
+        {**RANGE}),
+    "completeness_by_year_scan": Report(
+        # EXISTS por brief en vez de LEFT JOIN a las tres relaciones: el
+        # join multiplicaba las filas (países × funding × keywords) antes
+        # del COUNT(DISTINCT)
+        "Completitud por año",
+        f"""SELECT
+                b.year,
+                COUNT(*)                                                            as total_briefs,
+                SUM(EXISTS (SELECT 1 FROM brief_geo      x WHERE x.brief_id = b.brief_id)) as con_pais,
+                SUM(EXISTS (SELECT 1 FROM brief_funding  x WHERE x.brief_id = b.brief_id)) as con_funding,
+                SUM(EXISTS (SELECT 1 FROM brief_keywords x WHERE x.brief_id = b.brief_id)) as con_keywords
+            FROM      briefs b
+            WHERE     {QUARTER_RANGE}
+            GROUP BY  b.year
+            ORDER BY  b.year""",
+        {**RANGE}),
+}
+
+# Reporte exploratorio completo de 03_explore_db.py: (nombre, parámetros)
+EXPLORE = [
+    ("briefs_by_quarter",    {}),
+    ("top",                  {"dimension": "keywords",     "top": 20}),
+    ("top",                  {"dimension": "countries",    "top": 15}),
+    ("m49_regions",          {}),
+    ("m49_subregions",       {}),
+    ("top",                  {"dimension": "initiatives",  "top": 15}),
+    ("top",                  {"dimension": "programs",     "top": 10}),
+    ("top",                  {"dimension": "donors",       "top": 10}),
+    ("top",                  {"dimension": "sdgs",         "top": None}),
+    ("top",                  {"dimension": "impact_areas", "top": None}),
+    ("keywords_by_quarter",  {}),
+    ("top",                  {"dimension": "series",       "top": 15}),
+    ("completeness",         {}),
+    ("completeness_by_year", {}),
+]
+
+# ── Parámetros ─────────────────────────────────────────────────
+def quarter_key(label):
+    """'2025Q3' → clave entera de periods.py (año × 4 + trimestre − 1)."""
+    if label is None:
+        return None
+    year, q = str(label).upper().split("Q")
+    return int(year) * 4 + int(q) - 1
+
+def resolve(name, params, tables):
+    """
+    (nombre, parámetros completos) de un reporte según las tablas que
+    existen: defaults + parámetros dados, con los fallbacks del reporte
+    y de la dimensión si faltan tablas (p. ej. sin m49_areas, países por
+    texto). None si el reporte no se puede correr en esta base.
+    """
+    report = REPORTS[name]
+    unknown = set(params) - set(report.defaults)
+    if unknown:
+        raise ValueError(f"Parámetros no válidos para '{name}': {sorted(unknown)}")
+    if not set(report.requires) <= tables:
+        if report.fallback is None:
+            return None
+        fb_name, fb_params = report.fallback
+        rng = {k: v for k, v in params.items() if k in RANGE}
+        return resolve(fb_name, {**fb_params, **rng}, tables)
+    full = {**report.defaults, **params}
+    if "dimension" in full:
+        if full["dimension"] not in DIMENSIONS:
+            raise ValueError(f"Dimensión desconocida: {full['dimension']} "
+                             f"(usar {', '.join(DIMENSIONS)})")
+        dim = DIMENSIONS[full["dimension"]]
+        while not set(dim.requires) <= tables:
+            if dim.fallback is None:
+                return None
+            full["dimension"] = dim.fallback
+            dim = DIMENSIONS[dim.fallback]
+    return name, full
+
+def render_sql(name, params):
+    """SQL final y parámetros con nombre para sqlite3."""
+    report = REPORTS[name]
+    sql    = report.sql
+    if "dimension" in params:
+        dim = DIMENSIONS[params["dimension"]]
+        sql = sql.format(select=dim.select, group=dim.group, source=dim.source, where=dim.where)
+    bind = {k: v for k, v in params.items() if k not in ("dimension", "from_quarter", "to_quarter")}
+    if "top" in bind and bind["top"] is None:
+        bind["top"] = -1   # LIMIT -1: sin límite
+    bind["q_from"] = quarter_key(params.get("from_quarter"))
+    bind["q_to"]   = quarter_key(params.get("to_quarter"))
+    return sql, bind
+
+def title(name, params):
+    fields = {k: ("" if v is None else v) for k, v in params.items()}
+    if "dimension" in params:
+        fields["dimension"] = DIMENSIONS[params["dimension"]].title
+    text = REPORTS[name].title.format(**fields)
+    text = " ".join(text.split())
+    if params.get("from_quarter") or params.get("to_quarter"):
+        text += f" [{params.get('from_quarter') or '…'} – {params.get('to_quarter') or '…'}]"
+    return text
+
+# ── Versión de la base y caché ─────────────────────────────────
+def data_version(path=DB_PATH):
+    """
+    Versión de la base para las claves de caché, válida entre procesos.
+    PRAGMA data_version solo compara commits vistos por una misma
+    conexión (cada conexión nueva arranca de cero), así que se combina
+    con el contador de cambios del encabezado del archivo (bytes 24–27,
+    sube en cada commit con rollback journal) y el tamaño y mtime del
+    archivo y de su -wal (en modo WAL el encabezado cambia solo al
+    hacer checkpoint).
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        counter = int.from_bytes(f.read(28)[24:28], "big")
+    parts = [counter]
+    for p in (path, path.with_name(path.name + "-wal")):
+        if p.exists():
+            st = p.stat()
+            parts += [st.st_size, st.st_mtime_ns]
+    return "-".join(str(x) for x in parts)
+
+def digest(obj):
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+def cache_path(name, params, version):
+    """data/cache/reports/{versión}/{nombre}_{hash de parámetros}.parquet"""
+    return CACHE_DIR / digest([REPORT_VERSION, version]) / f"{name}_{digest(params)}.parquet"
+
+def prune_cache(current):
+    """Borra los resultados de versiones anteriores de la base."""
+    for d in CACHE_DIR.glob("*/"):
+        if d != current:
+            for p in d.glob("*.parquet"):
+                p.unlink(missing_ok=True)
+            d.rmdir()
+
+# ── Ejecución ──────────────────────────────────────────────────
+_local = threading.local()
+
+def connect_ro(path=DB_PATH):
+    """Conexión de solo lectura (una por hilo del pool)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(f"file:{Path(path).as_posix()}?mode=ro", uri=True)
+        _local.conn = conn
+    return conn
+
+def existing_tables(path=DB_PATH):
+    conn = sqlite3.connect(f"file:{Path(path).as_posix()}?mode=ro", uri=True)
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    return tables
+
+def query(name, params, path=DB_PATH):
+    sql, bind = render_sql(name, params)
+    return pd.read_sql_query(sql, connect_ro(path), params=bind)
+
+def run_reports(jobs, path=DB_PATH, workers=WORKERS, use_cache=True):
+    """
+    Ejecuta [(nombre, parámetros), ...] y devuelve, en el mismo orden,
+    [(nombre, parámetros completos, DataFrame, desde_caché)]; los que no
+    se pueden correr en esta base (ver resolve) se omiten. Los que no
+    están en caché corren en paralelo; las conexiones son de solo
+    lectura, una por hilo (sqlite3 libera el GIL mientras consulta).
+    """
+    tables   = existing_tables(path)
+    version  = data_version(path)
+    resolved = [r for r in (resolve(name, params, tables) for name, params in jobs) if r]
+    paths    = [cache_path(name, params, version) for name, params in resolved]
+
+    results = {}
+    if use_cache:
+        for i, p in enumerate(paths):
+            if p.exists():
+                results[i] = pd.read_parquet(p)
+    todo = [i for i in range(len(resolved)) if i not in results]
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+            frames = pool.map(lambda i: query(*resolved[i], path=path), todo)
+            for i, df in zip(todo, frames):
+                results[i] = df
+        for i in todo:
+            paths[i].parent.mkdir(parents=True, exist_ok=True)
+            results[i].to_parquet(paths[i], index=False)
+        prune_cache(paths[todo[0]].parent)
+
+    return [(name, params, results[i], i not in todo)
+            for i, (name, params) in enumerate(resolved)]
+
+# ── Exportación ────────────────────────────────────────────────
+def export(df, stem, fmt, out_dir):
+    """Guarda un resultado como JSON (registros), CSV o Parquet."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"{stem}.{fmt}"
+    if fmt == "json":
+        df.to_json(path, orient="records", force_ascii=False, indent=1)
+    elif fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Formato desconocido: {fmt} (usar {', '.join(FORMATS)})")
+    return path
+
+def stem(name, params):
+    """Nombre de archivo legible: top_keywords_20_2024Q1-2025Q4."""
+    parts = [name] + [str(params[k]) for k in ("dimension", "top", "min_freq")
+                      if params.get(k) is not None]
+    if params.get("from_quarter") or params.get("to_quarter"):
+        parts.append(f"{params.get('from_quarter') or ''}-{params.get('to_quarter') or ''}")
+    return "_".join(parts)
@@ -0,0 +1,404 @@
+"""
+run_pipeline.py
+Orquestador del pipeline: corre las etapas numeradas como un DAG.
+
+Cada etapa (ver stages) declara el script que la ejecuta, sus argumentos
+y los recursos que lee y escribe:
+- archivos o globs del directorio de trabajo (data/staging/...)
+- tablas de la base: "db:briefs", "db:keywords"...
+- artefactos de artifacts.py: "artifact:keywords_by_quarter"...
+
+Las dependencias salen de esas declaraciones: una etapa depende de la
+última etapa anterior (en el orden de la lista) que escribe cada recurso
+que lee, y de las anteriores que leen o escriben lo que ella escribe.
+Así 04 depende de 02 (keywords) y el análisis de países de 05, de 08.
+
+Corrida incremental: la huella de una etapa combina el código del script
+(y de los módulos compartidos que importa), sus argumentos, el contenido
+de los archivos que lee y la huella de las etapas de las que depende.
+Si coincide con la de su última corrida exitosa y las salidas existen,
+la etapa se salta. Un staging nuevo cambia la huella de la carga y, en
+cascada, la de todo lo que depende de ella; sin cambios, una corrida
+completa no ejecuta nada.
+
+Las etapas independientes corren en paralelo (--jobs), cada una en su
+propio proceso; 05 se divide en una etapa por dimensión. Una etapa que
+escribe la base no la comparte con ninguna otra (SQLite admite un solo
+escritor). La salida de cada etapa queda en data/logs/pipeline/ y los
+tiempos de cada corrida, en data/logs/pipeline_runs.jsonl.
+
+    python scripts/run_pipeline.py                    # lo que haga falta
+    python scripts/run_pipeline.py --harvest          # corrida diaria: cosechar primero
+    python scripts/run_pipeline.py figures --force    # una etapa (y lo que necesita)
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+from artifacts import has_artifact
+from instrumentation import log
+from periods import GRANULARITIES
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DB_PATH     = Path("data/db/cgspace_briefs.sqlite")
+STATE_PATH  = Path("data/cache/pipeline/state.json")
+LOG_DIR     = Path("data/logs/pipeline")
+RUNS_LOG    = Path("data/logs/pipeline_runs.jsonl")
+
+GRANULARITY = "quarter"
+JOBS        = os.cpu_count() or 1
+
+# name: identificador (y nombre del log); script: archivo en scripts/;
+# inputs / outputs: recursos (ver el docstring); volatile: lee fuentes
+# externas (la API), no tiene huella y solo corre si se pide.
+Stage = namedtuple("Stage", ["name", "script", "args", "inputs", "outputs", "volatile"],
+                   defaults=[False])
+
+# Tablas que crea y llena 02
+LOAD_TABLES = ["briefs", "keywords", "brief_keywords", "geo", "brief_geo", "authors",
+               "brief_authors", "funding_entities", "brief_funding", "brief_tags",
+               "quality_stats"]
+
+# Dimensión de 05 → tablas que lee (ver DIMENSIONS de 05)
+TEMPORAL = {
+    "keywords":     ["briefs", "keywords", "brief_keywords"],
+    "countries":    ["briefs", "geo", "brief_geo"],
+    "donors":       ["briefs", "funding_entities", "brief_funding"],
+    "initiatives":  ["briefs", "funding_entities", "brief_funding"],
+    "sdgs":         ["briefs", "brief_tags"],
+    "impact_areas": ["briefs", "brief_tags"],
+    "topics":       ["briefs", "topics", "brief_topics"],
+}
+TEMPORAL_TABLES = ["emerging", "declining", "stable", "trends", "cooccurrence"]
+
+# Staging de todos los tipos (item_types.py) y el anterior a la partición
+STAGING = "data/staging/**/*.parquet"
+
+def db(*tables):
+    return tuple(f"db:{t}" for t in tables)
+
+def temporal_artifacts(dim, g):
+    return (f"artifact:{dim}_by_{g}",) + tuple(f"artifact:{dim}_{t}_{g}" for t in TEMPORAL_TABLES)
+
+# ── Etapas ─────────────────────────────────────────────────────
+def stages(g=GRANULARITY):
+    """Etapas en orden de ejecución secuencial (el orden define las dependencias)."""
+    return [
+        Stage("explore_oai", "00_explore_oai.py", (), (), (), volatile=True),
+        Stage("harvest", "01_harvest_rest.py", (), (), (STAGING,), volatile=True),
+        Stage("load", "02_load_sqlite.py", (), (STAGING,), db(*LOAD_TABLES)),
+        Stage("normalize", "04_normalize.py", (),
+              db("keywords", "brief_keywords", "brief_tags"),
+              db("keywords", "brief_keywords", "brief_tags")),
+        Stage("authors", "07_resolve_authors.py", (),
+              db("authors", "brief_authors", "funding_entities", "brief_funding"),
+              db("authors")),
+        Stage("geo", "08_normalize_geo.py", (), db("geo", "brief_geo"), db("geo", "m49_areas")),
+        Stage("topics", "10_abstract_topics.py", (), db("briefs"),
+              db("topics", "brief_topics", "brief_topic_docs") + ("data/models/topics/state.npz",)),
+        Stage("dedup", "11_dedup_briefs.py", (), db("briefs"),
+              db("brief_duplicates") + ("outputs/tables/brief_duplicates.csv",)),
+        Stage("fulltext", "13_fetch_fulltext.py", (), db("briefs"),
+              db("fulltext_items", "bitstreams", "fulltext"), volatile=True),
+        Stage("explore", "03_explore_db.py", ("--quiet", "--format", "csv"),
+              db("briefs", "keywords", "brief_keywords", "geo", "brief_geo", "m49_areas",
+                 "funding_entities", "brief_funding", "quality_stats"),
+              ("outputs/reports/*.csv",)),
+        *[Stage(f"temporal.{dim}", "05_temporal_analysis.py",
+                ("--dimensions", dim, "--granularity", g, "--workers", "1"),
+                db(*tables), temporal_artifacts(dim, g))
+          for dim, tables in TEMPORAL.items()],
+        Stage("figures", "06_visualizations.py", ("--granularity", g),
+              (f"artifact:keywords_by_{g}", f"artifact:keywords_emerging_{g}",
+               f"artifact:keywords_stable_{g}") + db("briefs"),
+              ("outputs/figures_manifest.json",)),
+        Stage("network", "09_cooccurrence_network.py", ("--granularity", g),
+              (f"artifact:keywords_cooccurrence_{g}",),
+              (f"outputs/tables/keywords_network_modularity_by_{g}.csv",)),
+        Stage("dashboard", "12_build_dashboard.py", ("--granularity", g),
+              tuple(f"artifact:{dim}_{t}_{g}" for dim in TEMPORAL for t in ("by", "trends"))
+              + db("briefs"),
+              ("outputs/dashboard/index.html",)),
+    ]
+
+def dependencies(plan):
+    """
+    {etapa: [etapas de las que depende]}: el último escritor anterior de
+    cada recurso que lee, y los lectores y escritores anteriores de cada
+    recurso que escribe (para no pisar lo que todavía no leyeron).
+    """
+    deps = {}
+    for i, stage in enumerate(plan):
+        before = plan[:i]
+        found  = []
+        for r in stage.inputs:
+            writers = [s.name for s in before if r in s.outputs]
+            found  += writers[-1:]
+        for r in stage.outputs:
+            found += [s.name for s in before if r in s.inputs or r in s.outputs]
+        deps[stage.name] = sorted(set(found), key=[s.name for s in plan].index)
+    return deps
+
+def select(plan, deps, targets, harvest):
+    """
+    Etapas a considerar: los objetivos (o todas las no volátiles) y sus
+    ancestros. Las volátiles solo entran si se piden.
+    """
+    wanted = set(targets) or {s.name for s in plan if not s.volatile}
+    if harvest:
+        wanted.add("harvest")
+    volatile = {s.name for s in plan if s.volatile}
+    todo     = list(wanted)
+    while todo:
+        for d in deps[todo.pop()]:
+            if d not in wanted and d not in volatile:
+                wanted.add(d)
+                todo.append(d)
+    return [s for s in plan if s.name in wanted]
+
+# ── Huellas ────────────────────────────────────────────────────
+def is_file(resource):
+    return ":" not in resource.split("/")[0]
+
+def local_modules(path, seen):
+    """Módulos de scripts/ que importa un script, recursivamente."""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [a.name.split(".")[0] for a in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module.split(".")[0]]
+        else:
+            continue
+        for name in names:
+            module = SCRIPTS_DIR / f"{name}.py"
+            if name not in seen and module.exists():
+                seen.add(name)
+                local_modules(module, seen)
+    return seen
+
+def code_digest(script):
+    """Hash del script y de los módulos compartidos que importa."""
+    path = SCRIPTS_DIR / script
+    h    = hashlib.sha256(path.read_bytes())
+    for name in sorted(local_modules(path, set())):
+        h.update(name.encode())
+        h.update((SCRIPTS_DIR / f"{name}.py").read_bytes())
+    return h.hexdigest()
+
+def file_digest(pattern):
+    """Hash del contenido de los archivos que coinciden con el patrón."""
+    h = hashlib.sha256()
+    for path in sorted(Path(".").glob(pattern)):
+        h.update(path.as_posix().encode())
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
+
+def stage_key(stage, deps, keys):
+    """Huella de la etapa; None para las volátiles (siempre corren)."""
+    if stage.volatile:
+        return None
+    payload = {
+        "code":  code_digest(stage.script),
+        "args":  list(stage.args),
+        "files": {r: file_digest(r) for r in stage.inputs if is_file(r)},
+        "deps":  {d: keys.get(d) for d in deps},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def outputs_exist(stage):
+    tables = set()
+    if DB_PATH.exists():
+        conn   = sqlite3.connect(f"file:{DB_PATH.as_posix()}?mode=ro", uri=True)
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.close()
+    for r in stage.outputs:
+        kind, _, name = r.partition(":")
+        if is_file(r):
+            if not any(Path(".").glob(r)):
+                return False
+        elif kind == "db" and name not in tables:
+            return False
+        elif kind == "artifact" and not has_artifact(name):
+            return False
+    return True
+
+# ── Estado ─────────────────────────────────────────────────────
+def read_state():
+    if STATE_PATH.exists():
+        return json.loads(STATE_PATH.read_text(encoding="utf-8"))
+    return {}
+
+def write_state(state):
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(STATE_PATH)
+
+# ── Ejecución ──────────────────────────────────────────────────
+def db_access(stage):
+    """'w' si la etapa escribe la base, 'r' si solo la lee, None si no la toca."""
+    if any(r.startswith("db:") for r in stage.outputs):
+        return "w"
+    if any(r.startswith("db:") for r in stage.inputs):
+        return "r"
+    return None
+
+def conflicts(stage, running):
+    mode = db_access(stage)
+    return mode is not None and any(
+        "w" in (mode, db_access(other)) for other in running if db_access(other))
+
+def run_stage(stage):
+    """Corre el script en su propio proceso; salida en LOG_DIR. (código, segundos)."""
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    # UTF-8 explícito: la salida redirigida en Windows no admite ✓ ni acentos
+    # CGSPACE_STAGE: nombre de la etapa en los logs JSONL y perfiles (instrumentation.py)
+    env   = {**os.environ, "PYTHONIOENCODING": "utf-8", "CGSPACE_STAGE": stage.name}
+    start = time.perf_counter()
+    with open(LOG_DIR / f"{stage.name}.log", "w", encoding="utf-8") as out:
+        code = subprocess.run([sys.executable, str(SCRIPTS_DIR / stage.script), *stage.args],
+                              stdout=out, stderr=subprocess.STDOUT, env=env).returncode
+    return code, time.perf_counter() - start
+
+def tail(stage, n=15):
+    lines = (LOG_DIR / f"{stage.name}.log").read_text(encoding="utf-8").splitlines()
+    return "\n".join("    " + line for line in lines[-n:])
+
+def execute(selected, deps, state, jobs, force):
+    """
+    Corre las etapas seleccionadas respetando dependencias y el acceso a
+    la base. Devuelve {etapa: (estado, segundos)} con estado ok, skip,
+    error o blocked (dependía de una etapa que falló).
+    """
+    keys    = {name: info.get("key") for name, info in state.items()}
+    results = {}
+    pending = list(selected)
+    running = {}
+    names   = {s.name for s in selected}
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for stage in list(pending):
+                needed = [d for d in deps[stage.name] if d in names]
+                if any(results[d][0] in ("error", "blocked") for d in needed if d in results):
+                    pending.remove(stage)
+                    results[stage.name] = ("blocked", 0.0)
+                    log(f"  – {stage.name}: bloqueada")
+                    continue
+                if (not all(d in results for d in needed) or len(running) >= jobs
+                        or conflicts(stage, [s for s, _ in running.values()])):
+                    continue
+                pending.remove(stage)
+                key = stage_key(stage, deps[stage.name], keys)
+                if (not force and key is not None and state.get(stage.name, {}).get("key") == key
+                        and outputs_exist(stage)):
+                    keys[stage.name]    = key
+                    results[stage.name] = ("skip", 0.0)
+                    log(f"  · {stage.name}: sin cambios")
+                    continue
+                log(f"  ▶ {stage.name}: {' '.join([stage.script, *stage.args])}")
+                running[pool.submit(run_stage, stage)] = (stage, key)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, key = running.pop(future)
+                code, seconds = future.result()
+                if code == 0:
+                    keys[stage.name]  = key
+                    state[stage.name] = {"key": key, "seconds": round(seconds, 2),
+                                         "finished_at": datetime.now().isoformat(timespec="seconds")}
+                    results[stage.name] = ("ok", seconds)
+                    log(f"  ✓ {stage.name}: {seconds:.1f} s")
+                else:
+                    # salidas a medio escribir: la próxima corrida la repite
+                    state.pop(stage.name, None)
+                    results[stage.name] = ("error", seconds)
+                    log(f"  ✗ {stage.name}: código {code} en {seconds:.1f} s "
+                        f"(ver {LOG_DIR / (stage.name + '.log')})\n{tail(stage)}")
+                write_state(state)
+    return results
+
+def record_run(results, started, elapsed):
+    RUNS_LOG.parent.mkdir(parents=True, exist_ok=True)
+    with open(RUNS_LOG, "a", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "started_at": started, "seconds": round(elapsed, 2),
+            "stages": {name: {"status": status, "seconds": round(seconds, 2)}
+                       for name, (status, seconds) in results.items()},
+        }, ensure_ascii=False) + "\n")
+
+# ── Main ───────────────────────────────────────────────────────
+def positive_int(text):
+    """Tipo de argparse: entero >= 1."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"debe ser >= 1: {text}")
+    return value
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("targets", nargs="*",
+                        help="etapas a correr con sus dependencias (por defecto, todas)")
+    parser.add_argument("--harvest", action="store_true",
+                        help="cosechar la API antes de cargar (01_harvest_rest.py)")
+    parser.add_argument("--force", action="store_true",
+                        help="correr las etapas seleccionadas aunque no haya cambios")
+    parser.add_argument("--jobs", type=positive_int, default=JOBS, help="etapas en paralelo")
+    parser.add_argument("--granularity", choices=GRANULARITIES, default=GRANULARITY,
+                        help="granularidad de 05, 06, 09 y 12")
+    parser.add_argument("--list", action="store_true", help="mostrar las etapas y salir")
+    args = parser.parse_args()
+
+    plan = stages(args.granularity)
+    deps = dependencies(plan)
+    unknown = set(args.targets) - {s.name for s in plan}
+    if unknown:
+        parser.error(f"etapas desconocidas: {', '.join(sorted(unknown))} "
+                     f"(ver --list)")
+
+    if args.list:
+        for s in plan:
+            flag = " (volátil)" if s.volatile else ""
+            print(f"{s.name:<22} {s.script:<26} ← {', '.join(deps[s.name]) or '-'}{flag}")
+        return
+
+    selected = select(plan, deps, args.targets, args.harvest)
+    log(f"Pipeline: {len(selected)} etapas | {args.jobs} en paralelo"
+        f"{' | forzado' if args.force else ''}")
+
+    started = datetime.now().isoformat(timespec="seconds")
+    start   = time.perf_counter()
+    results = execute(selected, deps, read_state(), args.jobs, args.force)
+    elapsed = time.perf_counter() - start
+    record_run(results, started, elapsed)
+
+    counts = {status: sum(r[0] == status for r in results.values())
+              for status in ("ok", "skip", "error", "blocked")}
+    ran    = sum(seconds for status, seconds in results.values() if status != "skip")
+    log(f"\n{counts['ok']} corridas, {counts['skip']} sin cambios, {counts['error']} con error, "
+        f"{counts['blocked']} bloqueadas | {elapsed:.1f} s "
+        f"(suma de etapas: {ran:.1f} s)")
+    for name, (status, seconds) in sorted(results.items(), key=lambda r: -r[1][1]):
+        if status in ("ok", "error"):
+            log(f"  {seconds:>8.1f} s  {name}{'' if status == 'ok' else '  ✗'}")
+    if counts["error"] or counts["blocked"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,659 @@
+"""
+serve_api.py
+API HTTP local, de solo lectura, sobre la base de briefs y los
+artefactos de 05: conteos por faceta, reportes de 03, tablas de
+tendencias, series y co-ocurrencias, y búsqueda de briefs.
+
+    python scripts/serve_api.py                       # http://127.0.0.1:8000
+    python scripts/serve_api.py --port 8080 --pool 16
+    python scripts/serve_api.py --wal                 # pasar la base a WAL
+
+Rutas (GET, respuestas JSON):
+
+    /health                          estado, versión de datos y caché
+    /reports                         reportes de reports.py y sus parámetros
+    /reports/<nombre>?param=...      un reporte (mismos parámetros que 03)
+    /facets/<dimensión>?top=&from_quarter=&to_quarter=
+    /trends/<dimensión>?table=trends|emerging|declining|stable
+                        &granularity=&types=&sort=&limit=
+    /series/<dimensión>?item=...&item=...&granularity=&types=
+    /cooccurrence/<dimensión>?item=&period=&granularity=&types=&limit=
+    /briefs?q=&keyword=&country=&item_type=&from_quarter=&to_quarter=
+           &limit=&offset=
+    /briefs/<handle>                 un brief con keywords, países, autores...
+
+Pensado para correr mientras el loader (02, 08, 13...) escribe:
+
+- La base debe estar en WAL (02 la deja así): los lectores ven el
+  último commit sin bloquear al escritor ni ser bloqueados por él. Si
+  no lo está se avisa al arrancar; --wal la convierte (el cambio queda
+  grabado en el archivo).
+- Un pool de POOL_SIZE conexiones de solo lectura, prestadas por
+  petición; cada hilo del servidor toma una y la devuelve al terminar.
+- Caché LRU de respuestas ya codificadas (CACHE_ENTRIES, CACHE_BYTES)
+  y otra de artefactos leídos (FRAME_ENTRIES, FRAME_BYTES).
+  Una conexión aparte consulta PRAGMA data_version en cada petición:
+  cambia cuando otra conexión confirma un commit, y entonces la caché
+  se vacía. Lo mismo si cambia el manifest de artefactos.
+- Resultados de más de STREAM_ROWS filas se envían en streaming
+  (chunked) a medida que salen del cursor, sin armarlos en memoria ni
+  guardarlos en la caché.
+"""
+
+import argparse
+import json
+import math
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import artifacts
+import item_types
+import reports
+from instrumentation import emit, log
+from periods import GRANULARITIES, period_label
+
+DB_PATH        = Path("data/db/cgspace_briefs.sqlite")
+HOST           = "127.0.0.1"
+PORT           = 8000
+POOL_SIZE      = 8           # conexiones de solo lectura
+BUSY_TIMEOUT   = 5.0         # segundos esperando un lock de la base
+CACHE_ENTRIES  = 4096        # respuestas en la caché LRU
+CACHE_BYTES    = 64 << 20    # y bytes que pueden ocupar
+FRAME_ENTRIES  = 64          # artefactos leídos que se mantienen en memoria
+FRAME_BYTES    = 256 << 20   # y bytes que pueden ocupar
+STREAM_ROWS    = 1000        # más filas que esto: streaming, sin caché
+DEFAULT_LIMIT  = 100
+MAX_LIMIT      = 100_000
+
+TREND_TABLES = ("trends", "emerging", "declining", "stable")
+
+# ── Conexiones ─────────────────────────────────────────────────
+def connect_ro(path):
+    """Conexión de solo lectura en autocommit, usable desde cualquier hilo."""
+    conn = sqlite3.connect(f"file:{Path(path).as_posix()}?mode=ro", uri=True,
+                           timeout=BUSY_TIMEOUT, isolation_level=None,
+                           check_same_thread=False)
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+def journal_mode(path, switch=False):
+    """
+    Modo de journal de la base. Con rollback journal cada commit del
+    loader bloquearía a los lectores: sin `switch` solo se avisa; con
+    `switch` se pasa a WAL (queda grabado en el archivo). Devuelve el
+    modo final.
+    """
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    mode = None
+    try:
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        if mode != "wal" and switch:
+            mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+            log(f"  journal_mode → {mode}")
+        elif mode != "wal":
+            log(f"  ⚠️ La base está en modo {mode}: los commits del loader bloquean "
+                f"a la API (correr 02_load_sqlite.py o usar --wal)")
+        return mode
+    except sqlite3.OperationalError as e:
+        log(f"  ⚠️ No se pudo pasar la base a WAL ({e}); sigue en modo {mode}")
+        return mode
+    finally:
+        conn.close()
+
+class ConnectionPool:
+    """Conexiones de solo lectura que los hilos del servidor piden prestadas."""
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.idle = queue.LifoQueue()
+        for _ in range(size):
+            self.idle.put(connect_ro(path))
+
+    @contextmanager
+    def connection(self):
+        conn = self.idle.get()
+        try:
+            yield conn
+        finally:
+            self.idle.put(conn)
+
+class DataVersion:
+    """
+    Generación de los datos que sirve la API. Sube cuando otra conexión
+    confirma un commit en la base (PRAGMA data_version de una conexión
+    propia, que solo cambia por commits ajenos) o cuando cambia el
+    manifest de artefactos.
+    """
+
+    def __init__(self, path):
+        self.conn       = connect_ro(path)
+        self.lock       = threading.Lock()
+        self.last       = None
+        self.generation = 0
+
+    def current(self):
+        try:
+            manifest = artifacts.MANIFEST_PATH.stat().st_mtime_ns
+        except FileNotFoundError:
+            manifest = None
+        with self.lock:
+            state = (self.conn.execute("PRAGMA data_version").fetchone()[0], manifest)
+            if state != self.last:
+                self.last = state
+                self.generation += 1
+            return self.generation
+
+# ── Caché ──────────────────────────────────────────────────────
+def frame_bytes(value):
+    """Memoria aproximada de un artefacto leído (tabla o CountMatrix)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    c = value.counts
+    return sum(int(a.nbytes) for a in (c.data, c.indices, c.indptr,
+                                       value.items, value.periods, value.labels))
+
+class LRU:
+    """Caché LRU acotada por entradas y por peso (bytes), con lock."""
+
+    def __init__(self, entries, max_weight=math.inf, weight=lambda v: 0):
+        self.entries, self.max_weight, self.weight = entries, max_weight, weight
+        self.data   = OrderedDict()
+        self.total  = 0
+        self.lock   = threading.Lock()
+        self.hits   = self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self.data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value):
+        w = self.weight(value)
+        if w > self.max_weight:
+            return
+        with self.lock:
+            old = self.data.pop(key, None)
+            if old is not None:
+                self.total -= old[1]
+            self.data[key] = (value, w)
+            self.total += w
+            while len(self.data) > self.entries or self.total > self.max_weight:
+                _, (_, old_w) = self.data.popitem(last=False)
+                self.total -= old_w
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.total = 0
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.data), "bytes": self.total,
+                    "hits": self.hits, "misses": self.misses}
+
+# ── Resultados ─────────────────────────────────────────────────
+# Respuesta de una ruta: `meta` va tal cual en el objeto JSON; si hay
+# `columns`, `rows` (iterable de tuplas, p. ej. un cursor) va como lista
+# de objetos en "rows".
+Result = namedtuple("Result", ["meta", "columns", "rows"], defaults=[None, None])
+
+def plain(value):
+    """Valores de numpy/pandas a tipos JSON (NaN → null)."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(value)
+    return value
+
+def encode(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"),
+                      default=plain).encode("utf-8")
+
+def encode_rows(columns, rows):
+    return b",".join(encode({c: plain(v) for c, v in zip(columns, r)}) for r in rows)
+
+def cursor_result(cursor, meta=None):
+    return Result(meta or {}, [d[0] for d in cursor.description], cursor)
+
+def frame_result(df, meta=None):
+    return Result(meta or {}, [str(c) for c in df.columns],
+                  df.itertuples(index=False, name=None))
+
+# ── Parámetros ─────────────────────────────────────────────────
+class NotFound(LookupError):
+    pass
+
+def one(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+def int_param(params, name, default, low=0, high=MAX_LIMIT):
+    value = one(params, name)
+    if value is None or value == "":
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' debe ser un entero: {value!r}")
+    if not low <= value <= high:
+        raise ValueError(f"'{name}' fuera de rango ({low}–{high}): {value}")
+    return value
+
+def choice(params, name, options, default):
+    value = one(params, name, default)
+    if value not in options:
+        raise ValueError(f"'{name}' debe ser uno de {', '.join(options)}: {value!r}")
+    return value
+
+def quarter(params, name):
+    value = one(params, name)
+    if not value:
+        return None
+    if not re.fullmatch(r"\d{4}Q[1-4]", value.upper()):
+        raise ValueError(f"'{name}' debe ser un trimestre como 2025Q3: {value!r}")
+    return value.upper()
+
+def type_slugs(params):
+    """Slugs de ?types=a,b (o repetido); None sin filtro."""
+    names = [t for v in params.get("types", []) for t in v.split(",") if t]
+    if not names:
+        return None
+    slugs = sorted({item_types.slug(n) for n in item_types.resolve(names)})
+    item_types.sql_filter(slugs)     # valida
+    return slugs
+
+def artifact_name(dimension, kind, params):
+    """Nombre del artefacto de 05: {dim}_{kind}_{g}[__{tipos}]."""
+    if not re.fullmatch(r"[a-z0-9_]+", dimension):
+        raise NotFound(f"Dimensión desconocida: {dimension}")
+    g     = choice(params, "granularity", GRANULARITIES, "quarter")
+    types = type_slugs(params)
+    name  = f"{dimension}_{kind}_{g}"
+    return (f"{name}__{item_types.tag(types)}" if types else name), g
+
+# ── API ────────────────────────────────────────────────────────
+class API:
+    """Rutas de la API sobre una base y el almacén de artefactos."""
+
+    def __init__(self, path=DB_PATH, pool_size=POOL_SIZE,
+                 cache_entries=CACHE_ENTRIES, cache_bytes=CACHE_BYTES,
+                 frame_bytes_max=FRAME_BYTES, wal=False):
+        self.path    = Path(path)
+        self.journal = journal_mode(self.path, switch=wal)
+        self.pool    = ConnectionPool(self.path, pool_size)
+        self.version = DataVersion(self.path)
+        self.cache   = LRU(cache_entries, cache_bytes, len)
+        self.frames  = LRU(FRAME_ENTRIES, frame_bytes_max, frame_bytes)
+        self.seen    = None
+        self.tables  = None
+        self.routes  = [
+            (re.compile(r"/health"),                    self.health,       True),
+            (re.compile(r"/reports"),                   self.report_list,  False),
+            (re.compile(r"/reports/([a-z0-9_]+)"),      self.report,       True),
+            (re.compile(r"/facets/([a-z0-9_]+)"),       self.facet,        True),
+            (re.compile(r"/trends/([a-z0-9_]+)"),       self.trends,       False),
+            (re.compile(r"/series/([a-z0-9_]+)"),       self.series,       False),
+            (re.compile(r"/cooccurrence/([a-z0-9_]+)"), self.cooccurrence, False),
+            (re.compile(r"/briefs"),                    self.search,       True),
+            (re.compile(r"/briefs/(.+)"),               self.brief,        True),
+        ]
+
+    def generation(self):
+        """Generación actual; si cambió, vacía la caché y la lista de tablas."""
+        gen = self.version.current()
+        if gen != self.seen:
+            self.cache.clear()
+            self.tables = None
+            self.seen   = gen
+        return gen
+
+    def existing_tables(self, conn):
+        tables = self.tables
+        if tables is None:
+            tables = {r[0] for r in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'")}
+            self.tables = tables
+        return tables
+
+    def artifact(self, name, kind):
+        """Tabla o matriz de artifacts.py, en memoria mientras no se reescriba."""
+        info  = artifacts.entry(name, kind)
+        key   = (name, info["written_at"], info["file"])
+        value = self.frames.get(key)
+        if value is None:
+            value = (artifacts.load_table(name) if kind == "table"
+                     else artifacts.load_matrix(name))
+            self.frames.put(key, value)
+        return value
+
+    # ── Rutas ──
+    def health(self, conn, params):
+        n = conn.execute("SELECT COUNT(*) FROM briefs").fetchone()[0]
+        return Result({"status": "ok", "db": str(self.path), "journal_mode": self.journal,
+                       "briefs": n, "generation": self.seen,
+                       "cache": self.cache.stats(), "artifacts": self.frames.stats()})
+
+    def report_list(self, conn, params):
+        rows = [(name, reports.title(name, r.defaults), r.defaults, list(r.requires))
+                for name, r in reports.REPORTS.items()]
+        return Result({"dimensions": list(reports.DIMENSIONS)},
+                      ["name", "title", "defaults", "requires"], rows)
+
+    def run_report(self, conn, name, values):
+        if name not in reports.REPORTS:
+            raise NotFound(f"Reporte desconocido: {name}")
+        resolved = reports.resolve(name, values, self.existing_tables(conn))
+        if resolved is None:
+            raise NotFound(f"El reporte '{name}' no se puede correr en esta base "
+                           f"(faltan tablas: {sorted(reports.REPORTS[name].requires)})")
+        name, full = resolved
+        sql, bind  = reports.render_sql(name, full)
+        return cursor_result(conn.execute(sql, bind),
+                             {"report": name, "title": reports.title(name, full),
+                              "params": full})
+
+    def report(self, conn, params, name):
+        values = {}
+        for key in params:
+            value = one(params, key)
+            if key in ("from_quarter", "to_quarter"):
+                value = quarter(params, key)
+            elif key in ("top", "min_freq"):
+                value = None if value == "none" else int_param(params, key, None)
+            values[key] = value
+        return self.run_report(conn, name, values)
+
+    def facet(self, conn, params, dimension):
+        if dimension not in reports.DIMENSIONS:
+            raise NotFound(f"Dimensión desconocida: {dimension} "
+                           f"(usar {', '.join(reports.DIMENSIONS)})")
+        top = one(params, "top")
+        return self.run_report(conn, "top", {
+            "dimension":    dimension,
+            "top":          None if top == "none" else int_param(params, "top", 20),
+            "from_quarter": quarter(params, "from_quarter"),
+            "to_quarter":   quarter(params, "to_quarter")})
+
+    def trends(self, conn, params, dimension):
+        table   = choice(params, "table", TREND_TABLES, "trends")
+        name, g = artifact_name(dimension, table, params)
+        df      = self.artifact(name, "table")
+        df      = df.rename_axis("item").reset_index()
+        sort    = one(params, "sort")
+        if sort is not None:
+            if sort.lstrip("-") not in df.columns:
+                raise ValueError(f"'sort' debe ser una columna: {', '.join(df.columns)}")
+            df = df.sort_values(sort.lstrip("-"), ascending=not sort.startswith("-"),
+                                kind="stable")
+        total = len(df)
+        limit = int_param(params, "limit", None)
+        if limit is not None:
+            df = df.head(limit)
+        return frame_result(df, {"artifact": name, "granularity": g, "total": total})
+
+    def series(self, conn, params, dimension):
+        name, g = artifact_name(dimension, "by", params)
+        m       = self.artifact(name, "matrix")
+        wanted  = params.get("item", [])
+        if not wanted:
+            raise ValueError("Falta 'item' (uno o más: ?item=a&item=b)")
+        index   = {item: i for i, item in enumerate(m.items)}
+        missing = [w for w in wanted if w not in index]
+        if missing:
+            raise NotFound(f"Ítems sin datos en '{name}': {missing}")
+        rows = m.counts[[index[w] for w in wanted]].toarray()
+        out  = [(label, *map(int, rows[:, j])) for j, label in enumerate(m.labels)]
+        return Result({"artifact": name, "granularity": g}, ["period", *wanted], out)
+
+    def cooccurrence(self, conn, params, dimension):
+        name, g = artifact_name(dimension, "cooccurrence", params)
+        df      = self.artifact(name, "table")
+        item    = one(params, "item")
+        if item:
+            df = df[(df["item1"] == item) | (df["item2"] == item)]
+        period  = one(params, "period")
+        labels  = {k: period_label(g, k) for k in df["period"].unique()}
+        if period:
+            keys = [k for k, label in labels.items() if label == period]
+            df   = df[df["period"].isin(keys)]
+        df = df.sort_values(["n_cooccur", "pmi"], ascending=False, kind="stable")
+        df = df.head(int_param(params, "limit", DEFAULT_LIMIT))
+        df = df.assign(period=df["period"].map(labels))
+        return frame_result(df, {"artifact": name, "granularity": g})
+
+    def search(self, conn, params):
+        where, bind = [], {}
+        for k, word in enumerate((one(params, "q") or "").split()):
+            escaped = re.sub(r"([\\%_])", r"\\\1", word)
+            where.append(f"(b.title LIKE :w{k} ESCAPE '\\' OR b.abstract LIKE :w{k} ESCAPE '\\')")
+            bind[f"w{k}"] = f"%{escaped}%"
+        if one(params, "keyword"):
+            where.append("""EXISTS (SELECT 1 FROM brief_keywords bk
+                                    JOIN keywords k ON k.keyword_id = bk.keyword_id
+                                    WHERE bk.brief_id = b.brief_id AND k.keyword_norm = :keyword)""")
+            bind["keyword"] = one(params, "keyword").strip().lower()
+        if one(params, "country"):
+            where.append("""EXISTS (SELECT 1 FROM brief_geo bg
+                                    JOIN geo g ON g.geo_id = bg.geo_id
+                                    WHERE bg.brief_id = b.brief_id AND g.geo_type = 'country'
+                                      AND (g.value_norm = :country OR g.iso_alpha3 = :iso))""")
+            bind["country"] = one(params, "country").strip().lower()
+            bind["iso"]     = one(params, "country").strip().upper()
+            if "iso_alpha3" not in {r[1] for r in conn.execute("PRAGMA table_info(geo)")}:
+                where[-1] = where[-1].replace(" OR g.iso_alpha3 = :iso", "")
+                del bind["iso"]
+        slugs = type_slugs({"types": params.get("item_type", []) + params.get("types", [])})
+        if slugs:
+            where.append(item_types.sql_filter(slugs))
+        bind["q_from"] = reports.quarter_key(quarter(params, "from_quarter"))
+        bind["q_to"]   = reports.quarter_key(quarter(params, "to_quarter"))
+        where.append(reports.QUARTER_RANGE)
+        bind["limit"]  = int_param(params, "limit", DEFAULT_LIMIT)
+        bind["offset"] = int_param(params, "offset", 0, high=2**62)
+        sql = f"""SELECT b.brief_id, b.title, b.issued_date, b.year_quarter,
+                         b.item_type, b.series_raw, b.uri
+                  FROM   briefs b
+                  WHERE  {' AND '.join(where)}
+                  ORDER  BY b.issued_date DESC, b.brief_id
+                  LIMIT  :limit OFFSET :offset"""
+        return cursor_result(conn.execute(sql, bind),
+                             {"limit": bind["limit"], "offset": bind["offset"]})
+
+    def brief(self, conn, params, brief_id):
+        cur = conn.execute("SELECT * FROM briefs WHERE brief_id = ?", (brief_id,))
+        row = cur.fetchone()
+        if row is None:
+            raise NotFound(f"Brief no encontrado: {brief_id}")
+        out = {"brief": dict(zip([d[0] for d in cur.description], row))}
+
+        def values(sql):
+            return [r[0] if len(r) == 1 else list(r) for r in conn.execute(sql, (brief_id,))]
+
+        out["keywords"] = values("""SELECT k.keyword_raw FROM brief_keywords bk
+                                    JOIN keywords k ON k.keyword_id = bk.keyword_id
+                                    WHERE bk.brief_id = ? ORDER BY k.keyword_raw""")
+        out["geo"] = [dict(zip(("type", "value"), r)) for r in values(
+            """SELECT g.geo_type, g.value_raw FROM brief_geo bg
+               JOIN geo g ON g.geo_id = bg.geo_id
+               WHERE bg.brief_id = ? ORDER BY g.geo_type, g.value_raw""")]
+        out["authors"] = values("""SELECT a.author_name_raw FROM brief_authors ba
+                                   JOIN authors a ON a.author_id = ba.author_id
+                                   WHERE ba.brief_id = ? ORDER BY ba.author_order""")
+        out["funding"] = [dict(zip(("type", "entity"), r)) for r in values(
+            """SELECT fe.entity_type, fe.entity_raw FROM brief_funding bf
+               JOIN funding_entities fe ON fe.entity_id = bf.entity_id
+               WHERE bf.brief_id = ? ORDER BY fe.entity_type, fe.entity_raw""")]
+        out["tags"] = [dict(zip(("type", "value"), r)) for r in values(
+            """SELECT tag_type, tag_value FROM brief_tags
+               WHERE brief_id = ? ORDER BY tag_type, tag_value""")]
+        if {"bitstreams", "fulltext"} <= self.existing_tables(conn):
+            out["pdfs"] = [dict(zip(("name", "checksum", "status", "pages", "chars"), r))
+                           for r in values(
+                """SELECT bs.name, bs.checksum, bs.status, ft.n_pages, ft.n_chars
+                   FROM bitstreams bs LEFT JOIN fulltext ft ON ft.checksum = bs.checksum
+                   WHERE bs.brief_id = ? ORDER BY bs.name""")]
+        return Result(out)
+
+    def route(self, path):
+        for pattern, func, uses_db in self.routes:
+            m = pattern.fullmatch(path)
+            if m:
+                return func, uses_db, [unquote(g) for g in m.groups()]
+        raise NotFound(f"Ruta desconocida: {path}")
+
+# ── HTTP ───────────────────────────────────────────────────────
+ERRORS = ((NotFound, 404), (FileNotFoundError, 404), (ValueError, 400),
+          (KeyError, 400), (TypeError, 400), (sqlite3.OperationalError, 503))
+
+class Handler(BaseHTTPRequestHandler):
+    """GET → JSON; keep-alive (HTTP/1.1), Content-Length o chunked."""
+    protocol_version = "HTTP/1.1"
+    server_version   = "cgspace-briefs-api"
+    api              = None
+    # encabezados y cuerpo salen en escrituras separadas: con Nagle, el
+    # cuerpo espera el ACK retardado del cliente (~40 ms por petición)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url   = urlsplit(self.path)
+        path  = url.path.rstrip("/") or "/"
+        key   = (path, url.query)
+        gen   = self.api.generation()
+        body  = self.api.cache.get((gen, key))
+        how   = "hit"
+        self.streaming = False
+        try:
+            if body is None:
+                func, uses_db, args = self.api.route(path)
+                params = parse_qs(url.query)
+                with self.api.pool.connection() if uses_db else nullcontext() as conn:
+                    how = self.respond(func(conn, params, *args), (gen, key))
+            else:
+                self.send_body(200, body)
+            status = 200
+        except Exception as e:
+            status = next((code for cls, code in ERRORS if isinstance(e, cls)), 500)
+            if self.streaming:   # los encabezados ya salieron: solo cortar
+                self.close_connection = True
+            else:
+                self.send_body(status, encode({"error": str(e.args[0] if e.args else e)}))
+            how = type(e).__name__
+        emit("request", path=path, query=url.query, status=status, cache=how,
+             ms=round(1000 * (time.perf_counter() - start), 2))
+
+    def respond(self, result, key):
+        """
+        Envía un Result: entero (y a la caché) si es chico, si no en
+        streaming. Cierra el cursor aunque el cliente corte: un SELECT a
+        medio leer mantiene la conexión en una foto vieja de la base.
+        """
+        try:
+            return self.send_result(result, key)
+        finally:
+            close = getattr(result.rows, "close", None)
+            if close is not None:
+                close()
+
+    def send_result(self, result, key):
+        if result.columns is None:
+            body = encode(result.meta)
+            self.api.cache.put(key, body)
+            self.send_body(200, body)
+            return "miss"
+        rows  = iter(result.rows)
+        first = [next(rows, None) for _ in range(STREAM_ROWS + 1)]
+        first = [r for r in first if r is not None]
+        head  = encode(result.meta)[:-1] + (b"," if result.meta else b"") + b'"rows":['
+        if len(first) <= STREAM_ROWS:
+            body = head + encode_rows(result.columns, first) + b"]}"
+            self.api.cache.put(key, body)
+            self.send_body(200, body)
+            return "miss"
+        self.streaming = True
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.chunk(head + encode_rows(result.columns, first))
+        while True:
+            batch = [r for r in (next(rows, None) for _ in range(STREAM_ROWS)) if r is not None]
+            if not batch:
+                break
+            self.chunk(b"," + encode_rows(result.columns, batch))
+        self.chunk(b"]}")
+        self.wfile.write(b"0\r\n\r\n")
+        return "stream"
+
+    def chunk(self, data):
+        self.wfile.write(b"%x\r\n" % len(data) + data + b"\r\n")
+
+    def send_body(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass   # cada petición va al log JSONL (emit "request")
+
+class Server(ThreadingHTTPServer):
+    daemon_threads      = True
+    request_queue_size  = 128
+
+def serve(api, host=HOST, port=PORT):
+    handler = type("BoundHandler", (Handler,), {"api": api})
+    server  = Server((host, port), handler)
+    log(f"API en http://{host}:{server.server_port} (Ctrl+C para terminar)",
+        host=host, port=server.server_port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+# ── Main ───────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--pool", type=int, default=POOL_SIZE,
+                        help=f"conexiones de solo lectura (por defecto {POOL_SIZE})")
+    parser.add_argument("--cache-mb", type=int, default=CACHE_BYTES >> 20,
+                        help="tamaño máximo de la caché de respuestas")
+    parser.add_argument("--frames-mb", type=int, default=FRAME_BYTES >> 20,
+                        help="tamaño máximo de los artefactos en memoria")
+    parser.add_argument("--wal", action="store_true",
+                        help="pasar la base a journal WAL si no lo está (persistente)")
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        log(f"❌ No existe la base {args.db} (correr 02_load_sqlite.py)")
+        raise SystemExit(1)
+    log(f"Base: {args.db} | pool: {args.pool} | caché: {args.cache_mb} MB "
+        f"| artefactos: {args.frames_mb} MB")
+    api = API(args.db, args.pool, cache_bytes=args.cache_mb << 20,
+              frame_bytes_max=args.frames_mb << 20, wal=args.wal)
+    serve(api, args.host, args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Configuración común de los tests: los scripts del pipeline se importan
+por nombre (importlib, porque los numerados no son identificadores) y
+el log JSONL de instrumentation.py va a un directorio temporal.
+"""
+
+import importlib
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+def script(name):
+    """Módulo de scripts/ por nombre de archivo (sin .py)."""
+    return importlib.import_module(name)
+
+@pytest.fixture(autouse=True, scope="session")
+def quiet_logs(tmp_path_factory):
+    instrumentation = script("instrumentation")
+    instrumentation.LOG_DIR     = tmp_path_factory.mktemp("logs")
+    instrumentation.PROFILE_DIR = instrumentation.LOG_DIR / "profiles"
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Directorio de trabajo vacío: las rutas data/... de los scripts caen ahí."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def db():
+    """Base en memoria con el esquema de 02_load_sqlite.py."""
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(script("02_load_sqlite").SCHEMA)
+    yield conn
+    conn.close()
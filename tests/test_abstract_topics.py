@@ -0,0 +1,70 @@
+"""
+Actualización incremental de 10_abstract_topics.py: los abstracts
+editados o vaciados descuentan sus términos de df y todos los briefs se
+reasignan con el modelo nuevo.
+"""
+
+import sqlite3
+import sys
+
+import numpy as np
+import pytest
+
+from conftest import script
+
+topics = script("10_abstract_topics")
+
+WORDS = ("irrigation drought maize rainfall livestock fisheries nutrition gender "
+         "markets soil carbon seeds climate water policy finance").split()
+
+def abstract(i):
+    rng = np.random.default_rng(i)
+    return " ".join(rng.choice(WORDS, 12))
+
+@pytest.fixture
+def corpus(workdir, monkeypatch):
+    topics.DB_PATH.parent.mkdir(parents=True)
+    conn = sqlite3.connect(topics.DB_PATH)
+    conn.executescript(script("02_load_sqlite").SCHEMA)
+    conn.executemany("INSERT INTO briefs (brief_id, abstract) VALUES (?, ?)",
+                     [(f"b{i}", abstract(i)) for i in range(40)])
+    conn.commit()
+    monkeypatch.setattr(sys, "argv", ["10_abstract_topics.py"])
+    topics.main()
+    yield conn
+    conn.close()
+
+def expected_df(conn):
+    ids = [bid for (bid,) in conn.execute("SELECT brief_id FROM briefs WHERE abstract != ''")]
+    df = np.zeros(topics.N_FEATURES, dtype=np.int64)
+    for _, texts in topics.stream_batches(conn, ids):
+        df += np.bincount(topics.hash_batch(texts)[0].indices, minlength=topics.N_FEATURES)
+    return df
+
+def test_edits_and_emptied_abstracts_keep_df_exact(corpus):
+    corpus.execute("UPDATE briefs SET abstract = 'coffee cocoa bananas cassava yams' WHERE brief_id = 'b0'")
+    corpus.execute("UPDATE briefs SET abstract = 'too short' WHERE brief_id = 'b1'")
+    corpus.execute("UPDATE briefs SET abstract = '' WHERE brief_id = 'b2'")
+    corpus.commit()
+    topics.main()
+
+    model = topics.load_model()
+    assert model["n_docs"] == 38
+    assert (model["df"] == expected_df(corpus)).all()
+    dropped = corpus.execute(
+        "SELECT COUNT(*) FROM brief_topics WHERE brief_id IN ('b1', 'b2')").fetchone()[0]
+    assert dropped == 0
+    assert corpus.execute(
+        "SELECT COUNT(*) FROM brief_topic_docs WHERE brief_id = 'b2'").fetchone()[0] == 0
+
+def test_every_brief_is_reassigned_after_an_update(corpus):
+    before = dict(corpus.execute("SELECT brief_id || ':' || topic_id, weight FROM brief_topics"))
+    corpus.executemany("INSERT INTO briefs (brief_id, abstract) VALUES (?, ?)",
+                       [(f"n{i}", abstract(100 + i)) for i in range(10)])
+    corpus.commit()
+    topics.main()
+
+    after = dict(corpus.execute("SELECT brief_id || ':' || topic_id, weight FROM brief_topics"))
+    assert {k.split(":")[0] for k in after} >= {f"b{i}" for i in range(40)}
+    old = [k for k in before if k in after]
+    assert any(abs(before[k] - after[k]) > 1e-9 for k in old)
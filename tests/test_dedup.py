@@ -0,0 +1,67 @@
+"""
+MinHash + LSH de 11_dedup_briefs.py: textos distintos no se emparejan,
+las re-ediciones sí, y los clusters se identifican por su handle más chico.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import script
+
+dedup = script("11_dedup_briefs")
+
+VOCAB = [f"w{i}" for i in range(3000)]
+
+def random_texts(n, words=60, seed=0):
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(VOCAB, words)) for _ in range(n)]
+
+def jaccard(x, y):
+    x, y = set(dedup.shingles(x)), set(dedup.shingles(y))
+    return len(x & y) / len(x | y)
+
+@pytest.fixture(scope="module")
+def perms():
+    return dedup.permutations()
+
+def test_distinct_texts_are_not_paired(perms):
+    texts = random_texts(800)
+    sig   = dedup.minhash(texts, *perms)
+    pairs = dedup.candidate_pairs(sig)
+    n_pairs = len(texts) * (len(texts) - 1) // 2
+    assert len(pairs) / n_pairs < 1e-3
+    if len(pairs):
+        assert (dedup.similarity(sig, pairs[:, 0], pairs[:, 1]) < dedup.THRESHOLD).all()
+
+def test_signature_estimates_jaccard(perms):
+    base  = random_texts(1, words=200, seed=1)[0].split()
+    texts = [" ".join(base)]
+    for k in (2, 6, 12):
+        edited = list(base)
+        edited[::len(base) // k] = ["cambio"] * len(edited[::len(base) // k])
+        texts.append(" ".join(edited))
+    sig = dedup.minhash(texts, *perms)
+    for i in range(1, len(texts)):
+        est = dedup.similarity(sig, np.array([0]), np.array([i]))[0]
+        assert est == pytest.approx(jaccard(texts[0], texts[i]), abs=0.12)
+
+def test_reedition_is_paired(perms):
+    texts  = random_texts(50, words=120, seed=2)
+    words  = texts[7].split()
+    words[40] = "revisado"
+    texts.append(" ".join(words))
+    sig   = dedup.minhash(texts, *perms)
+    pairs = dedup.candidate_pairs(sig)
+    pairs = pairs[dedup.similarity(sig, pairs[:, 0], pairs[:, 1]) >= dedup.THRESHOLD]
+    assert pairs.tolist() == [[7, 50]]
+
+def test_cluster_id_is_smallest_handle(perms):
+    briefs = pd.DataFrame({
+        "brief_id":    ["10568/10", "10568/9", "10568/300", "10568/2"],
+        "issued_date": ["2020-01-01", "2021-01-01", "2019-05-01", None],
+    })
+    sig   = dedup.minhash(["mismo texto de un brief"] * 3 + ["otro"], *perms)
+    dup   = dedup.clusters(briefs, sig, np.array([[0, 1], [1, 2]]))
+    assert set(dup["cluster_id"]) == {"10568/9"}
+    assert set(dup["canonical_id"]) == {"10568/300"}
@@ -0,0 +1,140 @@
+"""
+13_fetch_fulltext.py contra benchmarks/bitstream_server.py: descarga una
+vez por checksum, extracción con pdftext.py, reanudación por lotes y
+briefs que comparten un PDF cuya primera descarga falla.
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from conftest import script
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+import bitstream_server   # noqa: E402
+
+fulltext = script("13_fetch_fulltext")
+
+N_BRIEFS = 30
+
+@pytest.fixture
+def server(workdir):
+    """Base con N_BRIEFS briefs y el árbol de bitstreams servido en un puerto libre."""
+    db = workdir / "data" / "db" / "cgspace_briefs.sqlite"
+    db.parent.mkdir(parents=True)
+    conn = sqlite3.connect(db)
+    conn.executescript(script("02_load_sqlite").SCHEMA)
+    conn.executemany("INSERT INTO briefs (brief_id, uuid, title, abstract) VALUES (?, ?, ?, ?)",
+                     [(f"10568/{n}", f"00000000-0000-0000-0000-{n:012d}",
+                       f"Brief number {n}", f"Abstract about soil and water {n}")
+                      for n in range(N_BRIEFS)])
+    conn.executescript(fulltext.SCHEMA)
+    conn.commit()
+
+    out = workdir / "site"
+    out.mkdir()
+    http = ThreadingHTTPServer(("127.0.0.1", 0),
+                               partial(bitstream_server.Handler, directory=str(out)))
+    base_url = f"http://127.0.0.1:{http.server_port}/server/api"
+    counts   = bitstream_server.build(db, out, base_url, missing=0.1, shared=0.3, no_pdf=0.1)
+    thread   = threading.Thread(target=http.serve_forever, daemon=True)
+    thread.start()
+    yield conn, fulltext.Client(base_url, 0), counts
+    http.shutdown()
+    http.server_close()
+    conn.close()
+
+def fetch(conn, client, items, workers=4):
+    claims = fulltext.Claims(fulltext.known_checksums(conn))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda item: fulltext.fetch_item(client, claims, item), items))
+    fulltext.save_batch(conn, results)
+    return results
+
+def test_fetch_and_extract(server):
+    conn, client, counts = server
+    fetch(conn, client, fulltext.pending_items(conn))
+    fulltext.extract_all(conn, fulltext.pending_extractions(conn), workers=1)
+
+    status = dict(conn.execute("SELECT status, COUNT(*) FROM fulltext_items GROUP BY status"))
+    assert status == {"ok": counts["items"], "error": counts["missing"]}
+    n_ok, n_unique = conn.execute("""SELECT COUNT(*), COUNT(DISTINCT checksum)
+                                     FROM bitstreams WHERE status = 'ok'""").fetchone()
+    assert n_ok == counts["pdfs"]
+    assert n_unique == counts["pdfs"] - counts["shared"]
+    # cada PDF distinto bajado una vez, con su texto
+    assert len(list(fulltext.PDF_DIR.glob("*/*.pdf"))) == n_unique
+    for brief_id, blob in conn.execute("""
+            SELECT bs.brief_id, ft.text_z FROM bitstreams bs
+            JOIN fulltext ft ON ft.checksum = bs.checksum"""):
+        text = fulltext.read_text(blob)
+        assert "Abstract about soil and water" in text
+
+def test_resume_only_pending_and_retry(server):
+    conn, client, counts = server
+    items = fulltext.pending_items(conn)
+    fetch(conn, client, items[:10])
+    assert fulltext.pending_items(conn) == items[10:]
+
+    fetch(conn, client, fulltext.pending_items(conn))
+    assert fulltext.pending_items(conn) == []
+    retry = fulltext.pending_items(conn, retry=True)
+    assert len(retry) == counts["missing"]
+    # el texto ya extraído no se vuelve a extraer
+    fulltext.extract_all(conn, fulltext.pending_extractions(conn), workers=1)
+    assert fulltext.pending_extractions(conn) == []
+
+class FlakyClient(fulltext.Client):
+    """La primera descarga de contenido falla, despacio (el otro hilo llega a esperar)."""
+    failed = False
+
+    def get(self, url, stream=False):
+        if url.endswith("/content") and not self.failed:
+            self.failed = True
+            time.sleep(0.3)
+            raise fulltext.requests.exceptions.ConnectionError("corte")
+        return super().get(url, stream)
+
+def test_shared_pdf_survives_failed_first_download(server):
+    conn, client, counts = server
+    assert counts["shared"]
+    by_checksum = {}
+    for item in fulltext.pending_items(conn):
+        try:
+            bitstreams = fulltext.pdf_bitstreams(client, item[1])
+        except fulltext.requests.exceptions.HTTPError:
+            continue                         # ítem que el servidor no tiene
+        for b in bitstreams:
+            by_checksum.setdefault(b["checkSum"]["value"], []).append(item)
+    pair = next(items[:2] for items in by_checksum.values() if len(items) > 1)
+
+    results = fetch(conn, FlakyClient(client.base_url, 0), pair, workers=2)
+    status  = {item: rows[0][5] for item, rows, _ in results}
+    assert sorted(status.values()) == ["error", "ok"]
+    # el brief en 'ok' tiene su PDF; el del error queda para --retry
+    for checksum, in conn.execute("SELECT checksum FROM bitstreams WHERE status = 'ok'"):
+        assert fulltext.pdf_path(checksum).exists()
+    retry = set(fulltext.pending_items(conn, retry=True)) & set(pair)
+    assert retry == {item for item, s in status.items() if s == "error"}
+
+def test_waiting_claim_takes_over_failed_download():
+    claims = fulltext.Claims([])
+    assert claims.claim("abc")
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(claims.claim("abc")))
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive()            # espera a la primera descarga
+    claims.release("abc", ok=False)
+    waiter.join(1)
+    assert got == [True]                # y como falló, la baja él
+
+    claims.release("abc", ok=True)
+    assert not claims.claim("abc")
@@ -0,0 +1,43 @@
+"""
+Límite de tasa de 01_harvest_rest.py: los hilos de la cosecha por tipo
+comparten un solo espaciado entre peticiones.
+"""
+
+import threading
+import time
+
+from conftest import script
+
+harvest  = script("01_harvest_rest")
+INTERVAL = 0.05
+
+class Response:
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {}
+
+def test_threads_share_one_rate(monkeypatch):
+    sent = []
+    lock = threading.Lock()
+
+    def fake_get(url, **kwargs):
+        with lock:
+            sent.append(time.monotonic())
+        return Response()
+
+    monkeypatch.setattr(harvest.requests, "get", fake_get)
+    monkeypatch.setattr(harvest, "LIMITER", script("ratelimit").RateLimiter(1 / INTERVAL))
+    threads = [threading.Thread(target=lambda: [harvest.get_json("u") for _ in range(5)])
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    gaps = [b - a for a, b in zip(sent, sent[1:])]
+    assert len(sent) == 20
+    assert min(gaps) >= INTERVAL * 0.9
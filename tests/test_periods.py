@@ -0,0 +1,66 @@
+"""
+Claves de periodo y precisión de issued_date (periods.py), y el
+recálculo de 02 sobre briefs cargados con claves ancladas al día 1.
+"""
+
+from datetime import date
+
+import pytest
+
+from conftest import script
+
+periods = script("periods")
+
+def test_full_date_has_every_key():
+    _, year, quarter, yq, keys = periods.parse_issued_date("2025-03-14")
+    assert (year, quarter, yq) == (2025, 1, "2025Q1")
+    assert keys == periods.period_keys(date(2025, 3, 14))
+    assert periods.date_precision("2025-03-14T00:00:00Z") == "day"
+
+def test_year_month_leaves_day_and_week_null():
+    _, year, quarter, yq, keys = periods.parse_issued_date("2025-03")
+    assert (year, quarter, yq) == (2025, 1, "2025Q1")
+    assert keys["day"] is None and keys["week"] is None
+    assert periods.period_label("month", keys["month"]) == "2025-03"
+    assert periods.period_label("quarter", keys["quarter"]) == "2025Q1"
+    assert periods.date_precision("2025-03") == "month"
+
+def test_year_only_keeps_just_the_year():
+    _, year, quarter, yq, keys = periods.parse_issued_date("2025")
+    assert (year, quarter, yq) == (2025, None, None)
+    assert keys == {"day": None, "week": None, "month": None, "quarter": None, "year": 2025}
+    assert periods.date_precision("2025") == "year"
+
+@pytest.mark.parametrize("value", [None, "", "s.f.", 2025])
+def test_unparseable_dates(value):
+    assert periods.parse_issued_date(value)[1:] == (None, None, None, {})
+    assert periods.date_precision(value) is None
+
+@pytest.mark.parametrize("granularity, label", [
+    ("day", "2024-12-30"), ("week", "2025-W01"), ("month", "2024-12"),
+    ("quarter", "2024Q4"), ("year", "2024"),
+])
+def test_labels(granularity, label):
+    key = periods.period_keys(date(2024, 12, 30))[granularity]
+    assert periods.period_label(granularity, key) == label
+    assert periods.is_period_label(label)
+
+def test_backfill_clears_keys_anchored_to_day_one(db):
+    load = script("02_load_sqlite")
+    anchored = periods.period_keys(date(2025, 1, 1))
+    for bid, issued in [("a", "2025"), ("b", "2025-03"), ("c", "2025-03-14")]:
+        db.execute("""
+            INSERT INTO briefs (brief_id, issued_date, year, quarter, year_quarter,
+                                period_day, period_week, period_month, period_quarter)
+            VALUES (?, ?, 2025, 1, '2025Q1', ?, ?, ?, ?)
+        """, (bid, issued, anchored["day"], anchored["week"],
+              anchored["month"], anchored["quarter"]))
+    load.backfill_periods(db)
+    rows = {r[0]: r[1:] for r in db.execute("""
+        SELECT brief_id, date_precision, quarter, period_day, period_week, period_month
+        FROM briefs
+    """)}
+    assert rows["a"] == ("year", None, None, None, None)
+    march = periods.period_keys(date(2025, 3, 14))
+    assert rows["b"] == ("month", 1, None, None, march["month"])
+    assert rows["c"] == ("day", 1, march["day"], march["week"], march["month"])
@@ -0,0 +1,62 @@
+"""
+Perfil de completitud que 02 mantiene al cargar: tras cargas y
+recargas parciales debe coincidir con quality.profile() sobre la última
+versión de cada brief.
+"""
+
+import pandas as pd
+
+from conftest import script
+
+quality = script("quality")
+loader  = script("02_load_sqlite")
+
+def staging(rows):
+    return pd.DataFrame(rows, columns=["brief_id", "title", "issued_date", "abstract",
+                                       "series_raw", "dcterms_subject", "cg_coverage_country",
+                                       "cg_subject_sdg"])
+
+FIRST = staging([
+    ("10568/1", "A", "2024-02-01", "texto", "Serie X", "maize | rice", "Kenya", ""),
+    ("10568/2", "B", "2024-05-10", "", "Serie X", "", "", "SDG 2"),
+    ("10568/3", "C", "2025-01-03", "otro", "", " | ", "Peru", ""),
+])
+# 10568/2 cambia de año, serie y campos; 10568/4 es nuevo
+SECOND = staging([
+    ("10568/2", "B", "2025-07-01", "ahora sí", "Serie Y", "water", "", ""),
+    ("10568/4", "D", "2025", "", "Serie Y", "", "Ghana", "SDG 5"),
+])
+
+def expected(*frames):
+    df = pd.concat(frames, ignore_index=True).drop_duplicates("brief_id", keep="last")
+    rows = []
+    for _, row in df.iterrows():
+        _, year, _, year_quarter, _ = script("periods").parse_issued_date(row["issued_date"])
+        rows.append({**row, "year": year, "year_quarter": year_quarter, "item_type": "brief"})
+    return as_dict(quality.profile(pd.DataFrame(rows)))
+
+def stored(conn):
+    return as_dict(pd.read_sql_query("SELECT * FROM quality_stats", conn))
+
+def as_dict(stats):
+    """{(scope, key, field): (n_briefs, n_present)}"""
+    return {(s, str(k), f): (int(n), int(p)) for s, k, f, n, p
+            in stats[["scope", "key", "field", "n_briefs", "n_present"]].itertuples(index=False)}
+
+def test_profile_after_first_load(db):
+    loader.load(db, FIRST)
+    assert stored(db) == expected(FIRST)
+
+def test_reload_retracts_previous_contribution(db):
+    loader.load(db, FIRST)
+    loader.load(db, SECOND)
+    assert stored(db) == expected(FIRST, SECOND)
+    # 10568/2 se fue de 2024Q2 (quedó vacío) y de la serie X
+    assert ("quarter", "2024Q2", "title") not in stored(db)
+    assert stored(db)["series", "Serie X", "title"] == (1, 1)
+
+def test_row_flags_match_presence():
+    _, flags = quality.presence(FIRST)
+    for (_, row), (_, marks) in zip(FIRST.iterrows(), flags.iterrows()):
+        bits = quality.row_flags(row)
+        assert {f for f, b in quality.FIELD_BITS.items() if bits & b} == set(marks[marks].index)
@@ -0,0 +1,56 @@
+"""
+Caché de reports.py: un resultado se reutiliza mientras la base no
+cambie y se invalida con cualquier commit (data_version), también en
+modo WAL, donde el encabezado del archivo no se actualiza hasta el
+checkpoint.
+"""
+
+import sqlite3
+
+import pytest
+
+from conftest import script
+
+reports = script("reports")
+
+JOBS = [("briefs_by_quarter", {})]
+
+@pytest.fixture(params=["delete", "wal"])
+def base(workdir, request):
+    path = workdir / "briefs.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA journal_mode = {request.param}")
+    conn.executescript(script("02_load_sqlite").SCHEMA)
+    add_brief(conn, "10568/1", 2025 * 4)
+    yield path, conn
+    conn.close()
+
+def add_brief(conn, brief_id, quarter_key):
+    conn.execute("INSERT INTO briefs (brief_id, year_quarter, period_quarter) VALUES (?, ?, ?)",
+                 (brief_id, f"{quarter_key // 4}Q{quarter_key % 4 + 1}", quarter_key))
+    conn.commit()
+
+def run(path):
+    (_, _, df, cached), = reports.run_reports(JOBS, path=path, workers=1)
+    return df, cached
+
+def test_unchanged_base_hits_cache(base):
+    path, _ = base
+    first, cached = run(path)
+    assert not cached
+    again, cached = run(path)
+    assert cached
+    assert again.equals(first)
+
+def test_commit_invalidates_cache(base):
+    path, conn = base
+    before = reports.data_version(path)
+    run(path)
+    add_brief(conn, "10568/2", 2025 * 4 + 1)
+    assert reports.data_version(path) != before
+
+    df, cached = run(path)
+    assert not cached
+    assert df["year_quarter"].tolist() == ["2025Q1", "2025Q2"]
+    # solo queda el directorio de la versión actual
+    assert len(list(reports.CACHE_DIR.glob("*/"))) == 1
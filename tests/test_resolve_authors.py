@@ -0,0 +1,37 @@
+import pytest
+
+from conftest import script
+
+ra = script("07_resolve_authors")
+
+@pytest.mark.parametrize("a, b", [
+    ("Smith, J.",    "Smith, John"),
+    ("Gonzalez, M.", "Gonzalez, Maria"),
+    ("Müller, K. P.", "Muller, Klaus Peter"),
+])
+def test_initial_matches_full_given_name(a, b):
+    sa, ga = ra.parse_name(a)
+    sb, gb = ra.parse_name(b)
+    assert ra.given_compatible(ga, gb)
+    assert ra.name_score(sa, ga, sb, gb) >= ra.MATCH_THRESHOLD
+
+def test_different_given_names_are_incompatible():
+    _, ga = ra.parse_name("Smith, John")
+    _, gb = ra.parse_name("Smith, James")
+    assert not ra.given_compatible(ga, gb)
+
+def add_authors(db, names):
+    db.executemany("INSERT INTO authors (author_name_raw) VALUES (?)", [(n,) for n in names])
+    return {n: aid for aid, n in db.execute("SELECT author_id, author_name_raw FROM authors")}
+
+def test_resolve_merges_initial_variants_without_context(db):
+    ids = add_authors(db, ["Smith, J.", "Smith, John", "Gonzalez, M.", "Gonzalez, Maria"])
+    clusters = ra.resolve_authors(db)
+    assert clusters[ids["Smith, J."]] == clusters[ids["Smith, John"]]
+    assert clusters[ids["Gonzalez, M."]] == clusters[ids["Gonzalez, Maria"]]
+    assert clusters[ids["Smith, J."]] != clusters[ids["Gonzalez, M."]]
+
+def test_initial_does_not_bridge_two_full_names(db):
+    ids = add_authors(db, ["Smith, John", "Smith, J.", "Smith, James"])
+    clusters = ra.resolve_authors(db)
+    assert clusters[ids["Smith, John"]] != clusters[ids["Smith, James"]]
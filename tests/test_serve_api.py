@@ -0,0 +1,41 @@
+"""
+serve_api.py: la API no cambia el journal de la base salvo con --wal,
+y la caché de artefactos respeta su tope de bytes.
+"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from conftest import script
+
+api = script("serve_api")
+
+def journal(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_journal_mode_only_switches_on_request(workdir):
+    path = workdir / "briefs.sqlite"
+    sqlite3.connect(path).close()
+    assert api.journal_mode(path) == "delete"
+    assert journal(path) == "delete"
+    assert api.journal_mode(path, switch=True) == "wal"
+    assert journal(path) == "wal"
+
+def test_frames_bounded_by_bytes():
+    frame  = pd.DataFrame({"n": np.zeros(1000, dtype=np.int64)})
+    size   = api.frame_bytes(frame)
+    frames = api.LRU(10, 2.5 * size, api.frame_bytes)
+    for i in range(4):
+        frames.put(i, frame)
+    assert frames.stats()["entries"] == 2
+    assert frames.stats()["bytes"] == 2 * size
+    assert frames.get(0) is None and frames.get(3) is frame
+    # un artefacto que solo no cabe no se guarda
+    frames.put("grande", pd.concat([frame] * 3))
+    assert frames.get("grande") is None
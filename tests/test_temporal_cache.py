@@ -0,0 +1,75 @@
+import sqlite3
+import sys
+
+import pytest
+
+from conftest import script
+
+ta = script("05_temporal_analysis")
+
+KEYWORDS = ["climate", "gender", "soil"]
+
+@pytest.fixture
+def loaded(db):
+    """Seis briefs en dos trimestres con keywords."""
+    db.executemany("INSERT INTO keywords (keyword_raw, keyword_norm) VALUES (?, ?)",
+                   [(k, k) for k in KEYWORDS])
+    kid = dict(db.execute("SELECT keyword_norm, keyword_id FROM keywords"))
+    for n in range(6):
+        q = 8100 + n % 2                       # 2025Q1 / 2025Q2
+        db.execute("INSERT INTO briefs (brief_id, title, period_quarter) VALUES (?, ?, ?)",
+                   (f"10568/{n}", f"t{n}", q))
+    links = [(0, "climate"), (0, "gender"), (1, "climate"), (2, "soil"),
+             (3, "gender"), (4, "climate"), (5, "soil")]
+    db.executemany("INSERT INTO brief_keywords (brief_id, keyword_id) VALUES (?, ?)",
+                   [(f"10568/{n}", kid[k]) for n, k in links])
+    db.commit()
+    return db
+
+def fingerprints(db):
+    return ta.period_fingerprints(db, ta.DIMENSIONS["keywords"])
+
+def test_relabel_invalidates_periods_with_the_item(loaded):
+    before = fingerprints(loaded)
+    loaded.execute("UPDATE keywords SET keyword_norm = 'climate change' WHERE keyword_norm = 'climate'")
+    after = fingerprints(loaded)
+    assert before.keys() == after.keys()
+    assert all(before[p] != after[p] for p in before)   # climate está en ambos
+
+    loaded.execute("UPDATE keywords SET keyword_norm = 'gender equality' WHERE keyword_norm = 'gender'")
+    again = fingerprints(loaded)
+    assert again["8100"] != after["8100"]               # brief 0 (Q1) tiene gender
+    assert again["8101"] != after["8101"]               # brief 3 (Q2) también
+
+def test_moving_a_link_within_a_period_invalidates_it(loaded):
+    before = fingerprints(loaded)
+    # soil pasa del brief 2 al brief 0: mismos conteos y mismas sumas de ids
+    loaded.execute("""UPDATE brief_keywords SET brief_id = '10568/0'
+                      WHERE brief_id = '10568/2'""")
+    after = fingerprints(loaded)
+    assert after["8100"] != before["8100"]
+    assert after["8101"] == before["8101"]
+
+def test_incremental_results_pick_up_new_labels(loaded, workdir):
+    m, _ = ta.incremental_results(loaded, "keywords")
+    assert set(m.items) == set(KEYWORDS)
+
+    loaded.execute("UPDATE keywords SET keyword_norm = 'soil health' WHERE keyword_norm = 'soil'")
+    m, _ = ta.incremental_results(loaded, "keywords")
+    assert set(m.items) == {"climate", "gender", "soil health"}
+    assert m.counts.sum() == 7
+
+def test_type_without_rows_writes_nothing(loaded, workdir, monkeypatch):
+    path = workdir / "briefs.sqlite"
+    disk = sqlite3.connect(path)
+    loaded.backup(disk)
+    disk.close()
+    monkeypatch.setattr(ta, "DB_PATH", path)
+    monkeypatch.setattr(sys, "argv", ["05", "--dimensions", "keywords",
+                                      "--types", "report", "--workers", "1"])
+    ta.main()
+    assert not (workdir / "data" / "artifacts").exists()
+    assert not list(workdir.glob("outputs/**/*.csv"))
+
+def test_empty_base_has_no_results(db, workdir):
+    assert ta.incremental_results(db, "keywords") == (None, None)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from scipy.special import erfc
+
+from conftest import script
+
+ta = script("05_temporal_analysis")
+
+def mann_kendall_naive(y):
+    T = len(y)
+    S = sum(np.sign(y[b] - y[a]) for a in range(T) for b in range(a + 1, T))
+    _, t = np.unique(y, return_counts=True)
+    var = (T * (T - 1) * (2 * T + 5) - (t * (t - 1) * (2 * t + 5)).sum()) / 18
+    z = (S - np.sign(S)) / np.sqrt(var) if var > 0 else 0.0
+    return S / (T * (T - 1) / 2), erfc(abs(z) / np.sqrt(2))
+
+def test_mann_kendall_known_series():
+    Y = np.array([np.arange(10), np.arange(10)[::-1], np.full(10, 3)], dtype=np.float32)
+    tau, p = ta.mann_kendall(Y)
+    assert tau[0] == pytest.approx(1.0) and p[0] < 0.001
+    assert tau[1] == pytest.approx(-1.0) and p[1] < 0.001
+    assert tau[2] == 0 and p[2] == pytest.approx(1.0)
+
+@pytest.mark.parametrize("lam, T", [(0.3, 200), (2, 30), (40, 12)])
+def test_mann_kendall_matches_pairwise_definition(lam, T):
+    # lam chico: camino por valores; lam grande con T chico: por desfases
+    Y = np.random.default_rng(7).poisson(lam, (25, T)).astype(np.float32)
+    tau, p = ta.mann_kendall(Y)
+    ref = np.array([mann_kendall_naive(y) for y in Y])
+    np.testing.assert_allclose(tau, ref[:, 0])
+    np.testing.assert_allclose(p, ref[:, 1])
+
+def test_mann_kendall_memory_is_linear_in_periods():
+    # 2557 días: la versión T × T pedía ~20 GiB para 790 filas
+    Y = np.random.default_rng(1).poisson(0.3, (200, 2557)).astype(np.float32)
+    tau, p = ta.mann_kendall(Y)
+    assert tau.shape == p.shape == (200,)
+
+def test_kleinberg_detects_burst():
+    T = 24
+    d = np.full(T, 200.0)
+    flat  = np.full(T, 10.0)
+    burst = flat.copy()
+    burst[10:14] = 60
+    weight, n_burst, active = ta.kleinberg_bursts(np.vstack([flat, burst]), d)
+    assert n_burst[0] == 0 and weight[0] == 0
+    assert n_burst[1] == 4 and weight[1] > 0
+    assert not active[1]
+
+def test_kleinberg_burst_active_at_end():
+    T = 20
+    d = np.full(T, 200.0)
+    r = np.full(T, 10.0)
+    r[-3:] = 60
+    _, n_burst, active = ta.kleinberg_bursts(r[None, :], d)
+    assert n_burst[0] == 3 and active[0]